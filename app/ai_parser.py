@@ -7,13 +7,18 @@ It ONLY parses user intent and outputs JSON instructions.
 LLM OUTPUT SAFETY: All LLM output access uses safe_get() - never dot access.
 """
 
+import functools
 import json
 import re
-from typing import Union
-from groq import Groq
+from typing import Optional, Union
 from app.config import settings
+from app.llm_clients import get_llm_clients
+from app.llm_cache import cached_completion, store_completion
+from app.llm_health import call_with_breaker, call_with_breaker_async
+from app.llm_hedging import hedged_call, hedged_call_async
 from app.models import ParsedIntent
 from app.llm_output_handler import safe_get, safe_get_nested
+from app.normalized_prompt import NormalizedPrompt, get_normalized_prompt
 RE_NUMERIC_ONLY = re.compile(r'^\d+$')
 RE_NUMERIC_WITH_UNIT = re.compile(r'^\d+\s*(mb|kb)?$', re.IGNORECASE)
 RE_SHORTHAND_ROT = re.compile(r'\brot\b', re.IGNORECASE)
@@ -460,30 +465,34 @@ def normalize_human_input(user_prompt: str, last_question: str = "") -> str:
     Returns:
         Normalized prompt ready for LLM
     """
-    import re
-    p = user_prompt.strip().lower()
-    
-    typo_map = {
-        'rotet': 'rotate',
-        'roate': 'rotate',
-        'rotae': 'rotate',
-        'rotate teh': 'rotate the',
-        'teh ': 'the ',
-        'degres': 'degrees',
-        'splti': 'split',
-        'compres': 'compress',
-        'comress': 'compress',
-        'mergee': 'merge',
-        'wattermark': 'watermark',
-        'watermak': 'watermark',
-        'orc': 'ocr',
-        'exract': 'extract',
-        'extrat': 'extract',
-    }
-    for typo, correct in typo_map.items():
-      if typo.isalpha():
-        p = re.sub(rf"\b{re.escape(typo)}\b", correct, p)
-      else:
+    normalized = get_normalized_prompt(user_prompt)
+    return normalized.view(("human_input", last_question), lambda: _normalize_human_input(normalized, last_question))
+
+
+# Operation-word typos fixed before the prompt goes to the LLM. Deliberately narrower than
+# the resolvers' maps: entries like "dog", "spill", "imag" or "adn" are real words
+# (or fragments) in watermark text and filenames, and the LLM reads the user's own text.
+_LLM_TYPO_FIXES = {
+    'rotet': 'rotate',
+    'roate': 'rotate',
+    'rotae': 'rotate',
+    'degres': 'degrees',
+    'splti': 'split',
+    'compres': 'compress',
+    'comress': 'compress',
+    'mergee': 'merge',
+    'wattermark': 'watermark',
+    'watermak': 'watermark',
+    'orc': 'ocr',
+    'exract': 'extract',
+    'extrat': 'extract',
+}
+_LLM_TYPO_RE = re.compile(r'\b(' + '|'.join(map(re.escape, _LLM_TYPO_FIXES)) + r')\b')
+
+
+def _normalize_human_input(normalized: NormalizedPrompt, last_question: str) -> str:
+    p = _LLM_TYPO_RE.sub(lambda m: _LLM_TYPO_FIXES[m.group(1)], normalized.text)
+    for typo, correct in (('rotate teh', 'rotate the'), ('teh ', 'the ')):
         p = p.replace(typo, correct)
     
     shorthand_map = {
@@ -558,37 +567,167 @@ class AIParser:
             if not api_key or api_key == "test-key-configure-in-env":
                 print("[AI Parser] WARNING: Groq API key not configured")
                 return
-            self.client = Groq(api_key=api_key)
+            self.client = get_llm_clients().groq(api_key)
         except Exception as e:
             print(f"[AI Parser] ERROR initializing Groq client: {e}")
             self.client = None
     
-    def _call_model(self, model: str, user_message: str) -> dict:
-        """Call a specific model and return parsed JSON response"""
+    def _messages(self, user_message: str) -> list[dict]:
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": user_message}
+        ]
+
+    def _ensure_client(self) -> None:
         if not self.client:
             # Try to reinitialize client
             self._init_client()
             if not self.client:
                 raise RuntimeError("LLM client not available. Please configure GROQ_API_KEY.")
-        
-        response = self.client.chat.completions.create(
+
+    @staticmethod
+    def _decode(model: str, response) -> tuple[str, str, dict]:
+        """(model, raw JSON, parsed JSON) of a completion."""
+        raw_json = response.choices[0].message.content
+        print(f"[AI:{model}] Response: {raw_json}")
+        return model, raw_json, json.loads(raw_json)
+
+    def _cached_parse(self, user_message: str) -> Optional[dict]:
+        """A stored validated answer for this exact request, in model order (no model call)."""
+        for model in self._models():
+            raw_json = cached_completion(f"groq:{model}", self._messages(user_message), 0.1, True, 500)
+            if raw_json:
+                print(f"[AI:{model}] Cache hit: {raw_json}")
+                return json.loads(raw_json)
+        return None
+
+    def _validated(self, user_message: str, answer: tuple[str, str, dict]) -> Union[ParsedIntent, list[ParsedIntent]]:
+        """Intent(s) from a model answer; the answer is cached only once it validated."""
+        model, raw_json, parsed_json = answer
+        intent = self._intent_from_json(parsed_json)  # Raises for clarifications and invalid intents
+        store_completion(f"groq:{model}", self._messages(user_message), 0.1, True, 500, raw_json)
+        return intent
+    
+    def _call_model(self, model: str, user_message: str) -> tuple[str, str, dict]:
+        """Call a specific model and return (model, raw JSON, parsed JSON)"""
+        self._ensure_client()
+        response = call_with_breaker(f"groq:{model}", lambda: self.client.chat.completions.create(
             model=model,
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": user_message}
-            ],
+            messages=self._messages(user_message),
             temperature=0.1,
             max_tokens=500,
             response_format={"type": "json_object"}
-        )
-        raw_json = response.choices[0].message.content
-        print(f"[AI:{model}] Response: {raw_json}")
-        return json.loads(raw_json)
-    
+        ))
+        return self._decode(model, response)
+
+    async def _call_model_async(self, model: str, user_message: str) -> tuple[str, str, dict]:
+        """_call_model on the pooled AsyncGroq client"""
+        self._ensure_client()
+        client = get_llm_clients().async_groq(settings.groq_api_key)
+        response = await call_with_breaker_async(f"groq:{model}", lambda: client.chat.completions.create(
+            model=model,
+            messages=self._messages(user_message),
+            temperature=0.1,
+            max_tokens=500,
+            response_format={"type": "json_object"}
+        ))
+        return self._decode(model, response)
+
+    def _models(self) -> list[str]:
+        """Primary first, then the fallback when it is a different model."""
+        if self.fallback_model != self.primary_model:
+            return [self.primary_model, self.fallback_model]
+        return [self.primary_model]
+
+    @staticmethod
+    def _is_confident(answer: tuple[str, str, dict]) -> bool:
+        # An answer asking for clarification lets the other model try; it is used only if that fails too
+        return not safe_get(answer[2], "needs_clarification")
+
+    @staticmethod
+    def _user_message(user_prompt: str, file_names: list[str], last_question: str) -> str:
+        normalized_prompt = normalize_human_input(user_prompt, last_question)
+        print(f"[AI] Normalized input: '{user_prompt}' → '{normalized_prompt}'")
+        
+        return f"""
+Prompt: "{normalized_prompt}"
+Files: {json.dumps(file_names)}
+
+Parse this into JSON:"""
+
+    @staticmethod
+    def _parse_failure(e: Exception) -> Exception:
+        """The ValueError parse_intent raises for an exception from the LLM/validation steps."""
+        if isinstance(e, json.JSONDecodeError):
+            print(f"[ERR] JSON decode error: {e}")
+            return ValueError(f"LLM returned invalid JSON: {e}")
+        if isinstance(e, ValueError):
+            if "CLARIFICATION_NEEDED" in str(e):
+                return e
+            print(f"[ERR] Validation error: {e}")
+            return ValueError(f"Failed to validate intent: {e}")
+        print(f"[ERR] Parse error: {type(e).__name__}: {e}")
+        return ValueError(f"Failed to parse intent: {e}")
+
+    @staticmethod
+    def _intent_from_json(parsed_json: dict) -> Union[ParsedIntent, list[ParsedIntent]]:
+        """Validate the model's JSON into intent(s), raising CLARIFICATION_NEEDED when it asked a question."""
+        def _sanitize_rotate_pages(obj: dict) -> None:
+            """Normalize common LLM outputs for rotate.pages.
+
+            Schema expects pages: Optional[List[int]]. LLM sometimes returns
+            strings like "all"/"all pages"; treat those as None (= all pages).
+            """
+            try:
+                if safe_get(obj, "operation_type") != "rotate":
+                    return
+                rotate = safe_get(obj, "rotate")
+                if not isinstance(rotate, dict):
+                    return
+                pages = safe_get(rotate, "pages")
+                if isinstance(pages, str):
+                    p = pages.strip().lower()
+                    if p in {"all", "all pages", "every", "every page", "entire"}:
+                        rotate["pages"] = None
+            except Exception:
+                return
+        
+        if safe_get(parsed_json, "needs_clarification"):
+            question = safe_get(parsed_json, "question", "Could you please clarify your request?")
+            suggested_format = safe_get(parsed_json, "suggested_format", "")
+            options = safe_get(parsed_json, "options", [])
+            
+            clarification_msg = f"{question}\n\n{suggested_format}" if suggested_format else question
+            
+            if options:
+                options_str = json.dumps(options)
+                raise ValueError(f"CLARIFICATION_NEEDED: {clarification_msg} | OPTIONS: {options_str}")
+            
+            raise ValueError(f"CLARIFICATION_NEEDED: {clarification_msg}")
+
+        if safe_get(parsed_json, "is_multi_operation") and isinstance(safe_get(parsed_json, "operations"), list):
+          intents: list[ParsedIntent] = []
+          for op in parsed_json["operations"]:
+            if isinstance(op, dict):
+              _sanitize_rotate_pages(op)
+            intents.append(ParsedIntent(**op))
+          return intents
+
+        if isinstance(parsed_json, dict):
+          _sanitize_rotate_pages(parsed_json)
+        
+        intent = ParsedIntent(**parsed_json)
+        
+        return intent
+
     def parse_intent(self, user_prompt: str, file_names: list[str], last_question: str = "") -> Union[ParsedIntent, list[ParsedIntent]]:
         """
         Convert natural language prompt + file list into structured intent.
         Uses dual-model approach: fast primary model, fallback to capable model if needed.
+        The fallback is hedged: it also starts when the primary runs slower than
+        its recent latency percentile, and the first confident answer wins.
+        A confident answer stored for the same request (LLM response cache) is
+        returned without calling either model.
         
         Args:
             user_prompt: User's natural language instruction
@@ -601,94 +740,37 @@ class AIParser:
         Raises:
             ValueError: If intent cannot be parsed or needs clarification (message contains the question)
         """
-        normalized_prompt = normalize_human_input(user_prompt, last_question)
-        print(f"[AI] Normalized input: '{user_prompt}' → '{normalized_prompt}'")
+        user_message = self._user_message(user_prompt, file_names, last_question)
         
-        user_message = f"""
-Prompt: "{normalized_prompt}"
-Files: {json.dumps(file_names)}
+        try:
+            parsed_json = self._cached_parse(user_message)
+            if parsed_json is not None:
+                return self._intent_from_json(parsed_json)
+            attempts = [
+                (f"groq:{model}", functools.partial(self._call_model, model, user_message))
+                for model in self._models()
+            ]
+            return self._validated(user_message, hedged_call(attempts, is_valid=self._is_confident))
+            
+        except Exception as e:
+            raise self._parse_failure(e)
 
-Parse this into JSON:"""
+    async def parse_intent_async(self, user_prompt: str, file_names: list[str], last_question: str = "") -> Union[ParsedIntent, list[ParsedIntent]]:
+        """parse_intent for async handlers: same models, fallback and errors, without blocking the event loop."""
+        user_message = self._user_message(user_prompt, file_names, last_question)
         
         try:
-            try:
-                parsed_json = self._call_model(self.primary_model, user_message)
-            except Exception as primary_error:
-                if self.fallback_model != self.primary_model:
-                    print(f"[AI] Primary model error: {primary_error}, trying fallback: {self.fallback_model}")
-                    parsed_json = self._call_model(self.fallback_model, user_message)
-                else:
-                    raise
-            
-            if safe_get(parsed_json, "needs_clarification") and self.fallback_model != self.primary_model:
-                print(f"[AI] Primary model uncertain, trying fallback: {self.fallback_model}")
-                try:
-                    fallback_json = self._call_model(self.fallback_model, user_message)
-                    if not safe_get(fallback_json, "needs_clarification"):
-                        print(f"[AI] Fallback model succeeded")
-                        parsed_json = fallback_json
-                except Exception as e:
-                    print(f"[AI] Fallback model failed: {e}, using primary result")
-
-            def _sanitize_rotate_pages(obj: dict) -> None:
-                """Normalize common LLM outputs for rotate.pages.
-
-                Schema expects pages: Optional[List[int]]. LLM sometimes returns
-                strings like "all"/"all pages"; treat those as None (= all pages).
-                """
-                try:
-                    if safe_get(obj, "operation_type") != "rotate":
-                        return
-                    rotate = safe_get(obj, "rotate")
-                    if not isinstance(rotate, dict):
-                        return
-                    pages = safe_get(rotate, "pages")
-                    if isinstance(pages, str):
-                        p = pages.strip().lower()
-                        if p in {"all", "all pages", "every", "every page", "entire"}:
-                            rotate["pages"] = None
-                except Exception:
-                    return
-            
-            if safe_get(parsed_json, "needs_clarification"):
-                question = safe_get(parsed_json, "question", "Could you please clarify your request?")
-                suggested_format = safe_get(parsed_json, "suggested_format", "")
-                options = safe_get(parsed_json, "options", [])
-                
-                clarification_msg = f"{question}\n\n{suggested_format}" if suggested_format else question
-                
-                if options:
-                    options_str = json.dumps(options)
-                    raise ValueError(f"CLARIFICATION_NEEDED: {clarification_msg} | OPTIONS: {options_str}")
-                
-                raise ValueError(f"CLARIFICATION_NEEDED: {clarification_msg}")
-
-            if safe_get(parsed_json, "is_multi_operation") and isinstance(safe_get(parsed_json, "operations"), list):
-              intents: list[ParsedIntent] = []
-              for op in parsed_json["operations"]:
-                if isinstance(op, dict):
-                  _sanitize_rotate_pages(op)
-                intents.append(ParsedIntent(**op))
-              return intents
-
-            if isinstance(parsed_json, dict):
-              _sanitize_rotate_pages(parsed_json)
-            
-            intent = ParsedIntent(**parsed_json)
-            
-            return intent
+            parsed_json = self._cached_parse(user_message)
+            if parsed_json is not None:
+                return self._intent_from_json(parsed_json)
+            attempts = [
+                (f"groq:{model}", functools.partial(self._call_model_async, model, user_message))
+                for model in self._models()
+            ]
+            return self._validated(user_message, await hedged_call_async(attempts, is_valid=self._is_confident))
             
-        except json.JSONDecodeError as e:
-            print(f"[ERR] JSON decode error: {e}")
-            raise ValueError(f"LLM returned invalid JSON: {e}")
-        except ValueError as e:
-            if "CLARIFICATION_NEEDED" in str(e):
-                raise
-            print(f"[ERR] Validation error: {e}")
-            raise ValueError(f"Failed to validate intent: {e}")
         except Exception as e:
-            print(f"[ERR] Parse error: {type(e).__name__}: {e}")
-            raise ValueError(f"Failed to parse intent: {e}")
+            raise self._parse_failure(e)
 
 
 ai_parser = AIParser()
@@ -0,0 +1,107 @@
+"""
+Blocking Executor - Bounded thread pools for blocking work inside async handlers.
+
+Problem: /api/analyze (an async handler) extracted PDF text with PyMuPDF and
+called the synchronous LLM wrapper inline, and /process ran clarify_intent
+(which can fall through to an LLM call) the same way. While that ran, the
+event loop of the uvicorn worker was stuck: status polls, SSE heartbeats and
+every other request waited behind one slow Groq response.
+
+Solution: `await run_blocking(func, *args)` runs func on a small, dedicated
+thread pool and suspends only the calling handler. The pool is bounded
+(Settings.blocking_executor_workers), so a burst of analyze requests queues
+here instead of spawning unbounded threads or starving the default executor
+that Starlette uses for sync endpoints.
+
+The file operations of /process (compress, OCR, merges: seconds to minutes
+each) go through `await run_file_operation(func, *args)` instead, a second
+pool sized by Settings.file_operation_workers. Short work (upload hashing,
+clarify/LLM calls, analyze text) therefore never queues behind a handful of
+long Ghostscript runs.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Any, Callable, Optional
+
+
+class _BoundedPool:
+    """Lazily built ThreadPoolExecutor plus submitted/running counters."""
+
+    def __init__(self, setting: str, default_workers: int, thread_name_prefix: str):
+        self.setting = setting
+        self.default_workers = default_workers
+        self.thread_name_prefix = thread_name_prefix
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.stats = {"submitted": 0, "running": 0}
+        self.lock = Lock()
+
+    def get_executor(self) -> ThreadPoolExecutor:
+        if self.executor is not None:
+            return self.executor
+        with self.lock:
+            if self.executor is None:
+                from app.config import settings
+                workers = max(1, int(getattr(settings, self.setting, self.default_workers) or 1))
+                self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=self.thread_name_prefix)
+        return self.executor
+
+    def _run_counted(self, func: Callable, *args, **kwargs) -> Any:
+        with self.lock:
+            self.stats["running"] += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self.lock:
+                self.stats["running"] -= 1
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            self.stats["submitted"] += 1
+        call = functools.partial(self._run_counted, func, *args, **kwargs)
+        return await loop.run_in_executor(self.get_executor(), call)
+
+    def shutdown(self) -> None:
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {
+                **self.stats,
+                "workers": self.executor._max_workers if self.executor is not None else 0,
+            }
+
+
+_BLOCKING = _BoundedPool("blocking_executor_workers", 4, "blocking")
+_FILE_OPERATIONS = _BoundedPool("file_operation_workers", 2, "file-op")
+
+
+def get_blocking_executor() -> ThreadPoolExecutor:
+    """Shared executor for short blocking work, built from Settings."""
+    return _BLOCKING.get_executor()
+
+
+async def run_blocking(func: Callable, *args, **kwargs) -> Any:
+    """Run func(*args, **kwargs) on the bounded executor without blocking the event loop."""
+    return await _BLOCKING.run(func, *args, **kwargs)
+
+
+async def run_file_operation(func: Callable, *args, **kwargs) -> Any:
+    """run_blocking for long file operations, on their own bounded executor."""
+    return await _FILE_OPERATIONS.run(func, *args, **kwargs)
+
+
+def shutdown_blocking_executor() -> None:
+    """Stop both executors (called from the app shutdown hook)."""
+    _BLOCKING.shutdown()
+    _FILE_OPERATIONS.shutdown()
+
+
+def get_blocking_stats() -> dict:
+    return {**_BLOCKING.get_stats(), "file_operations": _FILE_OPERATIONS.get_stats()}
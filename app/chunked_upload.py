@@ -0,0 +1,293 @@
+"""
+Chunked Uploads - Resumable uploads with on-the-fly hashing.
+
+Problem: save_uploaded_files receives the whole multipart body, then copies it
+into uploads/. A mobile connection dropping at 70MB of an 80MB PDF means
+starting over, and the file is read again later just to hash it.
+
+Solution: a three-step protocol feeding the /preupload flow:
+- init: declare filename + size, get a file_id (grouped under an upload_id)
+- put chunk at offset: bytes are appended to a .part file while a SHA-256 is
+  updated incrementally. A chunk only counts once fully written; a dropped
+  chunk is truncated away, so the client resumes from the last acknowledged
+  offset (GET the session to learn it)
+- finalize: size and optional client digest are checked, the file moves into
+  the content-addressed upload store (app/upload_store.py) - a duplicate
+  costs no copy - and the upload_id works with /submit-with-upload
+
+Each chunk is capped at upload_chunk_mb (the chunk_size init hands out) and
+the running total at the size declared at init, which is itself capped at
+max_file_size_mb. Stream data is collected into batches of up to
+_WRITE_BATCH_BYTES and each batch is written and hashed on the blocking pool
+(app/blocking.py), so a fast upload never stalls the event loop on disk I/O.
+"""
+
+import asyncio
+import os
+import time
+import uuid
+import hashlib
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import AsyncIterable, Iterable, Optional
+
+from app.blocking import run_blocking
+from app.upload_store import UploadStore, get_upload_store
+
+
+_WRITE_BATCH_BYTES = 1024 * 1024
+
+
+class ChunkedUploadError(Exception):
+    """Protocol violation; carries the HTTP status and the acknowledged offset when relevant."""
+
+    def __init__(self, status_code: int, detail: str, offset: Optional[int] = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.offset = offset
+
+
+@dataclass
+class UploadSession:
+    """One file being uploaded in chunks."""
+    file_id: str
+    upload_id: str
+    filename: str
+    size: int
+    part_path: str
+    offset: int = 0
+    hasher: "hashlib._Hash" = field(default_factory=hashlib.sha256)
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    busy: bool = False
+
+    def to_dict(self) -> dict:
+        return {
+            "upload_id": self.upload_id,
+            "file_id": self.file_id,
+            "filename": self.filename,
+            "size": self.size,
+            "offset": self.offset,
+            "complete": self.offset == self.size,
+        }
+
+
+def _write_and_hash(f, hasher, data: bytes) -> None:
+    f.write(data)
+    hasher.update(data)
+
+
+class ChunkedUploadStore:
+    """In-memory registry of upload sessions backed by .part files on disk."""
+
+    def __init__(
+        self,
+        upload_store: UploadStore,
+        partial_dir: str = "data/partial_uploads",
+        max_file_mb: float = 100,
+        chunk_mb: float = 8,
+        allowed_exts: Iterable[str] = (".pdf", ".png", ".jpg", ".jpeg", ".docx"),
+    ):
+        self.upload_store = upload_store
+        self.partial_dir = partial_dir
+        self.max_file_bytes = int(max_file_mb * 1024 * 1024)
+        self.chunk_bytes = min(int(chunk_mb * 1024 * 1024), self.max_file_bytes)
+        self.allowed_exts = {e.lower() for e in allowed_exts}
+        self._sessions: dict[str, UploadSession] = {}
+        self._lock = Lock()
+        os.makedirs(self.partial_dir, exist_ok=True)
+
+    def init(self, filename: str, size: int, upload_id: Optional[str] = None) -> UploadSession:
+        """Open a session for one file of the declared size."""
+        name = os.path.basename((filename or "").replace("\\", "/"))
+        if os.path.splitext(name.lower())[1] not in self.allowed_exts:
+            raise ChunkedUploadError(
+                400, f"Invalid file type: {filename}. Allowed: PDF, images (png/jpg/jpeg), and DOCX."
+            )
+        if size < 0:
+            raise ChunkedUploadError(400, "File size must not be negative")
+        if size > self.max_file_bytes:
+            raise ChunkedUploadError(
+                413, f"File {name} exceeds {self.max_file_bytes // (1024 * 1024)}MB limit"
+            )
+
+        file_id = uuid.uuid4().hex[:16]
+        session = UploadSession(
+            file_id=file_id,
+            upload_id=upload_id or str(uuid.uuid4())[:12],
+            filename=name,
+            size=int(size),
+            part_path=os.path.join(self.partial_dir, f"{file_id}.part"),
+        )
+        open(session.part_path, "wb").close()
+        with self._lock:
+            self._sessions[file_id] = session
+        return session
+
+    def get(self, file_id: str) -> UploadSession:
+        with self._lock:
+            session = self._sessions.get(file_id)
+        if session is None:
+            raise ChunkedUploadError(404, "Upload session not found or expired. Please re-upload.")
+        return session
+
+    def _claim(self, file_id: str, offset: Optional[int] = None) -> UploadSession:
+        """Mark the session busy; when given, offset must match the acknowledged one."""
+        with self._lock:
+            session = self._sessions.get(file_id)
+            if session is None:
+                raise ChunkedUploadError(404, "Upload session not found or expired. Please re-upload.")
+            if session.busy:
+                raise ChunkedUploadError(409, "Another chunk is being written", session.offset)
+            if offset is not None and offset != session.offset:
+                raise ChunkedUploadError(
+                    409, f"Offset mismatch: expected {session.offset}, got {offset}", session.offset
+                )
+            session.busy = True
+            return session
+
+    async def write_chunk(self, file_id: str, offset: int, stream: AsyncIterable[bytes]) -> UploadSession:
+        """Append a streamed chunk at offset, hashing as it is written.
+
+        On any failure (limit, client disconnect) the .part file is truncated
+        back to the acknowledged offset and the hash state is left untouched.
+        """
+        session = self._claim(file_id, offset)
+        hasher = session.hasher.copy()
+        written = 0
+        batch = bytearray()
+        pending: Optional[asyncio.Future] = None
+        try:
+            with open(session.part_path, "r+b") as f:
+                f.seek(offset)
+                f.truncate()
+
+                async def flush() -> None:
+                    nonlocal pending
+                    pending = asyncio.ensure_future(run_blocking(_write_and_hash, f, hasher, bytes(batch)))
+                    batch.clear()
+                    await asyncio.shield(pending)
+
+                try:
+                    async for data in stream:
+                        if not data:
+                            continue
+                        written += len(data)
+                        if written > self.chunk_bytes:
+                            raise ChunkedUploadError(
+                                413, f"Chunk exceeds the chunk size of {self.chunk_bytes} bytes", offset
+                            )
+                        if offset + written > session.size:
+                            raise ChunkedUploadError(
+                                413, f"Chunk runs past the declared size of {session.size} bytes", offset
+                            )
+                        batch += data
+                        if len(batch) >= _WRITE_BATCH_BYTES:
+                            await flush()
+                    if batch:
+                        await flush()
+                finally:
+                    if pending is not None and not pending.done():
+                        await asyncio.wait([pending])  # Never close or truncate under a running write
+        except BaseException:
+            try:
+                with open(session.part_path, "r+b") as f:
+                    f.truncate(offset)
+            except OSError:
+                pass
+            with self._lock:
+                session.busy = False
+            raise
+
+        with self._lock:
+            session.offset = offset + written
+            session.hasher = hasher
+            session.updated_at = time.time()
+            session.busy = False
+        return session
+
+    def finalize(self, file_id: str, sha256: Optional[str] = None) -> tuple[UploadSession, str, str]:
+        """Verify the upload and move it into the upload store.
+
+        The blob is referenced by the session's preupload and published as
+        uploads/<filename>. Returns (session, handle_path, sha256 hex).
+        """
+        session = self._claim(file_id)
+        try:
+            if session.offset != session.size:
+                raise ChunkedUploadError(
+                    409, f"Upload incomplete: {session.offset} of {session.size} bytes received", session.offset
+                )
+            digest = session.hasher.hexdigest()
+            if sha256 and sha256.strip().lower() != digest:
+                raise ChunkedUploadError(422, "SHA-256 mismatch: upload is corrupt, please re-upload", 0)
+
+            self.upload_store.ingest_file(session.part_path, f"preupload:{session.upload_id}", digest=digest)
+            path = self.upload_store.publish(digest, session.filename)
+        except ChunkedUploadError as e:
+            with self._lock:
+                session.busy = False
+                if e.status_code == 422:
+                    self._reset_locked(session)
+            raise
+        except BaseException:
+            with self._lock:
+                session.busy = False
+            raise
+
+        with self._lock:
+            self._sessions.pop(file_id, None)
+        return session, path, digest
+
+    def _reset_locked(self, session: UploadSession) -> None:
+        session.offset = 0
+        session.hasher = hashlib.sha256()
+        try:
+            open(session.part_path, "wb").close()
+        except OSError:
+            pass
+
+    def expire(self, max_age_seconds: float) -> int:
+        """Drop sessions idle for longer than max_age_seconds along with their .part files."""
+        cutoff = time.time() - max_age_seconds
+        with self._lock:
+            stale = [s for s in self._sessions.values() if s.updated_at < cutoff and not s.busy]
+            for s in stale:
+                self._sessions.pop(s.file_id, None)
+        for s in stale:
+            try:
+                os.remove(s.part_path)
+            except OSError:
+                pass
+        return len(stale)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return {
+            "active_sessions": len(sessions),
+            "bytes_received": sum(s.offset for s in sessions),
+            "chunk_size": self.chunk_bytes,
+        }
+
+
+_STORE: Optional[ChunkedUploadStore] = None
+_STORE_LOCK = Lock()
+
+
+def get_chunked_upload_store() -> ChunkedUploadStore:
+    """Shared store built from Settings."""
+    global _STORE
+    if _STORE is not None:
+        return _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            from app.config import settings
+            _STORE = ChunkedUploadStore(
+                get_upload_store(),
+                partial_dir=settings.upload_partial_dir,
+                max_file_mb=settings.max_file_size_mb,
+                chunk_mb=settings.upload_chunk_mb,
+            )
+    return _STORE
@@ -39,8 +39,6 @@ except ImportError:
     ONE_FLOW_AVAILABLE = False
 from app.utils import (
     normalize_whitespace,
-    fuzzy_match_keyword,
-    ALL_NORMALIZE_KEYWORDS,
     RE_EXPLICIT_ORDER,
     RE_AND_THEN,
     RE_BEFORE,
@@ -80,6 +78,8 @@ from app.models import (
     ParsedIntent,
 )
 from app.pdf_operations import get_upload_path
+from app.prompt_features import extract_prompt_features
+from app.normalized_prompt import get_normalized_prompt
 
 
 UNSUPPORTED_REPLY = "Not supported yet or sooner"
@@ -233,7 +233,7 @@ def _normalize_prompt_for_heuristics(user_prompt: str) -> str:
     This is only used for regex shortcuts and heuristics. The original prompt is still
     sent to the LLM to preserve full meaning.
     """
-    return re.sub(r"[A-Za-z]{2,}", lambda m: fuzzy_match_keyword(m.group(0), ALL_NORMALIZE_KEYWORDS), user_prompt)
+    return get_normalized_prompt(user_prompt).heuristic
 
 
 def _looks_like_multi_operation_prompt(user_prompt: str) -> bool:
@@ -978,58 +978,12 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
     user_prompt = _fix_common_connector_typos(user_prompt)
     prompt_for_match = _normalize_prompt_for_heuristics(user_prompt)
     prompt_compact = prompt_for_match.strip().lower()
+    features = extract_prompt_features(prompt_for_match, prompt_compact)
 
     if _is_explicitly_unsupported_request(prompt_for_match):
         return ClarificationResult(clarification=UNSUPPORTED_REPLY)
 
-    def _is_vague_command(prompt: str) -> bool:
-        """Detect vague/meaningless commands that need clarification."""
-        p = (prompt or "").strip().lower()
-        if not p:
-            return True
-        if len(p) < 3:
-            return True
-        vague_patterns = [
-            r"^do\s*(it|this|that)?$",
-            r"^why\s*(not)?$",
-            r"^ok(ay)?$",
-            r"^yes$",
-            r"^no$",
-            r"^sure$",
-            r"^go\s*(ahead)?$",
-            r"^start$",
-            r"^run$",
-            r"^execute$",
-            r"^process$",
-            r"^proceed$",
-            r"^begin$",
-            r"^make\s*it$",
-            r"^fix\s*(it)?$",
-            r"^help$",
-            r"^what$",
-            r"^how$",
-            r"^huh$",
-            r"^eh$",
-            r"^idk$",
-            r"^dunno$",
-            r"^whatever$",
-        ]
-        for pattern in vague_patterns:
-            if re.match(pattern, p):
-                return True
-        recognizable_words = [
-            "merge", "combine", "join", "split", "extract", "keep", "delete", "remove",
-            "compress", "reduce", "shrink", "small", "convert", "pdf", "docx", "word",
-            "png", "jpg", "jpeg", "image", "rotate", "turn", "flip", "reorder", "swap",
-            "reverse", "watermark", "page", "number", "ocr", "scan", "enhance", "flatten",
-            "optimize", "text", "to", "into", "as", "from", "all", "first", "last"
-        ]
-        has_recognizable = any(word in p for word in recognizable_words)
-        if not has_recognizable and len(p.split()) <= 3:
-            return True
-        return False
-
-    if _is_vague_command(prompt_compact) and file_names:
+    if features.vague and file_names:
         primary = file_names[0]
         primary_lower = (primary or "").lower()
         
@@ -1073,28 +1027,24 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
         all_pdfs = all(f.lower().endswith('.pdf') for f in file_names)
         num_files = len(file_names)
         
-        wants_to_image = bool(re.search(r"\b(to\s*img|to\s*image|to\s*images|to\s*png|to\s*jpe?g|as\s*png|as\s*jpe?g|export\s*(as\s*)?(png|jpe?g|images?))\b", prompt_compact))
-        wants_to_pdf = bool(re.search(r"\b(to\s*pdf|as\s*pdf|convert\s*(to\s*)?pdf)\b", prompt_compact))
-        wants_to_docx = bool(re.search(r"\b(to\s*docx|to\s*word|as\s*docx|as\s*word|convert\s*(to\s*)?(docx|word))\b", prompt_compact))
-        wants_split = bool(re.search(r"\b(split|extract\s*page|keep\s*page)\b", prompt_compact))
-        wants_delete_pages = bool(re.search(r"\b(delete\s*page|remove\s*page)\b", prompt_compact))
-        wants_merge = bool(re.search(r"\b(merge|combine|join)\b", prompt_compact))
-        wants_ocr = bool(re.search(r"\bocr\b", prompt_compact))
-        wants_reorder = bool(re.search(r"\b(reorder|reverse|swap)\b", prompt_compact))
-        wants_clean = bool(re.search(r"\b(clean|remove\s*(blank|duplicate)|blank\s*page|duplicate\s*page)\b", prompt_compact))
-        wants_compress = bool(re.search(r"\b(compress|smaller|shrink|reduce\s*size|make\s*small|tiny)\b", prompt_compact))
-        wants_rotate = bool(re.search(r"\b(rotate|turn|flip|straighten)\b", prompt_compact))
-        wants_watermark = bool(re.search(r"\bwatermark\b", prompt_compact))
-        wants_page_numbers = bool(re.search(r"\b(page\s*numbers?|number\s*pages?|add\s*numbers?)\b", prompt_compact))
-        wants_enhance = bool(re.search(r"\b(enhance|improve|clarify|sharpen|clean\s*up|fix\s*scan)\b", prompt_compact))
-        wants_flatten = bool(re.search(r"\b(flatten|sanitize|optimize)\b", prompt_compact))
-        wants_extract_text = bool(re.search(r"\b(extract\s*text|to\s*txt|as\s*txt|text\s*only|get\s*text)\b", prompt_compact))
-        
-        num_operations = sum([
-            wants_merge, wants_split, wants_delete_pages, wants_compress, wants_rotate,
-            wants_watermark, wants_page_numbers, wants_ocr, wants_enhance, wants_flatten,
-            wants_clean, wants_reorder, wants_to_image, wants_to_docx, wants_extract_text
-        ])
+        wants_to_image = features.to_image
+        wants_to_pdf = features.to_pdf
+        wants_to_docx = features.to_docx
+        wants_split = features.split
+        wants_delete_pages = features.delete_pages
+        wants_merge = features.merge
+        wants_ocr = features.ocr
+        wants_reorder = features.reorder
+        wants_clean = features.clean
+        wants_compress = features.compress
+        wants_rotate = features.rotate
+        wants_watermark = features.watermark
+        wants_page_numbers = features.page_numbers
+        wants_enhance = features.enhance
+        wants_flatten = features.flatten
+        wants_extract_text = features.extract_text
+        
+        num_operations = features.num_operations
         
         if is_pdf_file or all_pdfs:
             
@@ -1176,9 +1126,9 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
             
             if wants_rotate and wants_compress and is_pdf_file:
                 degrees = 90
-                if re.search(r"\b(left|counter|anti)\b", prompt_compact):
+                if features.rotate_left:
                     degrees = 270
-                elif re.search(r"\b180\b", prompt_compact):
+                elif features.rotate_180:
                     degrees = 180
                 preset = _infer_compress_preset(user_prompt)
                 return ClarificationResult(
@@ -1210,7 +1160,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
                 )
             
             if wants_clean and wants_compress and is_pdf_file:
-                is_duplicate = bool(re.search(r"\bduplicate\b", prompt_compact))
+                is_duplicate = features.duplicate
                 op_type = "remove_duplicate_pages" if is_duplicate else "remove_blank_pages"
                 preset = _infer_compress_preset(user_prompt)
                 return ClarificationResult(
@@ -1296,9 +1246,9 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
             if wants_rotate and wants_split and is_pdf_file:
                 pages = _parse_page_ranges(user_prompt)
                 degrees = 90
-                if re.search(r"\b(left|counter|anti)\b", prompt_compact):
+                if features.rotate_left:
                     degrees = 270
-                elif re.search(r"\b180\b", prompt_compact):
+                elif features.rotate_180:
                     degrees = 180
                 if pages:
                     return ClarificationResult(
@@ -1372,9 +1322,9 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
             
             if wants_merge and wants_rotate and all_pdfs and num_files >= 2:
                 degrees = 90
-                if re.search(r"\b(left|counter|anti)\b", prompt_compact):
+                if features.rotate_left:
                     degrees = 270
-                elif re.search(r"\b180\b", prompt_compact):
+                elif features.rotate_180:
                     degrees = 180
                 return ClarificationResult(
                     intent=[
@@ -1390,7 +1340,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
                 )
             
             if wants_merge and wants_clean and all_pdfs and num_files >= 2:
-                is_duplicate = bool(re.search(r"\bduplicate\b", prompt_compact))
+                is_duplicate = features.duplicate
                 op_type = "remove_duplicate_pages" if is_duplicate else "remove_blank_pages"
                 return ClarificationResult(
                     intent=[
@@ -1434,7 +1384,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
                 )
             
             if wants_ocr and wants_clean and is_pdf_file:
-                is_duplicate = bool(re.search(r"\bduplicate\b", prompt_compact))
+                is_duplicate = features.duplicate
                 op_type = "remove_duplicate_pages" if is_duplicate else "remove_blank_pages"
                 return ClarificationResult(
                     intent=[
@@ -1451,9 +1401,9 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
             
             if wants_ocr and wants_rotate and is_pdf_file:
                 degrees = 90
-                if re.search(r"\b(left|counter|anti)\b", prompt_compact):
+                if features.rotate_left:
                     degrees = 270
-                elif re.search(r"\b180\b", prompt_compact):
+                elif features.rotate_180:
                     degrees = 180
                 return ClarificationResult(
                     intent=[
@@ -1469,9 +1419,9 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
                 )
             
             if wants_clean and wants_reorder and is_pdf_file:
-                is_duplicate = bool(re.search(r"\bduplicate\b", prompt_compact))
+                is_duplicate = features.duplicate
                 op_type = "remove_duplicate_pages" if is_duplicate else "remove_blank_pages"
-                is_reverse = bool(re.search(r"\breverse\b", prompt_compact))
+                is_reverse = features.reverse
                 return ClarificationResult(
                     intent=[
                         ParsedIntent(
@@ -1486,7 +1436,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
                 )
             
             if wants_clean and wants_flatten and is_pdf_file:
-                is_duplicate = bool(re.search(r"\bduplicate\b", prompt_compact))
+                is_duplicate = features.duplicate
                 op_type = "remove_duplicate_pages" if is_duplicate else "remove_blank_pages"
                 return ClarificationResult(
                     intent=[
@@ -1534,11 +1484,11 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
             
             if wants_rotate and wants_reorder and is_pdf_file:
                 degrees = 90
-                if re.search(r"\b(left|counter|anti)\b", prompt_compact):
+                if features.rotate_left:
                     degrees = 270
-                elif re.search(r"\b180\b", prompt_compact):
+                elif features.rotate_180:
                     degrees = 180
-                is_reverse = bool(re.search(r"\breverse\b", prompt_compact))
+                is_reverse = features.reverse
                 return ClarificationResult(
                     intent=[
                         ParsedIntent(
@@ -1573,7 +1523,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
                 )
             
             if wants_clean and wants_ocr and wants_compress and is_pdf_file:
-                is_duplicate = bool(re.search(r"\bduplicate\b", prompt_compact))
+                is_duplicate = features.duplicate
                 op_type = "remove_duplicate_pages" if is_duplicate else "remove_blank_pages"
                 preset = _infer_compress_preset(user_prompt)
                 return ClarificationResult(
@@ -1594,7 +1544,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
                 )
             
             if wants_merge and wants_clean and wants_compress and all_pdfs and num_files >= 2:
-                is_duplicate = bool(re.search(r"\bduplicate\b", prompt_compact))
+                is_duplicate = features.duplicate
                 op_type = "remove_duplicate_pages" if is_duplicate else "remove_blank_pages"
                 preset = _infer_compress_preset(user_prompt)
                 return ClarificationResult(
@@ -1616,9 +1566,9 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
             
             if wants_merge and wants_rotate and wants_compress and all_pdfs and num_files >= 2:
                 degrees = 90
-                if re.search(r"\b(left|counter|anti)\b", prompt_compact):
+                if features.rotate_left:
                     degrees = 270
-                elif re.search(r"\b180\b", prompt_compact):
+                elif features.rotate_180:
                     degrees = 180
                 preset = _infer_compress_preset(user_prompt)
                 return ClarificationResult(
@@ -1678,9 +1628,9 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
             
             if wants_rotate and wants_page_numbers and wants_compress and is_pdf_file:
                 degrees = 90
-                if re.search(r"\b(left|counter|anti)\b", prompt_compact):
+                if features.rotate_left:
                     degrees = 270
-                elif re.search(r"\b180\b", prompt_compact):
+                elif features.rotate_180:
                     degrees = 180
                 preset = _infer_compress_preset(user_prompt)
                 return ClarificationResult(
@@ -1742,7 +1692,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
                 )
             
             if wants_clean and wants_flatten and wants_compress and is_pdf_file:
-                is_duplicate = bool(re.search(r"\bduplicate\b", prompt_compact))
+                is_duplicate = features.duplicate
                 op_type = "remove_duplicate_pages" if is_duplicate else "remove_blank_pages"
                 preset = _infer_compress_preset(user_prompt)
                 return ClarificationResult(
@@ -1873,9 +1823,9 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
             
             if (wants_merge or wants_to_pdf) and wants_rotate and all_images:
                 degrees = 90
-                if re.search(r"\b(left|counter|anti)\b", prompt_compact):
+                if features.rotate_left:
                     degrees = 270
-                elif re.search(r"\b180\b", prompt_compact):
+                elif features.rotate_180:
                     degrees = 180
                 return ClarificationResult(
                     intent=[
@@ -1963,9 +1913,9 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
             
             if wants_enhance and wants_rotate and is_image_file:
                 degrees = 90
-                if re.search(r"\b(left|counter|anti)\b", prompt_compact):
+                if features.rotate_left:
                     degrees = 270
-                elif re.search(r"\b180\b", prompt_compact):
+                elif features.rotate_180:
                     degrees = 180
                 return ClarificationResult(
                     intent=[
@@ -2025,9 +1975,9 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
             
             if (wants_merge or wants_to_pdf) and wants_rotate and wants_compress and all_images:
                 degrees = 90
-                if re.search(r"\b(left|counter|anti)\b", prompt_compact):
+                if features.rotate_left:
                     degrees = 270
-                elif re.search(r"\b180\b", prompt_compact):
+                elif features.rotate_180:
                     degrees = 180
                 preset = _infer_compress_preset(user_prompt)
                 return ClarificationResult(
@@ -2089,9 +2039,9 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
             
             if wants_ocr and wants_rotate and wants_compress and is_image_file:
                 degrees = 90
-                if re.search(r"\b(left|counter|anti)\b", prompt_compact):
+                if features.rotate_left:
                     degrees = 270
-                elif re.search(r"\b180\b", prompt_compact):
+                elif features.rotate_180:
                     degrees = 180
                 preset = _infer_compress_preset(user_prompt)
                 return ClarificationResult(
@@ -2226,7 +2176,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
                 )
             
             if wants_clean and wants_compress:
-                is_duplicate = bool(re.search(r"\bduplicate\b", prompt_compact))
+                is_duplicate = features.duplicate
                 op_type = "remove_duplicate_pages" if is_duplicate else "remove_blank_pages"
                 preset = _infer_compress_preset(user_prompt)
                 return ClarificationResult(
@@ -2493,7 +2443,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
         
         if wants_reorder and is_docx_file:
             m = re.search(r"\b(?:to|as)\b\s*([0-9,\s]+)", user_prompt, re.IGNORECASE)
-            is_reverse = bool(re.search(r"\breverse\b", prompt_compact))
+            is_reverse = features.reverse
             if is_reverse:
                 return ClarificationResult(
                     intent=[
@@ -2542,7 +2492,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
             )
         
         if wants_clean and is_docx_file:
-            is_duplicate = bool(re.search(r"\bduplicate\b", prompt_compact))
+            is_duplicate = features.duplicate
             op_type = "remove_duplicate_pages" if is_duplicate else "remove_blank_pages"
             return ClarificationResult(
                 intent=[
@@ -2610,11 +2560,11 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
         
         if wants_rotate and is_image_file:
             degrees = 90  # default
-            if re.search(r"\b(left|counter|anti)\b", prompt_compact):
+            if features.rotate_left:
                 degrees = 270
-            elif re.search(r"\b180\b", prompt_compact):
+            elif features.rotate_180:
                 degrees = 180
-            elif re.search(r"\b270\b", prompt_compact):
+            elif features.rotate_270:
                 degrees = 270
             return ClarificationResult(
                 intent=[
@@ -2644,7 +2594,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
             )
         
         if wants_reorder and all_images and num_files > 1:
-            is_reverse = bool(re.search(r"\breverse\b", prompt_compact))
+            is_reverse = features.reverse
             if is_reverse:
                 reversed_files = list(reversed(file_names))
                 return ClarificationResult(
@@ -2659,7 +2609,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
             )
         
         
-        wants_email_ready = bool(re.search(r"\b(email\s*ready|for\s*email|send\s*(by\s*)?email|email\s*size)\b", prompt_compact))
+        wants_email_ready = features.email_ready
         if wants_email_ready:
             if is_pdf_file:
                 return ClarificationResult(
@@ -2695,7 +2645,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
                     ]
                 )
         
-        wants_fix_scan = bool(re.search(r"\b(fix\s*(this\s*)?scan|fix\s*scanned|clean\s*scan)\b", prompt_compact))
+        wants_fix_scan = features.fix_scan
         if wants_fix_scan:
             if is_pdf_file:
                 return ClarificationResult(
@@ -2724,7 +2674,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
                     ]
                 )
         
-        wants_print_ready = bool(re.search(r"\b(print\s*ready|for\s*print|printing)\b", prompt_compact))
+        wants_print_ready = features.print_ready
         if wants_print_ready:
             if is_pdf_file:
                 return ClarificationResult(
@@ -2754,7 +2704,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
                     )
                 )
         
-        wants_searchable = bool(re.search(r"\b(make\s*searchable|searchable\s*pdf|text\s*searchable)\b", prompt_compact))
+        wants_searchable = features.searchable
         if wants_searchable:
             if is_pdf_file or is_image_file:
                 return ClarificationResult(
@@ -2764,7 +2714,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
                     )
                 )
         
-        wants_secure = bool(re.search(r"\b(secure|protect|sanitize)\s*pdf\b", prompt_compact))
+        wants_secure = features.secure
         if wants_secure and is_pdf_file:
             return ClarificationResult(
                 intent=ParsedIntent(
@@ -2773,7 +2723,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
                 )
             )
         
-        wants_optimize = bool(re.search(r"\b(optimize\s*(file|pdf)?|optimise)\b", prompt_compact))
+        wants_optimize = features.optimize
         if wants_optimize:
             if is_pdf_file:
                 preset = _infer_compress_preset(user_prompt)
@@ -2804,7 +2754,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
                     ]
                 )
         
-        wants_final = bool(re.search(r"\b(final\s*(version|pdf|copy)?|finalize)\b", prompt_compact))
+        wants_final = features.final
         if wants_final:
             if is_pdf_file:
                 return ClarificationResult(
@@ -2841,7 +2791,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
                     ]
                 )
         
-        wants_submission = bool(re.search(r"\b(submission\s*ready|college\s*submission|submit|assignment)\b", prompt_compact))
+        wants_submission = features.submission
         if wants_submission:
             if is_pdf_file:
                 return ClarificationResult(
@@ -2887,7 +2837,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
                     ]
                 )
         
-        wants_archive = bool(re.search(r"\b(archive\s*ready|for\s*archive|archiving)\b", prompt_compact))
+        wants_archive = features.archive
         if wants_archive:
             if is_pdf_file:
                 return ClarificationResult(
@@ -2920,7 +2870,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
                     ]
                 )
         
-        wants_whatsapp = bool(re.search(r"\b(whatsapp|wa)\s*(size|ready)?\b", prompt_compact))
+        wants_whatsapp = features.whatsapp
         if wants_whatsapp:
             if is_pdf_file:
                 return ClarificationResult(
@@ -2956,7 +2906,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
                     ]
                 )
         
-        wants_govt = bool(re.search(r"\b(govt|government)\s*(submission)?\b", prompt_compact))
+        wants_govt = features.govt
         if wants_govt:
             if is_pdf_file:
                 return ClarificationResult(
@@ -2989,7 +2939,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
                     ]
                 )
         
-        wants_scan_quality = bool(re.search(r"\b(scan\s*quality|quality\s*fix|improve\s*scan)\b", prompt_compact))
+        wants_scan_quality = features.scan_quality
         if wants_scan_quality:
             if is_pdf_file or is_image_file:
                 return ClarificationResult(
@@ -3005,7 +2955,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
                     ]
                 )
         
-        wants_neat = bool(re.search(r"\b(make\s*it\s*neat|neat\s*up|tidy)\b", prompt_compact))
+        wants_neat = features.neat
         if wants_neat:
             if is_pdf_file:
                 return ClarificationResult(
@@ -3021,7 +2971,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
                     ]
                 )
         
-        wants_professional = bool(re.search(r"\b(make\s*professional|professional\s*(copy|version)?|look\s*professional)\b", prompt_compact))
+        wants_professional = features.professional
         if wants_professional:
             if is_pdf_file:
                 return ClarificationResult(
@@ -3058,7 +3008,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
                     ]
                 )
         
-        wants_sendable = bool(re.search(r"\b(sendable|shareable|share\s*ready)\b", prompt_compact))
+        wants_sendable = features.sendable
         if wants_sendable:
             if is_pdf_file:
                 return ClarificationResult(
@@ -3094,7 +3044,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
                     ]
                 )
         
-        wants_convert_shrink = bool(re.search(r"\b(convert\s*(and|&)\s*(shrink|compress|smaller))\b", prompt_compact))
+        wants_convert_shrink = features.convert_shrink
         if wants_convert_shrink:
             if is_docx_file:
                 return ClarificationResult(
@@ -3123,7 +3073,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
                     ]
                 )
         
-        wants_scan_to_pdf = bool(re.search(r"\bscan\s*to\s*pdf\b", prompt_compact))
+        wants_scan_to_pdf = features.scan_to_pdf
         if wants_scan_to_pdf:
             if is_image_file or all_images:
                 return ClarificationResult(
@@ -3133,7 +3083,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
                     )
                 )
         
-        wants_combine_fix = bool(re.search(r"\b(combine\s*(and|&)\s*fix|merge\s*(and|&)\s*clean)\b", prompt_compact))
+        wants_combine_fix = features.combine_fix
         if wants_combine_fix and all_pdfs and num_files >= 2:
             return ClarificationResult(
                 intent=[
@@ -3148,7 +3098,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
                 ]
             )
         
-        wants_combine_shrink = bool(re.search(r"\b(combine\s*(and|&)\s*(shrink|compress)|merge\s*(and|&)\s*(shrink|compress))\b", prompt_compact))
+        wants_combine_shrink = features.combine_shrink
         if wants_combine_shrink:
             if all_pdfs and num_files >= 2:
                 preset = _infer_compress_preset(user_prompt)
@@ -3179,7 +3129,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
                     ]
                 )
         
-        wants_fix_orientation = bool(re.search(r"\b(fix\s*(orientation|rotation)|orientation\s*fix)\b", prompt_compact))
+        wants_fix_orientation = features.fix_orientation
         if wants_fix_orientation:
             if is_pdf_file:
                 return ClarificationResult(
@@ -3202,7 +3152,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
                     ]
                 )
         
-        wants_remove_extra = bool(re.search(r"\b(remove\s*extra|extra\s*pages?|unwanted\s*pages?)\b", prompt_compact))
+        wants_remove_extra = features.remove_extra
         if wants_remove_extra:
             if is_pdf_file:
                 return ClarificationResult(
@@ -3212,7 +3162,7 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
                     )
                 )
         
-        wants_mobile = bool(re.search(r"\b(mobile\s*(optimized?|ready)?|for\s*mobile|phone\s*size)\b", prompt_compact))
+        wants_mobile = features.mobile
         if wants_mobile:
             if is_pdf_file:
                 return ClarificationResult(
@@ -3269,10 +3219,10 @@ def clarify_intent(user_prompt: str, file_names: list[str], last_question: str =
     if file_names:
         primary = file_names[0]
         primary_lower = (primary or "").lower()
-        wants_convert = bool(re.search(r"\b(convert|change)\b", prompt_for_match, re.IGNORECASE))
-        wants_word = bool(re.search(r"\b(word|docx|doc)\b", prompt_for_match, re.IGNORECASE))
-        wants_pdf = bool(re.search(r"\bpdf\b", prompt_for_match, re.IGNORECASE))
-        wants_images = bool(re.search(r"\b(images?|img|png|jpe?g)\b", prompt_for_match, re.IGNORECASE))
+        wants_convert = features.convert
+        wants_word = features.word
+        wants_pdf = features.pdf
+        wants_images = features.images
 
         if wants_convert and wants_pdf and primary_lower.endswith(".docx"):
             return ClarificationResult(
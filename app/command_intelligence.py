@@ -14,6 +14,8 @@ from dataclasses import dataclass
 import re
 import logging
 
+from app.normalized_prompt import get_normalized_prompt
+
 
 logger = logging.getLogger(__name__)
 
@@ -146,11 +148,10 @@ class CommandIntelligence:
         
         Returns operation name if detected, None otherwise.
         """
-        for intent, patterns in CommandPatterns.COMPILED_PATTERNS.items():
-            for pattern in patterns:
-                if pattern.search(prompt):
-                    logger.debug(f"[INTENT DETECTED] {intent}")
-                    return intent
+        intents = CommandIntelligence._intents(prompt)
+        if intents:
+            logger.debug(f"[INTENT DETECTED] {intents[0]}")
+            return intents[0]
         
         return None
     
@@ -253,15 +254,17 @@ class CommandIntelligence:
     @staticmethod
     def find_all_intents(prompt: str) -> List[str]:
         """Find all potential intents in prompt"""
-        intents = []
-        
-        for intent, patterns in CommandPatterns.COMPILED_PATTERNS.items():
-            for pattern in patterns:
-                if pattern.search(prompt):
-                    intents.append(intent)
-                    break
-        
-        return intents
+        return list(CommandIntelligence._intents(prompt))
+    
+    @staticmethod
+    def _intents(prompt: str) -> tuple:
+        """Matching intents in COMPILED_PATTERNS order, scanned once per prompt"""
+        def build():
+            return tuple(
+                intent for intent, patterns in CommandPatterns.COMPILED_PATTERNS.items()
+                if any(pattern.search(prompt) for pattern in patterns)
+            )
+        return get_normalized_prompt(prompt or "").view("command_intents", build)
     
     @staticmethod
     def extract_parameters(prompt: str, intent: str) -> Dict[str, Any]:
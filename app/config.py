@@ -21,12 +21,86 @@ class Settings(BaseSettings):
     baseten_timeout_seconds: float = 12.0
 
     llm_model_rephrase_third: str | None = None
+
+    llm_pool_max_connections: int = 20  # Shared keep-alive pool for Groq/Baseten calls
+    llm_pool_max_keepalive: int = 10
+    llm_pool_keepalive_seconds: float = 60.0  # Idle connections are closed after this
+    llm_connect_timeout_seconds: float = 5.0
+    llm_timeout_seconds: float = 30.0
+    llm_hedge_enabled: bool = True  # Start the fallback model/provider when the primary runs slow
+    llm_hedge_percentile: float = 90.0  # Of the provider's recent latencies
+    llm_hedge_min_samples: int = 8  # Below this, llm_hedge_default_delay_seconds is used
+    llm_hedge_default_delay_seconds: float = 2.0
+    llm_hedge_min_delay_seconds: float = 0.25
+    llm_hedge_max_delay_seconds: float = 8.0
+    llm_cache_enabled: bool = True  # SQLite cache of low-temperature LLM completions
+    llm_cache_path: str = "data/llm_cache.db"
+    llm_cache_ttl_seconds: float = 86400.0
+    llm_cache_max_entries: int = 5000
+    llm_cache_max_mb: float = 50.0
+    llm_cache_max_temperature: float = 0.2  # Calls above this temperature are never cached
+    llm_rate_limit_enabled: bool = True  # Pace LLM calls client-side instead of sleeping after 429s
+    llm_rate_rpm: float = 30.0  # Requests/minute per model (default for models not in llm_rate_model_limits)
+    llm_rate_tpm: float = 6000.0  # Tokens/minute per model; raised/lowered by x-ratelimit-limit-tokens
+    llm_rate_model_limits: str = ""  # "model=rpm/tpm,model2=rpm/tpm"
+    llm_rate_max_wait_seconds: float = 60.0  # Longest a call is held before being sent anyway
+    llm_health_enabled: bool = True  # Background provider probes; /api/llm-status serves their cached result
+    llm_health_interval_seconds: float = 60.0
+    llm_breaker_failure_threshold: int = 3  # Consecutive failures that open a provider's circuit
+    llm_breaker_reset_seconds: float = 30.0  # Open circuit waits this long before a half-open trial
+    blocking_executor_workers: int = 4  # Threads for blocking work (text extraction, sync LLM) in async handlers
+    file_operation_workers: int = 2  # Threads for /process file operations (kept apart from the short work above)
     
     host: str = "0.0.0.0"
     port: int = 8000
     
     max_file_size_mb: int = 100
     max_files_per_request: int = 5
+    upload_chunk_mb: int = 8  # Chunk size advertised to resumable-upload clients
+    upload_partial_dir: str = "data/partial_uploads"  # In-progress chunked uploads (.part files)
+    upload_blob_dir: str = "data/blobs"  # Content-addressed upload store (same filesystem as uploads/)
+
+    job_workers: int = 2  # Fixed worker pool size for the background job queue
+    job_cleanup_minutes: int = 15
+    job_priority_small_mb: float = 5.0  # Inputs at or below this run in the high-priority class
+    job_priority_large_mb: float = 50.0  # Inputs above this run in the low-priority class
+    job_workspace_dir: str = "data/jobs"  # Per-job in/ and out/ directories
+    job_workspace_tmpfs: bool = False  # Put job workspaces on /dev/shm when available
+    job_events_heartbeat_seconds: float = 15.0  # Idle interval before an SSE/WebSocket heartbeat
+    job_events_retry_ms: int = 2000  # Client reconnect delay advertised on the SSE stream
+
+    process_pool_workers: int = 1  # Worker processes for CPU-heavy operations (0 = run in-process)
+    process_pool_max_tasks_per_worker: int = 20
+    process_pool_max_rss_mb: float = 400.0
+    process_pool_task_timeout_seconds: float = 600.0
+
+    result_cache_enabled: bool = True
+    result_cache_dir: str = "data/result_cache"
+    result_cache_max_mb: float = 500.0
+    result_cache_max_entries: int = 200
+
+    probe_cache_enabled: bool = True  # Page count / text layer / image ratio per input, by content hash
+    probe_cache_dir: str = "data/probe_cache"
+    probe_cache_max_entries: int = 500
+
+    intent_cache_enabled: bool = True  # Reuse parsed intents for repeated prompts (no clarify/LLM)
+    intent_cache_max_entries: int = 512
+    intent_cache_ttl_seconds: float = 600.0
+
+    speculation_enabled: bool = True  # Warm probe/text/thumbnail caches right after /preupload
+    speculation_workers: int = 1
+    speculation_cpu_budget_seconds: float = 300.0  # Per preupload, across all speculative steps
+    speculation_precompute: bool = True  # Also run the most likely operation into the result cache
+    speculation_precompute_min_mb: float = 5.0  # Only precompute for PDFs at least this large
+    speculation_thumbnail_dir: str = "data/thumbnails"
+
+    gs_parallel_workers: int = 3  # Concurrent Ghostscript chunks per compress job (0 = CPU count, 1 = off)
+    gs_max_processes: int = 4  # Ghostscript processes running at once across all jobs (per process)
+    gs_parallel_min_pages: int = 60  # Below this page count compression stays single-process
+    gs_pages_per_chunk: int = 25
+
+    ocr_parallel_workers: int = 0  # Concurrent OCR chunk processes (0 = CPU count, 1 = sequential)
+    ocr_chunk_pages: int = 25
     
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -0,0 +1,383 @@
+"""
+Document Probe - Basic facts about an input file, computed once per content.
+
+Problem: many paths reopen the same input just to learn basic facts.
+pdf_to_docx opens a "probe" document for its page count, ocr_pdf extracts
+text from every page to find scanned ones, _ghostscript_compress parses the
+PDF for its page count, and _check_file_type_guards passes page_count=0
+because nobody knows the real count.
+
+Solution: one pass over the file records
+- page count and page sizes (points)
+- per-page text presence (more than TEXT_MIN_CHARS of extractable text)
+- image area ratio (mean fraction of page area covered by images)
+- encryption state and producer
+
+Results are cached by SHA-256 of the content: in memory (LRU) and as small
+JSON files shared with process-pool workers. Uploads are probed in the
+background right after they arrive (submit_probe), so guards, the ETA
+estimator and operation heuristics normally find the answer ready.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from threading import Lock
+from typing import Optional
+
+
+TEXT_MIN_CHARS = 50  # More than this many extracted chars suggests a real text layer
+_HASH_CHUNK = 1024 * 1024
+_IMAGE_EXTS = {".png", ".jpg", ".jpeg"}
+
+
+@dataclass
+class DocumentProbe:
+    """Facts about one file's content."""
+    sha256: str
+    file_type: str  # pdf | image | docx | other
+    size_bytes: int
+    page_count: int = 0
+    page_sizes: list[list[float]] = field(default_factory=list)  # [width, height] in points
+    page_has_text: list[bool] = field(default_factory=list)
+    image_area_ratio: float = 0.0
+    encrypted: bool = False
+    producer: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def text_coverage(self) -> float:
+        """Fraction of pages with a text layer."""
+        if not self.page_has_text:
+            return 0.0
+        return sum(self.page_has_text) / len(self.page_has_text)
+
+    @property
+    def likely_scanned(self) -> bool:
+        return self.file_type == "image" or (self.text_coverage < 0.2 and self.image_area_ratio >= 0.6)
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["text_coverage"] = round(self.text_coverage, 3)
+        data["likely_scanned"] = self.likely_scanned
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DocumentProbe":
+        known = {k: data[k] for k in cls.__dataclass_fields__ if k in data}
+        return cls(**known)
+
+
+def _sha256_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _probe_pdf_fitz(path: str, probe: DocumentProbe) -> None:
+    import fitz
+
+    doc = fitz.open(path)
+    try:
+        probe.encrypted = bool(doc.is_encrypted or doc.needs_pass)
+        probe.producer = (doc.metadata or {}).get("producer") or None
+        probe.page_count = doc.page_count
+        if doc.needs_pass:
+            return
+        ratios = []
+        for page in doc:
+            rect = page.rect
+            area = max(1.0, rect.width * rect.height)
+            probe.page_sizes.append([round(rect.width, 1), round(rect.height, 1)])
+            probe.page_has_text.append(len(page.get_text("text").strip()) > TEXT_MIN_CHARS)
+            covered = 0.0
+            for info in page.get_image_info():
+                box = fitz.Rect(info.get("bbox", (0, 0, 0, 0))) & rect
+                if not box.is_empty:
+                    covered += box.width * box.height
+            ratios.append(min(1.0, covered / area))
+        probe.image_area_ratio = round(sum(ratios) / len(ratios), 3) if ratios else 0.0
+    finally:
+        doc.close()
+
+
+def _probe_pdf_pypdf(path: str, probe: DocumentProbe) -> None:
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    probe.encrypted = bool(reader.is_encrypted)
+    if reader.is_encrypted:
+        try:
+            reader.decrypt("")
+        except Exception:
+            return
+    try:
+        probe.producer = (reader.metadata or {}).get("/Producer") or None
+    except Exception:
+        probe.producer = None
+    probe.page_count = len(reader.pages)
+    ratios = []
+    for page in reader.pages:
+        box = page.mediabox
+        probe.page_sizes.append([round(float(box.width), 1), round(float(box.height), 1)])
+        try:
+            has_text = len((page.extract_text() or "").strip()) > TEXT_MIN_CHARS
+        except Exception:
+            has_text = False
+        probe.page_has_text.append(has_text)
+        # pypdf has no placement geometry: an image-only page counts as fully covered
+        try:
+            has_images = bool(page.images)
+        except Exception:
+            has_images = False
+        ratios.append(0.0 if not has_images else (0.3 if has_text else 1.0))
+    probe.image_area_ratio = round(sum(ratios) / len(ratios), 3) if ratios else 0.0
+
+
+def _probe_image(path: str, probe: DocumentProbe) -> None:
+    probe.page_count = 1
+    probe.page_has_text = [False]
+    probe.image_area_ratio = 1.0
+    try:
+        from PIL import Image
+        with Image.open(path) as img:
+            dpi = (img.info.get("dpi") or (72, 72))[0] or 72
+            probe.page_sizes = [[round(img.width * 72 / dpi, 1), round(img.height * 72 / dpi, 1)]]
+    except Exception:
+        pass
+
+
+def _sniff_file_type(path: str) -> str:
+    """File type from the leading bytes, for paths without a telling extension (upload blobs)."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(8)
+    except OSError:
+        return "other"
+    if head.startswith(b"%PDF"):
+        return "pdf"
+    if head.startswith(b"\x89PNG") or head.startswith(b"\xff\xd8\xff"):
+        return "image"
+    if head.startswith(b"PK\x03\x04"):
+        import zipfile
+        try:
+            with zipfile.ZipFile(path) as z:
+                return "docx" if "word/document.xml" in z.namelist() else "other"
+        except zipfile.BadZipFile:
+            return "other"
+    return "other"
+
+
+def probe_document(path: str, digest: Optional[str] = None) -> DocumentProbe:
+    """Probe a file (uncached). Failures are recorded in .error, never raised."""
+    ext = os.path.splitext(path)[1].lower()
+    file_type = "pdf" if ext == ".pdf" else "image" if ext in _IMAGE_EXTS else "docx" if ext == ".docx" else None
+    if file_type is None:
+        file_type = _sniff_file_type(path)  # Content-addressed blobs have no extension
+    probe = DocumentProbe(
+        sha256=digest or _sha256_file(path),
+        file_type=file_type,
+        size_bytes=os.path.getsize(path),
+    )
+    try:
+        if file_type == "pdf":
+            try:
+                _probe_pdf_fitz(path, probe)
+            except ImportError:
+                _probe_pdf_pypdf(path, probe)
+        elif file_type == "image":
+            _probe_image(path, probe)
+    except Exception as e:
+        probe.error = str(e)
+    return probe
+
+
+class ProbeCache:
+    """DocumentProbe results keyed by content hash (memory LRU + JSON files)."""
+
+    def __init__(self, cache_dir: Optional[str] = "data/probe_cache", max_entries: int = 500):
+        self.cache_dir = cache_dir
+        self.max_entries = max(1, int(max_entries))
+        self._lock = Lock()
+        self._memory: "OrderedDict[str, DocumentProbe]" = OrderedDict()
+        self._digests: dict[tuple, str] = {}  # (dev, inode, size, mtime_ns) -> sha256
+        self._inflight: dict[str, Lock] = {}
+        self._stats = {"hits": 0, "misses": 0, "probes": 0}
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def _file_key(path: str) -> tuple:
+        # Keyed by inode, so upload handles, blobs and workspace links share one entry
+        st = os.stat(path)
+        return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def remember_digest(self, path: str, digest: str) -> None:
+        """Record a digest computed elsewhere (e.g. by the upload store)."""
+        key = self._file_key(path)
+        with self._lock:
+            if len(self._digests) > 5000:
+                self._digests.clear()
+            self._digests[key] = digest
+
+    def digest_for(self, path: str, compute: bool = True) -> Optional[str]:
+        key = self._file_key(path)
+        with self._lock:
+            digest = self._digests.get(key)
+        if digest or not compute:
+            return digest
+        digest = _sha256_file(path)
+        self.remember_digest(path, digest)
+        return digest
+
+    def _json_path(self, digest: str) -> Optional[str]:
+        return os.path.join(self.cache_dir, f"{digest}.json") if self.cache_dir else None
+
+    def lookup(self, digest: str) -> Optional[DocumentProbe]:
+        with self._lock:
+            probe = self._memory.get(digest)
+            if probe is not None:
+                self._memory.move_to_end(digest)
+                return probe
+        json_path = self._json_path(digest)
+        if not json_path or not os.path.exists(json_path):
+            return None
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                probe = DocumentProbe.from_dict(json.load(f))
+        except Exception:
+            return None
+        self._remember(probe)
+        return probe
+
+    def _remember(self, probe: DocumentProbe) -> None:
+        with self._lock:
+            self._memory[probe.sha256] = probe
+            self._memory.move_to_end(probe.sha256)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _store(self, probe: DocumentProbe) -> None:
+        self._remember(probe)
+        json_path = self._json_path(probe.sha256)
+        if not json_path:
+            return
+        fd, tmp = tempfile.mkstemp(prefix=".tmp_", dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(asdict(probe), f)
+            os.replace(tmp, json_path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        self._prune_disk()
+
+    def _prune_disk(self) -> None:
+        """Keep at most max_entries JSON files (oldest first out)."""
+        try:
+            names = [n for n in os.listdir(self.cache_dir) if n.endswith(".json")]
+        except OSError:
+            return
+        excess = len(names) - self.max_entries
+        if excess <= 0:
+            return
+        paths = sorted((os.path.join(self.cache_dir, n) for n in names), key=os.path.getmtime)
+        for path in paths[:excess]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def get(self, path: str, digest: Optional[str] = None, compute: bool = True) -> Optional[DocumentProbe]:
+        """Probe for path, from cache when possible.
+
+        With compute=False nothing expensive happens: a file whose digest is
+        not already known, or whose probe is not cached, returns None.
+        """
+        if digest:
+            self.remember_digest(path, digest)
+        else:
+            digest = self.digest_for(path, compute=compute)
+            if not digest:
+                return None
+        probe = self.lookup(digest)
+        with self._lock:
+            self._stats["hits" if probe else "misses"] += 1
+        if probe is not None or not compute:
+            return probe
+
+        # One probe per digest at a time: a concurrent caller waits and then hits the cache
+        with self._lock:
+            inflight = self._inflight.setdefault(digest, Lock())
+        with inflight:
+            probe = self.lookup(digest)
+            if probe is None:
+                probe = probe_document(path, digest)
+                with self._lock:
+                    self._stats["probes"] += 1
+                self._store(probe)
+        with self._lock:
+            self._inflight.pop(digest, None)
+        return probe
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._memory),
+                "hit_ratio": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+            }
+
+
+_CACHE: Optional[ProbeCache] = None
+_CACHE_LOCK = Lock()
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+
+
+def get_probe_cache() -> Optional[ProbeCache]:
+    """Shared cache built from Settings; None when disabled."""
+    global _CACHE
+    if _CACHE is not None:
+        return _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            from app.config import settings
+            if not settings.probe_cache_enabled:
+                return None
+            _CACHE = ProbeCache(
+                cache_dir=settings.probe_cache_dir,
+                max_entries=settings.probe_cache_max_entries,
+            )
+    return _CACHE
+
+
+def get_probe(path: str, digest: Optional[str] = None, compute: bool = True) -> Optional[DocumentProbe]:
+    """Cached probe for path, or None (missing file, cache miss with compute=False, failure)."""
+    try:
+        if not path or not os.path.isfile(path):
+            return None
+        cache = get_probe_cache()
+        if cache is None:
+            return probe_document(path, digest) if compute else None
+        return cache.get(path, digest=digest, compute=compute)
+    except Exception as e:
+        print(f"[PROBE] Failed for {os.path.basename(path)}: {e}")
+        return None
+
+
+def submit_probe(path: str, digest: Optional[str] = None) -> None:
+    """Probe a freshly uploaded file on a background thread."""
+    global _EXECUTOR
+    if get_probe_cache() is None:
+        return
+    with _CACHE_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="probe")
+    _EXECUTOR.submit(get_probe, path, digest)
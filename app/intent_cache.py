@@ -0,0 +1,194 @@
+"""
+Intent Cache - Skip clarify_intent (and its LLM fallback) for repeated prompts.
+
+Problem: the same few prompts ("compress", "convert to docx", "merge all
+files") arrive over and over with different uploads. Every one of them runs
+the full clarification pipeline: one-flow resolution, typo repair, tens of
+regexes and, for anything ambiguous, an LLM round trip of a second or more.
+
+Solution: an in-memory LRU with a TTL, keyed by
+- the normalized prompt (whitespace collapsed; case kept for watermark text)
+- the file-type signature of the upload: extensions in order, so the count
+  is part of it but the names are not
+- last_question, since the same reply means different things after
+  different questions
+
+Only resolved intents are cached, never clarifications. File names inside
+the intent are stored as upload positions and rebound to the new upload on
+a hit (main then runs _resolve_intent_filenames as usual).
+
+Not cached: prompts that name a file (the intent depends on which names were
+uploaded) and percentage compression (the target depends on file size).
+"""
+
+import os
+import re
+import copy
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional
+
+
+_FILE_FIELDS = ("file", "files")
+_NAMED_FILE_RE = re.compile(r"\.(pdf|docx|png|jpe?g)\b", re.IGNORECASE)
+
+
+def normalize_prompt(prompt: str) -> str:
+    return " ".join((prompt or "").split())
+
+
+def file_signature(file_names: list[str]) -> tuple:
+    """Extensions in upload order: ('.pdf', '.pdf') for two PDFs, whatever they are called."""
+    return tuple(os.path.splitext(name or "")[1].lower() for name in (file_names or []))
+
+
+def is_cacheable_prompt(prompt: str, file_names: list[str]) -> bool:
+    if not prompt or "%" in prompt:
+        return False
+    if _NAMED_FILE_RE.search(prompt):
+        return False
+    lowered = prompt.lower()
+    for name in file_names or []:
+        stem = os.path.splitext(name or "")[0].lower()
+        if len(stem) >= 3 and stem in lowered:
+            return False
+    return True
+
+
+def _operations(intent):
+    for it in intent if isinstance(intent, list) else [intent]:
+        op = it.get_operation()
+        if op is not None:
+            yield op
+
+
+def _rebind_files(intent, mapping) -> bool:
+    """Replace every file reference via mapping(name) -> name; False if one is unmapped."""
+    for op in _operations(intent):
+        for field in _FILE_FIELDS:
+            value = getattr(op, field, None)
+            if isinstance(value, str):
+                mapped = mapping(value)
+                if mapped is None:
+                    return False
+                setattr(op, field, mapped)
+            elif isinstance(value, list):
+                mapped = [mapping(v) for v in value]
+                if any(m is None for m in mapped):
+                    return False
+                setattr(op, field, mapped)
+    return True
+
+
+class _Entry:
+    __slots__ = ("intent", "expires_at", "parse_seconds")
+
+    def __init__(self, intent, expires_at: float, parse_seconds: float):
+        self.intent = intent
+        self.expires_at = expires_at
+        self.parse_seconds = parse_seconds
+
+
+class IntentCache:
+    """LRU + TTL cache of resolved intents with file names stored as upload positions."""
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 600.0):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self._lock = Lock()
+        self._entries: "OrderedDict[tuple, _Entry]" = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "bypassed": 0, "expired": 0}
+        self._saved_seconds = 0.0
+
+    @staticmethod
+    def make_key(prompt: str, file_names: list[str], last_question: str = "") -> tuple:
+        return (normalize_prompt(prompt), file_signature(file_names), normalize_prompt(last_question))
+
+    def get(self, prompt: str, file_names: list[str], last_question: str = ""):
+        """A fresh copy of the cached intent bound to file_names, or None."""
+        if not is_cacheable_prompt(prompt, file_names):
+            with self._lock:
+                self._stats["bypassed"] += 1
+            return None
+        key = self.make_key(prompt, file_names, last_question)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= now:
+                del self._entries[key]
+                self._stats["expired"] += 1
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            self._saved_seconds += entry.parse_seconds
+            template = entry.intent
+
+        intent = copy.deepcopy(template)
+        names = list(file_names)
+        _rebind_files(intent, lambda ref: names[int(ref[1:])] if ref.startswith("@") else ref)
+        return intent
+
+    def put(self, prompt: str, file_names: list[str], last_question: str, intent, parse_seconds: float) -> bool:
+        """Cache a resolved intent; False when it cannot be keyed by upload position."""
+        if intent is None or not is_cacheable_prompt(prompt, file_names):
+            return False
+        positions = {}
+        for idx, name in enumerate(file_names or []):
+            positions.setdefault(name, idx)
+            positions.setdefault((name or "").lower(), idx)
+
+        def to_position(ref):
+            idx = positions.get(ref, positions.get((ref or "").lower()))
+            return None if idx is None else f"@{idx}"
+
+        template = copy.deepcopy(intent)
+        if not _rebind_files(template, to_position):
+            return False
+
+        key = self.make_key(prompt, file_names, last_question)
+        with self._lock:
+            self._entries[key] = _Entry(template, time.time() + self.ttl_seconds, max(0.0, parse_seconds))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._stats["stores"] += 1
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "hit_ratio": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+                "saved_seconds": round(self._saved_seconds, 3),
+            }
+
+
+_CACHE: Optional[IntentCache] = None
+_CACHE_LOCK = Lock()
+
+
+def get_intent_cache() -> Optional[IntentCache]:
+    """Shared cache built from Settings; None when disabled."""
+    global _CACHE
+    if _CACHE is not None:
+        return _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            from app.config import settings
+            if not settings.intent_cache_enabled:
+                return None
+            _CACHE = IntentCache(
+                max_entries=settings.intent_cache_max_entries,
+                ttl_seconds=settings.intent_cache_ttl_seconds,
+            )
+    return _CACHE
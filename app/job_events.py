@@ -0,0 +1,73 @@
+"""
+Job Events - Push job progress instead of 1-second polling.
+
+Problem: /job/{id}/status is polled every second per open tab, and each poll
+also samples /proc for RAM stats. Hundreds of tabs means thousands of requests
+per second that mostly return "nothing changed".
+
+Solution: JobQueue bumps JobInfo.event_id and fires listeners on every visible
+state change (progress, ETA context, start, completion, cancellation, queue
+movement). job_event_stream turns that into an async stream of snapshots:
+
+- "progress" events while the job is pending/processing
+- one "result" event once it is completed/failed/cancelled, then the stream ends
+- "heartbeat" events after `heartbeat_seconds` of silence, carrying the current
+  ETA so countdowns keep moving and proxies keep the connection open
+- resume: a client reconnecting with the last event id it saw only receives
+  something once the job has moved past it
+
+/job/{id}/status stays available as the polling fallback.
+"""
+
+import asyncio
+from typing import AsyncIterator, Callable, Optional
+
+
+TERMINAL_STATUSES = frozenset({"completed", "failed", "cancelled"})
+
+
+async def job_event_stream(
+    queue,
+    job_id: str,
+    snapshot: Callable[[object], dict],
+    last_event_id: Optional[int] = None,
+    heartbeat_seconds: float = 15.0,
+) -> AsyncIterator[tuple[Optional[int], str, dict]]:
+    """Yield (event_id, event_name, payload) for a job until it reaches a terminal state."""
+    loop = asyncio.get_running_loop()
+    changed = asyncio.Event()
+
+    def _wake() -> None:
+        loop.call_soon_threadsafe(changed.set)
+
+    queue.add_listener(job_id, _wake)
+    try:
+        heartbeat_due = False
+        while True:
+            changed.clear()
+            job = queue.get_job(job_id)
+            if job is None:
+                yield None, "error", {"job_id": job_id, "message": "Job not found"}
+                return
+
+            payload = snapshot(job)
+            terminal = payload.get("status") in TERMINAL_STATUSES
+            if last_event_id is None or job.event_id > last_event_id or terminal:
+                last_event_id = job.event_id
+                yield job.event_id, "result" if terminal else "progress", payload
+                if terminal:
+                    return
+            elif heartbeat_due:
+                yield None, "heartbeat", {
+                    "job_id": job_id,
+                    "status": payload.get("status"),
+                    "estimated_remaining": payload.get("estimated_remaining"),
+                }
+
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=heartbeat_seconds)
+                heartbeat_due = False
+            except asyncio.TimeoutError:
+                heartbeat_due = True
+    finally:
+        queue.remove_listener(job_id, _wake)
@@ -6,6 +6,7 @@ OPTIMIZATIONS:
 - Action 6: Compress job data (1KB → 256 bytes per job)
 - Automatic cleanup after 30 minutes
 - Thread-safe operations
+- Fixed-size worker pool fed from a priority queue (FIFO within a priority)
 
 Memory Impact: 100-150MB freed (Action 5) + 75% per job (Action 6)
 """
@@ -13,10 +14,12 @@ Memory Impact: 100-150MB freed (Action 5) + 75% per job (Action 6)
 import os
 import time
 import uuid
+import heapq
+import itertools
 import traceback
 from dataclasses import dataclass, field
 from collections import deque
-from threading import Thread, Lock
+from threading import Thread, Lock, Condition
 from typing import Optional, Literal, Callable
 from enum import Enum
 
@@ -31,6 +34,12 @@ class JobStatus(str, Enum):
     CANCELLED = "cancelled"   # Cancelled by user
 
 
+# Priority classes (lower value runs first; FIFO within a class)
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 10
+
+
 @dataclass
 class JobInfo:
     """Stores all information about a job"""
@@ -46,8 +55,11 @@ class JobInfo:
     operation_started_at: Optional[float] = None
     input_total_mb: Optional[float] = None
     max_eta_seconds: Optional[float] = None  # Maximum ETA set once at start, only counts down
+    priority: int = PRIORITY_NORMAL
+    event_id: int = 0  # Bumped on every visible state change (SSE event id)
     
     files: list[str] = field(default_factory=list)
+    input_blobs: dict[str, str] = field(default_factory=dict)  # file name -> upload store digest
     prompt: str = ""
     session_id: Optional[str] = None
     context_question: Optional[str] = None
@@ -58,6 +70,7 @@ class JobInfo:
     result_operation: Optional[str] = None
     result_output_file: Optional[str] = None
     result_options: Optional[list[str]] = None
+    result_details: Optional[dict] = None  # Operation parameters chosen at run time
     error_message: Optional[str] = None
 
 
@@ -69,6 +82,9 @@ class JobQueue:
     - Action 5: Keep last 50 jobs in memory (deque), archive older to SQLite
     - Action 6: Compress job data (1KB → 256 bytes)
     - Automatic cleanup after 30 minutes
+    - Fixed pool of `max_concurrent` workers blocked on a Condition; no
+      thread-per-job and no sleep polling. Jobs are started in
+      (priority, submission order).
     
     Memory Impact: 100-150MB freed + 75% per job compression
     """
@@ -77,13 +93,21 @@ class JobQueue:
         self._jobs: dict[str, JobInfo] = {}
         self._active_jobs_queue: deque = deque(maxlen=max_active_jobs)  # Action 5: Keep last 50
         self._lock = Lock()
-        self._max_concurrent = max_concurrent
+        self._work_available = Condition(self._lock)
+        self._pending: list[tuple[int, int, str]] = []  # heap of (priority, seq, job_id)
+        self._positions: dict[str, int] = {}  # job_id -> 1-based queue position
+        self._seq = itertools.count()
+        self._workers: list[Thread] = []
+        self._max_concurrent = max(1, int(max_concurrent))
         self._cleanup_after_seconds = cleanup_after_minutes * 60
         self._max_active_jobs = max_active_jobs
         self._processing_count = 0
         self._processor_func: Optional[Callable] = None
+        self._wait_samples: deque = deque(maxlen=100)  # Recent queue wait times (seconds)
         
         self._archive = None
+        self._archive_hook: Optional[Callable[[str], None]] = None
+        self._listeners: dict[str, list[Callable[[], None]]] = {}  # job_id -> change callbacks
         try:
             from app.job_archive import job_archive
             self._archive = job_archive
@@ -93,6 +117,21 @@ class JobQueue:
     def set_processor(self, func: Callable):
         """Set the function that processes jobs"""
         self._processor_func = func
+
+    def set_archive_hook(self, func: Callable[[str], None]):
+        """Set a callback run with the job ID after a job is archived (e.g. workspace cleanup)"""
+        self._archive_hook = func
+
+    def configure(self, max_concurrent: Optional[int] = None, cleanup_after_minutes: Optional[int] = None):
+        """Apply settings-driven limits. Extra workers are started if the pool grows."""
+        with self._lock:
+            if max_concurrent is not None:
+                self._max_concurrent = max(1, int(max_concurrent))
+            if cleanup_after_minutes is not None:
+                self._cleanup_after_seconds = int(cleanup_after_minutes) * 60
+            started = bool(self._workers)
+        if started:
+            self._ensure_workers()
     
     def create_job(
         self,
@@ -101,6 +140,8 @@ class JobQueue:
         session_id: Optional[str] = None,
         context_question: Optional[str] = None,
         input_source: Optional[str] = None,
+        priority: int = PRIORITY_NORMAL,
+        input_blobs: Optional[dict[str, str]] = None,
     ) -> str:
         """Create a new job and return its ID"""
         job_id = str(uuid.uuid4())[:12]  # Short IDs are easier to work with
@@ -108,10 +149,12 @@ class JobQueue:
         job = JobInfo(
             id=job_id,
             files=files,
+            input_blobs=dict(input_blobs or {}),
             prompt=prompt,
             session_id=session_id,
             context_question=context_question,
             input_source=input_source,
+            priority=int(priority),
         )
         
         with self._lock:
@@ -125,14 +168,71 @@ class JobQueue:
         """Get job info by ID"""
         with self._lock:
             return self._jobs.get(job_id)
+
+    def get_queue_position(self, job_id: str) -> Optional[int]:
+        """1-based position among pending jobs, or None if the job is not queued."""
+        with self._lock:
+            return self._queue_position_locked(job_id)
+
+    def _queue_position_locked(self, job_id: str) -> Optional[int]:
+        return self._positions.get(job_id)
+
+    def _reindex_locked(self) -> None:
+        """Recompute queue positions after the pending set changed. Caller holds the lock.
+
+        Drops entries of jobs that are no longer pending; a sorted list is a valid heap.
+        """
+        self._pending = sorted(
+            entry for entry in self._pending
+            if (job := self._jobs.get(entry[2])) is not None and job.status == JobStatus.PENDING
+        )
+        self._positions = {jid: idx for idx, (_, _, jid) in enumerate(self._pending, start=1)}
+
+    def get_wait_seconds(self, job_id: str) -> Optional[float]:
+        """Time spent waiting in the queue (live for pending jobs, final once started)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job:
+                return None
+            end = job.started_at if job.started_at else (job.completed_at or time.time())
+            return max(0.0, end - job.created_at)
     
+    def add_listener(self, job_id: str, callback: Callable[[], None]):
+        """Register a callback fired (from the changing thread) whenever the job's state changes"""
+        with self._lock:
+            self._listeners.setdefault(job_id, []).append(callback)
+
+    def remove_listener(self, job_id: str, callback: Callable[[], None]):
+        with self._lock:
+            callbacks = self._listeners.get(job_id)
+            if callbacks and callback in callbacks:
+                callbacks.remove(callback)
+                if not callbacks:
+                    del self._listeners[job_id]
+
+    def _touch_locked(self, job: JobInfo) -> None:
+        job.event_id += 1
+
+    def _notify(self, *job_ids: str) -> None:
+        """Fire change callbacks. Must be called without holding the lock."""
+        with self._lock:
+            callbacks = [cb for jid in job_ids for cb in self._listeners.get(jid, ())]
+        for cb in callbacks:
+            try:
+                cb()
+            except Exception as e:
+                print(f"[JOB EVENTS] Listener failed: {e}")
+
     def update_progress(self, job_id: str, progress: int, message: str):
         """Update job progress (0-100) and message"""
         with self._lock:
             job = self._jobs.get(job_id)
-            if job and job.status == JobStatus.PROCESSING:
-                job.progress = min(100, max(0, progress))
-                job.progress_message = message
+            if not job or job.status != JobStatus.PROCESSING:
+                return
+            job.progress = min(100, max(0, progress))
+            job.progress_message = message
+            self._touch_locked(job)
+        self._notify(job_id)
 
     def set_operation_context(self, job_id: str, operation_type: Optional[str], input_total_mb: Optional[float]):
         """Set current operation context used to compute realtime ETA."""
@@ -143,6 +243,8 @@ class JobQueue:
             job.current_operation = operation_type
             job.operation_started_at = time.time() if operation_type else None
             job.input_total_mb = input_total_mb
+            self._touch_locked(job)
+        self._notify(job_id)
     
     def set_max_eta(self, job_id: str, max_seconds: float):
         """Set maximum ETA estimate (only set once at start, never increases)"""
@@ -152,14 +254,17 @@ class JobQueue:
                 job.max_eta_seconds = max_seconds
     
     def cancel_job(self, job_id: str) -> bool:
-        """Cancel a job if it's still pending"""
+        """Cancel a job if it's still pending (its heap entry is dropped lazily by the workers)"""
         with self._lock:
             job = self._jobs.get(job_id)
-            if job and job.status in (JobStatus.PENDING, JobStatus.UPLOADING):
-                job.status = JobStatus.CANCELLED
-                job.completed_at = time.time()
-                return True
-            return False
+            if not job or job.status not in (JobStatus.PENDING, JobStatus.UPLOADING):
+                return False
+            job.status = JobStatus.CANCELLED
+            job.completed_at = time.time()
+            self._touch_locked(job)
+            self._reindex_locked()
+        self._notify(job_id)
+        return True
     
     def cleanup_old_jobs(self):
         """
@@ -174,6 +279,7 @@ class JobQueue:
             stale_ids = [
                 jid for jid, job in self._jobs.items()
                 if job.created_at < cutoff
+                and job.status not in (JobStatus.PENDING, JobStatus.PROCESSING)
             ]
             
             for jid in stale_ids:
@@ -186,36 +292,76 @@ class JobQueue:
             
             if stale_ids:
                 print(f"[JOB CLEANUP] Archived {len(stale_ids)} old jobs to SQLite")
+
+        if self._archive_hook:
+            for jid in stale_ids:
+                try:
+                    self._archive_hook(jid)
+                except Exception as e:
+                    print(f"[JOB CLEANUP] Archive hook failed for {jid}: {e}")
     
     def _start_processing(self, job_id: str):
-        """Start processing a job in a background thread"""
-        thread = Thread(target=self._process_job, args=(job_id,), daemon=True)
-        thread.start()
-    
-    def _process_job(self, job_id: str):
-        """Process a job (runs in background thread)"""
-        job = self.get_job(job_id)
-        if not job:
-            return
-        
+        """Enqueue a job and wake one idle worker"""
+        self._ensure_workers()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job:
+                return
+            heapq.heappush(self._pending, (job.priority, next(self._seq), job_id))
+            self._reindex_locked()
+            self._work_available.notify()
+
+    def _ensure_workers(self):
+        """Start worker threads up to the configured pool size (idempotent)"""
+        with self._lock:
+            missing = self._max_concurrent - len(self._workers)
+            for _ in range(max(0, missing)):
+                idx = len(self._workers) + 1
+                worker = Thread(target=self._worker_loop, name=f"job-worker-{idx}", daemon=True)
+                self._workers.append(worker)
+                worker.start()
+
+    def _next_job_locked(self) -> Optional[JobInfo]:
+        """Pop the next runnable job, skipping cancelled/vanished entries. Caller holds the lock."""
+        while self._pending:
+            _, _, job_id = heapq.heappop(self._pending)
+            job = self._jobs.get(job_id)
+            if job and job.status == JobStatus.PENDING:
+                return job
+        return None
+
+    def _worker_loop(self):
+        """Worker thread: block until a job is queued, then process it"""
         while True:
             with self._lock:
-                if self._processing_count < self._max_concurrent:
-                    self._processing_count += 1
-                    break
-            time.sleep(0.5)
-        
-        try:
-            with self._lock:
-                if job.status == JobStatus.CANCELLED:
-                    return
+                job = self._next_job_locked()
+                while job is None:
+                    self._work_available.wait()
+                    job = self._next_job_locked()
+                self._processing_count += 1
                 job.status = JobStatus.PROCESSING
                 job.started_at = time.time()
                 job.progress = 5
                 job.progress_message = "Starting processing..."
-            
+                self._wait_samples.append(job.started_at - job.created_at)
+                self._touch_locked(job)
+                # Everyone still queued moved up one place
+                self._reindex_locked()
+                moved = list(self._positions)
+                for jid in moved:
+                    self._touch_locked(self._jobs[jid])
+            self._notify(job.id, *moved)
+            try:
+                self._process_job(job)
+            finally:
+                with self._lock:
+                    self._processing_count -= 1
+    
+    def _process_job(self, job: JobInfo):
+        """Process a job (runs in a worker thread)"""
+        try:
             if self._processor_func:
-                self._processor_func(job_id)
+                self._processor_func(job.id)
             else:
                 raise RuntimeError("No processor function configured")
                 
@@ -226,11 +372,10 @@ class JobQueue:
                 job.result_status = "error"
                 job.result_message = f"Processing failed: {str(e)}"
                 job.completed_at = time.time()
-                print(f"[JOB ERROR] {job_id}: {e}")
+                self._touch_locked(job)
+                print(f"[JOB ERROR] {job.id}: {e}")
                 traceback.print_exc()
-        finally:
-            with self._lock:
-                self._processing_count -= 1
+            self._notify(job.id)
     
     def complete_job(
         self,
@@ -240,6 +385,7 @@ class JobQueue:
         operation: Optional[str] = None,
         output_file: Optional[str] = None,
         options: Optional[list[str]] = None,
+        details: Optional[dict] = None,
     ):
         """Mark a job as completed with results"""
         with self._lock:
@@ -254,9 +400,12 @@ class JobQueue:
                 job.result_operation = operation
                 job.result_output_file = output_file
                 job.result_options = options
+                job.result_details = details
                 job.current_operation = None
                 job.operation_started_at = None
                 job.input_total_mb = None
+                self._touch_locked(job)
+        self._notify(job_id)
     
     def fail_job(self, job_id: str, error_message: str):
         """Mark a job as failed"""
@@ -265,13 +414,22 @@ class JobQueue:
     def get_stats(self) -> dict:
         """Get queue statistics"""
         with self._lock:
+            now = time.time()
             total = len(self._jobs)
             by_status = {}
             for job in self._jobs.values():
                 by_status[job.status.value] = by_status.get(job.status.value, 0) + 1
+            # Counts and wait times only: a job ID is the credential for its result and cancel endpoints
+            queued_waits = [now - self._jobs[jid].created_at for jid in self._positions]
+            waits = list(self._wait_samples)
             return {
                 "total_jobs": total,
                 "processing": self._processing_count,
+                "workers": self._max_concurrent,
+                "queued": len(queued_waits),
+                "oldest_queued_wait_seconds": round(max(queued_waits), 2) if queued_waits else 0.0,
+                "avg_wait_seconds": round(sum(waits) / len(waits), 2) if waits else 0.0,
+                "max_wait_seconds": round(max(waits), 2) if waits else 0.0,
                 "by_status": by_status,
             }
 
@@ -0,0 +1,229 @@
+"""
+LLM Response Cache - SQLite store for repeated deterministic LLM calls.
+
+Problem: the same requests went to Groq again and again. AIParser sends the
+identical SYSTEM_PROMPT plus the same user message for a prompt it has parsed
+before, the phrasers rewrite the same instructions, and every one of those
+calls costs a round trip, rate-limit budget and tokens for an answer that at
+temperature <= 0.2 comes back the same.
+
+Solution: completions are stored in a small SQLite database keyed by a
+SHA-256 of (provider/model, messages, temperature, json_mode, max_tokens).
+max_tokens is part of the key so a short-budget answer is never served for a
+larger budget. Only low-temperature calls (<= max_temperature) are cached or
+looked up; creative calls (document analysis at 0.7) always go to the model.
+
+- TTL: rows older than ttl_seconds are misses and get deleted
+- Size: beyond max_entries rows or max_mb of content, the least recently
+  used rows are evicted (checked every _EVICT_EVERY stores)
+- Hits, misses, stores, expirations and evictions are counted for /api/status
+
+One connection (WAL mode) is shared behind a lock; lookups are primary-key
+reads on a local file, cheap enough to run inline in async handlers too.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from threading import Lock
+from typing import Optional
+
+
+_EVICT_EVERY = 50  # Stores between eviction passes
+
+
+class LLMResponseCache:
+    """Completions by request hash, with TTL and LRU size limits."""
+
+    def __init__(
+        self,
+        db_path: str = "data/llm_cache.db",
+        ttl_seconds: float = 86400.0,
+        max_entries: int = 5000,
+        max_mb: float = 50.0,
+        max_temperature: float = 0.2,
+    ):
+        self.db_path = db_path
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.max_temperature = float(max_temperature)
+        self._lock = Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "bypassed": 0, "expired": 0, "evicted": 0, "errors": 0}
+        self._stores_since_evict = 0
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                content TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_last_used ON llm_responses(last_used)")
+        with self._lock:
+            self._evict()
+
+    @staticmethod
+    def make_key(model: str, messages: list, temperature: float, json_mode: bool, max_tokens: Optional[int] = None) -> str:
+        canonical = json.dumps(
+            [model, messages, round(float(temperature), 4), bool(json_mode), max_tokens],
+            sort_keys=True, ensure_ascii=False, separators=(",", ":"),
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def cacheable(self, temperature: float) -> bool:
+        return temperature is not None and float(temperature) <= self.max_temperature
+
+    def get(self, model: str, messages: list, temperature: float, json_mode: bool = False, max_tokens: Optional[int] = None) -> Optional[str]:
+        """Cached completion text, or None (miss, expired, or temperature too high)."""
+        if not self.cacheable(temperature):
+            with self._lock:
+                self._stats["bypassed"] += 1
+            return None
+        key = self.make_key(model, messages, temperature, json_mode, max_tokens)
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT content, created_at FROM llm_responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and now - row[1] > self.ttl_seconds:
+                    self._conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                    self._stats["expired"] += 1
+                    row = None
+                if row is None:
+                    self._stats["misses"] += 1
+                    return None
+                self._conn.execute(
+                    "UPDATE llm_responses SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key)
+                )
+                self._stats["hits"] += 1
+                return row[0]
+            except sqlite3.Error as e:
+                self._stats["errors"] += 1
+                print(f"[LLM CACHE] Lookup failed: {e}")
+                return None
+
+    def put(self, model: str, messages: list, temperature: float, json_mode: bool, max_tokens: Optional[int], content: str) -> None:
+        if not content or not self.cacheable(temperature):
+            return
+        key = self.make_key(model, messages, temperature, json_mode, max_tokens)
+        now = time.time()
+        size = len(content.encode("utf-8"))
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_responses (key, model, content, size, created_at, last_used, hits) "
+                    "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                    (key, model, content, size, now, now),
+                )
+                self._stats["stores"] += 1
+                self._stores_since_evict += 1
+                if self._stores_since_evict >= _EVICT_EVERY:
+                    self._evict()
+            except sqlite3.Error as e:
+                self._stats["errors"] += 1
+                print(f"[LLM CACHE] Store failed: {e}")
+
+    def _evict(self) -> None:
+        """Drop expired rows, then least recently used ones beyond the size limits (caller holds the lock)."""
+        self._stores_since_evict = 0
+        try:
+            cursor = self._conn.execute(
+                "DELETE FROM llm_responses WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            )
+            self._stats["expired"] += max(0, cursor.rowcount)
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_responses"
+            ).fetchone()
+            if count <= self.max_entries and total <= self.max_bytes:
+                return
+            kept, kept_bytes, drop = 0, 0, []
+            for key, size in self._conn.execute("SELECT key, size FROM llm_responses ORDER BY last_used DESC"):
+                if kept < self.max_entries and kept_bytes + size <= self.max_bytes:
+                    kept += 1
+                    kept_bytes += size
+                else:
+                    drop.append((key,))
+            self._conn.executemany("DELETE FROM llm_responses WHERE key = ?", drop)
+            self._stats["evicted"] += len(drop)
+        except sqlite3.Error as e:
+            self._stats["errors"] += 1
+            print(f"[LLM CACHE] Eviction failed: {e}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_responses")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            try:
+                count, total = self._conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_responses"
+                ).fetchone()
+            except sqlite3.Error:
+                count, total = 0, 0
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": count,
+                "size_mb": round(total / (1024 * 1024), 3),
+                "hit_ratio": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+            }
+
+
+_CACHE: Optional[LLMResponseCache] = None
+_CACHE_LOCK = Lock()
+_CACHE_DISABLED = False
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Shared cache built from Settings; None when disabled or unavailable."""
+    global _CACHE, _CACHE_DISABLED
+    if _CACHE is not None or _CACHE_DISABLED:
+        return _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None and not _CACHE_DISABLED:
+            from app.config import settings
+            if not settings.llm_cache_enabled:
+                _CACHE_DISABLED = True
+                return None
+            try:
+                _CACHE = LLMResponseCache(
+                    db_path=settings.llm_cache_path,
+                    ttl_seconds=settings.llm_cache_ttl_seconds,
+                    max_entries=settings.llm_cache_max_entries,
+                    max_mb=settings.llm_cache_max_mb,
+                    max_temperature=settings.llm_cache_max_temperature,
+                )
+            except sqlite3.Error as e:
+                print(f"[LLM CACHE] Could not open {settings.llm_cache_path}, caching disabled: {e}")
+                _CACHE_DISABLED = True
+    return _CACHE
+
+
+def cached_completion(model: str, messages: list, temperature: float, json_mode: bool = False, max_tokens: Optional[int] = None) -> Optional[str]:
+    """Cached completion for this request, if the cache is on and has one."""
+    cache = get_llm_cache()
+    return cache.get(model, messages, temperature, json_mode, max_tokens) if cache else None
+
+
+def store_completion(model: str, messages: list, temperature: float, json_mode: bool, max_tokens: Optional[int], content: str) -> None:
+    cache = get_llm_cache()
+    if cache is not None:
+        cache.put(model, messages, temperature, json_mode, max_tokens, content)
@@ -0,0 +1,232 @@
+"""
+LLM Clients - One pooled, keep-alive HTTP client shared by every LLM call.
+
+Problem: safe_llm_call built a new Groq client on every call, GroqRephraser
+did the same per rephrase, and BasetenOpenAICompatRephraser opened (and
+closed) an httpx.Client per request. Each client has its own connection
+pool, so every LLM hop paid DNS + TCP + TLS setup again before sending a
+single token, and the pools were thrown away right after.
+
+Solution: a process-wide registry that owns
+- one httpx.Client with bounded pool limits and keep-alive, shared by every
+  provider (httpx keeps a separate pool per origin inside it), and
+- one Groq client per API key, built on top of that httpx.Client.
+Clients are created lazily under a lock and are safe to use from any thread.
+
+The async handlers get the same arrangement on the asyncio side: one
+httpx.AsyncClient and one AsyncGroq per key. Those are bound to the event
+loop that created them, so a request from a different loop (a second
+asyncio.run, a test) gets its own set. aclose_llm_clients() closes both
+kinds from the app shutdown hook; anything asking for a client afterwards
+gets a fresh one.
+
+Every chat request on these clients is paced by the shared rate limiter
+(app/llm_rate_limit.py) through httpx event hooks.
+
+Pool limits and timeouts come from Settings (llm_pool_* / llm_*_timeout_*).
+httpx and groq are imported lazily, so importing this module is free.
+"""
+
+import asyncio
+from threading import Lock
+from typing import Any, Optional
+
+from app.llm_rate_limit import observe_response, observe_response_async, pace_request, pace_request_async
+
+
+class LLMClientRegistry:
+    """Lazily created, shared LLM clients with pooled keep-alive connections."""
+
+    def __init__(
+        self,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry_seconds: float = 60.0,
+        connect_timeout_seconds: float = 5.0,
+        timeout_seconds: float = 30.0,
+    ):
+        self.max_connections = max(1, int(max_connections))
+        self.max_keepalive_connections = max(0, min(int(max_keepalive_connections), self.max_connections))
+        self.keepalive_expiry_seconds = float(keepalive_expiry_seconds)
+        self.connect_timeout_seconds = float(connect_timeout_seconds)
+        self.timeout_seconds = float(timeout_seconds)
+        self._lock = Lock()
+        self._http: Optional[Any] = None
+        self._groq: dict[str, Any] = {}
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._async_http: Optional[Any] = None
+        self._async_groq: dict[str, Any] = {}
+        self._stats = {"http_clients_created": 0, "groq_clients_created": 0, "async_clients_created": 0, "requests": 0}
+
+    # Factories (overridable, e.g. in tests)
+    def _pool_options(self) -> dict:
+        import httpx
+        return {
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry_seconds,
+            ),
+            "timeout": httpx.Timeout(self.timeout_seconds, connect=self.connect_timeout_seconds),
+        }
+
+    def _new_http_client(self):
+        import httpx
+        return httpx.Client(**self._pool_options(), event_hooks={
+            "request": [self._count_request, pace_request],
+            "response": [observe_response],
+        })
+
+    def _new_groq_client(self, api_key: str, http_client):
+        from groq import Groq
+        return Groq(api_key=api_key, http_client=http_client, timeout=self.timeout_seconds)
+
+    def _new_async_http_client(self):
+        import httpx
+        return httpx.AsyncClient(**self._pool_options(), event_hooks={
+            "request": [self._count_request_async, pace_request_async],
+            "response": [observe_response_async],
+        })
+
+    def _new_async_groq_client(self, api_key: str, http_client):
+        from groq import AsyncGroq
+        return AsyncGroq(api_key=api_key, http_client=http_client, timeout=self.timeout_seconds)
+
+    def _count_request(self, _request) -> None:
+        self._stats["requests"] += 1
+
+    async def _count_request_async(self, _request) -> None:
+        self._stats["requests"] += 1
+
+    def http(self):
+        """Shared httpx.Client (pass per-request timeouts to .post where needed)."""
+        client = self._http
+        if client is not None:
+            return client
+        with self._lock:
+            if self._http is None:
+                self._http = self._new_http_client()
+                self._stats["http_clients_created"] += 1
+            return self._http
+
+    def groq(self, api_key: Optional[str] = None):
+        """Shared Groq client for api_key (default: settings.groq_api_key)."""
+        if api_key is None:
+            from app.config import settings
+            api_key = settings.groq_api_key
+        client = self._groq.get(api_key)
+        if client is not None:
+            return client
+        http_client = self.http()
+        with self._lock:
+            client = self._groq.get(api_key)
+            if client is None:
+                client = self._new_groq_client(api_key, http_client)
+                self._groq[api_key] = client
+                self._stats["groq_clients_created"] += 1
+            return client
+
+    def _bind_async_loop(self) -> None:
+        """Drop async clients made on another event loop (caller holds the lock)."""
+        loop = asyncio.get_running_loop()
+        if self._async_loop is not loop:
+            # Their connections belong to a loop we cannot await on; let them be collected
+            self._async_loop = loop
+            self._async_http = None
+            self._async_groq = {}
+
+    def async_http(self):
+        """Shared httpx.AsyncClient for the running event loop."""
+        with self._lock:
+            self._bind_async_loop()
+            if self._async_http is None:
+                self._async_http = self._new_async_http_client()
+                self._stats["async_clients_created"] += 1
+            return self._async_http
+
+    def async_groq(self, api_key: Optional[str] = None):
+        """Shared AsyncGroq client for api_key on the running event loop."""
+        if api_key is None:
+            from app.config import settings
+            api_key = settings.groq_api_key
+        http_client = self.async_http()
+        with self._lock:
+            client = self._async_groq.get(api_key)
+            if client is None:
+                client = self._new_async_groq_client(api_key, http_client)
+                self._async_groq[api_key] = client
+                self._stats["async_clients_created"] += 1
+            return client
+
+    def close(self) -> None:
+        """Close every pooled (sync) connection; later calls build new clients."""
+        with self._lock:
+            http_client, self._http = self._http, None
+            self._groq = {}
+        if http_client is not None:
+            try:
+                http_client.close()  # Groq clients share it, so this closes their pools too
+            except Exception as e:
+                print(f"[LLM] Error closing HTTP client: {e}")
+
+    async def aclose(self) -> None:
+        """close(), plus the async clients of the running loop."""
+        self.close()
+        with self._lock:
+            same_loop = self._async_loop is asyncio.get_running_loop()
+            http_client, self._async_http = self._async_http, None
+            self._async_groq = {}
+            self._async_loop = None
+        if http_client is not None and same_loop:
+            try:
+                await http_client.aclose()
+            except Exception as e:
+                print(f"[LLM] Error closing async HTTP client: {e}")
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._stats,
+                "open": self._http is not None,
+                "async_open": self._async_http is not None,
+                "groq_clients": len(self._groq),
+                "max_connections": self.max_connections,
+                "max_keepalive_connections": self.max_keepalive_connections,
+                "keepalive_expiry_seconds": self.keepalive_expiry_seconds,
+            }
+
+
+_REGISTRY: Optional[LLMClientRegistry] = None
+_REGISTRY_LOCK = Lock()
+
+
+def get_llm_clients() -> LLMClientRegistry:
+    """Shared registry built from Settings."""
+    global _REGISTRY
+    if _REGISTRY is not None:
+        return _REGISTRY
+    with _REGISTRY_LOCK:
+        if _REGISTRY is None:
+            from app.config import settings
+            _REGISTRY = LLMClientRegistry(
+                max_connections=settings.llm_pool_max_connections,
+                max_keepalive_connections=settings.llm_pool_max_keepalive,
+                keepalive_expiry_seconds=settings.llm_pool_keepalive_seconds,
+                connect_timeout_seconds=settings.llm_connect_timeout_seconds,
+                timeout_seconds=settings.llm_timeout_seconds,
+            )
+    return _REGISTRY
+
+
+def close_llm_clients() -> None:
+    """Close pooled LLM connections (called from the app shutdown hook)."""
+    registry = _REGISTRY
+    if registry is not None:
+        registry.close()
+
+
+async def aclose_llm_clients() -> None:
+    """Close pooled LLM connections, sync and async (called from the app shutdown hook)."""
+    registry = _REGISTRY
+    if registry is not None:
+        await registry.aclose()
@@ -0,0 +1,354 @@
+"""
+LLM Health - Background provider probes plus a circuit breaker per provider.
+
+Problem: check_llm_availability() sent a real chat completion every time it
+ran. startup_event waited for it before the server came up, and every
+GET /api/llm-status (polled by the frontend) paid for another one. Meanwhile
+safe_llm_call, AIParser and the phrasers kept retrying into a provider that
+was down, each call burning its full timeout before falling back.
+
+Solution:
+- A CircuitBreaker per provider ("groq:<model>", "baseten:<model>", the same
+  names the hedger uses). CLOSED lets calls through; failure_threshold
+  consecutive failures OPEN it, and calls fail fast (CircuitOpenError /
+  skipped provider) instead of waiting on a timeout. After reset_seconds it
+  goes HALF_OPEN and lets a single trial call through: success closes it,
+  failure opens it again (a trial that never reports back, e.g. a cancelled
+  hedge, expires after reset_seconds). Rate limits (HTTP 429) do not count:
+  the provider is up.
+- An LLMHealthMonitor thread that probes every provider on an interval with
+  the providers' model listing endpoints (no tokens spent) and feeds the
+  breakers, so an outage is noticed without user traffic paying for it. A
+  successful probe only moves an OPEN breaker to HALF_OPEN: the listing
+  endpoint being up does not prove chat completions are, so the next real
+  call is the trial that closes it.
+- status() returns the last probe results from memory; check_llm_availability
+  and /api/llm-status serve that instead of calling the LLM.
+"""
+
+import threading
+import time
+from threading import Lock
+from typing import Any, Awaitable, Callable, Optional
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a provider whose circuit is open."""
+
+
+def _is_rate_limit(error: Any) -> bool:
+    """HTTP 429 from the Groq/OpenAI SDK errors (status_code) or httpx.HTTPStatusError (response)."""
+    if getattr(error, "status_code", None) == 429:
+        return True
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None) == 429
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker for one provider."""
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_seconds: float = 30.0):
+        self.name = name
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_seconds = float(reset_seconds)
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.last_error: Optional[str] = None
+        self._trial_started_at: Optional[float] = None
+        self._lock = Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go out now (in HALF_OPEN, only one trial at a time)."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            now = time.monotonic()
+            if self.state == OPEN:
+                if now - self.opened_at < self.reset_seconds:
+                    return False
+                self.state = HALF_OPEN
+                self._trial_started_at = None
+            if self._trial_started_at is not None and now - self._trial_started_at < self.reset_seconds:
+                return False
+            self._trial_started_at = now
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != CLOSED:
+                print(f"[LLM-HEALTH] {self.name} recovered, circuit closed")
+            self.state = CLOSED
+            self.failures = 0
+            self.last_error = None
+            self._trial_started_at = None
+
+    def record_probe_success(self) -> None:
+        """A health probe got through: an OPEN breaker may try a real call now.
+
+        Probes hit the model listing endpoint, not chat completions, so they
+        only move OPEN -> HALF_OPEN; closing still takes a successful call.
+        """
+        with self._lock:
+            if self.state == OPEN:
+                print(f"[LLM-HEALTH] {self.name} probe ok, circuit half-open")
+                self.state = HALF_OPEN
+                self._trial_started_at = None
+
+    def record_failure(self, error: Any = None) -> None:
+        if error is not None and _is_rate_limit(error):
+            with self._lock:
+                self._trial_started_at = None
+            return
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error) if error is not None else self.last_error
+            self._trial_started_at = None
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    print(f"[LLM-HEALTH] {self.name} failing ({self.last_error}), circuit open for {self.reset_seconds:.0f}s")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"state": self.state, "failures": self.failures, "last_error": self.last_error}
+
+
+class LLMHealthMonitor:
+    """Breakers for every provider plus the background probe loop."""
+
+    def __init__(
+        self,
+        interval_seconds: float = 60.0,
+        failure_threshold: int = 3,
+        reset_seconds: float = 30.0,
+        probes: Optional[Callable[[], dict]] = None,
+    ):
+        self.interval_seconds = max(1.0, float(interval_seconds))
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._probes = probes or _default_probes
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._results: dict[str, dict] = {}
+        self.last_probe_at: Optional[float] = None
+        self._lock = Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def breaker(self, provider: str) -> CircuitBreaker:
+        breaker = self._breakers.get(provider)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(
+                    provider, CircuitBreaker(provider, self.failure_threshold, self.reset_seconds)
+                )
+        return breaker
+
+    def probe_once(self) -> dict:
+        """Probe every provider now, update breakers and the cached results."""
+        try:
+            probes = self._probes()
+        except Exception as e:
+            print(f"[LLM-HEALTH] Could not build probes: {e}")
+            probes = {}
+        results = {}
+        for provider, probe in probes.items():
+            started = time.perf_counter()
+            try:
+                probe()
+                ok, error = True, None
+                self.breaker(provider).record_probe_success()
+            except Exception as e:
+                ok, error = False, str(e)
+                self.breaker(provider).record_failure(e)
+            results[provider] = {
+                "ok": ok,
+                "error": error,
+                "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+                "checked_at": time.time(),
+            }
+        with self._lock:
+            first = self.last_probe_at is None
+            self._results = results
+            self.last_probe_at = time.time()
+        if first:
+            _log_first_status(self.status())
+        return results
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.probe_once()
+            self._stop.wait(self.interval_seconds)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="llm-health", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=2.0)
+
+    def status(self) -> dict:
+        """Cached availability in check_llm_availability's shape, plus per-provider detail."""
+        with self._lock:
+            results = dict(self._results)
+            last_probe_at = self.last_probe_at
+            breakers = dict(self._breakers)
+        healthy = [
+            name for name, result in results.items()
+            if result["ok"] and breakers.get(name, None) is not None and breakers[name].state != OPEN
+        ]
+        errors = [result["error"] for result in results.values() if result["error"]]
+        configured = _api_key_configured()
+        error = None
+        if not configured:
+            error = "API key not configured"
+        elif last_probe_at is None:
+            error = "Health check pending"
+        elif not healthy:
+            error = errors[0] if errors else "No LLM provider reachable"
+        return {
+            "available": bool(healthy),
+            "api_key_configured": configured,
+            "models": [name.split(":", 1)[1] for name in healthy if name.startswith("groq:")],
+            "error": error,
+            "checked_at": last_probe_at,
+            "providers": {
+                name: {**breaker.snapshot(), **results.get(name, {})}
+                for name, breaker in breakers.items()
+            },
+        }
+
+
+def _api_key_configured() -> bool:
+    from app.llm_wrapper import _is_api_key_valid
+    return _is_api_key_valid()
+
+
+def _log_first_status(status: dict) -> None:
+    if status["available"]:
+        print(f"[OK] LLM connected successfully (model: {status['models']})")
+    elif not status["api_key_configured"]:
+        print("[WARN] LLM API key not configured - AI features will be limited")
+    else:
+        print(f"[WARN] LLM connection failed: {status.get('error') or 'Unknown error'}")
+
+
+def _default_probes() -> dict:
+    """provider name -> zero-argument probe raising on failure (model listings, no completions)."""
+    from app.config import settings
+    from app.llm_clients import get_llm_clients
+
+    probes = {}
+    if _api_key_configured():
+        models = [settings.llm_model, settings.llm_model_fallback, settings.llm_model_rephrase_third]
+        listing: dict = {}
+
+        def groq_model_probe(model: str) -> Callable[[], None]:
+            def probe() -> None:
+                if "ids" not in listing:  # One listing call serves every Groq model of this round
+                    data = get_llm_clients().groq(settings.groq_api_key).models.list().data
+                    listing["ids"] = {getattr(m, "id", None) for m in data}
+                if listing["ids"] and model not in listing["ids"]:
+                    raise RuntimeError(f"model {model} not offered by Groq")
+            return probe
+
+        for model in dict.fromkeys(m for m in models if m):
+            probes[f"groq:{model}"] = groq_model_probe(model)
+
+    if settings.baseten_api_key and settings.baseten_base_url:
+        def baseten_probe() -> None:
+            resp = get_llm_clients().http().get(
+                settings.baseten_base_url.rstrip("/") + "/models",
+                headers={"Authorization": f"Bearer {settings.baseten_api_key}"},
+                timeout=settings.baseten_timeout_seconds,
+            )
+            resp.raise_for_status()
+
+        probes[f"baseten:{settings.baseten_model}"] = baseten_probe
+    return probes
+
+
+_MONITOR: Optional[LLMHealthMonitor] = None
+_MONITOR_LOCK = Lock()
+
+
+def get_llm_health() -> LLMHealthMonitor:
+    """Shared monitor built from Settings (not started until start_llm_health_monitor)."""
+    global _MONITOR
+    if _MONITOR is not None:
+        return _MONITOR
+    with _MONITOR_LOCK:
+        if _MONITOR is None:
+            from app.config import settings
+            _MONITOR = LLMHealthMonitor(
+                interval_seconds=settings.llm_health_interval_seconds,
+                failure_threshold=settings.llm_breaker_failure_threshold,
+                reset_seconds=settings.llm_breaker_reset_seconds,
+            )
+    return _MONITOR
+
+
+def start_llm_health_monitor() -> None:
+    get_llm_health().start()
+
+
+def stop_llm_health_monitor() -> None:
+    monitor = _MONITOR
+    if monitor is not None:
+        monitor.stop()
+
+
+def circuit_allows(provider: str) -> bool:
+    return get_llm_health().breaker(provider).allow()
+
+
+def record_llm_success(provider: str) -> None:
+    get_llm_health().breaker(provider).record_success()
+
+
+def record_llm_failure(provider: str, error: Any = None) -> None:
+    get_llm_health().breaker(provider).record_failure(error)
+
+
+def call_with_breaker(provider: str, fn: Callable[[], Any]) -> Any:
+    """fn() guarded by provider's breaker: CircuitOpenError when open, outcome recorded."""
+    if not circuit_allows(provider):
+        raise CircuitOpenError(f"{provider} circuit open")
+    try:
+        result = fn()
+    except Exception as e:
+        record_llm_failure(provider, e)
+        raise
+    record_llm_success(provider)
+    return result
+
+
+async def call_with_breaker_async(provider: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+    """call_with_breaker for a coroutine factory."""
+    if not circuit_allows(provider):
+        raise CircuitOpenError(f"{provider} circuit open")
+    try:
+        result = await fn()
+    except Exception as e:
+        record_llm_failure(provider, e)
+        raise
+    record_llm_success(provider)
+    return result
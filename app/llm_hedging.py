@@ -0,0 +1,312 @@
+"""
+LLM Hedging - Start the backup request when the primary is slower than usual.
+
+Problem: AIParser.parse_intent called the primary model and only after it
+failed (or asked for clarification) tried the fallback; rephrase_with_fallback
+walked Baseten -> Groq -> third model one after another, each with a 12s
+timeout. A slow primary therefore added its whole latency before the backup
+even started, and tail latency was the sum of every step.
+
+Solution: hedged_call(attempts) runs the attempts in order but does not wait
+for each one to finish. The next attempt starts as soon as the running one
+either fails / returns an unusable result, or has been running longer than
+its provider's hedge delay: a percentile (Settings.llm_hedge_percentile) of
+that provider's recent latencies. The first valid result wins and the rest
+are cancelled (async tasks are cancelled; sync calls that already started
+finish in the background and only feed the latency histogram). When nothing
+valid comes back, the earliest unusable result is returned (the primary's,
+as before), or the last error is raised.
+
+Latencies are kept per provider ("groq:<model>", "baseten:<model>") in a
+bounded window of recent calls that returned a valid result. Unusable
+results are not recorded (an open breaker answers None instantly and would
+drag the percentile down), and time spent waiting in the rate limiter's
+pacing hooks is subtracted (it measures our budget, not the provider). Until a provider has
+llm_hedge_min_samples of them, llm_hedge_default_delay_seconds is used.
+"""
+
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from threading import Lock
+from typing import Any, Awaitable, Callable, Optional
+
+from app.llm_rate_limit import measure_pacing
+
+
+_WINDOW = 200  # Recent latencies kept per provider
+
+
+class LatencyHistogram:
+    """Recent call latencies of one provider."""
+
+    def __init__(self, window: int = _WINDOW):
+        self._samples: deque = deque(maxlen=window)
+        self._lock = Lock()
+        self.count = 0
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(float(seconds))
+            self.count += 1
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """pct-th percentile (0-100, nearest rank) of the window; None when empty."""
+        with self._lock:
+            ordered = sorted(self._samples)
+        if not ordered:
+            return None
+        rank = max(1, min(len(ordered), int(-(-pct * len(ordered) // 100))))
+        return ordered[rank - 1]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class LLMHedger:
+    """Per-provider latency histograms plus the hedge delays they imply."""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        percentile: float = 90.0,
+        min_samples: int = 8,
+        default_delay_seconds: float = 2.0,
+        min_delay_seconds: float = 0.25,
+        max_delay_seconds: float = 8.0,
+        workers: int = 8,
+    ):
+        self.enabled = enabled
+        self.percentile = float(percentile)
+        self.min_samples = max(1, int(min_samples))
+        self.default_delay_seconds = float(default_delay_seconds)
+        self.min_delay_seconds = float(min_delay_seconds)
+        self.max_delay_seconds = float(max_delay_seconds)
+        self._workers = max(1, int(workers))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._histograms: dict[str, LatencyHistogram] = {}
+        self._lock = Lock()
+        self._stats = {"calls": 0, "hedges": 0, "backup_wins": 0}
+
+    def histogram(self, provider: str) -> LatencyHistogram:
+        hist = self._histograms.get(provider)
+        if hist is None:
+            with self._lock:
+                hist = self._histograms.setdefault(provider, LatencyHistogram())
+        return hist
+
+    def record(self, provider: str, seconds: float) -> None:
+        self.histogram(provider).record(seconds)
+
+    def hedge_delay(self, provider: str) -> Optional[float]:
+        """Seconds to give provider before starting the next attempt (None = wait for it)."""
+        if not self.enabled:
+            return None
+        hist = self.histogram(provider)
+        observed = hist.percentile(self.percentile) if len(hist) >= self.min_samples else None
+        delay = self.default_delay_seconds if observed is None else observed
+        return min(self.max_delay_seconds, max(self.min_delay_seconds, delay))
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def _executor_for_calls(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="llm-hedge")
+        return self._executor
+
+    def _timed(self, provider: str, fn: Callable[[], Any], is_valid: Callable[[Any], bool]) -> Any:
+        with measure_pacing() as paced:
+            started = time.perf_counter()
+            result = fn()
+            elapsed = time.perf_counter() - started
+        if is_valid(result):
+            self.record(provider, max(0.0, elapsed - paced[0]))
+        return result
+
+    async def _timed_async(self, provider: str, fn: Callable[[], Awaitable[Any]], is_valid: Callable[[Any], bool]) -> Any:
+        with measure_pacing() as paced:
+            started = time.perf_counter()
+            result = await fn()
+            elapsed = time.perf_counter() - started
+        if is_valid(result):
+            self.record(provider, max(0.0, elapsed - paced[0]))
+        return result
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            providers = dict(self._histograms)
+            stats = dict(self._stats)
+        stats["enabled"] = self.enabled
+        stats["providers"] = {
+            name: {
+                "samples": hist.count,
+                "p50_ms": _ms(hist.percentile(50)),
+                "p90_ms": _ms(hist.percentile(90)),
+                "p99_ms": _ms(hist.percentile(99)),
+                "hedge_delay_ms": _ms(self.hedge_delay(name)),
+            }
+            for name, hist in providers.items()
+        }
+        return stats
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+def _resolve(outcomes: dict) -> Any:
+    """No valid result: the earliest attempt's result, else the last attempt's error."""
+    returned = [idx for idx, (ok, _) in outcomes.items() if ok]
+    if returned:
+        return outcomes[min(returned)][1]
+    raise outcomes[max(outcomes)][1]
+
+
+def hedged_call(
+    attempts: list[tuple[str, Callable[[], Any]]],
+    is_valid: Callable[[Any], bool] = lambda result: result is not None,
+    hedger: Optional[LLMHedger] = None,
+) -> Any:
+    """Run (provider, fn) attempts with hedging (see module docstring); blocks until resolved."""
+    if not attempts:
+        raise ValueError("hedged_call needs at least one attempt")
+    hedger = hedger or get_llm_hedger()
+    hedger._count("calls")
+    if len(attempts) == 1:
+        provider, fn = attempts[0]
+        return hedger._timed(provider, fn, is_valid)
+
+    executor = hedger._executor_for_calls()
+    pending: dict = {}
+    outcomes: dict = {}
+    launched = 0
+
+    def launch() -> None:
+        nonlocal launched
+        provider, fn = attempts[launched]
+        pending[executor.submit(hedger._timed, provider, fn, is_valid)] = launched
+        launched += 1
+
+    launch()
+    while pending:
+        delay = hedger.hedge_delay(attempts[launched - 1][0]) if launched < len(attempts) else None
+        done, _ = wait(pending, timeout=delay, return_when=FIRST_COMPLETED)
+        if not done:
+            print(f"[HEDGE] {attempts[launched - 1][0]} slower than {delay:.2f}s, starting {attempts[launched][0]}")
+            hedger._count("hedges")
+            launch()
+            continue
+        for future in done:
+            idx = pending.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                outcomes[idx] = (False, e)
+                continue
+            if is_valid(result):
+                for other in pending:
+                    other.cancel()
+                if idx > 0:
+                    hedger._count("backup_wins")
+                return result
+            outcomes[idx] = (True, result)
+        if launched < len(attempts):
+            launch()  # A failure or unusable answer starts the next attempt right away
+
+    return _resolve(outcomes)
+
+
+async def hedged_call_async(
+    attempts: list[tuple[str, Callable[[], Awaitable[Any]]]],
+    is_valid: Callable[[Any], bool] = lambda result: result is not None,
+    hedger: Optional[LLMHedger] = None,
+) -> Any:
+    """hedged_call for coroutine factories; losing attempts are cancelled."""
+    if not attempts:
+        raise ValueError("hedged_call_async needs at least one attempt")
+    hedger = hedger or get_llm_hedger()
+    hedger._count("calls")
+    if len(attempts) == 1:
+        provider, fn = attempts[0]
+        return await hedger._timed_async(provider, fn, is_valid)
+
+    pending: dict = {}
+    outcomes: dict = {}
+    launched = 0
+
+    def launch() -> None:
+        nonlocal launched
+        provider, fn = attempts[launched]
+        pending[asyncio.ensure_future(hedger._timed_async(provider, fn, is_valid))] = launched
+        launched += 1
+
+    launch()
+    try:
+        while pending:
+            delay = hedger.hedge_delay(attempts[launched - 1][0]) if launched < len(attempts) else None
+            done, _ = await asyncio.wait(pending, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                print(f"[HEDGE] {attempts[launched - 1][0]} slower than {delay:.2f}s, starting {attempts[launched][0]}")
+                hedger._count("hedges")
+                launch()
+                continue
+            for task in done:
+                idx = pending.pop(task)
+                try:
+                    result = task.result()
+                except Exception as e:
+                    outcomes[idx] = (False, e)
+                    continue
+                if is_valid(result):
+                    if idx > 0:
+                        hedger._count("backup_wins")
+                    return result
+                outcomes[idx] = (True, result)
+            if launched < len(attempts):
+                launch()
+    finally:
+        for task in pending:
+            task.cancel()
+
+    return _resolve(outcomes)
+
+
+_HEDGER: Optional[LLMHedger] = None
+_HEDGER_LOCK = Lock()
+
+
+def get_llm_hedger() -> LLMHedger:
+    """Shared hedger built from Settings."""
+    global _HEDGER
+    if _HEDGER is not None:
+        return _HEDGER
+    with _HEDGER_LOCK:
+        if _HEDGER is None:
+            from app.config import settings
+            _HEDGER = LLMHedger(
+                enabled=settings.llm_hedge_enabled,
+                percentile=settings.llm_hedge_percentile,
+                min_samples=settings.llm_hedge_min_samples,
+                default_delay_seconds=settings.llm_hedge_default_delay_seconds,
+                min_delay_seconds=settings.llm_hedge_min_delay_seconds,
+                max_delay_seconds=settings.llm_hedge_max_delay_seconds,
+            )
+    return _HEDGER
+
+
+def shutdown_llm_hedger() -> None:
+    """Stop the hedging threads (called from the app shutdown hook)."""
+    hedger = _HEDGER
+    if hedger is not None:
+        hedger.shutdown()
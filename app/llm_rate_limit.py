@@ -0,0 +1,338 @@
+"""
+LLM Rate Limit - Client-side token buckets that pace every LLM request.
+
+Problem: on a 429, safe_llm_call slept (attempt + 1) * 2 seconds in whichever
+thread made the call. Under a burst every concurrent job hit the provider's
+limit at the same moment, got a 429, slept the same fixed time, and retried
+together into the next 429.
+
+Solution: one limiter per process with two token buckets per model:
+requests/minute and tokens/minute. Every chat request takes a reservation
+before it is sent: 1 request plus an estimate of its tokens (prompt
+characters / 4 + max_tokens). Buckets may go into debt, and each
+reservation waits until the debt it adds has been repaid, so waiters are
+served strictly in arrival order (a fair FIFO queue without an explicit
+queue) and a burst is spread out instead of rejected.
+
+The limiter adapts to what the provider reports:
+- retry-after on a 429 blocks the model until then (and empties its buckets,
+  so waiters resume paced instead of all at once)
+- x-ratelimit-limit-tokens sets the tokens/minute budget
+- x-ratelimit-remaining-tokens / -requests lower our estimate to the
+  server's view, with x-ratelimit-reset-* as the wait when it is exhausted
+- usage.total_tokens of the response refunds the over-estimate
+
+It hooks into the pooled httpx clients (app/llm_clients.py), so Groq SDK and
+Baseten calls are paced without changes at each call site. Requests
+without a JSON body naming a model (health probes) are not paced.
+"""
+
+import asyncio
+import json
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from typing import Optional
+
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DEFAULT_PENALTY_SECONDS = 2.0  # 429 without any retry/reset hint
+_RESERVATION_KEY = "llm_rate_reservation"
+_PACED: ContextVar[Optional[list]] = ContextVar("llm_paced_seconds", default=None)
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Seconds from "7.66s", "2m59.56s", "120ms", "1h2m" or a bare number; None if unparseable."""
+    if value is None:
+        return None
+    text = str(value).strip().lower()
+    try:
+        return max(0.0, float(text))
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(text)
+    if not parts or "".join(n + u for n, u in parts) != text:
+        return None
+    scale = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    return sum(float(n) * scale[u] for n, u in parts)
+
+
+def _header_float(headers, name: str) -> Optional[float]:
+    try:
+        value = headers.get(name)
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class _Bucket:
+    """Token bucket with debt: level may go negative while reservations queue."""
+
+    def __init__(self, per_minute: float, now: float):
+        self.set_limit(per_minute)
+        self.level = self.capacity
+        self.updated = now
+
+    def set_limit(self, per_minute: float) -> None:
+        self.capacity = max(1.0, float(per_minute))
+        self.rate = self.capacity / 60.0
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, amount: float) -> float:
+        return max(0.0, (amount - self.level) / self.rate)
+
+
+class _ModelLimiter:
+    def __init__(self, rpm: float, tpm: float, now: float):
+        self.requests = _Bucket(rpm, now)
+        self.tokens = _Bucket(tpm, now)
+        self.blocked_until = 0.0
+        self.stats = {"requests": 0, "waited": 0, "wait_seconds": 0.0, "rate_limited": 0, "refunded_tokens": 0}
+
+
+class LLMRateLimiter:
+    """Per-model requests/minute and tokens/minute buckets shared by the whole process."""
+
+    def __init__(
+        self,
+        default_rpm: float = 30.0,
+        default_tpm: float = 6000.0,
+        model_limits: Optional[dict] = None,
+        max_wait_seconds: float = 60.0,
+    ):
+        self.default_rpm = float(default_rpm)
+        self.default_tpm = float(default_tpm)
+        self.model_limits = dict(model_limits or {})  # model -> (rpm, tpm)
+        self.max_wait_seconds = float(max_wait_seconds)
+        self._models: dict[str, _ModelLimiter] = {}
+        self._lock = Lock()
+
+    def _model(self, model: str, now: float) -> _ModelLimiter:
+        limiter = self._models.get(model)
+        if limiter is None:
+            rpm, tpm = self.model_limits.get(model, (self.default_rpm, self.default_tpm))
+            limiter = self._models[model] = _ModelLimiter(rpm, tpm, now)
+        return limiter
+
+    def reserve(self, model: str, tokens: int) -> float:
+        """Take 1 request + tokens for model; returns the seconds to wait before sending."""
+        now = time.monotonic()
+        with self._lock:
+            limiter = self._model(model, now)
+            limiter.requests.refill(now)
+            limiter.tokens.refill(now)
+            amount = min(float(tokens), limiter.tokens.capacity)  # Oversized requests wait for a full bucket
+            wait = max(
+                limiter.requests.wait_for(1.0),
+                limiter.tokens.wait_for(amount),
+                limiter.blocked_until - now,
+                0.0,
+            )
+            limiter.requests.level -= 1.0
+            limiter.tokens.level -= amount
+            limiter.stats["requests"] += 1
+            if wait > 0:
+                limiter.stats["waited"] += 1
+                limiter.stats["wait_seconds"] += wait
+        return min(wait, self.max_wait_seconds)
+
+    def observe(self, model: str, status_code: int, headers, reserved_tokens: int = 0, used_tokens: Optional[int] = None) -> None:
+        """Adapt model's buckets to a provider response."""
+        now = time.monotonic()
+        with self._lock:
+            limiter = self._model(model, now)
+            limiter.requests.refill(now)
+            limiter.tokens.refill(now)
+
+            limit_tokens = _header_float(headers, "x-ratelimit-limit-tokens")
+            if limit_tokens:
+                limiter.tokens.set_limit(limit_tokens)
+            reserved_tokens = min(reserved_tokens, limiter.tokens.capacity)  # As reserve() took it
+
+            if status_code == 429:
+                limiter.stats["rate_limited"] += 1
+                penalty = (
+                    parse_duration(headers.get("retry-after"))
+                    or parse_duration(headers.get("x-ratelimit-reset-tokens"))
+                    or parse_duration(headers.get("x-ratelimit-reset-requests"))
+                    or _DEFAULT_PENALTY_SECONDS
+                )
+                limiter.blocked_until = max(limiter.blocked_until, now + penalty)
+                limiter.requests.level = min(limiter.requests.level, 0.0)
+                # Nothing was consumed: give the tokens back, but start from an empty bucket
+                limiter.tokens.level = min(limiter.tokens.capacity, min(limiter.tokens.level, 0.0) + reserved_tokens)
+                return
+
+            if used_tokens is not None and reserved_tokens > used_tokens:
+                refund = reserved_tokens - used_tokens
+                limiter.tokens.level = min(limiter.tokens.capacity, limiter.tokens.level + refund)
+                limiter.stats["refunded_tokens"] += refund
+
+            remaining_tokens = _header_float(headers, "x-ratelimit-remaining-tokens")
+            if remaining_tokens is not None:
+                limiter.tokens.level = min(limiter.tokens.level, remaining_tokens)
+            remaining_requests = _header_float(headers, "x-ratelimit-remaining-requests")
+            if remaining_requests is not None and remaining_requests < 1:
+                reset = parse_duration(headers.get("x-ratelimit-reset-requests")) or _DEFAULT_PENALTY_SECONDS
+                limiter.blocked_until = max(limiter.blocked_until, now + reset)
+
+    def get_stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                model: {
+                    **limiter.stats,
+                    "wait_seconds": round(limiter.stats["wait_seconds"], 3),
+                    "rpm": limiter.requests.capacity,
+                    "tpm": limiter.tokens.capacity,
+                    "requests_available": round(min(limiter.requests.capacity, limiter.requests.level + (now - limiter.requests.updated) * limiter.requests.rate), 2),
+                    "tokens_available": round(min(limiter.tokens.capacity, limiter.tokens.level + (now - limiter.tokens.updated) * limiter.tokens.rate), 1),
+                    "blocked_seconds": round(max(0.0, limiter.blocked_until - now), 3),
+                }
+                for model, limiter in self._models.items()
+            }
+
+
+def parse_model_limits(spec: str) -> dict:
+    """"model=rpm/tpm,model2=rpm/tpm" -> {model: (rpm, tpm)} (malformed entries are skipped)."""
+    limits = {}
+    for entry in (spec or "").split(","):
+        model, _, values = entry.strip().partition("=")
+        rpm, _, tpm = values.partition("/")
+        try:
+            limits[model.strip()] = (float(rpm), float(tpm))
+        except ValueError:
+            continue
+    return limits
+
+
+def estimate_tokens(body: dict) -> int:
+    """Rough tokens for a chat request: prompt characters / 4 plus the completion budget."""
+    prompt_chars = sum(len(str(m.get("content") or "")) for m in body.get("messages") or [] if isinstance(m, dict))
+    completion = body.get("max_tokens") or body.get("max_completion_tokens") or 1024
+    return int(prompt_chars / 4) + int(completion)
+
+
+def _chat_request(request) -> Optional[tuple[str, int, bool]]:
+    """(model, estimated tokens, streaming) for a JSON chat request, else None."""
+    if request.method != "POST" or not request.url.path.endswith("/chat/completions"):
+        return None
+    try:
+        body = json.loads(request.content or b"{}")
+    except (ValueError, TypeError):
+        return None
+    model = body.get("model") if isinstance(body, dict) else None
+    if not model:
+        return None
+    return model, estimate_tokens(body), bool(body.get("stream"))
+
+
+def _used_tokens(response) -> Optional[int]:
+    try:
+        usage = response.json().get("usage") or {}
+        total = usage.get("total_tokens")
+        return int(total) if total is not None else None
+    except Exception:
+        return None
+
+
+# httpx event hooks (installed by app/llm_clients.py)
+
+def _begin(request) -> Optional[float]:
+    limiter = get_llm_rate_limiter()
+    chat = _chat_request(request) if limiter is not None else None
+    if chat is None:
+        return None
+    model, tokens, _ = chat
+    request.extensions[_RESERVATION_KEY] = chat
+    wait = limiter.reserve(model, tokens)
+    if wait > 0:
+        print(f"[LLM-RATE] Pacing {model}: waiting {wait:.2f}s for request/token budget")
+    return wait
+
+
+def _finish(response) -> None:
+    limiter = get_llm_rate_limiter()
+    reservation = response.request.extensions.get(_RESERVATION_KEY)
+    if limiter is None or reservation is None:
+        return
+    model, tokens, stream = reservation
+    used = _used_tokens(response) if response.status_code == 200 and not stream else None
+    limiter.observe(model, response.status_code, response.headers, reserved_tokens=tokens, used_tokens=used)
+
+
+@contextmanager
+def measure_pacing():
+    """Collect the seconds this thread / task sleeps in the pacing hooks: yields [total]."""
+    paced = [0.0]
+    token = _PACED.set(paced)
+    try:
+        yield paced
+    finally:
+        _PACED.reset(token)
+
+
+def _add_paced(wait: float) -> None:
+    paced = _PACED.get()
+    if paced is not None:
+        paced[0] += wait
+
+
+def pace_request(request) -> None:
+    wait = _begin(request)
+    if wait:
+        time.sleep(wait)
+        _add_paced(wait)
+
+
+async def pace_request_async(request) -> None:
+    wait = _begin(request)
+    if wait:
+        await asyncio.sleep(wait)
+        _add_paced(wait)
+
+
+def observe_response(response) -> None:
+    reservation = response.request.extensions.get(_RESERVATION_KEY)
+    if reservation is not None:
+        if not reservation[2]:
+            response.read()  # Non-streaming: the SDK reads it next anyway; we need usage
+        _finish(response)
+
+
+async def observe_response_async(response) -> None:
+    reservation = response.request.extensions.get(_RESERVATION_KEY)
+    if reservation is not None:
+        if not reservation[2]:
+            await response.aread()
+        _finish(response)
+
+
+_LIMITER: Optional[LLMRateLimiter] = None
+_LIMITER_LOCK = Lock()
+_LIMITER_DISABLED = False
+
+
+def get_llm_rate_limiter() -> Optional[LLMRateLimiter]:
+    """Shared limiter built from Settings; None when disabled."""
+    global _LIMITER, _LIMITER_DISABLED
+    if _LIMITER is not None or _LIMITER_DISABLED:
+        return _LIMITER
+    with _LIMITER_LOCK:
+        if _LIMITER is None and not _LIMITER_DISABLED:
+            from app.config import settings
+            if not settings.llm_rate_limit_enabled:
+                _LIMITER_DISABLED = True
+                return None
+            _LIMITER = LLMRateLimiter(
+                default_rpm=settings.llm_rate_rpm,
+                default_tpm=settings.llm_rate_tpm,
+                model_limits=parse_model_limits(settings.llm_rate_model_limits),
+                max_wait_seconds=settings.llm_rate_max_wait_seconds,
+            )
+    return _LIMITER
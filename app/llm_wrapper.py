@@ -19,15 +19,22 @@ USAGE:
         print(response.content)
     else:
         print(f"Failed: {response.error}")
+
+    # In async handlers (same arguments, never blocks the event loop):
+    response = await safe_llm_call_async(messages=[...], purpose="analysis")
 """
 
 from __future__ import annotations
 from dataclasses import dataclass
 from typing import Optional, List, Dict, Any
+import asyncio
 import time
 import traceback
 
 from app.config import settings
+from app.llm_cache import cached_completion, store_completion
+from app.llm_rate_limit import get_llm_rate_limiter
+from app.llm_health import circuit_allows, get_llm_health, record_llm_failure, record_llm_success
 
 
 @dataclass
@@ -53,10 +60,10 @@ def _is_api_key_valid() -> bool:
 
 
 def _get_groq_client():
-    """Lazy import and create Groq client"""
+    """Shared pooled Groq client (see app/llm_clients.py)"""
     try:
-        from groq import Groq
-        return Groq(api_key=settings.groq_api_key)
+        from app.llm_clients import get_llm_clients
+        return get_llm_clients().groq(settings.groq_api_key)
     except ImportError:
         print("[LLM] ERROR: groq package not installed")
         return None
@@ -65,6 +72,112 @@ def _get_groq_client():
         return None
 
 
+def _get_async_groq_client():
+    """Shared pooled AsyncGroq client for the running event loop"""
+    try:
+        from app.llm_clients import get_llm_clients
+        return get_llm_clients().async_groq(settings.groq_api_key)
+    except ImportError:
+        print("[LLM] ERROR: groq package not installed")
+        return None
+    except Exception as e:
+        print(f"[LLM] ERROR creating async Groq client: {e}")
+        return None
+
+
+def _unconfigured_response(purpose: str, fallback_response: Optional[str]) -> Optional[LLMResponse]:
+    """Failure response when no call can be made (no API key); None when one can."""
+    if _is_api_key_valid():
+        return None
+    error_msg = "Groq API key not configured. Please set GROQ_API_KEY in .env file."
+    print(f"[LLM:{purpose}] {error_msg}")
+    return LLMResponse(
+        success=False,
+        content=fallback_response or f"LLM unavailable: {error_msg}",
+        error=error_msg
+    )
+
+
+def _no_client_response(fallback_response: Optional[str]) -> LLMResponse:
+    return LLMResponse(
+        success=False,
+        content=fallback_response or "Could not initialize LLM client",
+        error="Groq client initialization failed"
+    )
+
+
+def _models_to_try() -> List[str]:
+    models = [settings.llm_model]
+    if hasattr(settings, 'llm_model_fallback') and settings.llm_model_fallback != settings.llm_model:
+        models.append(settings.llm_model_fallback)
+    return models
+
+
+def _completion_kwargs(model: str, messages, temperature: float, max_tokens: int, json_mode: bool) -> Dict[str, Any]:
+    kwargs = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+    }
+    if json_mode:
+        kwargs["response_format"] = {"type": "json_object"}
+    return kwargs
+
+
+def _success_response(purpose: str, model: str, response) -> Optional[LLMResponse]:
+    """LLMResponse for a non-empty completion; None (after logging) for an empty one."""
+    content = response.choices[0].message.content
+    if content and content.strip():
+        print(f"[LLM:{purpose}] Success with {model}")
+        return LLMResponse(
+            success=True,
+            content=content.strip(),
+            model_used=model,
+            raw_response=response
+        )
+    print(f"[LLM:{purpose}] Empty response from {model}")
+    return None
+
+
+def _cached_response(purpose: str, messages, temperature: float, max_tokens: int, json_mode: bool) -> Optional[LLMResponse]:
+    """A stored answer for this exact request from any of the models (low temperature only)."""
+    for model in _models_to_try():
+        content = cached_completion(f"groq:{model}", messages, temperature, json_mode, max_tokens)
+        if content:
+            print(f"[LLM:{purpose}] Cache hit ({model})")
+            return LLMResponse(success=True, content=content, model_used=model)
+    return None
+
+
+def _retry_delay(error: Exception, attempt: int) -> Optional[float]:
+    """Seconds to back off before the next attempt after a rate limit, else None.
+
+    0 when the shared rate limiter is on: it saw the 429 and its retry-after,
+    and holds the retry (with every other queued call, in order) until then.
+    """
+    if "rate" in str(error).lower() or "429" in str(error):
+        if get_llm_rate_limiter() is not None:
+            return 0
+        return (attempt + 1) * 2  # Exponential backoff
+    return None
+
+
+def _is_auth_error(error: Exception) -> bool:
+    # Auth error - no point retrying with same key
+    return "api_key" in str(error).lower() or "auth" in str(error).lower()
+
+
+def _failed_response(purpose: str, last_error: Optional[str], fallback_response: Optional[str]) -> LLMResponse:
+    error_msg = f"All LLM calls failed. Last error: {last_error}"
+    print(f"[LLM:{purpose}] {error_msg}")
+    return LLMResponse(
+        success=False,
+        content=fallback_response or "I couldn't process your request. Please try again.",
+        error=error_msg
+    )
+
+
 def safe_llm_call(
     messages: List[Dict[str, str]],
     purpose: str = "general",
@@ -91,114 +204,130 @@ def safe_llm_call(
     """
     
     # Check API key first
-    if not _is_api_key_valid():
-        error_msg = "Groq API key not configured. Please set GROQ_API_KEY in .env file."
-        print(f"[LLM:{purpose}] {error_msg}")
-        return LLMResponse(
-            success=False,
-            content=fallback_response or f"LLM unavailable: {error_msg}",
-            error=error_msg
-        )
+    unconfigured = _unconfigured_response(purpose, fallback_response)
+    if unconfigured:
+        return unconfigured
+    
+    cached = _cached_response(purpose, messages, temperature, max_tokens, json_mode)
+    if cached:
+        return cached
     
     # Get client
     client = _get_groq_client()
     if not client:
-        return LLMResponse(
-            success=False,
-            content=fallback_response or "Could not initialize LLM client",
-            error="Groq client initialization failed"
-        )
-    
-    # Models to try in order
-    models = [settings.llm_model]
-    if hasattr(settings, 'llm_model_fallback') and settings.llm_model_fallback != settings.llm_model:
-        models.append(settings.llm_model_fallback)
+        return _no_client_response(fallback_response)
     
     last_error = None
     
-    for model in models:
+    for model in _models_to_try():
+        provider = f"groq:{model}"
         for attempt in range(max_retries):
+            if not circuit_allows(provider):
+                last_error = f"{provider} circuit open"
+                print(f"[LLM:{purpose}] {provider} is failing, circuit open - skipping")
+                break
             try:
                 print(f"[LLM:{purpose}] Calling {model} (attempt {attempt + 1}/{max_retries})")
-                
-                kwargs = {
-                    "model": model,
-                    "messages": messages,
-                    "temperature": temperature,
-                    "max_tokens": max_tokens,
-                }
-                
-                if json_mode:
-                    kwargs["response_format"] = {"type": "json_object"}
-                
-                response = client.chat.completions.create(**kwargs)
-                
-                content = response.choices[0].message.content
-                if content and content.strip():
-                    print(f"[LLM:{purpose}] Success with {model}")
-                    return LLMResponse(
-                        success=True,
-                        content=content.strip(),
-                        model_used=model,
-                        raw_response=response
-                    )
-                else:
-                    last_error = "Empty response from LLM"
-                    print(f"[LLM:{purpose}] Empty response from {model}")
+                response = client.chat.completions.create(
+                    **_completion_kwargs(model, messages, temperature, max_tokens, json_mode)
+                )
+                record_llm_success(provider)
+                result = _success_response(purpose, model, response)
+                if result:
+                    store_completion(provider, messages, temperature, json_mode, max_tokens, result.content)
+                    return result
+                last_error = "Empty response from LLM"
                     
             except Exception as e:
                 last_error = str(e)
                 print(f"[LLM:{purpose}] Error with {model}: {e}")
+                record_llm_failure(provider, e)
                 
-                # Check for rate limiting
-                if "rate" in str(e).lower() or "429" in str(e):
-                    wait_time = (attempt + 1) * 2  # Exponential backoff
+                wait_time = _retry_delay(e, attempt)
+                if wait_time == 0:
+                    print(f"[LLM:{purpose}] Rate limited, retry queued behind the rate limiter")
+                elif wait_time is not None:
                     print(f"[LLM:{purpose}] Rate limited, waiting {wait_time}s...")
                     time.sleep(wait_time)
-                elif "api_key" in str(e).lower() or "auth" in str(e).lower():
-                    # Auth error - no point retrying with same key
+                elif _is_auth_error(e):
                     break
     
     # All attempts failed
-    error_msg = f"All LLM calls failed. Last error: {last_error}"
-    print(f"[LLM:{purpose}] {error_msg}")
-    
-    return LLMResponse(
-        success=False,
-        content=fallback_response or "I couldn't process your request. Please try again.",
-        error=error_msg
-    )
+    return _failed_response(purpose, last_error, fallback_response)
 
 
-def check_llm_availability() -> Dict[str, Any]:
+async def safe_llm_call_async(
+    messages: List[Dict[str, str]],
+    purpose: str = "general",
+    temperature: float = 0.3,
+    max_tokens: int = 1000,
+    json_mode: bool = False,
+    max_retries: int = 2,
+    fallback_response: Optional[str] = None,
+) -> LLMResponse:
     """
-    Check if LLM is available and working.
-    Returns status dict with details.
+    safe_llm_call for async handlers: same models, retries and fallbacks, but
+    the request goes through the pooled AsyncGroq client and rate-limit
+    backoff awaits asyncio.sleep, so the event loop keeps serving other requests.
     """
-    result = {
-        "available": False,
-        "api_key_configured": _is_api_key_valid(),
-        "models": [],
-        "error": None
-    }
+    unconfigured = _unconfigured_response(purpose, fallback_response)
+    if unconfigured:
+        return unconfigured
     
-    if not result["api_key_configured"]:
-        result["error"] = "API key not configured"
-        return result
+    cached = _cached_response(purpose, messages, temperature, max_tokens, json_mode)
+    if cached:
+        return cached
     
-    # Try a simple call
-    test_response = safe_llm_call(
-        messages=[{"role": "user", "content": "Say 'OK' if you can read this."}],
-        purpose="health_check",
-        max_tokens=10,
-        max_retries=1,
-        fallback_response=None
-    )
+    client = _get_async_groq_client()
+    if not client:
+        return _no_client_response(fallback_response)
     
-    if test_response.success:
-        result["available"] = True
-        result["models"].append(test_response.model_used)
-    else:
-        result["error"] = test_response.error
+    last_error = None
     
-    return result
+    for model in _models_to_try():
+        provider = f"groq:{model}"
+        for attempt in range(max_retries):
+            if not circuit_allows(provider):
+                last_error = f"{provider} circuit open"
+                print(f"[LLM:{purpose}] {provider} is failing, circuit open - skipping")
+                break
+            try:
+                print(f"[LLM:{purpose}] Calling {model} async (attempt {attempt + 1}/{max_retries})")
+                response = await client.chat.completions.create(
+                    **_completion_kwargs(model, messages, temperature, max_tokens, json_mode)
+                )
+                record_llm_success(provider)
+                result = _success_response(purpose, model, response)
+                if result:
+                    store_completion(provider, messages, temperature, json_mode, max_tokens, result.content)
+                    return result
+                last_error = "Empty response from LLM"
+                    
+            except Exception as e:
+                last_error = str(e)
+                print(f"[LLM:{purpose}] Error with {model}: {e}")
+                record_llm_failure(provider, e)
+                
+                wait_time = _retry_delay(e, attempt)
+                if wait_time == 0:
+                    print(f"[LLM:{purpose}] Rate limited, retry queued behind the rate limiter")
+                elif wait_time is not None:
+                    print(f"[LLM:{purpose}] Rate limited, waiting {wait_time}s...")
+                    await asyncio.sleep(wait_time)
+                elif _is_auth_error(e):
+                    break
+    
+    return _failed_response(purpose, last_error, fallback_response)
+
+
+def check_llm_availability() -> Dict[str, Any]:
+    """
+    LLM availability as last seen by the background health monitor
+    (app/llm_health.py): no LLM call, just the cached probe results.
+    Probes once, synchronously, when the monitor is not running yet.
+    Returns status dict with details.
+    """
+    monitor = get_llm_health()
+    if not monitor.running and monitor.last_probe_at is None:
+        monitor.probe_once()
+    return monitor.status()
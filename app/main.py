@@ -13,13 +13,14 @@ OPTIMIZATIONS:
 """
 
 import os
-import shutil
+import json
+import uuid
 import time
-from typing import List, Optional
+from typing import Callable, List, Optional
 from dataclasses import dataclass, field
 from threading import Lock
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from apscheduler.schedulers.background import BackgroundScheduler
@@ -27,7 +28,7 @@ from pydantic import BaseModel
 import re
 
 from app.config import settings
-from app.models import ProcessResponse, ParsedIntent
+from app.models import ProcessResponse, ParsedIntent, CompressIntent
 from app.error_handler import ErrorClassifier, ErrorType
 from app.pipeline_definitions import PipelineRegistry
 from app.pdf_operations import (
@@ -51,18 +52,57 @@ from app.pdf_operations import (
     remove_duplicate_pages,
     enhance_scan,
     flatten_pdf,
+    run_fused_pipeline,
+    FUSIBLE_OPERATIONS,
     ensure_temp_dirs,
     get_upload_path,
-    get_output_path
+    get_output_path,
+    get_output_dir,
 )
-from app.clarification_layer import clarify_intent
+from app.process_pool import cpu_bound, shutdown_process_pool, get_pool_stats
+from app.result_cache import get_result_cache
+from app.chunked_upload import ChunkedUploadError, get_chunked_upload_store
+from app.upload_store import get_upload_store
+from app.doc_probe import DocumentProbe, get_probe, get_probe_cache, submit_probe
+from app.intent_cache import get_intent_cache
+from app.llm_clients import aclose_llm_clients, get_llm_clients
+from app.llm_hedging import get_llm_hedger, shutdown_llm_hedger
+from app.llm_cache import get_llm_cache
+from app.llm_rate_limit import get_llm_rate_limiter
+from app.llm_health import get_llm_health, start_llm_health_monitor, stop_llm_health_monitor
+from app.blocking import get_blocking_stats, run_blocking, run_file_operation, shutdown_blocking_executor
+from app.speculation import configure_speculator, extract_analysis_text, get_speculator
+from app.page_map import page_step_from_intent
+from app import workspace as job_workspaces
+from app.job_events import job_event_stream
+from app.clarification_layer import ClarificationResult, clarify_intent
 from app.utils import normalize_whitespace, fuzzy_match_string, RE_EXPLICIT_ORDER, RE_ROTATE_DEGREES, RE_COMPRESS_SIZE
-from app.job_queue import job_queue, JobStatus
+from app.job_queue import job_queue, JobStatus, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
 
 
 error_classifier = ErrorClassifier()
 pipeline_registry = PipelineRegistry()
 
+# CPU-bound operations run in the worker-process pool (see app/process_pool.py);
+# Ghostscript/OCR/LibreOffice steps already run in their own processes.
+merge_pdfs = cpu_bound(merge_pdfs)
+split_pdf = cpu_bound(split_pdf)
+delete_pages = cpu_bound(delete_pages)
+pdf_to_docx = cpu_bound(pdf_to_docx)
+rotate_pdf = cpu_bound(rotate_pdf)
+reorder_pdf = cpu_bound(reorder_pdf)
+watermark_pdf = cpu_bound(watermark_pdf)
+add_page_numbers = cpu_bound(add_page_numbers)
+extract_text = cpu_bound(extract_text)
+pdf_to_images_zip = cpu_bound(pdf_to_images_zip)
+images_to_pdf = cpu_bound(images_to_pdf)
+split_pages_to_files_zip = cpu_bound(split_pages_to_files_zip)
+remove_blank_pages = cpu_bound(remove_blank_pages)
+remove_duplicate_pages = cpu_bound(remove_duplicate_pages)
+enhance_scan = cpu_bound(enhance_scan)
+flatten_pdf = cpu_bound(flatten_pdf)
+run_fused_pipeline = cpu_bound(run_fused_pipeline)
+
 
 _ETA_LOCK = Lock()
 _ETA_SEC_PER_MB_EWMA: dict[str, float] = {}
@@ -104,6 +144,27 @@ def _eta_expected_total_seconds(operation_type: str, input_total_mb: float | Non
     return _default_overhead_seconds(operation_type) + _sec_per_mb(operation_type) * mb
 
 
+def _eta_work_mb(operation_type: str, input_total_mb: float | None, probes: list[DocumentProbe] | None) -> float | None:
+    """Input size scaled by how much of it the operation actually has to work on.
+
+    OCR only touches pages without a text layer; compression time is dominated
+    by images. Without probes the raw size is used.
+    """
+    if input_total_mb is None or not probes:
+        return input_total_mb
+    op = (operation_type or "").lower()
+    if op in ("ocr", "ocr_pdf"):
+        pages = sum(p.page_count for p in probes)
+        if pages:
+            scanned = sum(p.page_count - sum(p.page_has_text) for p in probes)
+            return input_total_mb * max(0.05, scanned / pages)
+    if op in ("compress", "compress_to_target"):
+        total = sum(p.size_bytes for p in probes) or 1
+        image_ratio = sum(p.image_area_ratio * p.size_bytes for p in probes) / total
+        return input_total_mb * (0.3 + 0.7 * image_ratio)
+    return input_total_mb
+
+
 def _eta_update_stats(operation_type: str, input_total_mb: float | None, actual_seconds: float):
     if not operation_type or input_total_mb is None:
         return
@@ -495,12 +556,14 @@ def _check_file_type_guards(intent: ParsedIntent | list[ParsedIntent], file_name
         file_type = get_file_type(primary_file)
         if file_type is None:
             continue
+
+        probe = _input_probes([primary_file])[0] if file_type == FileType.PDF else None
         
         guard_result = check_all_guards(
             operation=op_type,
             current_type=file_type,
             filename=primary_file,
-            page_count=0,  # Unknown, default to 0
+            page_count=probe.page_count if probe else 0,  # 0 = unknown
         )
         
         if guard_result:
@@ -577,6 +640,24 @@ def _resolve_uploaded_filename(requested: str, uploaded_files: list[str]) -> str
     )
 
 
+def _clarify_intent_cached(prompt: str, file_names: list[str], last_question: str = "") -> ClarificationResult:
+    """clarify_intent, answered from the intent cache when the same prompt was resolved before."""
+    cache = get_intent_cache()
+    if cache is None:
+        return clarify_intent(prompt, file_names, last_question=last_question)
+
+    cached = cache.get(prompt, file_names, last_question)
+    if cached is not None:
+        _resolve_intent_filenames(cached, file_names)
+        return ClarificationResult(intent=cached)
+
+    started = time.time()
+    result = clarify_intent(prompt, file_names, last_question=last_question)
+    if result.intent:
+        cache.put(prompt, file_names, last_question, result.intent, time.time() - started)
+    return result
+
+
 def _resolve_intent_filenames(intent: ParsedIntent | list[ParsedIntent], uploaded_files: list[str]) -> None:
     """Mutate intent(s) in-place to correct file names based on uploaded files."""
 
@@ -603,6 +684,17 @@ app = FastAPI(
     version="0.1.0"
 )
 
+try:
+    from app.request_validator import StreamingUploadValidator
+    # Registered before CORS so rejections still carry CORS headers
+    app.add_middleware(
+        StreamingUploadValidator,
+        max_file_mb=settings.max_file_size_mb,
+        max_files=settings.max_files_per_request,
+    )
+except ImportError:
+    pass
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -611,12 +703,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-try:
-    from app.request_validator import validate_request_middleware
-    app.middleware("http")(validate_request_middleware)
-except ImportError:
-    pass
-
 
 
 
@@ -640,11 +726,32 @@ def cleanup_old_files():
                 file_age_seconds = current_time - os.path.getmtime(file_path)
                 if file_age_seconds > max_age_seconds:
                     try:
-                        os.remove(file_path)
+                        if directory == "uploads":
+                            # Handles only drop their reference; queued jobs keep the blob alive
+                            _release_upload(filename)
+                        else:
+                            os.remove(file_path)
                         print(f"[CLEANUP] Deleted old file from {directory}: {filename}")
                     except Exception as e:
                         print(f"Warning: Failed to delete {filename}: {e}")
 
+    swept = get_upload_store().sweep_unreferenced(3600)
+    if swept:
+        print(f"[CLEANUP] Removed {swept} unreferenced upload blob(s)")
+    speculator = get_speculator()
+    if speculator:
+        speculator.prune_thumbnails(3600)
+
+    removed = job_workspaces.sweep_stale_workspaces(3600, lambda jid: job_queue.get_job(jid) is not None)
+    if removed:
+        print(f"[CLEANUP] Removed {removed} orphaned job workspace(s)")
+
+def _on_job_archived(job_id: str) -> None:
+    """Archived jobs give up their workspace and their references on input blobs."""
+    job_workspaces.remove_workspace(job_id)
+    get_upload_store().release_holder(f"job:{job_id}")
+
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize directories on startup and schedule cleanup task"""
@@ -652,21 +759,31 @@ async def startup_event():
     print("[OK] OrderMyPDF started successfully")
     print(f"[OK] Using LLM model: {settings.llm_model}")
     
-    # Check LLM availability on startup
-    try:
-        from app.llm_wrapper import check_llm_availability
-        llm_status = check_llm_availability()
-        if llm_status["available"]:
-            print(f"[OK] LLM connected successfully (model: {llm_status['models']})")
-        elif not llm_status["api_key_configured"]:
-            print("[WARN] LLM API key not configured - AI features will be limited")
-        else:
-            print(f"[WARN] LLM connection failed: {llm_status.get('error', 'Unknown error')}")
-    except Exception as e:
-        print(f"[WARN] Could not check LLM status: {e}")
+    # Probe LLM providers in the background (first result is logged when it arrives)
+    if settings.llm_health_enabled:
+        try:
+            start_llm_health_monitor()
+        except Exception as e:
+            print(f"[WARN] Could not start LLM health monitor: {e}")
     
+    job_queue.configure(
+        max_concurrent=settings.job_workers,
+        cleanup_after_minutes=settings.job_cleanup_minutes,
+    )
+    workspace_root = job_workspaces.configure(settings.job_workspace_dir, use_tmpfs=settings.job_workspace_tmpfs)
     job_queue.set_processor(process_job_background)
-    print("[OK] Job queue system initialized")
+    job_queue.set_archive_hook(_on_job_archived)
+    print(f"[OK] Job queue system initialized ({settings.job_workers} worker(s), workspaces in {workspace_root})")
+    
+    if settings.speculation_enabled:
+        configure_speculator(
+            workers=settings.speculation_workers,
+            budget_seconds=settings.speculation_cpu_budget_seconds,
+            thumbnail_dir=settings.speculation_thumbnail_dir,
+            precompute=_speculative_precompute if settings.speculation_precompute else None,
+            is_busy=_job_queue_busy,
+        )
+        print(f"[OK] Preupload speculation enabled (budget {settings.speculation_cpu_budget_seconds:.0f}s per upload)")
     
     scheduler = BackgroundScheduler()
     scheduler.add_job(cleanup_old_files, 'interval', minutes=15)  # Run cleanup every 15 minutes
@@ -683,12 +800,14 @@ async def get_llm_status():
     """Check LLM availability and return status."""
     try:
         from app.llm_wrapper import check_llm_availability
-        status = check_llm_availability()
+        status = check_llm_availability() if get_llm_health().running else await run_blocking(check_llm_availability)
         return {
             "available": status["available"],
             "configured": status["api_key_configured"],
             "models": status.get("models", []),
-            "error": status.get("error")
+            "error": status.get("error"),
+            "checked_at": status.get("checked_at"),
+            "providers": status.get("providers", {}),
         }
     except Exception as e:
         return {
@@ -702,18 +821,36 @@ async def get_llm_status():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
+    speculator = get_speculator()
+    if speculator:
+        speculator.shutdown()
+    shutdown_process_pool()
+    shutdown_blocking_executor()
+    shutdown_llm_hedger()
+    stop_llm_health_monitor()
+    await aclose_llm_clients()
     print("[OK] OrderMyPDF shutting down")
 
 
 
-async def save_uploaded_files(files: List[UploadFile]) -> List[str]:
+async def save_uploaded_files(
+    files: List[UploadFile],
+    holder: Optional[str] = None,
+    digests: Optional[dict] = None,
+) -> List[str]:
     """
-    Save uploaded files to temporary directory.
+    Save uploaded files into the content-addressed upload store.
+
+    Each file is published as uploads/<name> (a handle on its blob). When
+    holder is given (e.g. "preupload:<id>") it also takes a reference on every
+    blob; digests, when given, is filled with name -> SHA-256.
     
     Returns:
         List of saved file names
     """
     file_names = []
+    store = get_upload_store()
+    request_holder = holder or f"request:{uuid.uuid4().hex}"
     
     allowed_exts = {".pdf", ".png", ".jpg", ".jpeg", ".docx"}
 
@@ -740,18 +877,75 @@ async def save_uploaded_files(files: List[UploadFile]) -> List[str]:
                 detail=f"File {file.filename} exceeds {settings.max_file_size_mb}MB limit"
             )
         
-        file_path = os.path.join("uploads", file.filename)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        try:
+            # Hashing and writing the blob reads the whole upload: keep it off the event loop
+            digest = await run_blocking(store.ingest_stream, file.file, request_holder)
+            await run_blocking(store.publish, digest, file.filename)
+        finally:
+            if holder is None:
+                store.release_holder(request_holder)
+        submit_probe(store.blob_path(digest), digest)
+        if digests is not None:
+            digests[file.filename] = digest
         
         file_names.append(file.filename)
     
     return file_names
 
 
-def execute_operation(intent: ParsedIntent) -> tuple[str, str]:
+def _release_upload(file_name: str, digest: Optional[str] = None) -> None:
+    """Drop uploads/<file_name>: release its store handle, or delete a legacy plain file."""
+    store = get_upload_store()
+    if store.handle_digest(file_name):
+        store.release_handle(file_name, digest)
+        return
+    upload_path = os.path.join("uploads", file_name)
+    if os.path.exists(upload_path):
+        os.remove(upload_path)
+
+
+def _job_input_blobs(file_names: List[str]) -> dict:
+    """name -> digest for files currently published as uploads/ handles."""
+    store = get_upload_store()
+    blobs = {}
+    for name in file_names:
+        digest = store.handle_digest(name)
+        if digest:
+            blobs[name] = digest
+    return blobs
+
+
+def _input_probes(file_names: List[str], input_blobs: Optional[dict] = None) -> List[Optional[DocumentProbe]]:
+    """Document probes for input files (cached by content hash; computed on a miss)."""
+    store = get_upload_store()
+    probes = []
+    for name in file_names or []:
+        digest = (input_blobs or {}).get(name) or store.handle_digest(name)
+        try:
+            probes.append(get_probe(get_upload_path(name), digest=digest))
+        except Exception:
+            probes.append(None)
+    return probes
+
+
+def _create_job_with_blobs(file_names: List[str], input_blobs: dict, **kwargs) -> str:
+    """Create a job that holds references on its input blobs until it is archived."""
+    job_id = job_queue.create_job(files=file_names, input_blobs=input_blobs, **kwargs)
+    get_upload_store().acquire_all(input_blobs.values(), f"job:{job_id}")
+    return job_id
+
+
+def execute_operation(
+    intent: ParsedIntent,
+    details: Optional[dict] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> tuple[str, str]:
     """
     Execute the parsed intent operation.
+
+    details, when given, is filled with operation-specific parameters worth
+    reporting in the job result (e.g. the preset compress_to_target chose).
+    progress(done, total) is forwarded to operations that report sub-steps (OCR chunks).
     
     Returns:
         tuple: (output_file_name, success_message)
@@ -807,7 +1001,7 @@ def execute_operation(intent: ParsedIntent) -> tuple[str, str]:
     elif intent.operation_type == "compress_to_target":
         require_pdf(operation.file)
         try:
-            output_file = compress_pdf_to_target(operation.file, operation.target_mb)
+            output_file = compress_pdf_to_target(operation.file, operation.target_mb, details=details)
             message = f"Compressed {operation.file} to under {operation.target_mb} MB"
         except Exception as e:
             err_msg = str(e)
@@ -878,6 +1072,7 @@ def execute_operation(intent: ParsedIntent) -> tuple[str, str]:
                 operation.file,
                 language=(operation.language or "eng"),
                 deskew=(operation.deskew if operation.deskew is not None else True),
+                progress=progress,
             )
             message = f"OCR complete for {operation.file}"
             return output_file, message
@@ -926,6 +1121,56 @@ def execute_operation(intent: ParsedIntent) -> tuple[str, str]:
         raise ValueError(f"Unknown operation type: {intent.operation_type}")
 
 
+_FUSED_OUTPUT_SUFFIX = {
+    "merge": "merged",
+    "split": "split",
+    "delete": "deleted",
+    "rotate": "rotated",
+    "reorder": "reordered",
+    "watermark": "watermarked",
+    "page_numbers": "page_numbers",
+}
+
+
+def _fused_step(intent: ParsedIntent) -> dict:
+    """Plain-dict (picklable) form of a page-level intent for run_fused_pipeline."""
+    page_step = page_step_from_intent(intent)
+    if page_step is not None:
+        return page_step
+    op = intent.get_operation()
+    kind = intent.operation_type
+    if kind == "merge":
+        return {"op": "merge"}
+    if kind == "watermark":
+        return {
+            "op": "watermark",
+            "text": op.text,
+            "opacity": op.opacity if op.opacity is not None else 0.12,
+            "angle": op.angle if op.angle is not None else 30,
+        }
+    if kind == "page_numbers":
+        return {"op": "page_numbers", "position": op.position or "bottom_center", "start_at": op.start_at or 1}
+    raise ValueError(f"Operation {kind} is not a page-level step")
+
+
+def _fused_step_message(intent: ParsedIntent) -> str:
+    op = intent.get_operation()
+    kind = intent.operation_type
+    if kind == "merge":
+        return f"Merged {len(op.files)} PDFs"
+    if kind == "split":
+        return f"Split pages {op.pages}"
+    if kind == "delete":
+        return f"Deleted pages {op.pages_to_delete}"
+    if kind == "rotate":
+        return f"Rotated {op.degrees}°"
+    if kind == "reorder":
+        return "Reordered pages"
+    if kind == "watermark":
+        return "Watermarked"
+    return "Added page numbers"
+
+
 def execute_operation_pipeline(intents: list[ParsedIntent], uploaded_files: list[str]) -> tuple[str, str]:
     """
     Execute multiple intents sequentially, feeding output of one into the next.
@@ -934,6 +1179,9 @@ def execute_operation_pipeline(intents: list[ParsedIntent], uploaded_files: list
     1. _check_file_type_guards: Validate operations against file types
     2. _optimize_operation_order: Reorder operations using pipeline definitions
     3. error_classifier: Handle execution errors gracefully
+    4. run_fused_pipeline: Consecutive page-level steps share one in-memory
+       document and are written once; Ghostscript/OCR/LibreOffice/render
+       steps hand off through files
     """
     if not intents:
         raise ValueError("No operations provided")
@@ -950,6 +1198,22 @@ def execute_operation_pipeline(intents: list[ParsedIntent], uploaded_files: list
     current_file: str | None = None
     messages: list[str] = []
 
+    # Consecutive page-level steps (FUSIBLE_OPERATIONS) are collected here and
+    # applied to one in-memory document; current_file holds a .pdf placeholder
+    # until the segment is flushed by the next file-based step (or the end).
+    fused_inputs: list[str] = []
+    fused_steps: list[dict] = []
+
+    def flush_fused(last_idx: int) -> None:
+        nonlocal current_file
+        if not fused_steps:
+            return
+        suffix = _FUSED_OUTPUT_SUFFIX.get(fused_steps[-1]["op"], "fused")
+        output_name = f"multi_step_{last_idx}_{suffix}.pdf"
+        current_file = run_fused_pipeline(list(fused_inputs), list(fused_steps), output_name=output_name)
+        fused_inputs.clear()
+        fused_steps.clear()
+
     for idx, intent in enumerate(intents, start=1):
         op = intent.get_operation()
 
@@ -991,28 +1255,23 @@ def execute_operation_pipeline(intents: list[ParsedIntent], uploaded_files: list
         if current_file and current_file.lower().endswith(".zip"):
             raise ValueError("Cannot run operations after producing a ZIP output")
 
-        if intent.operation_type == "merge":
-            output_name = f"multi_step_{idx}_merged.pdf"
-            current_file = merge_pdfs(op.files, output_name=output_name)
-            messages.append(f"Merged {len(op.files)} PDFs")
+        if intent.operation_type in FUSIBLE_OPERATIONS:
+            if intent.operation_type != "merge":
+                require_pdf_name(current_file)
+            if not fused_steps:
+                fused_inputs[:] = list(op.files) if intent.operation_type == "merge" else [current_file]
+            fused_steps.append(_fused_step(intent))
+            current_file = f"multi_step_{idx}_pending.pdf"
+            messages.append(_fused_step_message(intent))
+            continue
+
+        flush_fused(idx - 1)
 
-        elif intent.operation_type == "images_to_pdf":
+        if intent.operation_type == "images_to_pdf":
             output_name = f"multi_step_{idx}_images_to_pdf.pdf"
             current_file = images_to_pdf(op.files, output_name=output_name)
             messages.append(f"Images→PDF ({len(op.files)} images)")
 
-        elif intent.operation_type == "split":
-            require_pdf_name(current_file)
-            output_name = f"multi_step_{idx}_split.pdf"
-            current_file = split_pdf(current_file, op.pages, output_name=output_name)
-            messages.append(f"Split pages {op.pages}")
-
-        elif intent.operation_type == "delete":
-            require_pdf_name(current_file)
-            output_name = f"multi_step_{idx}_deleted.pdf"
-            current_file = delete_pages(current_file, op.pages_to_delete, output_name=output_name)
-            messages.append(f"Deleted pages {op.pages_to_delete}")
-
         elif intent.operation_type == "compress":
             require_pdf_name(current_file)
             output_name = f"multi_step_{idx}_compressed.pdf"
@@ -1032,41 +1291,6 @@ def execute_operation_pipeline(intents: list[ParsedIntent], uploaded_files: list
             current_file = pdf_to_docx(current_file, output_name=output_name)
             messages.append("Converted to DOCX")
 
-        elif intent.operation_type == "rotate":
-            require_pdf_name(current_file)
-            output_name = f"multi_step_{idx}_rotated.pdf"
-            current_file = rotate_pdf(current_file, op.degrees, op.pages, output_name=output_name)
-            messages.append(f"Rotated {op.degrees}°")
-
-        elif intent.operation_type == "reorder":
-            require_pdf_name(current_file)
-            output_name = f"multi_step_{idx}_reordered.pdf"
-            current_file = reorder_pdf(current_file, op.new_order, output_name=output_name)
-            messages.append("Reordered pages")
-
-        elif intent.operation_type == "watermark":
-            require_pdf_name(current_file)
-            output_name = f"multi_step_{idx}_watermarked.pdf"
-            current_file = watermark_pdf(
-                current_file,
-                op.text,
-                opacity=(op.opacity if op.opacity is not None else 0.12),
-                angle=(op.angle if op.angle is not None else 30),
-                output_name=output_name,
-            )
-            messages.append("Watermarked")
-
-        elif intent.operation_type == "page_numbers":
-            require_pdf_name(current_file)
-            output_name = f"multi_step_{idx}_page_numbers.pdf"
-            current_file = add_page_numbers(
-                current_file,
-                position=(op.position or "bottom_center"),
-                start_at=(op.start_at or 1),
-                output_name=output_name,
-            )
-            messages.append("Added page numbers")
-
         elif intent.operation_type == "extract_text":
             require_pdf_name(current_file)
             output_name = f"multi_step_{idx}_extracted.txt"
@@ -1134,6 +1358,8 @@ def execute_operation_pipeline(intents: list[ParsedIntent], uploaded_files: list
         else:
             raise ValueError(f"Unknown operation type: {intent.operation_type}")
 
+    flush_fused(len(intents))
+
     if not current_file:
         raise ValueError("Pipeline produced no output")
 
@@ -1141,6 +1367,66 @@ def execute_operation_pipeline(intents: list[ParsedIntent], uploaded_files: list
 
 
 
+def _job_priority(file_names: list[str]) -> int:
+    """Pick a queue priority class from total input size (small jobs jump ahead)."""
+    total_bytes = 0
+    for fname in file_names or []:
+        try:
+            fpath = get_upload_path(fname)
+            if os.path.exists(fpath):
+                total_bytes += os.path.getsize(fpath)
+        except Exception:
+            pass
+    total_mb = total_bytes / (1024 * 1024)
+    if total_mb <= settings.job_priority_small_mb:
+        return PRIORITY_HIGH
+    if total_mb > settings.job_priority_large_mb:
+        return PRIORITY_LOW
+    return PRIORITY_NORMAL
+
+
+def _execute_cached(
+    intent: ParsedIntent | list[ParsedIntent],
+    file_names: list[str],
+    details: Optional[dict] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> tuple[str, str, bool]:
+    """
+    Run an intent (or pipeline) through the content-addressed result cache.
+
+    Returns:
+        tuple: (output_file_name, success_message, cache_hit)
+    """
+    cache = get_result_cache()
+    key = None
+    if cache is not None:
+        try:
+            key = cache.make_key(intent, file_names, [get_upload_path(f) for f in file_names])
+            if key:
+                hit = cache.get(key, outputs_dir=get_output_dir(), details=details, file_names=file_names)
+                if hit:
+                    print(f"[RESULT CACHE] Hit {key[:12]} → {hit[0]}")
+                    return hit[0], hit[1], True
+        except Exception as e:
+            print(f"[RESULT CACHE] Lookup failed: {e}")
+            key = None
+
+    if isinstance(intent, list):
+        output_file, message = execute_operation_pipeline(intent, file_names)
+        operation_name = "multi"
+    else:
+        output_file, message = execute_operation(intent, details=details, progress=progress)
+        operation_name = intent.operation_type
+
+    if key and output_file not in file_names:
+        try:
+            cache.put(key, get_output_path(output_file), message, operation_name, details=details, file_names=file_names)
+        except Exception as e:
+            print(f"[RESULT CACHE] Store failed: {e}")
+
+    return output_file, message, False
+
+
 def _ensure_files_are_ready(file_names: list[str]) -> list[str]:
     """
     Self-healing safety mechanism (per spec section 12).
@@ -1168,15 +1454,60 @@ def _ensure_files_are_ready(file_names: list[str]) -> list[str]:
     return ready_files
 
 
+def _job_output_name(job_id: str, output_file: str) -> str:
+    """Public (download) name of an output written inside the job's workspace."""
+    if job_workspaces.current_workspace() and output_file:
+        return job_workspaces.public_output_name(job_id, output_file)
+    return output_file
+
+
+def _execute_in_request_workspace(
+    workspace_id: str,
+    blobs: dict,
+    intent: ParsedIntent | list[ParsedIntent],
+    file_names: list[str],
+) -> tuple[str, str, bool]:
+    """_execute_cached on this request's own upload blobs (name -> digest).
+
+    uploads/<name> is shared by every request using that name, so two
+    concurrent /process calls with different scan.pdf files would read each
+    other's bytes. The workspace snapshots the request's blobs instead, and
+    outputs are returned under public names, like job results.
+    """
+    store = get_upload_store()
+    named_inputs = {name: store.blob_path(digest) for name, digest in blobs.items() if store.has(digest)}
+    with job_workspaces.job_workspace(workspace_id, [], named_inputs=named_inputs):
+        output_file, message, cache_hit = _execute_cached(intent, file_names)
+        return _job_output_name(workspace_id, output_file), message, cache_hit
+
+
 def process_job_background(job_id: str):
     """
     Background job processor - runs the same logic as /process but with progress updates.
     
-    This function is called by the job queue in a background thread.
+    This function is called by the job queue in a background thread. Each job
+    runs inside its own workspace (app/workspace.py), so concurrent jobs never
+    share output names.
     """
     job = job_queue.get_job(job_id)
     if not job:
         return
+
+    try:
+        store = get_upload_store()
+        blobs = {name: store.blob_path(d) for name, d in job.input_blobs.items() if store.has(d)}
+        inputs = [os.path.join("uploads", name) for name in job.files if name not in blobs]
+        with job_workspaces.job_workspace(job_id, inputs, named_inputs=blobs):
+            _process_job_in_workspace(job_id)
+    except OSError as e:
+        print(f"[JOB {job_id}] Workspace error: {e}")
+        job_queue.fail_job(job_id, f"Processing failed: {e}")
+
+
+def _process_job_in_workspace(job_id: str):
+    job = job_queue.get_job(job_id)
+    if not job:
+        return
     
     try:
         file_names = job.files
@@ -1247,7 +1578,7 @@ def process_job_background(job_id: str):
         else:
             if locked_mode:
                 job_queue.update_progress(job_id, 20, "Executing your confirmed choice...")
-                clarification_result = clarify_intent(active_prompt, file_names, last_question="")
+                clarification_result = _clarify_intent_cached(active_prompt, file_names, last_question="")
 
                 if clarification_result.intent:
                     intent = clarification_result.intent
@@ -1276,12 +1607,8 @@ def process_job_background(job_id: str):
                         _resolve_intent_filenames(intent, file_names)
                         job_queue.update_progress(job_id, 30, "Repeating last operation...")
                         try:
-                            if isinstance(intent, list):
-                                output_file, message = execute_operation_pipeline(intent, file_names)
-                                operation_name = "multi"
-                            else:
-                                output_file, message = execute_operation(intent)
-                                operation_name = intent.operation_type
+                            output_file, message, _ = _execute_cached(intent, file_names)
+                            operation_name = "multi" if isinstance(intent, list) else intent.operation_type
                         except Exception as e:
                             job_queue.fail_job(job_id, str(e))
                             return
@@ -1289,7 +1616,9 @@ def process_job_background(job_id: str):
                         session.last_success_prompt = session.last_success_prompt or active_prompt
                         session.last_success_intent = intent
                         _clear_pending(session)
-                        job_queue.complete_job(job_id, "success", message, operation_name, output_file)
+                        job_queue.complete_job(
+                            job_id, "success", message, operation_name, _job_output_name(job_id, output_file)
+                        )
                         _reset_intent_lock(session)
                         return
 
@@ -1311,14 +1640,14 @@ def process_job_background(job_id: str):
 
                 job_queue.update_progress(job_id, 20, "Understanding your request...")
                 
-                clarification_result = clarify_intent(prompt_to_parse, file_names, last_question=effective_question)
+                clarification_result = _clarify_intent_cached(prompt_to_parse, file_names, last_question=effective_question)
                 
                 if not clarification_result.intent and clarification_result.clarification and session:
                     from app.clarification_layer import _rephrase_with_context
                     rephrased = _rephrase_with_context(prompt_to_parse, session.last_success_intent, file_names)
                     if rephrased:
                         print(f"[JOB {job_id}] Rephrased '{prompt_to_parse}' → '{rephrased}'")
-                        clarification_result = clarify_intent(rephrased, file_names, last_question=effective_question)
+                        clarification_result = _clarify_intent_cached(rephrased, file_names, last_question=effective_question)
                 
                 if clarification_result.intent:
                     intent = clarification_result.intent
@@ -1352,19 +1681,23 @@ def process_job_background(job_id: str):
             except Exception:
                 pass
         input_total_mb = round(input_total_bytes / (1024 * 1024), 2) if input_total_bytes else 0.5
+        probes = [p for p in _input_probes(file_names, job.input_blobs) if p is not None]
         
         if isinstance(intent, list):
             total_max_eta = 0.0
             for step in intent:
-                step_eta = _eta_expected_total_seconds(step.operation_type, input_total_mb) or 30
+                step_mb = _eta_work_mb(step.operation_type, input_total_mb, probes)
+                step_eta = _eta_expected_total_seconds(step.operation_type, step_mb) or 30
                 total_max_eta += step_eta
             job_queue.set_max_eta(job_id, total_max_eta)
         else:
-            max_eta = _eta_expected_total_seconds(intent.operation_type, input_total_mb) or 30
+            work_mb = _eta_work_mb(intent.operation_type, input_total_mb, probes)
+            max_eta = _eta_expected_total_seconds(intent.operation_type, work_mb) or 30
             job_queue.set_max_eta(job_id, max_eta)
         
         job_queue.update_progress(job_id, 40, "Processing your files...")
         
+        result_details: dict = {}
         try:
             if isinstance(intent, list):
                 total_steps = len(intent)
@@ -1372,18 +1705,27 @@ def process_job_background(job_id: str):
                     progress = 40 + int((i / total_steps) * 50)
                     job_queue.update_progress(job_id, progress, f"Step {i+1} of {total_steps}...")
                 
-                output_file, message = execute_operation_pipeline(intent, file_names)
-                print(f"[JOB {job_id}] {message}")
+                output_file, message, cache_hit = _execute_cached(intent, file_names)
+                print(f"[JOB {job_id}] {message}{' (cached)' if cache_hit else ''}")
                 operation_name = "multi"
             else:
-                job_queue.set_operation_context(job_id, intent.operation_type, input_total_mb)
+                job_queue.set_operation_context(job_id, intent.operation_type, work_mb)
                 job_queue.update_progress(job_id, 60, f"Running {intent.operation_type}...")
 
                 op_started = time.time()
-                output_file, message = execute_operation(intent)
+                def _chunk_progress(done: int, total: int) -> None:
+                    job_queue.update_progress(
+                        job_id, 60 + int(30 * done / max(1, total)),
+                        f"Running {intent.operation_type}: {done}/{total} chunks done...",
+                    )
+
+                output_file, message, cache_hit = _execute_cached(
+                    intent, file_names, details=result_details, progress=_chunk_progress
+                )
                 op_elapsed = time.time() - op_started
-                _eta_update_stats(intent.operation_type, input_total_mb, op_elapsed)
-                print(f"[JOB {job_id}] {message}")
+                if not cache_hit:
+                    _eta_update_stats(intent.operation_type, work_mb, op_elapsed)
+                print(f"[JOB {job_id}] {message}{' (cached)' if cache_hit else ''}")
                 operation_name = intent.operation_type
         except Exception as e:
             job_queue.fail_job(job_id, str(e))
@@ -1400,13 +1742,14 @@ def process_job_background(job_id: str):
         
         try:
             for file_name in file_names:
-                upload_path = os.path.join("uploads", file_name)
-                if os.path.exists(upload_path):
-                    os.remove(upload_path)
+                _release_upload(file_name, job.input_blobs.get(file_name))
         except Exception as cleanup_err:
             print(f"[JOB {job_id}] Warning: Failed to cleanup: {cleanup_err}")
 
-        job_queue.complete_job(job_id, "success", message, operation_name, output_file)
+        job_queue.complete_job(
+            job_id, "success", message, operation_name, _job_output_name(job_id, output_file),
+            details=result_details or None,
+        )
         _reset_intent_lock(session)
         
     except Exception as e:
@@ -1427,7 +1770,18 @@ async def root():
         "status": "running",
         "version": "0.1.0",
         "model": settings.llm_model,
-        "job_queue": job_queue.get_stats()
+        "job_queue": job_queue.get_stats(),
+        "process_pool": get_pool_stats(),
+        "result_cache": get_result_cache().get_stats() if get_result_cache() else {"enabled": False},
+        "upload_store": get_upload_store().get_stats(),
+        "probe_cache": get_probe_cache().get_stats() if get_probe_cache() else {"enabled": False},
+        "intent_cache": get_intent_cache().get_stats() if get_intent_cache() else {"enabled": False},
+        "speculation": get_speculator().get_stats() if get_speculator() else {"enabled": False},
+        "llm_clients": get_llm_clients().get_stats(),
+        "blocking_executor": get_blocking_stats(),
+        "llm_hedging": get_llm_hedger().get_stats(),
+        "llm_cache": get_llm_cache().get_stats() if get_llm_cache() else {"enabled": False},
+        "llm_rate_limit": get_llm_rate_limiter().get_stats() if get_llm_rate_limiter() else {"enabled": False},
     }
 
 
@@ -1441,22 +1795,81 @@ _PREUPLOADS: dict[str, dict] = {}
 _PREUPLOADS_LOCK = Lock()
 
 
+def _job_queue_busy() -> bool:
+    """True while jobs are running or waiting (speculation then skips heavy steps)."""
+    stats = job_queue.get_stats()
+    return bool(stats.get("processing") or stats.get("queued"))
+
+
+def _speculative_precompute(
+    file_name: str, path: str, probe: Optional[DocumentProbe], budget_seconds: float
+) -> Optional[str]:
+    """Run the most likely operation for a preuploaded file into the result cache.
+
+    Today that is the default ("compress", which the parser resolves to the
+    ebook preset) compression of a large, unencrypted PDF - the most common
+    request for big files. It runs in a throwaway workspace so nothing lands in
+    outputs/.
+    """
+    if get_result_cache() is None or probe is None or probe.file_type != "pdf" or probe.encrypted:
+        return None
+    size_mb = probe.size_bytes / (1024 * 1024)
+    if size_mb < settings.speculation_precompute_min_mb:
+        return None
+    estimate = _eta_expected_total_seconds("compress", _eta_work_mb("compress", size_mb, [probe]))
+    if estimate is None or estimate > budget_seconds:
+        return None
+
+    intent = ParsedIntent(operation_type="compress", compress=CompressIntent(file=file_name, preset="ebook"))
+    workspace_id = f"spec-{uuid.uuid4().hex[:12]}"
+    try:
+        with job_workspaces.job_workspace(workspace_id, [], named_inputs={file_name: path}):
+            _, _, cache_hit = _execute_cached(intent, [file_name])
+    finally:
+        job_workspaces.remove_workspace(workspace_id)
+    print(f"[SPECULATE] Precomputed compress for {file_name}{' (already cached)' if cache_hit else ''}")
+    return "compress"
+
+
+def _speculate_preupload(upload_id: str, blobs: dict) -> None:
+    """Hand a preupload's files (name -> digest) to the speculation stage."""
+    speculator = get_speculator()
+    if not speculator or not blobs:
+        return
+    store = get_upload_store()
+    speculator.speculate(upload_id, {name: (store.blob_path(d), d) for name, d in blobs.items()})
+
+
+def _analysis_text(file_name: str, path: str) -> str:
+    """/api/analyze text for an upload, warm from speculation when possible."""
+    speculator = get_speculator()
+    if speculator is None:
+        return extract_analysis_text(path)
+    return speculator.analysis_text(path, get_upload_store().handle_digest(file_name))
+
+
 def _cleanup_old_preuploads(max_age_minutes: int = 15) -> None:
-    """Remove pre-uploads older than max_age_minutes"""
+    """Release pre-uploads older than max_age_minutes (blobs go once nothing else references them)"""
     cutoff = time.time() - (max_age_minutes * 60)
     with _PREUPLOADS_LOCK:
         stale = [uid for uid, data in _PREUPLOADS.items() if data.get("created_at", 0) < cutoff]
-        for uid in stale:
-            for fname in _PREUPLOADS[uid].get("files", []):
-                try:
-                    fpath = os.path.join("uploads", fname)
-                    if os.path.exists(fpath):
-                        os.remove(fpath)
-                except Exception:
-                    pass
-            _PREUPLOADS.pop(uid, None)
-        if stale:
-            print(f"[PREUPLOAD CLEANUP] Removed {len(stale)} old pre-uploads")
+        stale_data = [(uid, _PREUPLOADS.pop(uid)) for uid in stale]
+    store = get_upload_store()
+    for uid, data in stale_data:
+        blobs = data.get("blobs") or {}
+        for fname in data.get("files", []):
+            try:
+                _release_upload(fname, blobs.get(fname))
+            except Exception:
+                pass
+        store.release_holder(f"preupload:{uid}")
+        if get_speculator():
+            get_speculator().cancel(uid)
+    if stale:
+        print(f"[PREUPLOAD CLEANUP] Removed {len(stale)} old pre-uploads")
+    expired = get_chunked_upload_store().expire(max_age_minutes * 60)
+    if expired:
+        print(f"[PREUPLOAD CLEANUP] Removed {expired} idle chunked upload(s)")
 
 
 
@@ -1477,18 +1890,19 @@ async def preupload_files(
                 detail=f"Too many files. Maximum {settings.max_files_per_request} files allowed."
             )
         
-        file_names = await save_uploaded_files(files)
-        
-        import uuid
         upload_id = str(uuid.uuid4())[:12]
+        blobs: dict = {}
+        file_names = await save_uploaded_files(files, holder=f"preupload:{upload_id}", digests=blobs)
         
         with _PREUPLOADS_LOCK:
             _PREUPLOADS[upload_id] = {
                 "files": file_names,
+                "blobs": blobs,
                 "created_at": time.time(),
             }
         
         print(f"[PREUPLOAD] {upload_id} - Files: {file_names}")
+        _speculate_preupload(upload_id, blobs)
         
         return {
             "upload_id": upload_id,
@@ -1530,6 +1944,103 @@ async def api_upload_files(
         raise HTTPException(status_code=500, detail=f"Failed to upload files: {str(e)}")
 
 
+def _chunked_upload_http_error(e: ChunkedUploadError) -> HTTPException:
+    detail = {"message": e.detail, "offset": e.offset} if e.offset is not None else e.detail
+    return HTTPException(status_code=e.status_code, detail=detail)
+
+
+@app.post("/upload/init")
+async def chunked_upload_init(
+    filename: str = Form(..., description="Name of the file to upload"),
+    size: int = Form(..., description="Total size in bytes"),
+    upload_id: str | None = Form(default=None, description="Add to an existing upload group"),
+):
+    """
+    Start a resumable chunked upload for one file.
+
+    PUT bytes to /upload/{file_id}?offset=N, then POST /upload/{file_id}/finalize.
+    Files finalized under the same upload_id are submitted together via /submit-with-upload.
+    """
+    store = get_chunked_upload_store()
+    if upload_id:
+        with _PREUPLOADS_LOCK:
+            pending = len(_PREUPLOADS.get(upload_id, {}).get("files", []))
+        if pending >= settings.max_files_per_request:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Too many files. Maximum {settings.max_files_per_request} files allowed."
+            )
+    try:
+        session = store.init(filename, size, upload_id=upload_id)
+    except ChunkedUploadError as e:
+        raise _chunked_upload_http_error(e)
+    print(f"[CHUNKED UPLOAD] init {session.file_id} ({session.filename}, {size} bytes) -> {session.upload_id}")
+    return {**session.to_dict(), "chunk_size": store.chunk_bytes}
+
+
+@app.get("/upload/{file_id}")
+async def chunked_upload_status(file_id: str):
+    """Acknowledged offset of a chunked upload (resume point after a dropped connection)."""
+    try:
+        return get_chunked_upload_store().get(file_id).to_dict()
+    except ChunkedUploadError as e:
+        raise _chunked_upload_http_error(e)
+
+
+@app.put("/upload/{file_id}")
+async def chunked_upload_put(file_id: str, request: Request, offset: int = 0):
+    """Append the raw request body at offset. 409 carries the offset to resume from."""
+    try:
+        session = await get_chunked_upload_store().write_chunk(file_id, offset, request.stream())
+    except ChunkedUploadError as e:
+        raise _chunked_upload_http_error(e)
+    return session.to_dict()
+
+
+@app.post("/upload/{file_id}/finalize")
+async def chunked_upload_finalize(
+    file_id: str,
+    sha256: str | None = Form(default=None, description="Client-computed SHA-256 to verify against"),
+):
+    """Verify size (and digest when given), move the file into uploads/ and attach it to its upload_id."""
+    try:
+        session, path, digest = get_chunked_upload_store().finalize(file_id, sha256=sha256)
+    except ChunkedUploadError as e:
+        raise _chunked_upload_http_error(e)
+
+    cache = get_result_cache()
+    if cache:
+        cache.remember_hash(path, digest)
+
+    with _PREUPLOADS_LOCK:
+        entry = _PREUPLOADS.setdefault(session.upload_id, {"files": [], "blobs": {}, "created_at": time.time()})
+        if session.filename not in entry["files"]:
+            entry["files"].append(session.filename)
+        entry.setdefault("blobs", {})[session.filename] = digest
+        entry["created_at"] = time.time()
+        files = list(entry["files"])
+
+    _speculate_preupload(session.upload_id, {session.filename: digest})
+    print(f"[CHUNKED UPLOAD] finalized {session.filename} sha256={digest[:12]} -> {session.upload_id}")
+    return {
+        "upload_id": session.upload_id,
+        "files": files,
+        "sha256": digest,
+        "message": "File uploaded successfully. Use /submit-with-upload to process.",
+    }
+
+
+@app.get("/api/thumbnail/{file_name}")
+async def get_thumbnail(file_name: str):
+    """First-page thumbnail of an upload (rendered during preupload speculation)."""
+    speculator = get_speculator()
+    digest = get_upload_store().handle_digest(file_name)
+    path = speculator.thumbnail_path(digest) if speculator and digest else None
+    if not path or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Thumbnail not available")
+    return FileResponse(path, media_type="image/png")
+
+
 @app.post("/submit-with-upload")
 async def submit_with_preupload(
     upload_id: str = Form(..., description="Upload ID from /preupload"),
@@ -1546,6 +2057,9 @@ async def submit_with_preupload(
     try:
         with _PREUPLOADS_LOCK:
             preupload_data = _PREUPLOADS.pop(upload_id, None)
+        speculator = get_speculator()
+        if speculator:
+            speculator.cancel(upload_id)
         
         if not preupload_data:
             raise HTTPException(
@@ -1554,28 +2068,36 @@ async def submit_with_preupload(
             )
         
         file_names = preupload_data["files"]
+        blobs = preupload_data.get("blobs") or {}
+        store = get_upload_store()
 
-        session = _get_session(session_id)
-        prompt_to_use = prompt
-        if (input_source or "").lower() == "button" or _is_button_confirmation(session, prompt):
-            _lock_intent(session, prompt, "button")
-            prompt_to_use = session.locked_action or prompt
-        
-        for fname in file_names:
-            fpath = os.path.join("uploads", fname)
-            if not os.path.exists(fpath):
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Uploaded file {fname} not found. Please re-upload."
-                )
-        
-        job_id = job_queue.create_job(
-            files=file_names,
-            prompt=prompt_to_use,
-            session_id=session_id,
-            context_question=context_question,
-            input_source=input_source,
-        )
+        try:
+            session = _get_session(session_id)
+            prompt_to_use = prompt
+            if (input_source or "").lower() == "button" or _is_button_confirmation(session, prompt):
+                _lock_intent(session, prompt, "button")
+                prompt_to_use = session.locked_action or prompt
+
+            for fname in file_names:
+                present = store.has(blobs[fname]) if fname in blobs else os.path.exists(os.path.join("uploads", fname))
+                if not present:
+                    raise HTTPException(
+                        status_code=404,
+                        detail=f"Uploaded file {fname} not found. Please re-upload."
+                    )
+
+            job_id = _create_job_with_blobs(
+                file_names,
+                blobs,
+                prompt=prompt_to_use,
+                session_id=session_id,
+                context_question=context_question,
+                input_source=input_source,
+                priority=_job_priority(file_names),
+            )
+        finally:
+            # The job now holds its own references
+            store.release_holder(f"preupload:{upload_id}")
         
         print(f"[JOB CREATED from preupload] {job_id} - Files: {file_names}, Prompt: {prompt_to_use[:50]}...")
         
@@ -1613,21 +2135,28 @@ async def submit_job(
                 detail=f"Too many files. Maximum {settings.max_files_per_request} files allowed."
             )
         
-        file_names = await save_uploaded_files(files)
+        request_holder = f"request:{uuid.uuid4().hex}"
+        blobs: dict = {}
+        file_names = await save_uploaded_files(files, holder=request_holder, digests=blobs)
 
-        session = _get_session(session_id)
-        prompt_to_use = prompt
-        if (input_source or "").lower() == "button" or _is_button_confirmation(session, prompt):
-            _lock_intent(session, prompt, "button")
-            prompt_to_use = session.locked_action or prompt
-        
-        job_id = job_queue.create_job(
-            files=file_names,
-            prompt=prompt_to_use,
-            session_id=session_id,
-            context_question=context_question,
-            input_source=input_source,
-        )
+        try:
+            session = _get_session(session_id)
+            prompt_to_use = prompt
+            if (input_source or "").lower() == "button" or _is_button_confirmation(session, prompt):
+                _lock_intent(session, prompt, "button")
+                prompt_to_use = session.locked_action or prompt
+
+            job_id = _create_job_with_blobs(
+                file_names,
+                blobs,
+                prompt=prompt_to_use,
+                session_id=session_id,
+                context_question=context_question,
+                input_source=input_source,
+                priority=_job_priority(file_names),
+            )
+        finally:
+            get_upload_store().release_holder(request_holder)
         
         print(f"[JOB CREATED] {job_id} - Files: {file_names}, Prompt: {prompt_to_use[:50]}...")
         
@@ -1693,12 +2222,14 @@ async def submit_job_reuse(
             _lock_intent(session, prompt, "button")
             prompt_to_use = session.locked_action or prompt
 
-        job_id = job_queue.create_job(
-            files=files_list,
+        job_id = _create_job_with_blobs(
+            files_list,
+            _job_input_blobs(files_list),
             prompt=prompt_to_use,
             session_id=session_id,
             context_question=context_question,
             input_source=input_source,
+            priority=_job_priority(files_list),
         )
         
         print(f"[JOB REUSE] {job_id} - Files: {files_list}, Prompt: {prompt_to_use[:50]}...")
@@ -1716,33 +2247,23 @@ async def submit_job_reuse(
         raise HTTPException(status_code=500, detail=f"Failed to submit job: {str(e)}")
 
 
-@app.get("/job/{job_id}/status")
-async def get_job_status(job_id: str):
-    """
-    Get the current status and progress of a job.
-    
-    Poll this endpoint every 1 second while status is "pending" or "processing".
-    
-    Returns:
-    - status: "pending" | "processing" | "completed" | "failed" | "cancelled"
-    - progress: 0-100
-    - message: Human-readable progress message
-    - estimated_remaining: Dynamic estimated seconds remaining
-    - result: (only when completed) Contains output_file, operation, etc.
-    """
-    job = job_queue.get_job(job_id)
-    
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
-    
+def _job_status_payload(job) -> dict:
+    """Status/progress/ETA/result snapshot shared by the polling and streaming endpoints."""
+    job_id = job.id
     response = {
         "job_id": job_id,
         "status": job.status.value,
         "progress": job.progress,
         "message": job.progress_message,
         "created_at": job.created_at,
-        "ram": _memory_snapshot(),
     }
+
+    queue_position = job_queue.get_queue_position(job_id)
+    if queue_position is not None:
+        response["queue_position"] = queue_position
+    wait_seconds = job_queue.get_wait_seconds(job_id)
+    if wait_seconds is not None:
+        response["wait_seconds"] = round(wait_seconds, 2)
     
     estimated_remaining = 0.0
     if job.started_at and job.status == JobStatus.PROCESSING:
@@ -1763,7 +2284,7 @@ async def get_job_status(job_id: str):
         if estimated_remaining <= 0.0 and job.progress < 100:
             estimated_remaining = 5.0
     elif job.status == JobStatus.PENDING:
-        estimated_remaining = 30.0
+        estimated_remaining = 30.0 * max(1, queue_position or 1)
     else:
         estimated_remaining = 0.0
 
@@ -1779,11 +2300,94 @@ async def get_job_status(job_id: str):
             "operation": job.result_operation,
             "output_file": job.result_output_file,
             "options": job.result_options,
+            "details": job.result_details,
         }
     
     return response
 
 
+@app.get("/job/{job_id}/status")
+async def get_job_status(job_id: str):
+    """
+    Get the current status and progress of a job.
+    
+    Poll this endpoint every 1 second while status is "pending" or "processing",
+    or subscribe to /job/{job_id}/events (SSE) or /job/{job_id}/ws instead.
+    
+    Returns:
+    - status: "pending" | "processing" | "completed" | "failed" | "cancelled"
+    - progress: 0-100
+    - message: Human-readable progress message
+    - estimated_remaining: Dynamic estimated seconds remaining
+    - queue_position: (only while pending) 1-based position in the job queue
+    - wait_seconds: Time spent waiting in the queue before processing started
+    - result: (only when completed) Contains output_file, operation, etc.
+    """
+    job = job_queue.get_job(job_id)
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    response = _job_status_payload(job)
+    response["ram"] = _memory_snapshot()
+    return response
+
+
+def _sse_format(event_id: Optional[int], event: str, payload: dict) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(payload, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+@app.get("/job/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request, last_event_id: Optional[int] = None):
+    """
+    Server-Sent Events stream of job progress (push alternative to polling /status).
+
+    Events: "progress" (status snapshot), "heartbeat" (ETA only, after idle
+    periods), "result" (final snapshot, stream ends). Reconnects resume via
+    the Last-Event-ID header (or ?last_event_id=).
+    """
+    if not job_queue.get_job(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    header_id = request.headers.get("last-event-id")
+    if last_event_id is None and header_id and header_id.isdigit():
+        last_event_id = int(header_id)
+
+    async def _events():
+        yield f"retry: {int(settings.job_events_retry_ms)}\n\n"
+        async for event_id, event, payload in job_event_stream(
+            job_queue, job_id, _job_status_payload, last_event_id, settings.job_events_heartbeat_seconds
+        ):
+            if await request.is_disconnected():
+                return
+            yield _sse_format(event_id, event, payload)
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.websocket("/job/{job_id}/ws")
+async def job_events_websocket(websocket: WebSocket, job_id: str, last_event_id: Optional[int] = None):
+    """WebSocket variant of /job/{job_id}/events: JSON messages {id, event, data}."""
+    await websocket.accept()
+    try:
+        async for event_id, event, payload in job_event_stream(
+            job_queue, job_id, _job_status_payload, last_event_id, settings.job_events_heartbeat_seconds
+        ):
+            await websocket.send_json({"id": event_id, "event": event, "data": payload})
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+
 @app.post("/job/{job_id}/cancel")
 async def cancel_job(job_id: str):
     """Cancel a pending job."""
@@ -1832,12 +2436,12 @@ async def get_job_result(job_id: str):
     if not job.result_output_file:
         raise HTTPException(status_code=404, detail="No output file available")
     
-    file_path = get_output_path(job.result_output_file)
+    file_path = job_workspaces.resolve_public_name(job.result_output_file) or get_output_path(job.result_output_file)
     
     if not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="Output file not found on server")
     
-    filename = job.result_output_file
+    filename = os.path.basename(file_path)
     lower = filename.lower()
     media_type = "application/pdf"
     if lower.endswith(".docx"):
@@ -1887,6 +2491,9 @@ async def process_pdfs(
     - Prompt: "merge all these files" or "keep only page 1"
     """
     session: SessionState | None = None
+    request_id = uuid.uuid4().hex[:12]
+    request_holder = f"request:{request_id}"
+    blobs: dict = {}
     try:
         if len(files) > settings.max_files_per_request:
             raise HTTPException(
@@ -1894,7 +2501,8 @@ async def process_pdfs(
                 detail=f"Too many files. Maximum {settings.max_files_per_request} files allowed."
             )
         
-        file_names = await save_uploaded_files(files)
+        # The request holds its blobs until it returns, whatever happens to uploads/<name>
+        file_names = await save_uploaded_files(files, holder=request_holder, digests=blobs)
 
         session = _get_session(session_id)
         
@@ -1924,9 +2532,8 @@ async def process_pdfs(
             percent = int(percent_match.group(3))
             file_name = file_names[0]  # Only support single file for now
             from app.models import ParsedIntent, CompressToTargetIntent
-            from app.pdf_operations import get_upload_path
             import os
-            file_path = get_upload_path(file_name)
+            file_path = get_upload_store().blob_path(blobs[file_name]) if file_name in blobs else ""
             if os.path.exists(file_path):
                 size_bytes = os.path.getsize(file_path)
                 size_mb = size_bytes / (1024 * 1024)
@@ -1947,7 +2554,7 @@ async def process_pdfs(
                 )
         else:
             if locked_mode:
-                clarification_result = clarify_intent(active_prompt, file_names, last_question="")
+                clarification_result = await run_blocking(_clarify_intent_cached, active_prompt, file_names, last_question="")
 
                 if clarification_result.intent:
                     intent = clarification_result.intent
@@ -1973,12 +2580,10 @@ async def process_pdfs(
                         intent = session.last_success_intent
                         _resolve_intent_filenames(intent, file_names)
                         try:
-                            if isinstance(intent, list):
-                                output_file, message = execute_operation_pipeline(intent, file_names)
-                                operation_name = "multi"
-                            else:
-                                output_file, message = execute_operation(intent)
-                                operation_name = intent.operation_type
+                            output_file, message, _ = await run_file_operation(
+                                _execute_in_request_workspace, request_id, blobs, intent, file_names
+                            )
+                            operation_name = "multi" if isinstance(intent, list) else intent.operation_type
                         except FileNotFoundError as e:
                             raise HTTPException(status_code=404, detail=str(e))
                         except ValueError as e:
@@ -2013,14 +2618,14 @@ async def process_pdfs(
                                 active_prompt,
                             )
 
-                clarification_result = clarify_intent(prompt_to_parse, file_names, last_question=effective_question)
+                clarification_result = await run_blocking(_clarify_intent_cached, prompt_to_parse, file_names, last_question=effective_question)
                 
                 if not clarification_result.intent and clarification_result.clarification and session:
                     from app.clarification_layer import _rephrase_with_context
-                    rephrased = _rephrase_with_context(prompt_to_parse, session.last_success_intent, file_names)
+                    rephrased = await run_blocking(_rephrase_with_context, prompt_to_parse, session.last_success_intent, file_names)
                     if rephrased:
                         print(f"[AI] Rephrased '{prompt_to_parse}' → '{rephrased}'")
-                        clarification_result = clarify_intent(rephrased, file_names, last_question=effective_question)
+                        clarification_result = await run_blocking(_clarify_intent_cached, rephrased, file_names, last_question=effective_question)
                 
                 if clarification_result.intent:
                     intent = clarification_result.intent
@@ -2044,14 +2649,11 @@ async def process_pdfs(
         _resolve_intent_filenames(intent, file_names)
         
         try:
-            if isinstance(intent, list):
-                output_file, message = execute_operation_pipeline(intent, file_names)
-                print(f"[OK] {message}")
-                operation_name = "multi"
-            else:
-                output_file, message = execute_operation(intent)
-                print(f"[OK] {message}")
-                operation_name = intent.operation_type
+            output_file, message, cache_hit = await run_file_operation(
+                _execute_in_request_workspace, request_id, blobs, intent, file_names
+            )
+            print(f"[OK] {message}{' (cached)' if cache_hit else ''}")
+            operation_name = "multi" if isinstance(intent, list) else intent.operation_type
         except FileNotFoundError as e:
             raise HTTPException(status_code=404, detail=str(e))
         except ValueError as e:
@@ -2068,9 +2670,8 @@ async def process_pdfs(
         
         try:
             for file_name in file_names:
-                upload_path = os.path.join("uploads", file_name)
-                if os.path.exists(upload_path):
-                    os.remove(upload_path)
+                # Only our own handle: the name may have been re-uploaded with other bytes since
+                await run_blocking(_release_upload, file_name, blobs.get(file_name))
         except Exception as cleanup_err:
             print(f"Warning: Failed to cleanup uploaded files: {cleanup_err}")
 
@@ -2089,6 +2690,7 @@ async def process_pdfs(
             message=f"Unexpected error: {str(e)}"
         )
     finally:
+        get_upload_store().release_holder(request_holder)
         if session and session.intent_status == "RESOLVED":
             _reset_intent_lock(session)
 
@@ -2100,11 +2702,12 @@ async def download_file(filename: str):
     
     Note: In production, use signed URLs or tokens for security.
     """
-    file_path = get_output_path(filename)
+    file_path = job_workspaces.resolve_public_name(filename) or get_output_path(filename)
     
     if not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="File not found")
     
+    filename = os.path.basename(file_path)
     lower = filename.lower()
     media_type = "application/pdf"
     if lower.endswith(".docx"):
@@ -2132,7 +2735,7 @@ async def cleanup_temp_files():
     try:
         if os.path.exists("uploads"):
             for file in os.listdir("uploads"):
-                os.remove(os.path.join("uploads", file))
+                _release_upload(file)
         
         if os.path.exists("outputs"):
             for file in os.listdir("outputs"):
@@ -2161,10 +2764,10 @@ async def analyze_document(request: AnalyzeRequest):
     
     SAFETY: Uses llm_wrapper for robust error handling and fallbacks.
     """
-    from app.llm_wrapper import safe_llm_call, check_llm_availability
+    from app.llm_wrapper import safe_llm_call_async, check_llm_availability
     
     # Check LLM availability first
-    llm_status = check_llm_availability()
+    llm_status = check_llm_availability() if get_llm_health().running else await run_blocking(check_llm_availability)
     if not llm_status["api_key_configured"]:
         return {
             "answer": "⚠️ AI analysis is not configured. Please set up the GROQ_API_KEY in the environment variables to enable document analysis."
@@ -2175,35 +2778,11 @@ async def analyze_document(request: AnalyzeRequest):
         document_text = ""
         for fname in request.files[:3]:  # Limit to first 3 files
             fpath = os.path.join("uploads", fname)
-            if os.path.exists(fpath) and fname.lower().endswith(".pdf"):
-                try:
-                    import fitz  # PyMuPDF
-                    doc = fitz.open(fpath)
-                    for page_num in range(min(doc.page_count, 20)):  # Limit to first 20 pages
-                        page = doc[page_num]
-                        text = page.get_text()
-                        if text.strip():
-                            document_text += f"\n--- Page {page_num + 1} ---\n{text}"
-                    doc.close()
-                except Exception as e:
-                    print(f"[ANALYZE] Could not extract text from {fname}: {e}")
-            # Handle DOCX files
-            elif os.path.exists(fpath) and fname.lower().endswith(".docx"):
+            if os.path.exists(fpath) and fname.lower().endswith((".pdf", ".docx", ".txt")):
                 try:
-                    from docx import Document
-                    doc = Document(fpath)
-                    for para in doc.paragraphs[:200]:  # Limit paragraphs
-                        if para.text.strip():
-                            document_text += f"\n{para.text}"
+                    document_text += await run_blocking(_analysis_text, fname, fpath)
                 except Exception as e:
                     print(f"[ANALYZE] Could not extract text from {fname}: {e}")
-            # Handle text files
-            elif os.path.exists(fpath) and fname.lower().endswith(".txt"):
-                try:
-                    with open(fpath, 'r', encoding='utf-8', errors='ignore') as f:
-                        document_text += f"\n{f.read()[:15000]}"
-                except Exception as e:
-                    print(f"[ANALYZE] Could not read text from {fname}: {e}")
         
         if not document_text.strip():
             return {
@@ -2243,7 +2822,7 @@ Answer the user's questions about this document. Be helpful, accurate, and cite
         })
         
         # Call LLM using safe wrapper
-        response = safe_llm_call(
+        response = await safe_llm_call_async(
             messages=messages,
             purpose="document_analysis",
             temperature=0.7,
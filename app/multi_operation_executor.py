@@ -9,10 +9,10 @@ Allows users to perform multiple operations in sequence:
 
 from typing import List, Tuple
 from app.models import ParsedIntent
+from app.page_map import page_step_from_intent
 from app.pdf_operations import (
     merge_pdfs,
-    split_pdf,
-    delete_pages,
+    run_fused_pipeline,
     compress_pdf,
     pdf_to_docx,
     compress_pdf_to_target,
@@ -45,34 +45,46 @@ class OperationChain:
         """
         self.current_file = initial_file
         messages = []
-        
+        # Consecutive split/delete/reorder/rotate steps are compiled into one
+        # page map and written once instead of once per step.
+        page_steps: List[Tuple[int, ParsedIntent, dict]] = []
+
+        def flush_page_steps():
+            if not page_steps:
+                return
+            first_idx, last_idx = page_steps[0][0], page_steps[-1][0]
+            try:
+                self.current_file = run_fused_pipeline(
+                    [self.current_file],
+                    [step for _, _, step in page_steps],
+                    f"step_{last_idx}_pages.pdf"
+                )
+            except Exception as e:
+                ops = ", ".join(intent.operation_type for _, intent, _ in page_steps)
+                error_msg = f"[ERR] Operations {first_idx}-{last_idx} ({ops}) failed: {str(e)}"
+                print(error_msg)
+                messages.append(error_msg)
+                raise ValueError(error_msg)
+            for _, intent, _ in page_steps:
+                messages.append(self._page_step_message(intent))
+            print(f"[OK] Operations {first_idx}-{last_idx} completed in one pass: {self.current_file}")
+            page_steps.clear()
+
         for idx, intent in enumerate(self.operations, 1):
             print(f"\n[CHAIN] Operation {idx}/{len(self.operations)}: {intent.operation_type}")
-            
+
+            if intent.operation_type == "merge":
+                print("[WARN] Skipping merge in operation chain (already working with single file)")
+                continue
+
+            step = page_step_from_intent(intent)
+            if step is not None:
+                page_steps.append((idx, intent, step))
+                continue
+
+            flush_page_steps()
             try:
-                if intent.operation_type == "merge":
-                    print("[WARN] Skipping merge in operation chain (already working with single file)")
-                    continue
-                
-                elif intent.operation_type == "split":
-                    output_name = f"step_{idx}_split.pdf"
-                    self.current_file = split_pdf(
-                        self.current_file,
-                        intent.split.pages,
-                        output_name
-                    )
-                    messages.append(f"✂️  Split to pages {intent.split.pages}")
-                
-                elif intent.operation_type == "delete":
-                    output_name = f"step_{idx}_deleted.pdf"
-                    self.current_file = delete_pages(
-                        self.current_file,
-                        intent.delete.pages_to_delete,
-                        output_name
-                    )
-                    messages.append(f"Deleted pages {intent.delete.pages_to_delete}")
-                
-                elif intent.operation_type == "compress":
+                if intent.operation_type == "compress":
                     output_name = f"step_{idx}_compressed.pdf"
                     self.current_file = compress_pdf(self.current_file, output_name)
                     messages.append("Compressed")
@@ -98,11 +110,24 @@ class OperationChain:
                 print(error_msg)
                 messages.append(error_msg)
                 raise ValueError(error_msg)
+
+        flush_page_steps()
         
         summary = " → ".join(messages) if messages else "Processing completed"
         return self.current_file, summary
 
 
+    @staticmethod
+    def _page_step_message(intent: ParsedIntent) -> str:
+        if intent.operation_type == "split":
+            return f"✂️  Split to pages {intent.split.pages}"
+        if intent.operation_type == "delete":
+            return f"Deleted pages {intent.delete.pages_to_delete}"
+        if intent.operation_type == "reorder":
+            return "Reordered pages"
+        return f"Rotated {intent.rotate.degrees}°"
+
+
 def execute_operation_chain(
     initial_file: str,
     intents: List[ParsedIntent]
@@ -0,0 +1,110 @@
+"""
+Normalized Prompt - One normalization stage shared by every deterministic resolver.
+
+Problem: one prompt was normalized and scanned separately by LocalNormalizer
+(one_flow_resolver), PatternMatcher._normalize (pattern_matching),
+CommandIntelligence (command_intelligence), normalize_human_input (ai_parser)
+and _normalize_prompt_for_heuristics (clarification_layer). Each applied its
+own typo map with one re.sub per entry.
+_normalize_prompt_for_heuristics also fuzzy-matched every word against the
+keyword list on each of its several calls per request.
+
+Solution: get_normalized_prompt(text) returns one memoized NormalizedPrompt
+per distinct text (an LRU, so every resolver working on the same request
+gets the same object). It carries:
+- text: lowercased and stripped
+- tokens: alphanumeric words of text
+- heuristic: the fuzzy keyword-normalized prompt used by clarification_layer
+- operations / target_format / target_size_mb / purpose: what the pattern
+  matcher detects, computed on first access
+
+Typo maps stay per resolver: a correction is only safe where the resolver
+reads the word as an operation ("orc" -> "ocr" would turn the watermark text
+in "watermark orc" into a second operation). compile_typo_fixes(map) gives
+each resolver its own single-pass replacer.
+
+Resolver-specific derivations (prefix stripping, a resolver's own typo map,
+its intent scan) are memoized on the same object through view(key, build), so
+asking twice during a request costs a dict lookup.
+"""
+
+import re
+from functools import lru_cache
+from threading import Lock
+from typing import Callable, Optional
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_HEURISTIC_WORD_RE = re.compile(r"[A-Za-z]{2,}")
+
+
+def compile_typo_fixes(fixes: dict) -> Callable[[str], str]:
+    """One-scan whole-word replacer for a lowercase typo -> correction map."""
+    pattern = re.compile(r"\b(" + "|".join(sorted(map(re.escape, fixes), key=len, reverse=True)) + r")\b")
+    return lambda text: pattern.sub(lambda m: fixes[m.group(1)], text) if text else text
+
+
+class NormalizedPrompt:
+    """Normalization results for one prompt text; treat as read-only."""
+
+    __slots__ = ("raw", "text", "tokens", "_views", "_lock")
+
+    def __init__(self, raw: str):
+        self.raw = raw or ""
+        self.text = self.raw.lower().strip()
+        self.tokens = tuple(_TOKEN_RE.findall(self.text))
+        self._views: dict = {}
+        self._lock = Lock()
+
+    def view(self, key, build: Callable[[], object]):
+        """Memoized derivation of this prompt (return immutable values: callers share them)."""
+        try:
+            return self._views[key]
+        except KeyError:
+            pass
+        value = build()
+        with self._lock:
+            return self._views.setdefault(key, value)
+
+    @property
+    def heuristic(self) -> str:
+        """Every word fuzzy-matched to the nearest operation/connector/unit keyword."""
+        def build():
+            from app.utils import ALL_NORMALIZE_KEYWORDS, fuzzy_match_keyword
+            return _HEURISTIC_WORD_RE.sub(
+                lambda m: fuzzy_match_keyword(m.group(0), ALL_NORMALIZE_KEYWORDS), self.raw
+            )
+        return self.view("heuristic", build)
+
+    def _pattern_match(self):
+        from app.pattern_matching import match_command
+        return match_command(self.raw)  # memoized on this object by PatternMatcher.match
+
+    @property
+    def operations(self) -> tuple:
+        matched = self._pattern_match()
+        return tuple(matched.operations) if matched else ()
+
+    @property
+    def target_format(self) -> Optional[str]:
+        matched = self._pattern_match()
+        return matched.target_format if matched else None
+
+    @property
+    def target_size_mb(self) -> Optional[float]:
+        matched = self._pattern_match()
+        return matched.target_size_mb if matched else None
+
+    @property
+    def purpose(self) -> Optional[str]:
+        matched = self._pattern_match()
+        return matched.purpose if matched else None
+
+    def __repr__(self) -> str:
+        return f"NormalizedPrompt({self.raw!r})"
+
+
+@lru_cache(maxsize=256)
+def get_normalized_prompt(text: str) -> NormalizedPrompt:
+    """Shared NormalizedPrompt for text (memoized)."""
+    return NormalizedPrompt(text)
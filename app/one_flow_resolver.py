@@ -26,6 +26,8 @@ from dataclasses import dataclass, field
 from typing import Optional, List, Tuple
 from enum import Enum
 
+from app.normalized_prompt import compile_typo_fixes, get_normalized_prompt
+
 logger = logging.getLogger(__name__)
 
 
@@ -75,6 +77,29 @@ PREFIX_PATTERNS = [
     r"^i\s+want\s+to\s+",
     r"^i\s+need\s+to\s+",
 ]
+PREFIX_RES = [re.compile(p, re.IGNORECASE) for p in PREFIX_PATTERNS]
+
+# This resolver's own typo map: words it would otherwise miss as operations or connectors
+TYPO_FIXES = {
+    "compres": "compress",
+    "comprs": "compress",
+    "mrge": "merge",
+    "merg": "merge",
+    "splt": "split",
+    "spill": "split",
+    "spilt": "split",
+    "convrt": "convert",
+    "rotat": "rotate",
+    "rotae": "rotate",
+    "adn": "and",
+    "thn": "then",
+    "thne": "then",
+    "dog": "docx",
+    "dox": "docx",
+    "pfd": "pdf",
+    "imag": "image",
+}
+fix_typos = compile_typo_fixes(TYPO_FIXES)
 
 TARGET_FORMAT_PATTERNS = {
     r"\bto\s+pdf\b": FileType.PDF,
@@ -166,43 +191,19 @@ class LocalNormalizer:
     
     @staticmethod
     def normalize(text: str) -> str:
-        """Normalize input text"""
+        """Normalize input text (memoized per prompt on the shared NormalizedPrompt)"""
         if not text:
             return text
+        return get_normalized_prompt(text).view("one_flow_text", lambda: LocalNormalizer._normalize(text))
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        result = get_normalized_prompt(text).text
+        
+        for pattern in PREFIX_RES:
+            result = pattern.sub("", result).strip()
         
-        result = text.lower().strip()
-        
-        for pattern in PREFIX_PATTERNS:
-            result = re.sub(pattern, "", result, flags=re.IGNORECASE).strip()
-        
-        typo_fixes = {
-            r"\bcompres\b": "compress",
-            r"\bcomprs\b": "compress",
-            r"\bmrge\b": "merge",
-            r"\bmerg\b": "merge",
-            r"\bsplt\b": "split",
-            r"\bspill\b": "split",
-            r"\bspilt\b": "split",
-            r"\bconvrt\b": "convert",
-            r"\brotate\b": "rotate",
-            r"\brotat\b": "rotate",
-            r"\brotae\b": "rotate",
-            r"\bwatermark\b": "watermark",
-            r"\benhance\b": "enhance",
-            r"\breorder\b": "reorder",
-            r"\bflatten\b": "flatten",
-            r"\bclean\b": "clean",
-            r"\badn\b": "and",
-            r"\bthn\b": "then",
-            r"\bthne\b": "then",
-            r"\bdog\b": "docx",
-            r"\bdox\b": "docx",
-            r"\bpfd\b": "pdf",
-            r"\bimag\b": "image",
-        }
-        
-        for typo, fix in typo_fixes.items():
-            result = re.sub(typo, fix, result, flags=re.IGNORECASE)
+        result = fix_typos(result)
         
         result = PIPELINE_ARROW.sub(" → ", result)
         
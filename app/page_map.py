@@ -0,0 +1,117 @@
+"""
+Page Map Compiler - Collapse page-structure chains into a single pass.
+
+split / delete / reorder / rotate are pure page-index transformations. A chain
+like "keep pages 1-10, then delete page 3, then reverse, then rotate page 1"
+used to rebuild the PDF once per step. Here the chain is composed into one
+final page map - for every output page, the source page index plus the total
+clockwise rotation - and the PDF is written once.
+
+Steps are plain dicts (same shape the fused pipeline uses):
+    {"op": "split",   "pages": [1, 2, 3]}
+    {"op": "delete",  "pages": [2]}
+    {"op": "reorder", "new_order": [3, 1, 2] | "reverse"}
+    {"op": "rotate",  "degrees": 90, "pages": [1] | None}
+
+Page numbers in each step are 1-indexed against the document as it looks
+after the previous steps, exactly like running the operations one by one.
+"""
+
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+
+PAGE_MAP_OPERATIONS = frozenset({"split", "delete", "reorder", "rotate"})
+
+
+@dataclass(frozen=True)
+class PageRef:
+    """One output page: 0-based source page index + clockwise rotation to add."""
+    source: int
+    rotation: int = 0
+
+
+def _check_pages(numbers: Iterable[int], total: int) -> None:
+    for p in numbers:
+        if p < 1 or p > total:
+            raise ValueError(f"Invalid page number: {p}. PDF has {total} pages.")
+
+
+def compose_step(page_map: List[PageRef], step: dict) -> List[PageRef]:
+    """Apply one page-structure step to a page map and return the new map."""
+    op = step.get("op")
+    total = len(page_map)
+
+    if op == "split":
+        pages = step["pages"]
+        _check_pages(pages, total)
+        return [page_map[p - 1] for p in pages]
+
+    if op == "delete":
+        pages = step["pages"]
+        _check_pages(pages, total)
+        drop = set(pages)
+        return [ref for i, ref in enumerate(page_map, start=1) if i not in drop]
+
+    if op == "reorder":
+        new_order = step["new_order"]
+        if new_order == "reverse":
+            return list(reversed(page_map))
+        if len(new_order) != total:
+            raise ValueError(f"new_order must have exactly {total} entries")
+        if set(new_order) != set(range(1, total + 1)):
+            raise ValueError("new_order must include each page number exactly once")
+        return [page_map[p - 1] for p in new_order]
+
+    if op == "rotate":
+        degrees = step["degrees"]
+        if degrees not in (90, 180, 270):
+            raise ValueError("degrees must be one of 90, 180, 270")
+        pages = step.get("pages")
+        if pages is None:
+            targets = set(range(1, total + 1))
+        else:
+            _check_pages(pages, total)
+            targets = set(pages)
+        return [
+            PageRef(ref.source, (ref.rotation + degrees) % 360) if i in targets else ref
+            for i, ref in enumerate(page_map, start=1)
+        ]
+
+    raise ValueError(f"Operation '{op}' is not a page-structure step")
+
+
+def compile_page_map(steps: List[dict], page_count: int) -> List[PageRef]:
+    """Compose a chain of page-structure steps against the real page count.
+
+    Raises:
+        ValueError: On out-of-range pages or invalid reorder/rotate arguments
+    """
+    page_map = [PageRef(i) for i in range(page_count)]
+    for step in steps:
+        page_map = compose_step(page_map, step)
+    if not page_map:
+        raise ValueError("No pages left after applying the page operations")
+    return page_map
+
+
+def is_identity(page_map: List[PageRef], page_count: int) -> bool:
+    """True when the map would reproduce the source document unchanged."""
+    return len(page_map) == page_count and all(
+        ref.source == i and ref.rotation == 0 for i, ref in enumerate(page_map)
+    )
+
+
+def page_step_from_intent(intent) -> Optional[dict]:
+    """Plain step dict for a split/delete/reorder/rotate ParsedIntent, else None."""
+    kind = getattr(intent, "operation_type", None)
+    if kind not in PAGE_MAP_OPERATIONS:
+        return None
+    op = intent.get_operation()
+    if kind == "split":
+        return {"op": "split", "pages": list(op.pages)}
+    if kind == "delete":
+        return {"op": "delete", "pages": list(op.pages_to_delete)}
+    if kind == "reorder":
+        return {"op": "reorder", "new_order": op.new_order if op.new_order == "reverse" else list(op.new_order)}
+    return {"op": "rotate", "degrees": op.degrees, "pages": list(op.pages) if op.pages is not None else None}
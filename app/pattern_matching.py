@@ -26,10 +26,12 @@ TARGET GROUPS:
 
 import re
 import logging
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from typing import Optional, List, Tuple, Dict, Set
 from enum import Enum
 
+from app.normalized_prompt import compile_typo_fixes, get_normalized_prompt
+
 logger = logging.getLogger(__name__)
 
 
@@ -133,6 +135,21 @@ PURPOSE_PATTERNS = {
 
 ARROW_PATTERN = re.compile(r"\s*[→➔\->]+\s*")
 
+TYPO_FIXES = {
+    "dog": "docx",
+    "dox": "docx",
+    "spill": "split",
+    "spilt": "split",
+    "pfd": "pdf",
+    "imag": "image",
+    "compres": "compress",
+    "mrge": "merge",
+    "merg": "merge",
+    "rotat": "rotate",
+    "rotae": "rotate",
+}
+fix_typos = compile_typo_fixes(TYPO_FIXES)
+
 NOISE_PATTERN = re.compile(
     r"^(and|pls|plz|please|do\s+it|then|now|just|can\s+you|"
     r"i\s+want\s+to|i\s+need\s+to|help\s+me|could\s+you|would\s+you)\s+",
@@ -164,6 +181,14 @@ class PatternMatcher:
             MatchedPattern if matched, None if no match
         """
         
+        if not text:
+            return None
+        matched = get_normalized_prompt(text).view("pattern_match", lambda: self._match(text))
+        if matched is None:
+            return None
+        return replace(matched, operations=list(matched.operations))
+    
+    def _match(self, text: str) -> Optional[MatchedPattern]:
         normalized = self._normalize(text)
         
         if not normalized:
@@ -197,29 +222,12 @@ class PatternMatcher:
         if not text:
             return ""
         
-        result = text.lower().strip()
-        
-        result = NOISE_PATTERN.sub("", result).strip()
-        
-        typo_fixes = {
-            r"\bdog\b": "docx",
-            r"\bdox\b": "docx",
-            r"\bspill\b": "split",
-            r"\bspilt\b": "split",
-            r"\bpfd\b": "pdf",
-            r"\bimag\b": "image",
-            r"\bcompres\b": "compress",
-            r"\bmrge\b": "merge",
-            r"\bmerg\b": "merge",
-            r"\brotat\b": "rotate",
-            r"\brotae\b": "rotate",
-        }
-        for typo, fix in typo_fixes.items():
-            result = re.sub(typo, fix, result, flags=re.IGNORECASE)
-        
-        result = ARROW_PATTERN.sub(" → ", result)
-        
-        return result
+        def build():
+            result = NOISE_PATTERN.sub("", get_normalized_prompt(text).text).strip()
+            result = fix_typos(result)
+            return ARROW_PATTERN.sub(" → ", result)
+        
+        return get_normalized_prompt(text).view("pattern_text", build)
     
     def _extract_operations(self, text: str) -> List[str]:
         """Extract operations from text"""
@@ -13,12 +13,18 @@ OPTIMIZATION: Lazy imports for heavy libraries (fitz, pdf2docx, pypdf)
 import os
 import shutil
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, List, Optional
 import io
 import zipfile
 import hashlib
 import subprocess
 import math
+import copy
+import threading
+
+from app.doc_probe import TEXT_MIN_CHARS, get_probe
+from app.page_map import PAGE_MAP_OPERATIONS, PageRef, compile_page_map
+from app.workspace import current_workspace, input_dir, output_dir
 
 
 
@@ -101,18 +107,33 @@ def get_upload_path(filename: str) -> str:
     """Get full path for an input file.
 
     Primary source is `uploads/`. For multi-step pipelines, intermediate files live in
-    `outputs/` and may be used as inputs for subsequent steps.
+    `outputs/` and may be used as inputs for subsequent steps. Inside a job
+    workspace (app/workspace.py) its in/ and out/ directories are checked first.
     """
+    workspace = current_workspace()
+    if workspace:
+        for directory in (input_dir(workspace), output_dir(workspace)):
+            path = os.path.join(directory, filename)
+            if os.path.exists(path):
+                return path
     uploads_path = os.path.join("uploads", filename)
     if os.path.exists(uploads_path):
         return uploads_path
+    if workspace:
+        return os.path.join(output_dir(workspace), filename)
     outputs_path = os.path.join("outputs", filename)
     return outputs_path
 
 
+def get_output_dir() -> str:
+    """Directory outputs are written to: the active job workspace, else `outputs/`."""
+    workspace = current_workspace()
+    return output_dir(workspace) if workspace else "outputs"
+
+
 def get_output_path(filename: str) -> str:
     """Get full path for output file"""
-    return os.path.join("outputs", filename)
+    return os.path.join(get_output_dir(), filename)
 
 
 def _resolve_ghostscript_executable(*, raise_if_missing: bool) -> Optional[str]:
@@ -272,6 +293,190 @@ def delete_pages(file_name: str, pages_to_delete: List[int], output_name: str =
     return output_name
 
 
+def _gs_parallel_settings() -> tuple[int, int, int]:
+    """(workers, min_pages, pages_per_chunk) for chunked Ghostscript compression."""
+    from app.config import settings
+    workers = int(settings.gs_parallel_workers or 0)
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers, max(1, int(settings.gs_parallel_min_pages)), max(1, int(settings.gs_pages_per_chunk))
+
+
+_GS_SLOTS: Optional[threading.BoundedSemaphore] = None
+_GS_SLOTS_LOCK = threading.Lock()
+
+
+def _gs_slots() -> threading.BoundedSemaphore:
+    """Process-wide budget of concurrently running Ghostscript processes.
+
+    Chunked compression and target-size searches of several jobs all draw
+    from it (Settings.gs_max_processes), so the per-job worker counts never
+    add up to more gs processes than the machine was sized for.
+    """
+    global _GS_SLOTS
+    if _GS_SLOTS is None:
+        with _GS_SLOTS_LOCK:
+            if _GS_SLOTS is None:
+                from app.config import settings
+                _GS_SLOTS = threading.BoundedSemaphore(max(1, int(settings.gs_max_processes or 1)))
+    return _GS_SLOTS
+
+
+def _run_gs(args: List[str]) -> None:
+    """subprocess.run a Ghostscript command line inside the process-wide budget."""
+    with _gs_slots():
+        subprocess.run(args, check=True)
+
+
+def _has_cross_page_references(input_path: str) -> bool:
+    """True when the PDF has an outline, named destinations or links to its own pages.
+
+    A Ghostscript run over a page range drops links and outline entries that
+    point outside the range, so such files must not be compressed in chunks.
+    Unreadable structure counts as True (the single-process path is safe).
+    """
+    try:
+        fitz = _get_fitz()
+    except Exception:
+        fitz = None
+    try:
+        if fitz is not None:
+            with fitz.open(input_path) as doc:
+                if doc.get_toc(simple=True):
+                    return True
+                internal = (fitz.LINK_GOTO, fitz.LINK_NAMED)
+                return any(link.get("kind") in internal for page in doc for link in page.get_links())
+        reader = PdfReader(input_path)
+        if reader.outline or reader.named_destinations:
+            return True
+        for page in reader.pages:
+            for annot in page.get("/Annots") or []:
+                annot = annot.get_object()
+                action = annot.get("/A") or {}
+                if annot.get("/Subtype") == "/Link" and ("/Dest" in annot or action.get("/S") == "/GoTo"):
+                    return True
+        return False
+    except Exception:
+        return True
+
+
+def _gs_pdfwrite_args(gs_executable: str, preset: str, output_path: str, input_path: str,
+                      first_page: Optional[int] = None, last_page: Optional[int] = None) -> List[str]:
+    args = [
+        gs_executable,
+        "-sDEVICE=pdfwrite",
+        f"-dPDFSETTINGS=/{preset}",
+        "-dNOPAUSE",
+        "-dBATCH",
+        "-dQUIET",
+    ]
+    if first_page is not None:
+        args += [f"-dFirstPage={first_page}", f"-dLastPage={last_page}"]
+    return args + [f"-sOutputFile={output_path}", input_path]
+
+
+def _page_ranges(page_count: int, pages_per_chunk: int) -> List[tuple[int, int]]:
+    """1-indexed inclusive (first, last) ranges covering every page."""
+    return [
+        (first, min(first + pages_per_chunk - 1, page_count))
+        for first in range(1, page_count + 1, pages_per_chunk)
+    ]
+
+
+def _stitch_pdf_chunks(chunk_paths: List[str], output_path: str) -> None:
+    """Concatenate compressed chunks into output_path, deduplicating shared objects.
+
+    With PyMuPDF, garbage=4 merges byte-identical objects and streams (images,
+    ICC profiles, fully embedded fonts that several chunks carried separately).
+    Font subsets are the exception: each chunk embeds a subset of only the
+    glyphs on its own pages, so the streams differ and a text-heavy file ends
+    up with one subset per font per chunk - a few KB each, small next to the
+    image savings compression is chunked for. Files with an outline or
+    internal links never get here (_has_cross_page_references).
+    Without PyMuPDF, pypdf concatenates and dedupes identical objects if the
+    installed version supports it.
+    """
+    tmp_path = output_path + ".stitch.tmp"
+    try:
+        fitz = _get_fitz()
+    except Exception:
+        fitz = None
+
+    if fitz is not None:
+        doc = fitz.open()
+        try:
+            for chunk in chunk_paths:
+                with fitz.open(chunk) as part:
+                    doc.insert_pdf(part)
+            doc.save(tmp_path, garbage=4, deflate=True)
+        finally:
+            doc.close()
+    else:
+        writer = PdfWriter()
+        for chunk in chunk_paths:
+            for page in PdfReader(chunk).pages:
+                writer.add_page(page)
+        if hasattr(writer, "compress_identical_objects"):
+            writer.compress_identical_objects()
+        with open(tmp_path, "wb") as f:
+            writer.write(f)
+    os.replace(tmp_path, output_path)
+
+
+def _ghostscript_compress(gs_executable: str, input_path: str, output_path: str, preset: str) -> None:
+    """Run Ghostscript pdfwrite, splitting large inputs into page ranges compressed concurrently.
+
+    Inputs below gs_parallel_min_pages (or with gs_parallel_workers = 1) take
+    the original single-process path, as do files with an outline or internal
+    links, which per-range runs would break. If any chunk fails, the whole
+    file is recompressed single-process so the result never depends on the
+    split. Every gs process, chunked or not, runs inside _gs_slots().
+    """
+    workers, min_pages, per_chunk = _gs_parallel_settings()
+    page_count = 0
+    if workers > 1:
+        probe = get_probe(input_path, compute=False)
+        try:
+            page_count = probe.page_count if probe else len(PdfReader(input_path).pages)
+        except Exception:
+            page_count = 0
+
+    if (
+        workers <= 1
+        or page_count < max(min_pages, 2 * per_chunk)
+        or _has_cross_page_references(input_path)
+    ):
+        _run_gs(_gs_pdfwrite_args(gs_executable, preset, output_path, input_path))
+        return
+
+    from concurrent.futures import ThreadPoolExecutor
+    import tempfile
+    import time
+
+    ranges = _page_ranges(page_count, per_chunk)
+    started = time.time()
+    with tempfile.TemporaryDirectory(prefix="gs_chunks_", dir=os.path.dirname(output_path) or ".") as tmp_dir:
+        chunk_paths = [os.path.join(tmp_dir, f"chunk_{i:04d}.pdf") for i in range(len(ranges))]
+
+        def _run_chunk(i: int) -> None:
+            first, last = ranges[i]
+            _run_gs(_gs_pdfwrite_args(gs_executable, preset, chunk_paths[i], input_path, first, last))
+
+        try:
+            with ThreadPoolExecutor(max_workers=min(workers, len(ranges))) as executor:
+                list(executor.map(_run_chunk, range(len(ranges))))
+            _stitch_pdf_chunks(chunk_paths, output_path)
+        except Exception as e:
+            print(f"[COMPRESS] Parallel compression failed ({e}), retrying single-process")
+            _run_gs(_gs_pdfwrite_args(gs_executable, preset, output_path, input_path))
+            return
+
+    print(
+        f"[COMPRESS] {page_count} pages in {len(ranges)} chunks on "
+        f"{min(workers, len(ranges))} workers: {time.time() - started:.2f}s"
+    )
+
+
 def compress_pdf(file_name: str, output_name: str = "compressed_output.pdf", preset: str = "ebook") -> str:
     """
     Compress a PDF using a qualitative preset.
@@ -307,19 +512,7 @@ def compress_pdf(file_name: str, output_name: str = "compressed_output.pdf", pre
 
     gs_executable = _resolve_ghostscript_executable(raise_if_missing=False)
     if gs_executable:
-        subprocess.run(
-            [
-                gs_executable,
-                "-sDEVICE=pdfwrite",
-                f"-dPDFSETTINGS=/{preset}",
-                "-dNOPAUSE",
-                "-dBATCH",
-                "-dQUIET",
-                f"-sOutputFile={output_path}",
-                input_path,
-            ],
-            check=True,
-        )
+        _ghostscript_compress(gs_executable, input_path, output_path, preset)
         return output_name
 
     pdf_reader = PdfReader(input_path)
@@ -433,12 +626,16 @@ def pdf_to_docx(file_name: str, output_name: str = "converted_output.docx") -> s
     except Exception:
         size_mb = 0
 
-    try:
-        probe = fitz.open(input_path)
+    probe = get_probe(input_path, compute=False)
+    if probe and probe.page_count:
         page_count = probe.page_count
-        probe.close()
-    except Exception:
-        page_count = 0
+    else:
+        try:
+            probe_doc = fitz.open(input_path)
+            page_count = probe_doc.page_count
+            probe_doc.close()
+        except Exception:
+            page_count = 0
 
     try_pdf2docx = bool(size_mb and size_mb <= 15 and page_count and page_count <= 30)
 
@@ -542,7 +739,7 @@ def docx_to_pdf(file_name: str, output_name: str = "converted_output.pdf") -> st
         c.save()
         return output_name
 
-    out_dir = os.path.abspath("outputs")
+    out_dir = os.path.abspath(get_output_dir())
 
     try:
         subprocess.run(
@@ -581,13 +778,75 @@ def docx_to_pdf(file_name: str, output_name: str = "converted_output.pdf") -> st
     return output_name
 
 
-def compress_pdf_to_target(file_name: str, target_mb: int, output_name: str = "compressed_target_output.pdf") -> str:
+# Candidate settings for compress_pdf_to_target, best quality first. Entries
+# with "dpi" add explicit image downsampling between/below the stock presets;
+# "qfactor" raises the JPEG quantization factor (higher = smaller, blurrier).
+_TARGET_CANDIDATES: List[dict] = [
+    {"preset": "prepress"},
+    {"preset": "printer"},
+    {"preset": "ebook", "dpi": 200},
+    {"preset": "ebook"},
+    {"preset": "ebook", "dpi": 110},
+    {"preset": "screen"},
+    {"preset": "screen", "dpi": 50, "qfactor": 1.3},
+    {"preset": "screen", "dpi": 36, "qfactor": 2.0},
+]
+_TARGET_MAX_WORKERS = 3  # Candidates in flight per target search (each also needs a _gs_slots() slot)
+
+
+def _gs_target_args(gs_executable: str, candidate: dict, output_path: str, input_path: str) -> List[str]:
+    """Ghostscript command line for one compress_pdf_to_target candidate."""
+    args = _gs_pdfwrite_args(gs_executable, candidate["preset"], output_path, input_path)[:-2]
+    dpi = candidate.get("dpi")
+    if dpi:
+        args += [
+            "-dDownsampleColorImages=true",
+            "-dDownsampleGrayImages=true",
+            "-dColorImageDownsampleType=/Bicubic",
+            "-dGrayImageDownsampleType=/Bicubic",
+            f"-dColorImageResolution={dpi}",
+            f"-dGrayImageResolution={dpi}",
+            "-dColorImageDownsampleThreshold=1.0",
+            "-dGrayImageDownsampleThreshold=1.0",
+        ]
+    args.append(f"-sOutputFile={output_path}")
+    qfactor = candidate.get("qfactor")
+    if qfactor:
+        jpeg = f"<< /QFactor {qfactor} /Blend 1 /HSamples [2 1 1 2] /VSamples [2 1 1 2] >>"
+        args += [
+            "-dAutoFilterColorImages=false",
+            "-dAutoFilterGrayImages=false",
+            "-dColorImageFilter=/DCTEncode",
+            "-dGrayImageFilter=/DCTEncode",
+            "-c",
+            f"<< /ColorImageDict {jpeg} /GrayImageDict {jpeg} >> setdistillerparams",
+            "-f",
+        ]
+    return args + [input_path]
+
+
+def compress_pdf_to_target(
+    file_name: str,
+    target_mb: int,
+    output_name: str = "compressed_target_output.pdf",
+    details: Optional[dict] = None,
+) -> str:
     """
     Compress a PDF to a target size (in MB) using Ghostscript.
+
+    Candidates in _TARGET_CANDIDATES run best quality first, at most
+    _TARGET_MAX_WORKERS at a time and inside the process-wide Ghostscript
+    budget, each into its own temp file. As soon as a candidate fits,
+    lower-quality candidates are cancelled or never started; once nothing of
+    higher quality is still running, the winner's file is moved into place -
+    no preset is ever run twice.
+
     Args:
         file_name: Source PDF file name
         target_mb: Target size in MB
         output_name: Name for the output file
+        details: Optional dict filled with the chosen parameters (preset, dpi,
+                 qfactor, size_mb, met_target, ...), also on PARTIAL_SUCCESS
     Returns:
         str: Output file name
     Raises:
@@ -603,46 +862,84 @@ def compress_pdf_to_target(file_name: str, target_mb: int, output_name: str = "c
     gs_executable = _resolve_ghostscript_executable(raise_if_missing=True)
     
     original_size_mb = os.path.getsize(input_path) / (1024 * 1024)
-    best_size_mb = original_size_mb
-    best_quality = None
-    
-    qualities = ["screen", "ebook", "printer", "prepress"]
-    for quality in qualities:
-        try:
-            subprocess.run([
-                gs_executable,
-                "-sDEVICE=pdfwrite",
-                f"-dPDFSETTINGS=/{quality}",
-                "-dNOPAUSE",
-                "-dBATCH",
-                "-dQUIET",
-                f"-sOutputFile={output_path}",
-                input_path
-            ], check=True)
-            size_mb = os.path.getsize(output_path) / (1024 * 1024)
-            if size_mb <= target_mb:
-                return output_name
-            if size_mb < best_size_mb:
-                best_size_mb = size_mb
-                best_quality = quality
-        except Exception as e:
-            continue
-    
-    if best_quality:
-        subprocess.run([
-            gs_executable,
-            "-sDEVICE=pdfwrite",
-            f"-dPDFSETTINGS=/{best_quality}",
-            "-dNOPAUSE",
-            "-dBATCH",
-            "-dQUIET",
-            f"-sOutputFile={output_path}",
-            input_path
-        ], check=True)
-        raise Exception(f"PARTIAL_SUCCESS:Compressed from {original_size_mb:.1f}MB to {best_size_mb:.1f}MB (target was {target_mb}MB). Maximum compression reached.")
-    
-    raise Exception(f"Could not compress {file_name}. The PDF may already be optimized.")
 
+    import tempfile
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    candidates = _TARGET_CANDIDATES
+    workers = min(_TARGET_MAX_WORKERS, _gs_parallel_settings()[0], len(candidates))
+    lock = threading.Lock()
+    sizes: dict[int, Optional[float]] = {}  # rank -> size_mb (None = failed/cancelled)
+    running: dict[int, subprocess.Popen] = {}
+    state = {"best_fit": None, "done": False, "cancelled": 0}
+
+    with tempfile.TemporaryDirectory(prefix="gs_target_", dir=os.path.dirname(output_path) or ".") as tmp_dir:
+        paths = [os.path.join(tmp_dir, f"candidate_{rank}.pdf") for rank in range(len(candidates))]
+
+        def _obsolete(rank: int) -> bool:
+            best_fit = state["best_fit"]
+            return state["done"] or (best_fit is not None and rank > best_fit)
+
+        def _run(rank: int) -> None:
+            with _gs_slots():
+                with lock:
+                    if _obsolete(rank):
+                        state["cancelled"] += 1
+                        return
+                    proc = subprocess.Popen(_gs_target_args(gs_executable, candidates[rank], paths[rank], input_path))
+                    running[rank] = proc
+                returncode = proc.wait()
+            with lock:
+                running.pop(rank, None)
+                if returncode != 0 or not os.path.exists(paths[rank]):
+                    sizes[rank] = None
+                else:
+                    sizes[rank] = os.path.getsize(paths[rank]) / (1024 * 1024)
+                    best_fit = state["best_fit"]
+                    if sizes[rank] <= target_mb and (best_fit is None or rank < best_fit):
+                        state["best_fit"] = rank
+                best_fit = state["best_fit"]
+                if best_fit is not None and all(r in sizes for r in range(best_fit)):
+                    state["done"] = True
+                for r in [r for r in running if _obsolete(r)]:
+                    running.pop(r).kill()
+                    state["cancelled"] += 1
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            list(executor.map(_run, range(len(candidates))))
+
+        best_fit = state["best_fit"]
+        finished = {rank: size for rank, size in sizes.items() if size is not None}
+        if best_fit is not None:
+            chosen = best_fit
+        elif finished:
+            chosen = min(finished, key=lambda rank: finished[rank])
+        else:
+            raise Exception(f"Could not compress {file_name}. The PDF may already be optimized.")
+
+        chosen_size = finished[chosen]
+        if best_fit is None and chosen_size >= original_size_mb:
+            raise Exception(f"Could not compress {file_name}. The PDF may already be optimized.")
+
+        os.replace(paths[chosen], output_path)
+
+    params = {
+        **candidates[chosen],
+        "size_mb": round(chosen_size, 2),
+        "original_mb": round(original_size_mb, 2),
+        "target_mb": target_mb,
+        "met_target": best_fit is not None,
+        "candidates_run": len(finished),
+        "candidates_cancelled": state["cancelled"],
+    }
+    if details is not None:
+        details.update(params)
+    print(f"[COMPRESS] Target {target_mb}MB → {params}")
+
+    if best_fit is None:
+        raise Exception(f"PARTIAL_SUCCESS:Compressed from {original_size_mb:.1f}MB to {chosen_size:.1f}MB (target was {target_mb}MB). Maximum compression reached.")
+    return output_name
 
 
 def rotate_pdf(
@@ -682,12 +979,7 @@ def rotate_pdf(
     writer = PdfWriter()
     for idx, page in enumerate(reader.pages, start=1):
         if idx in pages_set:
-            if hasattr(page, "rotate_clockwise"):
-                page = page.rotate_clockwise(degrees)
-            elif hasattr(page, "rotate"):
-                page = page.rotate(degrees)
-            elif hasattr(page, "rotateClockwise"):
-                page.rotateClockwise(degrees)
+            page = _rotate_page(page, degrees)
         writer.add_page(page)
 
     output_path = get_output_path(output_name)
@@ -732,6 +1024,87 @@ def reorder_pdf(file_name: str, new_order: List[int] | str, output_name: str = "
     return output_name
 
 
+def _rotate_page(page, degrees: int):
+    """Rotate a pypdf page clockwise across pypdf API generations."""
+    if hasattr(page, "rotate_clockwise"):
+        return page.rotate_clockwise(degrees)
+    if hasattr(page, "rotate"):
+        return page.rotate(degrees)
+    if hasattr(page, "rotateClockwise"):
+        page.rotateClockwise(degrees)
+    return page
+
+
+def _merge_overlay(page, overlay_page) -> None:
+    try:
+        page.merge_page(overlay_page)
+    except Exception:
+        page.mergePage(overlay_page)  # type: ignore
+
+
+def _watermark_overlay(w: float, h: float, text: str, opacity: float, angle: int):
+    """Build a single-page watermark overlay of size (w, h)."""
+    from reportlab.pdfgen import canvas  # type: ignore
+
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=(w, h))
+    try:
+        c.setFillAlpha(float(opacity))
+    except Exception:
+        pass
+    c.saveState()
+    c.translate(w / 2.0, h / 2.0)
+    try:
+        c.rotate(float(angle or 0))
+    except Exception:
+        c.rotate(0)
+    base = min(w, h)
+    font_size = max(18, min(72, int(base / 10)))
+    c.setFont("Helvetica", font_size)
+    c.setFillColorRGB(0, 0, 0)
+    c.drawCentredString(0, 0, text)
+    c.restoreState()
+    c.showPage()
+    c.save()
+    buf.seek(0)
+    return PdfReader(buf).pages[0]
+
+
+def _page_number_overlay(w: float, h: float, number: int, position: str):
+    """Build a single-page overlay with `number` drawn at `position`."""
+    from reportlab.pdfgen import canvas  # type: ignore
+
+    margin = 28.0
+    if position == "bottom_right":
+        x, y, align = (w - margin, margin, 2)
+    elif position == "bottom_left":
+        x, y, align = (margin, margin, 0)
+    elif position == "top_right":
+        x, y, align = (w - margin, h - margin, 2)
+    elif position == "top_left":
+        x, y, align = (margin, h - margin, 0)
+    elif position == "top_center":
+        x, y, align = (w / 2.0, h - margin, 1)
+    else:
+        x, y, align = (w / 2.0, margin, 1)
+
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=(w, h))
+    c.setFont("Helvetica", 11)
+    c.setFillColorRGB(0, 0, 0)
+    s = str(number)
+    if align == 1:
+        c.drawCentredString(x, y, s)
+    elif align == 2:
+        c.drawRightString(x, y, s)
+    else:
+        c.drawString(x, y, s)
+    c.showPage()
+    c.save()
+    buf.seek(0)
+    return PdfReader(buf).pages[0]
+
+
 def watermark_pdf(
     file_name: str,
     text: str,
@@ -759,40 +1132,9 @@ def watermark_pdf(
     reader = PdfReader(input_path)
     writer = PdfWriter()
 
-    def _overlay_page(w: float, h: float) -> "PdfReader":
-        buf = io.BytesIO()
-        c = canvas.Canvas(buf, pagesize=(w, h))
-        try:
-            c.setFillAlpha(float(opacity))
-        except Exception:
-            pass
-        c.saveState()
-        c.translate(w / 2.0, h / 2.0)
-        try:
-            c.rotate(float(angle or 0))
-        except Exception:
-            c.rotate(0)
-        base = min(w, h)
-        font_size = max(18, min(72, int(base / 10)))
-        c.setFont("Helvetica", font_size)
-        c.setFillColorRGB(0, 0, 0)
-        c.drawCentredString(0, 0, text)
-        c.restoreState()
-        c.showPage()
-        c.save()
-        buf.seek(0)
-        return PdfReader(buf)
-
     for page in reader.pages:
         mb = page.mediabox
-        w = float(mb.width)
-        h = float(mb.height)
-        overlay_pdf = _overlay_page(w, h)
-        overlay_page = overlay_pdf.pages[0]
-        try:
-            page.merge_page(overlay_page)
-        except Exception:
-            page.mergePage(overlay_page)  # type: ignore
+        _merge_overlay(page, _watermark_overlay(float(mb.width), float(mb.height), text, opacity, angle))
         writer.add_page(page)
 
     output_path = get_output_path(output_name)
@@ -824,47 +1166,103 @@ def add_page_numbers(
     reader = PdfReader(input_path)
     writer = PdfWriter()
 
-    def _coords(w: float, h: float) -> tuple[float, float, int]:
-        margin = 28.0
-        font_size = 11
-        if position == "bottom_right":
-            return (w - margin, margin, 2)
-        if position == "bottom_left":
-            return (margin, margin, 0)
-        if position == "top_right":
-            return (w - margin, h - margin, 2)
-        if position == "top_left":
-            return (margin, h - margin, 0)
-        if position == "top_center":
-            return (w / 2.0, h - margin, 1)
-        return (w / 2.0, margin, 1)
-
     for i, page in enumerate(reader.pages, start=0):
         mb = page.mediabox
-        w = float(mb.width)
-        h = float(mb.height)
-        x, y, align = _coords(w, h)
-        number = start_at + i
-
-        buf = io.BytesIO()
-        c = canvas.Canvas(buf, pagesize=(w, h))
-        c.setFont("Helvetica", 11)
-        c.setFillColorRGB(0, 0, 0)
-        s = str(number)
-        if align == 1:
-            c.drawCentredString(x, y, s)
-        elif align == 2:
-            c.drawRightString(x, y, s)
-        else:
-            c.drawString(x, y, s)
-        c.showPage()
-        c.save()
-        buf.seek(0)
-        overlay_page = PdfReader(buf).pages[0]
+        _merge_overlay(page, _page_number_overlay(float(mb.width), float(mb.height), start_at + i, position))
+        writer.add_page(page)
+
+    output_path = get_output_path(output_name)
+    with open(output_path, "wb") as f:
+        writer.write(f)
+    return output_name
+
+
+# ============================================
+# FUSED PAGE-LEVEL PIPELINES
+# ============================================
+
+# Steps that only touch page objects in memory (pypdf + reportlab overlays).
+# Consecutive fusible steps share one in-memory document and are serialized once.
+FUSIBLE_OPERATIONS = frozenset({
+    "merge", "split", "delete", "rotate", "reorder", "watermark", "page_numbers",
+})
+
+
+def run_fused_pipeline(file_names: List[str], steps: List[dict], output_name: str) -> str:
+    """Apply consecutive page-level steps to one in-memory document and write it once.
+
+    Args:
+        file_names: Input PDFs; more than one means the segment starts with a merge
+        steps: Plain dicts such as {"op": "rotate", "degrees": 90, "pages": [1]}
+               ("merge" steps are implied by file_names and skipped here)
+        output_name: Name for the single output file
+
+    Consecutive split/delete/reorder/rotate steps are compiled into a single
+    page map (see app/page_map.py) and applied in one pass.
+
+    Returns:
+        str: Output file name
+    """
+    ensure_temp_dirs()
+
+    if any(step.get("op") in ("watermark", "page_numbers") for step in steps):
         try:
-            page.merge_page(overlay_page)
+            import reportlab  # type: ignore  # noqa: F401
         except Exception:
-            page.mergePage(overlay_page)  # type: ignore
+            raise Exception(
+                "Watermark and page numbers require the optional dependency 'reportlab'. "
+                "Install with: pip install reportlab"
+            )
+
+    # Every position holds its own page object (one reader per input, and
+    # _apply_page_map copies repeated pages), so overlays can mutate in place.
+    pages: list = []
+    for file_name in file_names:
+        input_path = get_upload_path(file_name)
+        if not os.path.exists(input_path):
+            raise FileNotFoundError(f"File not found: {file_name}")
+        pages.extend(PdfReader(input_path).pages)
+
+    structural: list[dict] = []
+
+    def _flush_structural() -> None:
+        nonlocal pages
+        if structural:
+            pages = _apply_page_map(pages, compile_page_map(structural, len(pages)))
+            structural.clear()
+
+    for step in steps:
+        op = step.get("op")
+        if op == "merge":
+            continue
+        if op in PAGE_MAP_OPERATIONS:
+            structural.append(step)
+            continue
+        _flush_structural()
+        if op == "watermark":
+            opacity = step.get("opacity", 0.12)
+            if opacity < 0 or opacity > 1:
+                raise ValueError("opacity must be between 0 and 1")
+            for page in pages:
+                mb = page.mediabox
+                _merge_overlay(page, _watermark_overlay(
+                    float(mb.width), float(mb.height), step["text"], opacity, step.get("angle", 30)
+                ))
+        elif op == "page_numbers":
+            start_at = step.get("start_at", 1)
+            position = step.get("position", "bottom_center")
+            for i, page in enumerate(pages):
+                mb = page.mediabox
+                _merge_overlay(page, _page_number_overlay(float(mb.width), float(mb.height), start_at + i, position))
+        else:
+            raise ValueError(f"Operation '{op}' cannot run in a fused pipeline")
+    _flush_structural()
+
+    if not pages:
+        raise ValueError("Pipeline removed every page")
+
+    writer = PdfWriter()
+    for page in pages:
         writer.add_page(page)
 
     output_path = get_output_path(output_name)
@@ -873,6 +1271,27 @@ def add_page_numbers(
     return output_name
 
 
+def _apply_page_map(pages: list, page_map: List[PageRef]) -> list:
+    """Materialize a compiled page map over a list of pypdf pages.
+
+    A source page used at several output positions is copied for each of them,
+    so every output position holds its own page object.
+    """
+    refs: dict[int, int] = {}
+    for ref in page_map:
+        refs[id(pages[ref.source])] = refs.get(id(pages[ref.source]), 0) + 1
+
+    out = []
+    for ref in page_map:
+        page = pages[ref.source]
+        if refs[id(page)] > 1:
+            page = copy.copy(page)
+        if ref.rotation:
+            page = _rotate_page(page, ref.rotation)
+        out.append(page)
+    return out
+
+
 def flatten_pdf(file_name: str, output_name: str = "flattened_output.pdf") -> str:
     """Flatten/sanitize a PDF structure (low-RAM optimization).
 
@@ -1242,11 +1661,85 @@ def split_pages_to_files_zip(
     return output_name
 
 
+_OCR_TEXT_MIN_CHARS = TEXT_MIN_CHARS  # More than this many extracted chars suggests a real text layer
+
+
+def _ocr_parallel_settings() -> tuple[int, int]:
+    """(workers, pages_per_chunk) for chunked OCR."""
+    from app.config import settings
+    workers = int(settings.ocr_parallel_workers or 0)
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers, max(1, int(settings.ocr_chunk_pages))
+
+
+def _ocr_chunk(in_pdf: str, out_pdf: str, language: str, deskew: bool) -> str:
+    """OCR one PDF with the standard -> enhanced -> auto-language retry ladder.
+
+    Module-level so chunk workers (spawned processes) can import it.
+    """
+    import ocrmypdf
+
+    last_error = None
+
+    def _run_ocr_with_settings(enhanced: bool = False, auto_lang: bool = False) -> bool:
+        """Run OCR using ocrmypdf Python API. Returns True on success, False on failure."""
+        nonlocal last_error
+        try:
+            ocr_lang = None if auto_lang else language
+            ocrmypdf.ocr(
+                in_pdf,
+                out_pdf,
+                language=ocr_lang,
+                deskew=deskew or enhanced,
+                skip_text=True,
+                jobs=1,
+                image_dpi=300 if enhanced else 200,
+                tesseract_timeout=180 if enhanced else 120,
+                clean=enhanced,
+                optimize=1 if enhanced else 0,
+            )
+            return True
+        except Exception as e:
+            last_error = str(e)
+            return False
+
+    if _run_ocr_with_settings(enhanced=False, auto_lang=False):
+        return out_pdf
+    if _run_ocr_with_settings(enhanced=True, auto_lang=False):
+        return out_pdf
+    if _run_ocr_with_settings(enhanced=True, auto_lang=True):
+        return out_pdf
+    # Provide more helpful error message
+    if last_error:
+        if "tesseract" in last_error.lower():
+            raise Exception("OCR requires Tesseract to be installed and in PATH")
+        elif "ghostscript" in last_error.lower():
+            raise Exception("OCR requires Ghostscript to be installed")
+        else:
+            raise Exception(f"OCR failed: {last_error}")
+    raise Exception("OCR_NOT_POSSIBLE: The document may not contain scannable images")
+
+
+def _scanned_page_runs(needs_ocr: List[bool], chunk_pages: int) -> List[List[int]]:
+    """Group 0-based indices of pages needing OCR into consecutive runs of at most chunk_pages."""
+    chunks: List[List[int]] = []
+    for i, flag in enumerate(needs_ocr):
+        if not flag:
+            continue
+        if chunks and chunks[-1][-1] == i - 1 and len(chunks[-1]) < chunk_pages:
+            chunks[-1].append(i)
+        else:
+            chunks.append([i])
+    return chunks
+
+
 def ocr_pdf(
     file_name: str,
     language: str = "eng",
     deskew: bool = True,
     output_name: str = "ocr_output.pdf",
+    progress: Optional[Callable[[int, int], None]] = None,
 ) -> str:
     """Run OCR to produce a searchable PDF with automatic retry and enhanced preprocessing.
 
@@ -1255,6 +1748,13 @@ def ocr_pdf(
     - Applies: deskew, contrast normalization, noise removal, DPI ≥300
     - Auto-detects language if initial attempt fails
     - Returns OCR_NOT_POSSIBLE only if completely unrecoverable
+
+    Parallel chunking:
+    - Every page is checked for an existing text layer; those pages are passed
+      through untouched, so mixed documents only pay for the scanned pages
+    - Scanned pages are grouped into runs of ocr_chunk_pages, OCR'd concurrently
+      in ocr_parallel_workers processes and merged back in page order
+    - progress(done_chunks, total_chunks) is called as chunks finish
     """
     ensure_temp_dirs()
 
@@ -1270,124 +1770,112 @@ def ocr_pdf(
                 "OCR requires Tesseract to be installed. "
                 "Install from: https://github.com/UB-Mannheim/tesseract/wiki"
             )
-    
+
     try:
-        import ocrmypdf
+        import ocrmypdf  # noqa: F401
     except ImportError:
         raise Exception(
             "OCR requires the 'ocrmypdf' package. Install with: pip install ocrmypdf"
         )
 
-    chunk_pages = 25
+    workers, chunk_pages = _ocr_parallel_settings()
     reader = PdfReader(input_path)
     total_pages = len(reader.pages)
     output_path = get_output_path(output_name)
-    
-    # Check if PDF already has searchable text
-    has_text = False
+
+    # Check every page for searchable text (from the document probe when it covers every page)
+    needs_ocr: List[bool] = []
     text_sample = ""
-    try:
-        for page in reader.pages[:min(3, total_pages)]:  # Check first 3 pages
-            text = page.extract_text() or ""
-            if len(text.strip()) > 50:  # More than 50 chars suggests real text
-                has_text = True
-                text_sample = text.strip()[:100]
-                break
-    except Exception:
-        pass
-    
-    if has_text:
+    probe = get_probe(input_path)
+    if probe and len(probe.page_has_text) == total_pages:
+        needs_ocr = [not has_text for has_text in probe.page_has_text]
+    else:
+        for page in reader.pages:
+            try:
+                text = (page.extract_text() or "").strip()
+            except Exception:
+                text = ""
+            if len(text) > _OCR_TEXT_MIN_CHARS:
+                needs_ocr.append(False)
+                text_sample = text_sample or text[:100]
+            else:
+                needs_ocr.append(True)
+
+    if total_pages and not any(needs_ocr):
+        if not text_sample:
+            try:
+                text_sample = (reader.pages[0].extract_text() or "").strip()[:100]
+            except Exception:
+                text_sample = ""
         # PDF already has searchable text - inform user instead of silent copy
         raise Exception(
             f"OCR_ALREADY_SEARCHABLE: This PDF already contains searchable text. "
             f"OCR is not needed. Preview: \"{text_sample}...\""
         )
 
-    last_error = None  # Track the actual error
-
-    def _run_ocr_with_settings(in_pdf: str, out_pdf: str, enhanced: bool = False, auto_lang: bool = False) -> bool:
-        """Run OCR using ocrmypdf Python API. Returns True on success, False on failure."""
-        nonlocal last_error
+    chunks = _scanned_page_runs(needs_ocr, chunk_pages)
+    if len(chunks) == 1 and len(chunks[0]) == total_pages:
         try:
-            ocr_lang = None if auto_lang else language
-            ocrmypdf.ocr(
-                in_pdf,
-                out_pdf,
-                language=ocr_lang,
-                deskew=deskew or enhanced,
-                skip_text=True,
-                jobs=1,
-                image_dpi=300 if enhanced else 200,
-                tesseract_timeout=180 if enhanced else 120,
-                clean=enhanced,
-                optimize=1 if enhanced else 0,
-            )
-            return True
+            _ocr_chunk(input_path, output_path, language, deskew)
         except Exception as e:
-            last_error = str(e)
-            return False
+            raise Exception(f"OCR failed: {e}")
+        if progress:
+            progress(1, 1)
+        return output_name
 
-    def _run_ocr(in_pdf: str, out_pdf: str) -> None:
-        """OCR with automatic retry on failure."""
-        if _run_ocr_with_settings(in_pdf, out_pdf, enhanced=False, auto_lang=False):
-            return
-        if _run_ocr_with_settings(in_pdf, out_pdf, enhanced=True, auto_lang=False):
-            return
-        if _run_ocr_with_settings(in_pdf, out_pdf, enhanced=True, auto_lang=True):
-            return
-        # Provide more helpful error message
-        if last_error:
-            if "tesseract" in last_error.lower():
-                raise Exception("OCR requires Tesseract to be installed and in PATH")
-            elif "ghostscript" in last_error.lower():
-                raise Exception("OCR requires Ghostscript to be installed")
-            else:
-                raise Exception(f"OCR failed: {last_error}")
-        raise Exception("OCR_NOT_POSSIBLE: The document may not contain scannable images")
+    skipped = total_pages - sum(len(c) for c in chunks)
+    print(f"[OCR] {total_pages} pages: {skipped} already searchable, {len(chunks)} chunk(s) to OCR")
+
+    import tempfile
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    with tempfile.TemporaryDirectory(prefix="ocr_chunks_", dir=os.path.dirname(output_path) or ".") as tmp_dir:
+        jobs = []
+        for n, pages in enumerate(chunks):
+            chunk_in = os.path.join(tmp_dir, f"chunk_in_{n:04d}.pdf")
+            chunk_out = os.path.join(tmp_dir, f"chunk_out_{n:04d}.pdf")
+            w = PdfWriter()
+            for i in pages:
+                w.add_page(reader.pages[i])
+            with open(chunk_in, "wb") as f:
+                w.write(f)
+            jobs.append((chunk_in, chunk_out))
 
-    if total_pages > chunk_pages:
-        temp_outputs: list[str] = []
         try:
-            for start in range(0, total_pages, chunk_pages):
-                end = min(total_pages, start + chunk_pages)
-                chunk_in = get_output_path(f"_ocr_chunk_in_{start+1}_{end}.pdf")
-                chunk_out = get_output_path(f"_ocr_chunk_out_{start+1}_{end}.pdf")
-
-                w = PdfWriter()
-                for i in range(start, end):
-                    w.add_page(reader.pages[i])
-                with open(chunk_in, "wb") as f:
-                    w.write(f)
-
-                _run_ocr(chunk_in, chunk_out)
-                temp_outputs.append(chunk_out)
+            if len(jobs) == 1 or workers <= 1:
+                for done, (chunk_in, chunk_out) in enumerate(jobs, start=1):
+                    _ocr_chunk(chunk_in, chunk_out, language, deskew)
+                    if progress:
+                        progress(done, len(jobs))
+            else:
+                ctx = multiprocessing.get_context("spawn")
+                with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=ctx) as executor:
+                    futures = [
+                        executor.submit(_ocr_chunk, chunk_in, chunk_out, language, deskew)
+                        for chunk_in, chunk_out in jobs
+                    ]
+                    try:
+                        for done, future in enumerate(as_completed(futures), start=1):
+                            future.result()
+                            if progress:
+                                progress(done, len(jobs))
+                    except Exception:
+                        for future in futures:
+                            future.cancel()
+                        raise
+
+            ocr_pages = {}
+            for pages, (_, chunk_out) in zip(chunks, jobs):
+                for i, pg in zip(pages, PdfReader(chunk_out).pages):
+                    ocr_pages[i] = pg
 
             merged = PdfWriter()
-            for p in temp_outputs:
-                r = PdfReader(p)
-                for pg in r.pages:
-                    merged.add_page(pg)
+            for i in range(total_pages):
+                merged.add_page(ocr_pages.get(i, reader.pages[i]))
             with open(output_path, "wb") as f:
                 merged.write(f)
         except Exception as e:
             raise Exception(f"OCR failed: {e}")
-        finally:
-            try:
-                for start in range(0, total_pages, chunk_pages):
-                    end = min(total_pages, start + chunk_pages)
-                    chunk_in = get_output_path(f"_ocr_chunk_in_{start+1}_{end}.pdf")
-                    if os.path.exists(chunk_in):
-                        os.remove(chunk_in)
-                for p in temp_outputs:
-                    if os.path.exists(p):
-                        os.remove(p)
-            except Exception:
-                pass
 
-        return output_name
-
-    try:
-        _run_ocr(input_path, output_path)
-    except Exception as e:
-        raise Exception(f"OCR failed: {e}")
     return output_name
@@ -11,19 +11,23 @@ Provider order (configurable):
 Safety/behavior:
 - Preserve intent; do not add new operations.
 - Output ONLY the rewritten instruction text.
-- If a provider is not configured or fails, fall back to next.
+- If a provider is not configured or fails, fall back to next; if it is slower than
+  usual, the next one is started alongside it (hedging) and the first answer wins.
 """
 
 from __future__ import annotations
 
 from dataclasses import dataclass
 from typing import Optional
+import functools
 import json
 import os
 
-import httpx
-
 from app.config import settings
+from app.llm_clients import get_llm_clients
+from app.llm_cache import cached_completion, store_completion
+from app.llm_health import call_with_breaker, call_with_breaker_async, circuit_allows, record_llm_failure, record_llm_success
+from app.llm_hedging import hedged_call, hedged_call_async
 
 
 @dataclass
@@ -59,6 +63,18 @@ def _build_user_message(user_prompt: str, file_names: Optional[list[str]] = None
     )
 
 
+def _rephrase_messages(user_prompt: str, file_names: Optional[list[str]] = None) -> list[dict]:
+    return [
+        {"role": "system", "content": _REPHRASE_SYSTEM},
+        {"role": "user", "content": _build_user_message(user_prompt, file_names)},
+    ]
+
+
+# Every provider is called with these; they are part of the response cache key
+_REPHRASE_TEMPERATURE = 0.2
+_REPHRASE_MAX_TOKENS = 200
+
+
 class BasetenOpenAICompatRephraser:
     def __init__(self):
         self.api_key = getattr(settings, "baseten_api_key", None) or os.getenv("BASETEN_API_KEY")
@@ -69,14 +85,12 @@ class BasetenOpenAICompatRephraser:
             "BASETEN_MODEL", "openai/gpt-oss-120b"
         )
         self.timeout_s = float(getattr(settings, "baseten_timeout_seconds", 12.0) or 12.0)
+        self.provider_name = f"baseten:{self.model}"
 
     def is_configured(self) -> bool:
         return bool(self.api_key and self.base_url and self.model)
 
-    def rephrase(self, user_prompt: str, file_names: Optional[list[str]] = None) -> Optional[RephraseResult]:
-        if not self.is_configured():
-            return None
-
+    def _request(self, user_prompt: str, file_names: Optional[list[str]]) -> tuple[str, dict, dict]:
         url = self.base_url.rstrip("/") + "/chat/completions"
         headers = {
             "Authorization": f"Bearer {self.api_key}",
@@ -84,31 +98,52 @@ class BasetenOpenAICompatRephraser:
         }
         payload = {
             "model": self.model,
-            "messages": [
-                {"role": "system", "content": _REPHRASE_SYSTEM},
-                {"role": "user", "content": _build_user_message(user_prompt, file_names)},
-            ],
-            "temperature": 0.2,
+            "messages": _rephrase_messages(user_prompt, file_names),
+            "temperature": _REPHRASE_TEMPERATURE,
             "top_p": 1,
-            "max_tokens": 200,
+            "max_tokens": _REPHRASE_MAX_TOKENS,
         }
+        return url, headers, payload
 
+    def _result(self, data: dict) -> Optional[RephraseResult]:
+        text = (
+            (data.get("choices") or [{}])[0]
+            .get("message", {})
+            .get("content", "")
+        )
+        text = (text or "").strip()
+        if not text:
+            return None
+        return RephraseResult(text=text, provider=self.provider_name)
+
+    def rephrase(self, user_prompt: str, file_names: Optional[list[str]] = None) -> Optional[RephraseResult]:
+        if not self.is_configured() or not circuit_allows(self.provider_name):
+            return None
+
+        url, headers, payload = self._request(user_prompt, file_names)
         try:
-            with httpx.Client(timeout=self.timeout_s) as client:
-                resp = client.post(url, headers=headers, json=payload)
-                resp.raise_for_status()
-                data = resp.json()
-
-            text = (
-                (data.get("choices") or [{}])[0]
-                .get("message", {})
-                .get("content", "")
-            )
-            text = (text or "").strip()
-            if not text:
-                return None
-            return RephraseResult(text=text, provider=f"baseten:{self.model}")
-        except Exception:
+            client = get_llm_clients().http()
+            resp = client.post(url, headers=headers, json=payload, timeout=self.timeout_s)
+            resp.raise_for_status()
+            record_llm_success(self.provider_name)
+            return self._result(resp.json())
+        except Exception as e:
+            record_llm_failure(self.provider_name, e)
+            return None
+
+    async def rephrase_async(self, user_prompt: str, file_names: Optional[list[str]] = None) -> Optional[RephraseResult]:
+        if not self.is_configured() or not circuit_allows(self.provider_name):
+            return None
+
+        url, headers, payload = self._request(user_prompt, file_names)
+        try:
+            client = get_llm_clients().async_http()
+            resp = await client.post(url, headers=headers, json=payload, timeout=self.timeout_s)
+            resp.raise_for_status()
+            record_llm_success(self.provider_name)
+            return self._result(resp.json())
+        except Exception as e:
+            record_llm_failure(self.provider_name, e)
             return None
 
 
@@ -120,44 +155,49 @@ class GroqRephraser:
     def is_configured(self) -> bool:
         return bool(getattr(settings, "groq_api_key", None)) and bool(self.model)
 
+    def _request(self, user_prompt: str, file_names: Optional[list[str]]) -> dict:
+        return {
+            "model": self.model,
+            "messages": _rephrase_messages(user_prompt, file_names),
+            "temperature": _REPHRASE_TEMPERATURE,
+            "max_tokens": _REPHRASE_MAX_TOKENS,
+            "top_p": 1,
+        }
+
+    def _result(self, resp) -> Optional[RephraseResult]:
+        text = (resp.choices[0].message.content or "").strip()
+        if not text:
+            return None
+        return RephraseResult(text=text, provider=self.provider_name)
+
     def rephrase(self, user_prompt: str, file_names: Optional[list[str]] = None) -> Optional[RephraseResult]:
         if not self.is_configured():
             return None
 
         try:
-            from groq import Groq
-
-            client = Groq(api_key=settings.groq_api_key)
-            resp = client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": _REPHRASE_SYSTEM},
-                    {"role": "user", "content": _build_user_message(user_prompt, file_names)},
-                ],
-                temperature=0.2,
-                max_tokens=200,
-                top_p=1,
+            client = get_llm_clients().groq(settings.groq_api_key)
+            resp = call_with_breaker(
+                self.provider_name, lambda: client.chat.completions.create(**self._request(user_prompt, file_names))
             )
-            text = (resp.choices[0].message.content or "").strip()
-            if not text:
-                return None
-            return RephraseResult(text=text, provider=self.provider_name)
+            return self._result(resp)
         except Exception:
             return None
 
+    async def rephrase_async(self, user_prompt: str, file_names: Optional[list[str]] = None) -> Optional[RephraseResult]:
+        if not self.is_configured():
+            return None
 
-def rephrase_with_fallback(
-    user_prompt: str,
-    file_names: Optional[list[str]] = None,
-) -> Optional[RephraseResult]:
-    """Try multiple providers to rephrase a prompt.
+        try:
+            client = get_llm_clients().async_groq(settings.groq_api_key)
+            resp = await call_with_breaker_async(
+                self.provider_name, lambda: client.chat.completions.create(**self._request(user_prompt, file_names))
+            )
+            return self._result(resp)
+        except Exception:
+            return None
 
-    Returns first successful result; None if none succeed.
-    """
-
-    if not user_prompt or not user_prompt.strip():
-        return None
 
+def _providers() -> list:
     providers = []
 
     providers.append(BasetenOpenAICompatRephraser())
@@ -171,14 +211,92 @@ def rephrase_with_fallback(
         providers.append(
             GroqRephraser(settings.llm_model_fallback, provider_name=f"groq:{settings.llm_model_fallback}")
         )
+    return providers
 
-    original = user_prompt.strip()
-    for p in providers:
-        out = p.rephrase(original, file_names=file_names)
-        if out and out.text and out.text.strip():
-            text = out.text.strip()
-            if len(text) > 4 * len(original) and len(text) > 200:
-                continue
-            return RephraseResult(text=text, provider=out.provider)
 
+def _accept(out: Optional[RephraseResult], original: str) -> Optional[RephraseResult]:
+    """The stripped result, unless it is empty or implausibly longer than the original."""
+    if out and out.text and out.text.strip():
+        text = out.text.strip()
+        if len(text) > 4 * len(original) and len(text) > 200:
+            return None
+        return RephraseResult(text=text, provider=out.provider)
     return None
+
+
+def _rephrase_accepted(provider, original: str, file_names: Optional[list[str]]) -> Optional[RephraseResult]:
+    return _accept(provider.rephrase(original, file_names=file_names), original)
+
+
+async def _rephrase_accepted_async(provider, original: str, file_names: Optional[list[str]]) -> Optional[RephraseResult]:
+    return _accept(await provider.rephrase_async(original, file_names=file_names), original)
+
+
+def _cached_rephrase(providers: list, original: str, file_names: Optional[list[str]]) -> Optional[RephraseResult]:
+    """A stored rewrite of this exact request by any provider, in provider order."""
+    messages = _rephrase_messages(original, file_names)
+    for p in providers:
+        text = cached_completion(p.provider_name, messages, _REPHRASE_TEMPERATURE, False, _REPHRASE_MAX_TOKENS)
+        accepted = _accept(RephraseResult(text=text, provider=p.provider_name), original) if text else None
+        if accepted:
+            return accepted
+    return None
+
+
+def _store_rephrase(result: Optional[RephraseResult], original: str, file_names: Optional[list[str]]) -> None:
+    if result is not None:
+        store_completion(
+            result.provider, _rephrase_messages(original, file_names),
+            _REPHRASE_TEMPERATURE, False, _REPHRASE_MAX_TOKENS, result.text,
+        )
+
+
+def rephrase_with_fallback(
+    user_prompt: str,
+    file_names: Optional[list[str]] = None,
+) -> Optional[RephraseResult]:
+    """Try multiple providers to rephrase a prompt.
+
+    Providers run in order, hedged: the next one also starts once the current
+    one runs past its recent latency percentile (see app/llm_hedging.py).
+    A rewrite of the same request stored in the LLM response cache is returned
+    without calling any provider.
+    Returns the first acceptable result; None if none succeed.
+    """
+
+    if not user_prompt or not user_prompt.strip():
+        return None
+
+    original = user_prompt.strip()
+    providers = [p for p in _providers() if p.is_configured()]
+    if not providers:
+        return None
+    cached = _cached_rephrase(providers, original, file_names)
+    if cached:
+        return cached
+    attempts = [(p.provider_name, functools.partial(_rephrase_accepted, p, original, file_names)) for p in providers]
+    result = hedged_call(attempts)
+    _store_rephrase(result, original, file_names)
+    return result
+
+
+async def rephrase_with_fallback_async(
+    user_prompt: str,
+    file_names: Optional[list[str]] = None,
+) -> Optional[RephraseResult]:
+    """rephrase_with_fallback on the pooled async clients (for async handlers)."""
+
+    if not user_prompt or not user_prompt.strip():
+        return None
+
+    original = user_prompt.strip()
+    providers = [p for p in _providers() if p.is_configured()]
+    if not providers:
+        return None
+    cached = _cached_rephrase(providers, original, file_names)
+    if cached:
+        return cached
+    attempts = [(p.provider_name, functools.partial(_rephrase_accepted_async, p, original, file_names)) for p in providers]
+    result = await hedged_call_async(attempts)
+    _store_rephrase(result, original, file_names)
+    return result
@@ -0,0 +1,293 @@
+"""
+Process Pool Execution Backend - CPU-heavy PDF operations off the API process.
+
+Problem: process_job_background runs OpenCV, page rendering, pdf2docx and the
+pypdf page loops on a thread of the single uvicorn process. They all share one
+GIL, so one big job stalls status polling and every other job.
+
+Solution: a small pool of worker processes (spawn start method, so no forking
+of a multi-threaded server). The parent only sends the operation name and its
+plain arguments; the worker runs the pdf_operations function against the shared
+uploads/ and outputs/ directories and sends back the output file NAME - never
+file bytes.
+
+Guarantees:
+- Per-task timeout: a stuck worker is killed and replaced
+- Recycling: a worker is replaced after N tasks or once its RSS crosses a limit
+- Crash isolation: an OOM-killed worker fails only its own task
+- Callers are unchanged: `cpu_bound(func)` returns a drop-in wrapper that falls
+  back to in-process execution when the pool is disabled (workers = 0)
+"""
+
+import os
+import time
+import queue
+import functools
+import importlib
+import multiprocessing
+from threading import Lock
+from typing import Any, Callable, Optional
+
+
+_EXCEPTION_TYPES = {
+    "ValueError": ValueError,
+    "FileNotFoundError": FileNotFoundError,
+    "TimeoutError": TimeoutError,
+    "MemoryError": MemoryError,
+}
+
+
+def _current_rss_mb() -> float:
+    """Resident set size of the calling process in MB (0 when unknown)."""
+    try:
+        with open("/proc/self/statm", "r", encoding="utf-8") as f:
+            parts = f.read().split()
+        return (int(parts[1]) * os.sysconf("SC_PAGE_SIZE")) / (1024 * 1024)
+    except Exception:
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except Exception:
+        return 0.0
+
+
+def _worker_main(conn) -> None:
+    """Worker process loop: receive (module, func, args, kwargs), reply with the result."""
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        if message is None:
+            return
+
+        module_name, func_name, args, kwargs = message
+        try:
+            func = getattr(importlib.import_module(module_name), func_name)
+            func = getattr(func, "__wrapped__", func)
+            result = func(*args, **kwargs)
+            reply = ("ok", result, _current_rss_mb())
+        except BaseException as e:  # noqa: BLE001 - everything must go back over IPC
+            reply = ("err", type(e).__name__, str(e), _current_rss_mb())
+        try:
+            conn.send(reply)
+        except Exception:
+            return
+
+
+class _Worker:
+    """One worker process plus the parent end of its pipe."""
+
+    def __init__(self, ctx):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.tasks = 0
+        self.rss_mb = 0.0
+
+    def stop(self, timeout: float = 2.0) -> None:
+        try:
+            self.conn.send(None)
+        except Exception:
+            pass
+        self.process.join(timeout)
+        self.kill()
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(1.0)
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+
+
+class ProcessPool:
+    """
+    Fixed-size pool of recyclable worker processes.
+
+    Each call borrows one idle worker, so at most `workers` operations run at
+    once; further callers block until a worker is returned.
+    """
+
+    def __init__(
+        self,
+        workers: int = 1,
+        max_tasks_per_worker: int = 20,
+        max_rss_mb: float = 400.0,
+        task_timeout_seconds: float = 600.0,
+    ):
+        self._ctx = multiprocessing.get_context("spawn")
+        self._size = max(1, int(workers))
+        self._max_tasks = max(1, int(max_tasks_per_worker))
+        self._max_rss_mb = float(max_rss_mb)
+        self._task_timeout = float(task_timeout_seconds)
+        self._idle: queue.Queue = queue.Queue()
+        self._lock = Lock()
+        self._closed = False
+        self._stats = {
+            "tasks": 0,
+            "failures": 0,
+            "timeouts": 0,
+            "crashes": 0,
+            "recycled": 0,
+        }
+        for _ in range(self._size):
+            self._idle.put(_Worker(self._ctx))
+
+    def _bump(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        worker.kill()
+        return _Worker(self._ctx)
+
+    def run(self, module_name: str, func_name: str, args: tuple = (), kwargs: Optional[dict] = None,
+            timeout: Optional[float] = None) -> Any:
+        """Run module.func(*args, **kwargs) in a worker and return its (small, picklable) result."""
+        if self._closed:
+            raise RuntimeError("Process pool is shut down")
+
+        limit = self._task_timeout if timeout is None else float(timeout)
+        worker: _Worker = self._idle.get()
+        try:
+            if not worker.process.is_alive():
+                worker = self._replace(worker)
+
+            started = time.time()
+            try:
+                worker.conn.send((module_name, func_name, tuple(args), dict(kwargs or {})))
+                ready = worker.conn.poll(limit)
+            except (OSError, EOFError):
+                ready = False
+
+            if not ready:
+                self._bump("timeouts")
+                worker = self._replace(worker)
+                raise TimeoutError(f"{func_name} timed out after {int(limit)}s")
+
+            try:
+                reply = worker.conn.recv()
+            except (EOFError, OSError):
+                self._bump("crashes")
+                worker = self._replace(worker)
+                raise Exception(
+                    f"{func_name} crashed the worker process (likely out of memory). Please try a smaller file."
+                )
+
+            worker.tasks += 1
+            worker.rss_mb = float(reply[-1] or 0.0)
+            self._bump("tasks")
+            elapsed = time.time() - started
+
+            if worker.tasks >= self._max_tasks or (self._max_rss_mb and worker.rss_mb > self._max_rss_mb):
+                print(
+                    f"[POOL] Recycling worker pid={worker.process.pid} "
+                    f"(tasks={worker.tasks}, rss={worker.rss_mb:.0f}MB)"
+                )
+                self._bump("recycled")
+                worker.stop()
+                worker = _Worker(self._ctx)
+
+            if reply[0] == "ok":
+                print(f"[POOL] {func_name} finished in {elapsed:.2f}s")
+                return reply[1]
+
+            self._bump("failures")
+            exc_type = _EXCEPTION_TYPES.get(reply[1], Exception)
+            raise exc_type(reply[2])
+        finally:
+            self._idle.put(worker)
+
+    def shutdown(self) -> None:
+        """Stop all workers. Blocks until in-flight tasks return their workers."""
+        self._closed = True
+        for _ in range(self._size):
+            try:
+                self._idle.get(timeout=self._task_timeout).stop()
+            except queue.Empty:
+                break
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            out = dict(self._stats)
+        out["workers"] = self._size
+        out["idle"] = self._idle.qsize()
+        return out
+
+
+_POOL: Optional[ProcessPool] = None
+_POOL_LOCK = Lock()
+_POOL_DISABLED = False
+
+
+def get_process_pool() -> Optional[ProcessPool]:
+    """Lazily create the shared pool from Settings. Returns None when disabled."""
+    global _POOL, _POOL_DISABLED
+    if _POOL is not None or _POOL_DISABLED:
+        return _POOL
+    with _POOL_LOCK:
+        if _POOL is not None or _POOL_DISABLED:
+            return _POOL
+        from app.config import settings
+        workers = int(getattr(settings, "process_pool_workers", 0) or 0)
+        if workers <= 0:
+            _POOL_DISABLED = True
+            return None
+        try:
+            _POOL = ProcessPool(
+                workers=workers,
+                max_tasks_per_worker=settings.process_pool_max_tasks_per_worker,
+                max_rss_mb=settings.process_pool_max_rss_mb,
+                task_timeout_seconds=settings.process_pool_task_timeout_seconds,
+            )
+            print(f"[POOL] Started {workers} worker process(es)")
+        except Exception as e:
+            print(f"[POOL] Could not start worker processes, running in-process: {e}")
+            _POOL_DISABLED = True
+        return _POOL
+
+
+def shutdown_process_pool() -> None:
+    """Stop the shared pool (called from the app shutdown hook)."""
+    global _POOL
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.shutdown()
+
+
+def get_pool_stats() -> dict:
+    if _POOL is None:
+        return {"enabled": False}
+    stats = _POOL.get_stats()
+    stats["enabled"] = True
+    return stats
+
+
+def cpu_bound(func: Callable) -> Callable:
+    """Wrap a module-level operation so it executes in the worker pool when enabled.
+
+    Arguments and the return value must be small and picklable (file names,
+    page lists, options) - files themselves are exchanged via uploads/outputs.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        pool = get_process_pool()
+        if pool is None:
+            return func(*args, **kwargs)
+        from app.workspace import current_workspace
+        workspace = current_workspace()
+        if workspace:
+            # Context vars do not cross processes: re-enter the job workspace in the worker.
+            return pool.run(
+                "app.workspace", "call_in_workspace",
+                (workspace, func.__module__, func.__name__, args, kwargs),
+            )
+        return pool.run(func.__module__, func.__name__, args, kwargs)
+
+    return wrapper
@@ -0,0 +1,208 @@
+"""
+Prompt Features - Every keyword flag clarify_intent needs, extracted up front.
+
+Problem: clarify_intent computed about forty "wants_*" flags, each with its own
+inline re.search over the prompt, and _is_vague_command looped over two dozen
+pattern strings calling re.match for each. Every call paid a lookup in re's
+pattern cache (and a recompile whenever other modules pushed the patterns
+out), and most of those scans looked for words the prompt never contained.
+
+Solution: all patterns are compiled once at import. extract_prompt_features
+makes one scan with a combined trigger regex to collect the words that can
+start a match. Then it runs only the flag patterns whose trigger words are
+present. A typical prompt names one or two operations, so two or three
+precise patterns run instead of forty.
+
+The gate is exact. Every flag pattern starts with \\b and one of its trigger
+words, so a pattern can only match where the trigger scan saw its trigger.
+Flags read from prompt_for_match (format words) keep the original
+case-insensitive search on the un-lowercased prompt.
+"""
+
+import re
+from dataclasses import dataclass, fields
+from typing import Optional
+
+
+# (flag, pattern on the lowercased prompt, words a match can start with)
+_FLAG_SPECS: tuple = (
+    # operations
+    ("to_image", r"\b(to\s*img|to\s*image|to\s*images|to\s*png|to\s*jpe?g|as\s*png|as\s*jpe?g|export\s*(as\s*)?(png|jpe?g|images?))\b", ("to", "as", "export")),
+    ("to_pdf", r"\b(to\s*pdf|as\s*pdf|convert\s*(to\s*)?pdf)\b", ("to", "as", "convert")),
+    ("to_docx", r"\b(to\s*docx|to\s*word|as\s*docx|as\s*word|convert\s*(to\s*)?(docx|word))\b", ("to", "as", "convert")),
+    ("split", r"\b(split|extract\s*page|keep\s*page)\b", ("split", "extract", "keep")),
+    ("delete_pages", r"\b(delete\s*page|remove\s*page)\b", ("delete", "remove")),
+    ("merge", r"\b(merge|combine|join)\b", ("merge", "combine", "join")),
+    ("ocr", r"\bocr\b", ("ocr",)),
+    ("reorder", r"\b(reorder|reverse|swap)\b", ("reorder", "reverse", "swap")),
+    ("clean", r"\b(clean|remove\s*(blank|duplicate)|blank\s*page|duplicate\s*page)\b", ("clean", "remove", "blank", "duplicate")),
+    ("compress", r"\b(compress|smaller|shrink|reduce\s*size|make\s*small|tiny)\b", ("compress", "smaller", "shrink", "reduce", "make", "tiny")),
+    ("rotate", r"\b(rotate|turn|flip|straighten)\b", ("rotate", "turn", "flip", "straighten")),
+    ("watermark", r"\bwatermark\b", ("watermark",)),
+    ("page_numbers", r"\b(page\s*numbers?|number\s*pages?|add\s*numbers?)\b", ("page", "number", "add")),
+    ("enhance", r"\b(enhance|improve|clarify|sharpen|clean\s*up|fix\s*scan)\b", ("enhance", "improve", "clarify", "sharpen", "clean", "fix")),
+    ("flatten", r"\b(flatten|sanitize|optimize)\b", ("flatten", "sanitize", "optimize")),
+    ("extract_text", r"\b(extract\s*text|to\s*txt|as\s*txt|text\s*only|get\s*text)\b", ("extract", "to", "as", "text", "get")),
+    # outcome phrases ("email ready", "make it neat", ...)
+    ("email_ready", r"\b(email\s*ready|for\s*email|send\s*(by\s*)?email|email\s*size)\b", ("email", "for", "send")),
+    ("fix_scan", r"\b(fix\s*(this\s*)?scan|fix\s*scanned|clean\s*scan)\b", ("fix", "clean")),
+    ("print_ready", r"\b(print\s*ready|for\s*print|printing)\b", ("print", "for")),
+    ("searchable", r"\b(make\s*searchable|searchable\s*pdf|text\s*searchable)\b", ("make", "searchable", "text")),
+    ("secure", r"\b(secure|protect|sanitize)\s*pdf\b", ("secure", "protect", "sanitize")),
+    ("optimize", r"\b(optimize\s*(file|pdf)?|optimise)\b", ("optimize", "optimise")),
+    ("final", r"\b(final\s*(version|pdf|copy)?|finalize)\b", ("final",)),
+    ("submission", r"\b(submission\s*ready|college\s*submission|submit|assignment)\b", ("submission", "college", "submit", "assignment")),
+    ("archive", r"\b(archive\s*ready|for\s*archive|archiving)\b", ("archive", "for", "archiving")),
+    ("whatsapp", r"\b(whatsapp|wa)\s*(size|ready)?\b", ("whatsapp", "wa")),
+    ("govt", r"\b(govt|government)\s*(submission)?\b", ("govt", "government")),
+    ("scan_quality", r"\b(scan\s*quality|quality\s*fix|improve\s*scan)\b", ("scan", "quality", "improve")),
+    ("neat", r"\b(make\s*it\s*neat|neat\s*up|tidy)\b", ("make", "neat", "tidy")),
+    ("professional", r"\b(make\s*professional|professional\s*(copy|version)?|look\s*professional)\b", ("make", "professional", "look")),
+    ("sendable", r"\b(sendable|shareable|share\s*ready)\b", ("sendable", "shareable", "share")),
+    ("convert_shrink", r"\b(convert\s*(and|&)\s*(shrink|compress|smaller))\b", ("convert",)),
+    ("scan_to_pdf", r"\bscan\s*to\s*pdf\b", ("scan",)),
+    ("combine_fix", r"\b(combine\s*(and|&)\s*fix|merge\s*(and|&)\s*clean)\b", ("combine", "merge")),
+    ("combine_shrink", r"\b(combine\s*(and|&)\s*(shrink|compress)|merge\s*(and|&)\s*(shrink|compress))\b", ("combine", "merge")),
+    ("fix_orientation", r"\b(fix\s*(orientation|rotation)|orientation\s*fix)\b", ("fix", "orientation")),
+    ("remove_extra", r"\b(remove\s*extra|extra\s*pages?|unwanted\s*pages?)\b", ("remove", "extra", "unwanted")),
+    ("mobile", r"\b(mobile\s*(optimized?|ready)?|for\s*mobile|phone\s*size)\b", ("mobile", "for", "phone")),
+    # modifiers
+    ("rotate_left", r"\b(left|counter|anti)\b", ("left", "counter", "anti")),
+    ("rotate_180", r"\b180\b", ("180",)),
+    ("rotate_270", r"\b270\b", ("270",)),
+    ("duplicate", r"\bduplicate\b", ("duplicate",)),
+    ("reverse", r"\breverse\b", ("reverse",)),
+)
+
+# Read from prompt_for_match with re.IGNORECASE, as the original checks did
+_FORMAT_SPECS: tuple = (
+    ("convert", r"\b(convert|change)\b"),
+    ("word", r"\b(word|docx|doc)\b"),
+    ("pdf", r"\bpdf\b"),
+    ("images", r"\b(images?|img|png|jpe?g)\b"),
+)
+
+_VAGUE_PATTERNS = (
+    r"do\s*(it|this|that)?", r"why\s*(not)?", r"ok(ay)?", r"yes", r"no", r"sure",
+    r"go\s*(ahead)?", r"start", r"run", r"execute", r"process", r"proceed", r"begin",
+    r"make\s*it", r"fix\s*(it)?", r"help", r"what", r"how", r"huh", r"eh", r"idk",
+    r"dunno", r"whatever",
+)
+_VAGUE_RE = re.compile("^(?:" + "|".join(_VAGUE_PATTERNS) + ")$")
+_RECOGNIZABLE_WORDS = (
+    "merge", "combine", "join", "split", "extract", "keep", "delete", "remove",
+    "compress", "reduce", "shrink", "small", "convert", "pdf", "docx", "word",
+    "png", "jpg", "jpeg", "image", "rotate", "turn", "flip", "reorder", "swap",
+    "reverse", "watermark", "page", "number", "ocr", "scan", "enhance", "flatten",
+    "optimize", "text", "to", "into", "as", "from", "all", "first", "last",
+)
+
+_FLAG_PATTERNS = tuple((name, re.compile(pattern), frozenset(triggers)) for name, pattern, triggers in _FLAG_SPECS)
+_FORMAT_PATTERNS = tuple((name, re.compile(pattern, re.IGNORECASE)) for name, pattern in _FORMAT_SPECS)
+
+_TRIGGERS = sorted({t for _, _, triggers in _FLAG_SPECS for t in triggers}, key=lambda t: (-len(t), t))
+# Longest first: at each word start the scan reports the longest trigger present
+_TRIGGER_RE = re.compile(r"\b(?:" + "|".join(map(re.escape, _TRIGGERS)) + ")")
+# A reported trigger also stands for every trigger that is a prefix of it ("assignment" -> "as")
+_TRIGGER_CLOSURE = {t: frozenset(p for p in _TRIGGERS if t.startswith(p)) for t in _TRIGGERS}
+
+
+@dataclass(slots=True)
+class PromptFeatures:
+    """Keyword flags for one prompt (see _FLAG_SPECS / _FORMAT_SPECS for the patterns)."""
+    to_image: bool = False
+    to_pdf: bool = False
+    to_docx: bool = False
+    split: bool = False
+    delete_pages: bool = False
+    merge: bool = False
+    ocr: bool = False
+    reorder: bool = False
+    clean: bool = False
+    compress: bool = False
+    rotate: bool = False
+    watermark: bool = False
+    page_numbers: bool = False
+    enhance: bool = False
+    flatten: bool = False
+    extract_text: bool = False
+
+    email_ready: bool = False
+    fix_scan: bool = False
+    print_ready: bool = False
+    searchable: bool = False
+    secure: bool = False
+    optimize: bool = False
+    final: bool = False
+    submission: bool = False
+    archive: bool = False
+    whatsapp: bool = False
+    govt: bool = False
+    scan_quality: bool = False
+    neat: bool = False
+    professional: bool = False
+    sendable: bool = False
+    convert_shrink: bool = False
+    scan_to_pdf: bool = False
+    combine_fix: bool = False
+    combine_shrink: bool = False
+    fix_orientation: bool = False
+    remove_extra: bool = False
+    mobile: bool = False
+
+    rotate_left: bool = False
+    rotate_180: bool = False
+    rotate_270: bool = False
+    duplicate: bool = False
+    reverse: bool = False
+
+    convert: bool = False
+    word: bool = False
+    pdf: bool = False
+    images: bool = False
+
+    vague: bool = False
+
+    @property
+    def num_operations(self) -> int:
+        """How many distinct operations the prompt asks for."""
+        return sum((
+            self.merge, self.split, self.delete_pages, self.compress, self.rotate,
+            self.watermark, self.page_numbers, self.ocr, self.enhance, self.flatten,
+            self.clean, self.reorder, self.to_image, self.to_docx, self.extract_text,
+        ))
+
+    def active(self) -> list[str]:
+        return [f.name for f in fields(self) if getattr(self, f.name)]
+
+
+def is_vague_command(prompt_compact: str) -> bool:
+    """Meaningless or too-short commands ("ok", "do it", "idk") that need clarification."""
+    p = (prompt_compact or "").strip().lower()
+    if len(p) < 3:
+        return True
+    if _VAGUE_RE.match(p):
+        return True
+    if len(p.split()) <= 3 and not any(word in p for word in _RECOGNIZABLE_WORDS):
+        return True
+    return False
+
+
+def extract_prompt_features(prompt_for_match: str, prompt_compact: Optional[str] = None) -> PromptFeatures:
+    """All flags for a prompt in one trigger scan plus the patterns it admits."""
+    text = prompt_for_match or ""
+    compact = text.strip().lower() if prompt_compact is None else prompt_compact
+
+    present: set = set()
+    for m in _TRIGGER_RE.finditer(compact):
+        present |= _TRIGGER_CLOSURE[m.group(0)]
+
+    features = PromptFeatures(vague=is_vague_command(compact))
+    if present:
+        for name, pattern, triggers in _FLAG_PATTERNS:
+            if not triggers.isdisjoint(present) and pattern.search(compact):
+                setattr(features, name, True)
+    for name, pattern in _FORMAT_PATTERNS:
+        if pattern.search(text):
+            setattr(features, name, True)
+    return features
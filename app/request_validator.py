@@ -1,6 +1,8 @@
 """
 Request Validation Middleware - Action 10
 Validates requests BEFORE processing to prevent 400 errors after CPU waste.
+Uploads are validated while they stream (StreamingUploadValidator), so peak
+memory per upload stays constant regardless of file size.
 
 Impact:
 - 70% fewer 400 errors (fast failure)
@@ -15,10 +17,10 @@ Validation checks:
 4. JSON intent format valid
 """
 
-from fastapi import Request
-from fastapi.responses import JSONResponse
-from typing import Callable, Any
+from typing import Callable, Optional
+import json
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
@@ -40,6 +42,9 @@ OPERATION_FILE_CONSTRAINTS = {
     "images": {"types": ["pdf", "jpg", "png", "jpeg"], "description": "PDFs and images"},
     "enhance": {"types": ["pdf"], "description": "PDFs only"},
 }
+# Optional per-operation "max_mb" entries tighten the global per-file limit.
+
+_ANY_OPERATION_TYPES = {t for c in OPERATION_FILE_CONSTRAINTS.values() for t in c["types"]}
 
 
 def get_file_type(filename: str) -> str:
@@ -75,40 +80,251 @@ def is_file_compatible(operation: str, file_type: str) -> tuple[bool, str]:
     return True, ""
 
 
-async def validate_request_middleware(request: Request, call_next: Callable) -> Any:
+class UploadRejected(Exception):
+    """Raised from the wrapped receive channel when an upload breaks a limit."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+_DISPOSITION_PARAM = re.compile(r';\s*(name|filename)\s*=\s*(?:"([^"]*)"|([^;]*))', re.IGNORECASE)
+_MAX_PART_HEADER_BYTES = 16 * 1024
+_OPERATION_FIELD = "operation"
+
+
+class MultipartScanner:
     """
-    Middleware to validate /process requests before they consume CPU/memory.
-    
+    Incremental multipart/form-data scanner: sees every byte once, keeps only
+    a delimiter-sized tail plus the current part's headers in memory.
+
+    Calls on_part(name, filename) when a part starts and on_data(n, chunk)
+    for its body bytes (chunk is only passed for small text fields).
+    """
+
+    def __init__(self, boundary: bytes, on_part: Callable[[str, Optional[str]], None],
+                 on_data: Callable[[int, Optional[bytes]], None]):
+        self._delimiter = b"\r\n--" + boundary
+        self._on_part = on_part
+        self._on_data = on_data
+        self._buf = b"\r\n"  # The first delimiter has no leading CRLF
+        self._state = "body"
+        self._in_part = False
+        self._want_bytes = False
+
+    def feed(self, data: bytes) -> None:
+        self._buf += data
+        while True:
+            if self._state == "body":
+                idx = self._buf.find(self._delimiter)
+                if idx == -1:
+                    consumable = len(self._buf) - (len(self._delimiter) - 1)
+                    if consumable > 0:
+                        self._emit(self._buf[:consumable])
+                        self._buf = self._buf[consumable:]
+                    return
+                self._emit(self._buf[:idx])
+                self._buf = self._buf[idx + len(self._delimiter):]
+                self._in_part = False
+                self._state = "after_delimiter"
+            if self._state == "after_delimiter":
+                if len(self._buf) < 2:
+                    return
+                if self._buf.startswith(b"--"):
+                    self._state = "done"
+                elif self._buf.startswith(b"\r\n"):
+                    self._buf = self._buf[2:]
+                    self._state = "headers"
+                else:
+                    raise UploadRejected(400, "Malformed multipart body")
+            if self._state == "headers":
+                idx = self._buf.find(b"\r\n\r\n")
+                if idx == -1:
+                    if len(self._buf) > _MAX_PART_HEADER_BYTES:
+                        raise UploadRejected(400, "Multipart part headers too large")
+                    return
+                self._start_part(self._buf[:idx].decode("latin-1"))
+                self._buf = self._buf[idx + 4:]
+                self._state = "body"
+            if self._state == "done":
+                self._buf = b""
+                return
+
+    def _emit(self, chunk: bytes) -> None:
+        if self._in_part and chunk:
+            self._on_data(len(chunk), chunk if self._want_bytes else None)
+
+    def _start_part(self, raw_headers: str) -> None:
+        name, filename = "", None
+        for line in raw_headers.split("\r\n"):
+            key, _, value = line.partition(":")
+            if key.strip().lower() != "content-disposition":
+                continue
+            for param, quoted, bare in _DISPOSITION_PARAM.findall(value):
+                val = quoted if quoted or not bare else bare.strip()
+                if param.lower() == "name":
+                    name = val
+                else:
+                    filename = val
+        self._in_part = True
+        self._want_bytes = filename is None and name == _OPERATION_FIELD
+        self._on_part(name, filename)
+
+
+class StreamingUploadValidator:
+    """
+    ASGI middleware validating multipart uploads while they stream.
+
+    Replaces the old body-buffering middleware (which read up to 5 x 100MB
+    into RAM and then replayed it). Nothing is buffered here: receive()
+    messages pass straight through to the endpoint after being scanned.
+
     Checks:
-    - Operation is valid
-    - File types match operation
-    - File sizes within limits
-    - Total payload size acceptable
-    
-    Returns 400 immediately if validation fails (no processing).
+    - Content-Length above the request ceiling -> 413 before any byte is read
+    - Too many file parts -> 400 as soon as the extra part's headers arrive
+    - File type (from the part's filename) not allowed -> 400. The allowed set
+      is OPERATION_FILE_CONSTRAINTS[operation] when an "operation" form field
+      or query parameter precedes the files, else every type any operation takes
+    - Per-file bytes above the limit (OPERATION_FILE_CONSTRAINTS "max_mb" or
+      the global limit) or total above the ceiling -> 413 mid-stream
     """
-    if request.method != "POST" or "/process" not in request.url.path:
-        return await call_next(request)
-    
-    try:
-        body = await request.body()
-        
-        from io import BytesIO
-        import tempfile
-        
-        request.state.validated = True
-        
-        async def receive():
-            return {"type": "http.request", "body": body, "more_body": False}
-        
-        request._receive = receive
-        
-        response = await call_next(request)
-        return response
-        
-    except Exception as e:
-        logger.warning(f"Validation middleware error: {e}")
-        return await call_next(request)
+
+    def __init__(self, app, max_file_mb: float = 100, max_files: int = 5, max_total_mb: Optional[float] = None):
+        self.app = app
+        self.max_file_bytes = int(max_file_mb * 1024 * 1024)
+        self.max_files = int(max_files)
+        self.max_total_bytes = int((max_total_mb or max_file_mb * max_files) * 1024 * 1024)
+        # Multipart framing overhead allowed on top of the file bytes
+        self.max_request_bytes = self.max_total_bytes + 1024 * 1024
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("method") != "POST":
+            return await self.app(scope, receive, send)
+
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        content_type = headers.get("content-type", "")
+        if not content_type.lower().startswith("multipart/form-data"):
+            return await self.app(scope, receive, send)
+
+        content_length = headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_request_bytes:
+            return await self._reject(scope, send, 413, (
+                f"Upload is {int(content_length) / (1024 * 1024):.1f}MB, "
+                f"exceeds limit of {self.max_total_bytes // (1024 * 1024)}MB"
+            ))
+
+        boundary = _boundary(content_type)
+        if not boundary:
+            return await self._reject(scope, send, 400, "Missing multipart boundary")
+
+        query_operation = _query_param(scope, _OPERATION_FIELD)
+        state = {"operation": query_operation, "files": 0, "total": 0, "part": None, "field": b""}
+
+        def on_part(name: str, filename: Optional[str]) -> None:
+            _finish_field(state)
+            state["part"] = {"name": name, "filename": filename, "bytes": 0}
+            if filename is None:
+                return
+            state["files"] += 1
+            if state["files"] > self.max_files:
+                raise UploadRejected(400, f"Too many files. Maximum {self.max_files} files allowed.")
+            ok, error = _check_file_type(state["operation"], filename)
+            if not ok:
+                raise UploadRejected(400, error)
+
+        def on_data(n: int, chunk: Optional[bytes]) -> None:
+            part = state["part"]
+            part["bytes"] += n
+            if part["filename"] is None:
+                if chunk is not None and len(state["field"]) < 64:
+                    state["field"] += chunk[:64]
+                return
+            state["total"] += n
+            limit = _file_limit_bytes(state["operation"], self.max_file_bytes)
+            if part["bytes"] > limit:
+                raise UploadRejected(413, f"File '{part['filename']}' exceeds limit of {limit // (1024 * 1024)}MB")
+            if state["total"] > self.max_total_bytes:
+                raise UploadRejected(413, f"Total upload exceeds limit of {self.max_total_bytes // (1024 * 1024)}MB")
+
+        scanner = MultipartScanner(boundary.encode("latin-1"), on_part, on_data)
+        rejection: dict = {}
+        response_started = False
+
+        async def checked_receive():
+            message = await receive()
+            if message["type"] == "http.request" and not rejection:
+                try:
+                    scanner.feed(message.get("body", b""))
+                except UploadRejected as e:
+                    rejection["error"] = e
+                    raise
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            if rejection:
+                return  # The endpoint's own "could not parse body" reply is replaced below
+            response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, checked_receive, guarded_send)
+        except UploadRejected:
+            pass
+        if rejection and not response_started:
+            error = rejection["error"]
+            logger.warning(f"Upload rejected ({error.status_code}): {error.detail}")
+            await self._reject(scope, send, error.status_code, error.detail)
+
+    @staticmethod
+    async def _reject(scope, send, status_code: int, detail: str) -> None:
+        body = json.dumps({"detail": detail}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def _boundary(content_type: str) -> Optional[str]:
+    match = re.search(r'boundary=(?:"([^"]+)"|([^;\s]+))', content_type, re.IGNORECASE)
+    if not match:
+        return None
+    return match.group(1) or match.group(2)
+
+
+def _query_param(scope, name: str) -> Optional[str]:
+    from urllib.parse import parse_qs
+    values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get(name)
+    return values[0].strip().lower() if values else None
+
+
+def _finish_field(state: dict) -> None:
+    """Record the value of a completed "operation" text field."""
+    part = state["part"]
+    if part and part["filename"] is None and part["name"] == _OPERATION_FIELD and state["field"]:
+        state["operation"] = state["field"].decode("utf-8", "ignore").strip().lower()
+    state["field"] = b""
+
+
+def _check_file_type(operation: Optional[str], filename: str) -> tuple[bool, str]:
+    file_type = get_file_type(filename)
+    if operation in OPERATION_FILE_CONSTRAINTS:
+        return is_file_compatible(operation, file_type)
+    if file_type not in _ANY_OPERATION_TYPES:
+        return False, f"Invalid file type: {filename}. Allowed: PDF, images (png/jpg/jpeg), and DOCX."
+    return True, ""
+
+
+def _file_limit_bytes(operation: Optional[str], default: int) -> int:
+    max_mb = OPERATION_FILE_CONSTRAINTS.get(operation or "", {}).get("max_mb")
+    return min(default, int(max_mb * 1024 * 1024)) if max_mb else default
 
 
 def validate_operation(operation: str) -> tuple[bool, str]:
@@ -0,0 +1,357 @@
+"""
+Result Cache - Content-addressed cache of operation outputs.
+
+Users re-run the same operation on the same bytes all the time ("again", a
+button clicked twice, the same PDF uploaded by several people). Instead of
+re-running multi-minute Ghostscript/OCR jobs, outputs are cached on disk under
+a key derived from:
+
+- SHA-256 of every uploaded input file, in order
+- A canonical JSON serialization of the ParsedIntent (or list of intents),
+  with file names replaced by their position in the upload list so the same
+  bytes under a different name still hit
+
+Layout (data/result_cache/):
+    <key>.bin   - the cached output file
+    <key>.json  - metadata (output name, message template, operation, size)
+
+Messages name the input files ("Compressed scan.pdf ..."), so they are stored
+with the names replaced by position placeholders and filled in with the
+current request's names on a hit.
+
+Eviction is LRU bounded by total bytes and entry count. Hits are published
+into outputs/ atomically (temp file + os.replace), so a reader never sees a
+half-written output.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional
+
+
+_HASH_CHUNK = 1024 * 1024
+
+# Values execute_operation uses when an intent leaves the field unset (None)
+_EFFECTIVE_DEFAULTS = {
+    "compress": {"preset": "ebook"},
+    "watermark": {"opacity": 0.12, "angle": 30},
+    "page_numbers": {"position": "bottom_center", "start_at": 1},
+    "pdf_to_images": {"format": "png", "dpi": 150},
+    "ocr": {"language": "eng", "deskew": True},
+}
+
+
+class ResultCache:
+    """Disk-backed LRU cache of operation outputs keyed by input hash + intent."""
+
+    def __init__(self, cache_dir: str = "data/result_cache", max_mb: float = 500.0, max_entries: int = 200):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.max_entries = max(1, int(max_entries))
+        self._lock = Lock()
+        self._index: "OrderedDict[str, dict]" = OrderedDict()  # oldest first
+        self._total_bytes = 0
+        self._file_hashes: dict[tuple[str, int, float], str] = {}
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    # ---------- keys ----------
+
+    def _load_index(self) -> None:
+        """Rebuild the LRU index from disk (ordered by last access time)."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            key = name[:-5]
+            meta_path = os.path.join(self.cache_dir, name)
+            blob_path = self._blob_path(key)
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+                if not os.path.exists(blob_path):
+                    os.remove(meta_path)
+                    continue
+                meta["size"] = os.path.getsize(blob_path)
+                entries.append((os.path.getmtime(blob_path), key, meta))
+            except Exception:
+                continue
+        for _, key, meta in sorted(entries):
+            self._index[key] = meta
+            self._total_bytes += meta["size"]
+
+    def _blob_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.bin")
+
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def hash_file(self, path: str) -> str:
+        """SHA-256 of a file, memoized on (path, size, mtime)."""
+        st = os.stat(path)
+        memo_key = (os.path.abspath(path), st.st_size, st.st_mtime)
+        with self._lock:
+            cached = self._file_hashes.get(memo_key)
+        if cached:
+            return cached
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        with self._lock:
+            if len(self._file_hashes) > 1000:
+                self._file_hashes.clear()
+            self._file_hashes[memo_key] = digest
+        return digest
+
+    def remember_hash(self, path: str, digest: str) -> None:
+        """Seed the hash memo with a digest computed elsewhere (e.g. while uploading)."""
+        st = os.stat(path)
+        with self._lock:
+            if len(self._file_hashes) > 1000:
+                self._file_hashes.clear()
+            self._file_hashes[(os.path.abspath(path), st.st_size, st.st_mtime)] = digest
+
+    @staticmethod
+    def _effective_fields(data: dict) -> dict:
+        """Dumped intent with unset parameters filled in as the executor fills them, then Nones dropped.
+
+        "compress" with preset None and with preset "ebook" run the same command,
+        so they must share a key.
+        """
+        op_type = data.get("operation_type")
+        op = data.get(op_type)
+        if isinstance(op, dict):
+            for field, value in _EFFECTIVE_DEFAULTS.get(op_type, {}).items():
+                if op.get(field) is None:
+                    op[field] = value
+        return _drop_none(data)
+
+    @staticmethod
+    def _canonical_intent(intent, file_names: list[str]) -> Optional[object]:
+        """Intent(s) as plain data (effective parameters) with file names replaced by upload positions."""
+        positions = {name: idx for idx, name in enumerate(file_names)}
+        unknown = []
+
+        def _replace(value, key=None):
+            if isinstance(value, dict):
+                return {k: _replace(v, k) for k, v in value.items()}
+            if isinstance(value, list):
+                return [_replace(v, key) for v in value]
+            if key in ("file", "files") and isinstance(value, str):
+                if value not in positions:
+                    unknown.append(value)
+                    return value
+                return f"@{positions[value]}"
+            return value
+
+        intents = intent if isinstance(intent, list) else [intent]
+        data = [_replace(ResultCache._effective_fields(it.model_dump())) for it in intents]
+        if unknown:
+            return None
+        return data if isinstance(intent, list) else data[0]
+
+    @staticmethod
+    def _message_template(message: str, file_names: list[str]) -> str:
+        """message with input file names replaced by {@<position>} placeholders."""
+        template = message.replace("{", "{{").replace("}", "}}")
+        for idx, name in sorted(enumerate(file_names), key=lambda item: len(item[1]), reverse=True):
+            escaped = name.replace("{", "{{").replace("}", "}}")
+            template = template.replace(escaped, f"{{@{idx}}}")
+        return template
+
+    @staticmethod
+    def _fill_message(template: str, file_names: list[str]) -> Optional[str]:
+        """Inverse of _message_template for the current names (None if a position is missing)."""
+        try:
+            return template.format_map({f"@{idx}": name for idx, name in enumerate(file_names)})
+        except (KeyError, IndexError, ValueError):
+            return None
+
+    def make_key(self, intent, file_names: list[str], input_paths: list[str]) -> Optional[str]:
+        """Cache key for (input bytes, intent), or None if the request is not cacheable."""
+        if not file_names or len(file_names) != len(input_paths):
+            return None
+        canonical = self._canonical_intent(intent, file_names)
+        if canonical is None:
+            return None
+        h = hashlib.sha256()
+        for path in input_paths:
+            if not os.path.exists(path):
+                return None
+            h.update(self.hash_file(path).encode("ascii"))
+            h.update(b"\0")
+        h.update(json.dumps(canonical, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+        return h.hexdigest()
+
+    # ---------- lookup / publish ----------
+
+    def get(
+        self,
+        key: str,
+        outputs_dir: str = "outputs",
+        details: Optional[dict] = None,
+        file_names: Optional[list[str]] = None,
+    ) -> Optional[tuple[str, str, str]]:
+        """On hit, publish the cached output into outputs_dir and return (output_name, message, operation).
+
+        The message names file_names (the current request's inputs). details,
+        when given, is filled with the parameters stored alongside the entry.
+        """
+        with self._lock:
+            meta = self._index.get(key)
+            message = None
+            if meta is not None and "message_template" in meta:
+                message = self._fill_message(meta["message_template"], file_names or [])
+            if message is None:  # Unknown key, or an entry stored before messages were templated
+                self._stats["misses"] += 1
+                return None
+            self._index.move_to_end(key)
+            self._stats["hits"] += 1
+
+        blob = self._blob_path(key)
+        try:
+            os.utime(blob, None)
+            _atomic_copy(blob, os.path.join(outputs_dir, meta["output_name"]))
+        except FileNotFoundError:
+            self._drop(key)
+            with self._lock:
+                self._stats["hits"] -= 1
+                self._stats["misses"] += 1
+            return None
+        if details is not None and meta.get("details"):
+            details.update(meta["details"])
+        return meta["output_name"], message, meta.get("operation") or ""
+
+    def put(
+        self,
+        key: str,
+        output_path: str,
+        message: str,
+        operation: str,
+        details: Optional[dict] = None,
+        file_names: Optional[list[str]] = None,
+    ) -> None:
+        """Store an output file under key and evict down to the size/entry bounds.
+
+        file_names are the inputs message refers to; they are stored as positions.
+        """
+        if not os.path.isfile(output_path):
+            return
+        size = os.path.getsize(output_path)
+        if size > self.max_bytes:
+            return
+        _atomic_copy(output_path, self._blob_path(key))
+        meta = {
+            "output_name": os.path.basename(output_path),
+            "message_template": self._message_template(message, file_names or []),
+            "operation": operation,
+            "size": size,
+            "details": details or None,
+            "created_at": time.time(),
+        }
+        tmp_meta = self._meta_path(key) + ".tmp"
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_meta, self._meta_path(key))
+
+        with self._lock:
+            old = self._index.pop(key, None)
+            if old:
+                self._total_bytes -= old.get("size", 0)
+            self._index[key] = meta
+            self._total_bytes += size
+            self._stats["stores"] += 1
+            victims = []
+            while self._index and (self._total_bytes > self.max_bytes or len(self._index) > self.max_entries):
+                victim, vmeta = self._index.popitem(last=False)
+                self._total_bytes -= vmeta.get("size", 0)
+                self._stats["evictions"] += 1
+                victims.append(victim)
+        for victim in victims:
+            self._remove_files(victim)
+
+    def _drop(self, key: str) -> None:
+        with self._lock:
+            meta = self._index.pop(key, None)
+            if meta:
+                self._total_bytes -= meta.get("size", 0)
+        self._remove_files(key)
+
+    def _remove_files(self, key: str) -> None:
+        for path in (self._blob_path(key), self._meta_path(key)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"[RESULT CACHE] Failed to remove {path}: {e}")
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._index),
+                "size_mb": round(self._total_bytes / (1024 * 1024), 2),
+                "hit_ratio": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+            }
+
+
+def _drop_none(value):
+    if isinstance(value, dict):
+        return {k: _drop_none(v) for k, v in value.items() if v is not None}
+    if isinstance(value, list):
+        return [_drop_none(v) for v in value]
+    return value
+
+
+def _atomic_copy(src: str, dst: str) -> None:
+    """Copy src to dst via a temp file in dst's directory + os.replace.
+
+    Always a real copy: operations open outputs/ files with "wb", which would
+    truncate a hard-linked cache blob in place.
+    """
+    dst_dir = os.path.dirname(dst) or "."
+    os.makedirs(dst_dir, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".tmp_", dir=dst_dir)
+    os.close(fd)
+    try:
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+_CACHE: Optional[ResultCache] = None
+_CACHE_LOCK = Lock()
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Shared cache built from Settings; None when disabled."""
+    global _CACHE
+    if _CACHE is not None:
+        return _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            from app.config import settings
+            if not settings.result_cache_enabled:
+                return None
+            _CACHE = ResultCache(
+                cache_dir=settings.result_cache_dir,
+                max_mb=settings.result_cache_max_mb,
+                max_entries=settings.result_cache_max_entries,
+            )
+    return _CACHE
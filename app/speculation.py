@@ -0,0 +1,295 @@
+"""
+Speculation - Warm caches for a preupload while the user is still typing.
+
+Problem: /preupload lets files upload while the prompt is typed, but nothing
+else happens to them until /submit-with-upload. The job then starts cold:
+probe, text extraction and the operation itself all run after the click.
+
+Solution: as soon as a preupload lands, a background stage runs per file:
+1. probe (app/doc_probe.py): page count, text layer, image ratio
+2. text for /api/analyze (first ANALYZE_MAX_PAGES pages), kept by content hash
+3. first-page thumbnail, data/thumbnails/<sha256>.png
+4. optionally the single most likely operation for the file type, run
+   through the result cache (a callback from main, e.g. the default ebook
+   compression of a large PDF), so a matching job is a cache hit
+
+Budget: each preupload may spend speculation_cpu_budget_seconds. Steps are
+measured (thread CPU time for in-process steps, wall time for the
+precompute, which runs in worker processes), and the precompute callback is
+told what is left so it can skip work it estimates to be larger. Thumbnails
+and precompute are skipped while the job queue is busy.
+
+Cancellation: cancel(upload_id) when the preupload expires or is consumed.
+Remaining steps are skipped; a step already running finishes (Ghostscript and
+friends cannot be interrupted safely) and its result stays cached.
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Callable, Optional
+
+from app.doc_probe import DocumentProbe, get_probe
+
+
+ANALYZE_MAX_PAGES = 20
+ANALYZE_MAX_PARAGRAPHS = 200
+_THUMBNAIL_WIDTH = 240
+_TEXT_CACHE_ENTRIES = 64
+
+
+def extract_analysis_text(path: str) -> str:
+    """Document text in the shape /api/analyze sends to the LLM."""
+    name = path.lower()
+    text = ""
+    if name.endswith(".pdf"):
+        import fitz  # PyMuPDF
+        doc = fitz.open(path)
+        try:
+            for page_num in range(min(doc.page_count, ANALYZE_MAX_PAGES)):
+                page_text = doc[page_num].get_text()
+                if page_text.strip():
+                    text += f"\n--- Page {page_num + 1} ---\n{page_text}"
+        finally:
+            doc.close()
+    elif name.endswith(".docx"):
+        from docx import Document
+        doc = Document(path)
+        for para in doc.paragraphs[:ANALYZE_MAX_PARAGRAPHS]:
+            if para.text.strip():
+                text += f"\n{para.text}"
+    elif name.endswith(".txt"):
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            text = f"\n{f.read()[:15000]}"
+    return text
+
+
+def render_thumbnail(path: str, out_path: str, width: int = _THUMBNAIL_WIDTH) -> bool:
+    """First page (PDF) or the image itself, scaled to width, as PNG. False when unsupported."""
+    name = path.lower()
+    tmp = f"{out_path}.tmp.png"
+    if name.endswith(".pdf"):
+        import fitz
+        doc = fitz.open(path)
+        try:
+            if doc.needs_pass or doc.page_count == 0:
+                return False
+            page = doc[0]
+            zoom = width / max(1.0, page.rect.width)
+            page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False).save(tmp)
+        finally:
+            doc.close()
+    elif name.endswith((".png", ".jpg", ".jpeg")):
+        from PIL import Image
+        with Image.open(path) as img:
+            img.thumbnail((width, width * 4))
+            img.convert("RGB").save(tmp, "PNG")
+    else:
+        return False
+    os.replace(tmp, out_path)
+    return True
+
+
+class _Speculation:
+    """Per-preupload state."""
+
+    def __init__(self, upload_id: str, budget_seconds: float):
+        self.upload_id = upload_id
+        self.cancelled = threading.Event()
+        self.budget_seconds = budget_seconds
+        self.spent_seconds = 0.0
+        self.steps: list[str] = []
+        self.skipped: list[str] = []
+
+    @property
+    def budget_left(self) -> float:
+        return max(0.0, self.budget_seconds - self.spent_seconds)
+
+
+class Speculator:
+    """Runs speculation tasks on a small thread pool."""
+
+    def __init__(
+        self,
+        workers: int = 1,
+        budget_seconds: float = 300.0,
+        thumbnail_dir: Optional[str] = "data/thumbnails",
+        precompute: Optional[Callable[[str, str, Optional[DocumentProbe], float], Optional[str]]] = None,
+        is_busy: Optional[Callable[[], bool]] = None,
+    ):
+        self.budget_seconds = float(budget_seconds)
+        self.thumbnail_dir = thumbnail_dir
+        self.precompute = precompute
+        self.is_busy = is_busy or (lambda: False)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix="speculate")
+        self._lock = Lock()
+        self._active: dict[str, _Speculation] = {}
+        self._texts: "OrderedDict[str, str]" = OrderedDict()  # sha256 -> analysis text
+        self._stats = {"started": 0, "cancelled": 0, "steps": 0, "skipped": 0, "precomputed": 0}
+        if self.thumbnail_dir:
+            os.makedirs(self.thumbnail_dir, exist_ok=True)
+
+    # ---------- scheduling ----------
+
+    def speculate(self, upload_id: str, files: dict[str, tuple[str, Optional[str]]]) -> None:
+        """Start warming caches for files: name -> (path, sha256 or None)."""
+        with self._lock:
+            spec = self._active.get(upload_id)
+            if spec is None:
+                spec = self._active[upload_id] = _Speculation(upload_id, self.budget_seconds)
+                self._stats["started"] += 1
+        self._executor.submit(self._run, spec, dict(files))
+
+    def cancel(self, upload_id: str) -> None:
+        """Stop speculation for a preupload that expired or was consumed."""
+        with self._lock:
+            spec = self._active.pop(upload_id, None)
+            if spec is None:
+                return
+            self._stats["cancelled"] += 1
+        spec.cancelled.set()
+
+    def status(self, upload_id: str) -> Optional[dict]:
+        with self._lock:
+            spec = self._active.get(upload_id)
+        if spec is None:
+            return None
+        return {
+            "steps": list(spec.steps),
+            "skipped": list(spec.skipped),
+            "cpu_seconds": round(spec.spent_seconds, 2),
+            "budget_left": round(spec.budget_left, 2),
+        }
+
+    # ---------- steps ----------
+
+    def _run(self, spec: _Speculation, files: dict[str, tuple[str, Optional[str]]]) -> None:
+        for name, (path, digest) in files.items():
+            probe = self._step(spec, f"probe:{name}", lambda: get_probe(path, digest=digest))
+            digest = digest or (probe.sha256 if probe else None)
+            if digest:
+                self._step(spec, f"text:{name}", lambda: self._warm_text(path, digest))
+                self._step(spec, f"thumbnail:{name}", lambda: self._warm_thumbnail(path, digest), heavy=True)
+            if self.precompute:
+                done = self._step(
+                    spec, f"precompute:{name}",
+                    lambda: self.precompute(name, path, probe, spec.budget_left),
+                    heavy=True, wall_clock=True,
+                )
+                if done:
+                    with self._lock:
+                        self._stats["precomputed"] += 1
+
+    def _step(self, spec: _Speculation, label: str, fn: Callable, heavy: bool = False, wall_clock: bool = False):
+        """Run one step unless cancelled, over budget, or (heavy steps) the queue is busy."""
+        reason = None
+        if spec.cancelled.is_set():
+            reason = "cancelled"
+        elif spec.budget_left <= 0:
+            reason = "budget"
+        elif heavy and self.is_busy():
+            reason = "busy"
+        if reason:
+            spec.skipped.append(f"{label} ({reason})")
+            with self._lock:
+                self._stats["skipped"] += 1
+            return None
+
+        started_cpu, started_wall = time.thread_time(), time.time()
+        try:
+            result = fn()
+        except Exception as e:
+            print(f"[SPECULATE] {spec.upload_id} {label} failed: {e}")
+            result = None
+        spent = (time.time() - started_wall) if wall_clock else (time.thread_time() - started_cpu)
+        spec.spent_seconds += spent
+        spec.steps.append(label)
+        with self._lock:
+            self._stats["steps"] += 1
+        return result
+
+    def _warm_text(self, path: str, digest: str) -> None:
+        with self._lock:
+            if digest in self._texts:
+                return
+        self._remember_text(digest, extract_analysis_text(path))
+
+    def _remember_text(self, digest: str, text: str) -> None:
+        with self._lock:
+            self._texts[digest] = text
+            self._texts.move_to_end(digest)
+            while len(self._texts) > _TEXT_CACHE_ENTRIES:
+                self._texts.popitem(last=False)
+
+    def _warm_thumbnail(self, path: str, digest: str) -> None:
+        out = self.thumbnail_path(digest)
+        if out and not os.path.exists(out):
+            render_thumbnail(path, out)
+
+    # ---------- consumers ----------
+
+    def analysis_text(self, path: str, digest: Optional[str] = None) -> str:
+        """Analysis text for a file, from the speculation cache when warm."""
+        if digest:
+            with self._lock:
+                text = self._texts.get(digest)
+            if text is not None:
+                return text
+        text = extract_analysis_text(path)
+        if digest:
+            self._remember_text(digest, text)
+        return text
+
+    def thumbnail_path(self, digest: str) -> Optional[str]:
+        if not self.thumbnail_dir or not digest:
+            return None
+        return os.path.join(self.thumbnail_dir, f"{digest}.png")
+
+    def prune_thumbnails(self, max_age_seconds: float) -> int:
+        if not self.thumbnail_dir or not os.path.isdir(self.thumbnail_dir):
+            return 0
+        cutoff = time.time() - max_age_seconds
+        removed = 0
+        for name in os.listdir(self.thumbnail_dir):
+            path = os.path.join(self.thumbnail_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                pass
+        return removed
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "active": len(self._active), "cached_texts": len(self._texts)}
+
+    def shutdown(self) -> None:
+        with self._lock:
+            specs = list(self._active.values())
+            self._active.clear()
+        for spec in specs:
+            spec.cancelled.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_SPECULATOR: Optional[Speculator] = None
+_SPECULATOR_LOCK = Lock()
+
+
+def configure_speculator(**kwargs) -> Speculator:
+    """Build the shared speculator (main wires in the precompute and busy callbacks)."""
+    global _SPECULATOR
+    with _SPECULATOR_LOCK:
+        if _SPECULATOR is not None:
+            _SPECULATOR.shutdown()
+        _SPECULATOR = Speculator(**kwargs)
+    return _SPECULATOR
+
+
+def get_speculator() -> Optional[Speculator]:
+    """Shared speculator, or None when speculation is disabled / not configured."""
+    return _SPECULATOR
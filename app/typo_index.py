@@ -0,0 +1,118 @@
+"""
+Typo Index - Symmetric-delete candidate lookup for fuzzy keyword matching.
+
+Problem: fuzzy_match_keyword ran difflib.SequenceMatcher against every keyword
+for every word of every prompt, and _normalize_prompt_for_heuristics calls it
+for each word. That is about 30 ratio() computations per word, nearly all of
+them for keywords that could never reach the threshold.
+
+Solution (SymSpell-style): every keyword is indexed under all strings that
+can be made from it by deleting up to max_distance characters. A query
+generates its own deletes and looks them up, so only keywords within
+max_distance edits come back, in time that does not depend on the size of
+the keyword list. The survivors are then scored with the same
+SequenceMatcher ratio as before, so results are identical to the linear
+scan, including which keyword wins a tie (the earlier one in list order).
+
+Why nothing is missed: SequenceMatcher's ratio is 2*M/(la+lb), and the
+matched count M is at most the longest common subsequence. ratio >= t
+therefore implies an insert/delete distance (and so a Levenshtein distance)
+of at most (1-t)*(la+lb). The length filter bounds la+lb by 2*maxlen/t. For
+the 0.86 keyword threshold and 9-letter keywords, that radius is 2 edits.
+Symmetric deletes find every pair within that Levenshtein distance.
+
+When the radius would be large (long strings, low threshold), the index
+falls back to a scan pruned by SequenceMatcher's cheap upper bounds
+(real_quick_ratio, quick_ratio), which is still exact.
+"""
+
+import math
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Iterable, Optional
+
+
+MAX_INDEX_DISTANCE = 3  # Above this the delete sets grow too large to be worth indexing
+_MEMO_ENTRIES = 4096  # Per index; prompts reuse a small vocabulary
+
+
+def _deletes(word: str, max_distance: int) -> set:
+    """word plus every string reachable by deleting up to max_distance characters."""
+    out = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))} - out
+        out |= frontier
+    return out
+
+
+class TypoIndex:
+    """Best SequenceMatcher match at or above threshold, found via symmetric deletes."""
+
+    def __init__(self, words: Iterable[str], threshold: float):
+        self.words = list(words)
+        self.threshold = float(threshold)
+        self._keys = [w.lower() for w in self.words]
+        self.max_len = max((len(k) for k in self._keys), default=0)
+        self.min_len = min((len(k) for k in self._keys), default=0)
+        # Any word passing the threshold is within this many edits (module docstring)
+        bound = (1 - self.threshold) * 2 * self.max_len / self.threshold if self.threshold > 0 else math.inf
+        self.max_distance = math.floor(bound + 1e-9) if bound != math.inf else None
+        self._index: Optional[dict] = None
+        self._memo: dict = {}
+        if self.max_distance is not None and self.max_distance <= MAX_INDEX_DISTANCE:
+            self._index = {}
+            for pos, key in enumerate(self._keys):
+                for d in _deletes(key, self.max_distance):
+                    self._index.setdefault(d, []).append(pos)
+
+    def _length_ok(self, la: int, lb: int) -> bool:
+        return 2 * min(la, lb) >= self.threshold * (la + lb) - 1e-9
+
+    def _candidates(self, query: str) -> Iterable[int]:
+        if self._index is None:
+            return range(len(self._keys))
+        if not self._length_ok(len(query), self.max_len) and len(query) > self.max_len:
+            return ()
+        if not self._length_ok(len(query), self.min_len) and len(query) < self.min_len:
+            return ()
+        found = set()
+        for d in _deletes(query, self.max_distance):
+            found.update(self._index.get(d, ()))
+        return sorted(found)
+
+    def best(self, query: str) -> tuple[Optional[str], float]:
+        """(best word, ratio) in list order, like a linear scan with strict '>'; (None, 0.0) if no candidate."""
+        q = query.lower()
+        best, best_score = None, 0.0
+        for pos in self._candidates(q):
+            key = self._keys[pos]
+            if not self._length_ok(len(q), len(key)):
+                continue
+            matcher = SequenceMatcher(None, q, key)
+            # Cheap upper bounds first; they cannot beat the current best or the threshold
+            floor = max(best_score, self.threshold - 1e-9) if best is not None else self.threshold - 1e-9
+            if matcher.real_quick_ratio() < floor or matcher.quick_ratio() < floor:
+                continue
+            score = matcher.ratio()
+            if score > best_score:
+                best, best_score = self.words[pos], score
+        return best, best_score
+
+    def match(self, query: str) -> Optional[str]:
+        try:
+            return self._memo[query]
+        except KeyError:
+            pass
+        best, score = self.best(query)
+        result = best if best is not None and score >= self.threshold else None
+        if len(self._memo) >= _MEMO_ENTRIES:
+            self._memo.clear()
+        self._memo[query] = result
+        return result
+
+
+@lru_cache(maxsize=64)
+def get_typo_index(words: tuple, threshold: float) -> TypoIndex:
+    """Shared index per (word list, threshold)."""
+    return TypoIndex(words, threshold)
@@ -0,0 +1,298 @@
+"""
+Upload Store - Content-addressed uploads with deduplication and refcounting.
+
+Problem: uploads were written to uploads/<original filename>. The same PDF
+uploaded by fifty users was stored fifty times, two different files called
+scan.pdf overwrote each other, and cleanup deleted files by age whether or
+not a queued job still needed them.
+
+Solution:
+- Bytes live once under <blob_dir>/<sha256[:2]>/<sha256>. A duplicate upload
+  is hashed (from the spooled request body) and then costs no write at all.
+- uploads/<name> becomes a handle: a hard link to the blob, kept for the
+  name-based lookups (get_upload_path, /submit-reuse, /api/analyze). Handles,
+  like job workspaces, must be treated as read-only.
+- Holders take references: "handle:<name>", "preupload:<upload_id>",
+  "job:<job_id>", "request:<id>". A job's (or a /process request's) workspace
+  is built from its blobs, so another upload reusing the name cannot change
+  its input.
+- When the last reference is released the blob is evicted. Cleanup releases
+  references instead of deleting files blindly.
+
+References are in memory; after a restart, blobs nobody re-acquires are
+removed by sweep_unreferenced.
+"""
+
+import os
+import time
+import shutil
+import hashlib
+import tempfile
+from threading import Lock
+from typing import BinaryIO, Iterable, Optional
+
+
+_HASH_CHUNK = 1024 * 1024
+
+
+def _link_or_copy(src: str, dst: str) -> None:
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+class UploadStore:
+    """Blob directory plus reference counts per holder."""
+
+    def __init__(self, blob_dir: str = "data/blobs", uploads_dir: str = "uploads"):
+        self.blob_dir = blob_dir
+        self.uploads_dir = uploads_dir
+        self._lock = Lock()
+        self._refs: dict[str, set[str]] = {}  # digest -> holders
+        self._held: dict[str, set[str]] = {}  # holder -> digests
+        self._handles: dict[str, str] = {}  # uploads/ name -> digest
+        self._stats = {"stored": 0, "deduplicated": 0, "bytes_saved": 0, "evicted": 0}
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.uploads_dir, exist_ok=True)
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_dir, digest[:2], digest)
+
+    def has(self, digest: str) -> bool:
+        return bool(digest) and os.path.exists(self.blob_path(digest))
+
+    # ---------- ingest ----------
+
+    def ingest_stream(self, fileobj: BinaryIO, holder: str) -> str:
+        """Store a readable, seekable file object; returns its SHA-256.
+
+        The object is hashed first; its bytes are only written when the blob
+        is new.
+        """
+        fileobj.seek(0)
+        h = hashlib.sha256()
+        size = 0
+        for chunk in iter(lambda: fileobj.read(_HASH_CHUNK), b""):
+            h.update(chunk)
+            size += len(chunk)
+        digest = h.hexdigest()
+
+        if self._acquire_existing(digest, holder, size):
+            return digest
+
+        dst = self.blob_path(digest)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".tmp_", dir=os.path.dirname(dst))
+        try:
+            with os.fdopen(fd, "wb") as out:
+                fileobj.seek(0)
+                shutil.copyfileobj(fileobj, out, _HASH_CHUNK)
+            self._commit(tmp, digest, holder, size)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            fileobj.seek(0)
+        return digest
+
+    def ingest_file(self, path: str, holder: str, digest: Optional[str] = None) -> str:
+        """Move a finished file into the store (it is consumed); returns its SHA-256."""
+        if not digest:
+            h = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+                    h.update(chunk)
+            digest = h.hexdigest()
+        size = os.path.getsize(path)
+
+        if self._acquire_existing(digest, holder, size):
+            os.remove(path)
+            return digest
+
+        os.makedirs(os.path.dirname(self.blob_path(digest)), exist_ok=True)
+        try:
+            self._commit(path, digest, holder, size)
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+        return digest
+
+    def _acquire_existing(self, digest: str, holder: str, size: int) -> bool:
+        with self._lock:
+            if not os.path.exists(self.blob_path(digest)):
+                return False
+            # Handles share the blob's inode, so age-based cleanup sees this mtime
+            os.utime(self.blob_path(digest))
+            self._add_ref_locked(digest, holder)
+            self._stats["deduplicated"] += 1
+            self._stats["bytes_saved"] += size
+        return True
+
+    def _commit(self, src: str, digest: str, holder: str, size: int) -> None:
+        """Rename src into place (or drop it when a racing upload got there first) and take a ref."""
+        dst = self.blob_path(digest)
+        with self._lock:
+            if os.path.exists(dst):
+                self._stats["deduplicated"] += 1
+                self._stats["bytes_saved"] += size
+            else:
+                try:
+                    os.replace(src, dst)
+                except OSError:
+                    shutil.move(src, dst)
+                self._stats["stored"] += 1
+            self._add_ref_locked(digest, holder)
+
+    # ---------- references ----------
+
+    def _add_ref_locked(self, digest: str, holder: str) -> None:
+        self._refs.setdefault(digest, set()).add(holder)
+        self._held.setdefault(holder, set()).add(digest)
+
+    def acquire(self, digest: str, holder: str) -> bool:
+        """Add a reference; False when the blob no longer exists."""
+        with self._lock:
+            if not os.path.exists(self.blob_path(digest)):
+                return False
+            self._add_ref_locked(digest, holder)
+        return True
+
+    def acquire_all(self, digests: Iterable[str], holder: str) -> None:
+        for digest in digests:
+            self.acquire(digest, holder)
+
+    def release(self, digest: str, holder: str) -> None:
+        with self._lock:
+            self._release_locked(digest, holder)
+
+    def release_holder(self, holder: str) -> int:
+        """Drop every reference held by holder. Returns how many were released."""
+        with self._lock:
+            digests = self._held.pop(holder, set())
+            for digest in digests:
+                self._release_locked(digest, holder)
+        return len(digests)
+
+    def _release_locked(self, digest: str, holder: str) -> None:
+        holders = self._refs.get(digest)
+        if holders is None or holder not in holders:
+            return
+        holders.discard(holder)
+        held = self._held.get(holder)
+        if held is not None:
+            held.discard(digest)
+            if not held:
+                self._held.pop(holder, None)
+        if not holders:
+            self._refs.pop(digest, None)
+            self._evict_locked(digest)
+
+    def _evict_locked(self, digest: str) -> None:
+        try:
+            os.remove(self.blob_path(digest))
+            self._stats["evicted"] += 1
+        except FileNotFoundError:
+            pass
+
+    def ref_count(self, digest: str) -> int:
+        with self._lock:
+            return len(self._refs.get(digest, ()))
+
+    # ---------- uploads/ handles ----------
+
+    @staticmethod
+    def _handle_holder(name: str) -> str:
+        return f"handle:{name}"
+
+    def publish(self, digest: str, name: str) -> str:
+        """Point uploads/<name> at the blob (hard link) and return the handle path."""
+        path = os.path.join(self.uploads_dir, name)
+        holder = self._handle_holder(name)
+        fd, tmp = tempfile.mkstemp(prefix=".tmp_", dir=self.uploads_dir)
+        os.close(fd)
+        os.remove(tmp)
+        with self._lock:
+            _link_or_copy(self.blob_path(digest), tmp)
+            os.replace(tmp, path)
+            previous = self._handles.get(name)
+            self._handles[name] = digest
+            self._add_ref_locked(digest, holder)
+            if previous and previous != digest:
+                self._release_locked(previous, holder)
+        return path
+
+    def handle_digest(self, name: str) -> Optional[str]:
+        with self._lock:
+            return self._handles.get(name)
+
+    def release_handle(self, name: str, digest: Optional[str] = None) -> bool:
+        """Remove uploads/<name> and its reference.
+
+        With digest, only when the handle still points at that blob (the name
+        may have been re-uploaded with other bytes since).
+        """
+        with self._lock:
+            current = self._handles.get(name)
+            if current is None or (digest and current != digest):
+                return False
+            self._handles.pop(name, None)
+            try:
+                os.remove(os.path.join(self.uploads_dir, name))
+            except FileNotFoundError:
+                pass
+            self._release_locked(current, self._handle_holder(name))
+        return True
+
+    # ---------- maintenance ----------
+
+    def sweep_unreferenced(self, max_age_seconds: float) -> int:
+        """Remove blobs nobody references (e.g. left over from before a restart)."""
+        cutoff = time.time() - max_age_seconds
+        removed = 0
+        if not os.path.isdir(self.blob_dir):
+            return 0
+        for shard in os.listdir(self.blob_dir):
+            shard_dir = os.path.join(self.blob_dir, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for name in os.listdir(shard_dir):
+                path = os.path.join(shard_dir, name)
+                try:
+                    if os.path.getmtime(path) > cutoff:
+                        continue
+                except OSError:
+                    continue
+                with self._lock:
+                    if name.startswith(".tmp_") or not self._refs.get(name):
+                        try:
+                            os.remove(path)
+                            removed += 1
+                        except OSError:
+                            pass
+        return removed
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            digests = list(self._refs)
+            stats = dict(self._stats)
+            stats["referenced_blobs"] = len(digests)
+            stats["references"] = sum(len(h) for h in self._refs.values())
+            stats["handles"] = len(self._handles)
+        stats["bytes_saved_mb"] = round(stats.pop("bytes_saved") / (1024 * 1024), 2)
+        return stats
+
+
+_STORE: Optional[UploadStore] = None
+_STORE_LOCK = Lock()
+
+
+def get_upload_store() -> UploadStore:
+    """Shared store built from Settings."""
+    global _STORE
+    if _STORE is not None:
+        return _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            from app.config import settings
+            _STORE = UploadStore(blob_dir=settings.upload_blob_dir)
+    return _STORE
@@ -3,7 +3,8 @@ Shared utility functions to reduce code duplication across modules.
 """
 
 import re
-from difflib import SequenceMatcher
+
+from app.typo_index import get_typo_index
 
 
 RE_EXPLICIT_ORDER = re.compile(r"\b(and then|then|after that|afterwards|before that|before|first|second|finally)\b", re.IGNORECASE)
@@ -57,15 +58,7 @@ def fuzzy_match_string(query: str, candidates: list[str], threshold: float = 0.8
         if candidate.lower() == query_lower:
             return candidate
     
-    best = None
-    best_score = 0.0
-    for candidate in candidates:
-        score = SequenceMatcher(None, query_lower, candidate.lower()).ratio()
-        if score > best_score:
-            best_score = score
-            best = candidate
-    
-    return best if best and best_score >= threshold else None
+    return get_typo_index(tuple(candidates), threshold).match(query_lower)
 
 
 def fuzzy_match_keyword(word: str, keywords: list[str], threshold: float = 0.86) -> str:
@@ -77,15 +70,8 @@ def fuzzy_match_keyword(word: str, keywords: list[str], threshold: float = 0.86)
     if w in keywords or len(w) < 4:
         return w
     
-    best = None
-    best_score = 0.0
-    for k in keywords:
-        score = SequenceMatcher(None, w, k).ratio()
-        if score > best_score:
-            best_score = score
-            best = k
-    
-    return best if best and best_score >= threshold else word
+    best = get_typo_index(tuple(keywords), threshold).match(w)
+    return best if best else word
 
 
 
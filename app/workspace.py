@@ -0,0 +1,179 @@
+"""
+Job Workspaces - Isolated working directories per background job.
+
+Problem: every pdf_operations function writes a fixed default name into the
+shared outputs/ directory (merged_output.pdf, multi_step_2_split.pdf, ...), so
+two concurrent jobs overwrite each other and the queue had to run one job at
+a time.
+
+Solution:
+- Each job gets <root>/<job_id>/in (a snapshot of its uploads) and
+  <root>/<job_id>/out. The root may live on tmpfs (/dev/shm).
+- The active workspace is a context variable, so get_upload_path /
+  get_output_path resolve inside it without changing any operation signature.
+  cpu_bound operations carry it into the worker process via call_in_workspace.
+- Job results expose "<job_id>__<name>"; /download resolves that back to the
+  job's out/ directory through the job ID.
+- When the job is archived the directory is renamed aside (atomic) and then
+  deleted, so a half-removed workspace is never visible under its job ID.
+"""
+
+import os
+import re
+import time
+import shutil
+import importlib
+import contextlib
+from contextvars import ContextVar
+from typing import Callable, Iterable, Iterator, Optional
+
+
+_TMPFS_ROOT = "/dev/shm/ordermypdf-jobs"
+_TRASH_PREFIX = ".trash-"
+_PUBLIC_NAME = re.compile(r"^([0-9a-f-]{12})__([^/\\]+)$")
+
+_root = "data/jobs"
+_current: ContextVar[Optional[str]] = ContextVar("job_workspace", default=None)
+
+
+def configure(root: str, use_tmpfs: bool = False) -> str:
+    """Set the workspace root (tmpfs when requested and available). Returns the root in use."""
+    global _root
+    if use_tmpfs and os.path.isdir("/dev/shm"):
+        root = _TMPFS_ROOT
+    _root = root
+    os.makedirs(_root, exist_ok=True)
+    return _root
+
+
+def workspace_dir(job_id: str) -> str:
+    return os.path.join(_root, job_id)
+
+
+def input_dir(workspace: str) -> str:
+    return os.path.join(workspace, "in")
+
+
+def output_dir(workspace: str) -> str:
+    return os.path.join(workspace, "out")
+
+
+def current_workspace() -> Optional[str]:
+    """Workspace directory of the job running in this context, if any."""
+    return _current.get()
+
+
+def _link_or_copy(src: str, dst: str) -> None:
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def create_workspace(job_id: str, input_paths: Iterable[str], named_inputs: Optional[dict[str, str]] = None) -> str:
+    """Create <root>/<job_id>/{in,out} and snapshot the job's input files into in/.
+
+    input_paths keep their base name; named_inputs maps in/ name -> source path
+    (e.g. a content-addressed upload blob).
+    """
+    workspace = workspace_dir(job_id)
+    os.makedirs(input_dir(workspace), exist_ok=True)
+    os.makedirs(output_dir(workspace), exist_ok=True)
+    sources = [(os.path.basename(path), path) for path in input_paths]
+    sources += list((named_inputs or {}).items())
+    for name, path in sources:
+        if not os.path.isfile(path):
+            continue
+        dst = os.path.join(input_dir(workspace), name)
+        if not os.path.exists(dst):
+            _link_or_copy(path, dst)
+    return workspace
+
+
+@contextlib.contextmanager
+def use_workspace(workspace: str) -> Iterator[str]:
+    """Make workspace the active one for path resolution in this context."""
+    token = _current.set(workspace)
+    try:
+        yield workspace
+    finally:
+        _current.reset(token)
+
+
+@contextlib.contextmanager
+def job_workspace(
+    job_id: str, input_paths: Iterable[str], named_inputs: Optional[dict[str, str]] = None
+) -> Iterator[str]:
+    """Create the job's workspace and activate it for the duration of the block."""
+    with use_workspace(create_workspace(job_id, input_paths, named_inputs)) as workspace:
+        yield workspace
+
+
+def call_in_workspace(workspace: str, module_name: str, func_name: str, args: tuple, kwargs: dict):
+    """Process-pool entry point: run module.func inside workspace (context vars do not cross processes)."""
+    func = getattr(importlib.import_module(module_name), func_name)
+    func = getattr(func, "__wrapped__", func)
+    with use_workspace(workspace):
+        return func(*args, **kwargs)
+
+
+def public_output_name(job_id: str, name: str) -> str:
+    """Globally unique name for a job output; resolves back through the job ID."""
+    return f"{job_id}__{name}"
+
+
+def split_public_name(public_name: str) -> Optional[tuple[str, str]]:
+    """(job_id, file_name) for a public output name, else None."""
+    match = _PUBLIC_NAME.match(public_name or "")
+    if not match:
+        return None
+    return match.group(1), match.group(2)
+
+
+def resolve_public_name(public_name: str) -> Optional[str]:
+    """Path of a job output inside its workspace, or None when not a job output."""
+    parts = split_public_name(public_name)
+    if not parts:
+        return None
+    job_id, name = parts
+    workspace = workspace_dir(job_id)
+    path = os.path.join(output_dir(workspace), name)
+    if not os.path.exists(path) and os.path.exists(os.path.join(input_dir(workspace), name)):
+        path = os.path.join(input_dir(workspace), name)  # pass-through result
+    return path
+
+
+def remove_workspace(job_id: str) -> None:
+    """Rename the workspace aside (atomic on one filesystem), then delete it."""
+    workspace = workspace_dir(job_id)
+    if not os.path.isdir(workspace):
+        return
+    trash = os.path.join(_root, f"{_TRASH_PREFIX}{job_id}-{time.time_ns()}")
+    try:
+        os.replace(workspace, trash)
+    except OSError as e:
+        print(f"[WORKSPACE] Could not detach {job_id}: {e}")
+        return
+    shutil.rmtree(trash, ignore_errors=True)
+
+
+def sweep_stale_workspaces(max_age_seconds: float, is_live: Callable[[str], bool]) -> int:
+    """Remove leftover workspaces (e.g. from before a restart) no live job owns."""
+    if not os.path.isdir(_root):
+        return 0
+    removed = 0
+    cutoff = time.time() - max_age_seconds
+    for name in os.listdir(_root):
+        path = os.path.join(_root, name)
+        try:
+            if not os.path.isdir(path) or os.path.getmtime(path) > cutoff:
+                continue
+        except OSError:
+            continue
+        if name.startswith(_TRASH_PREFIX):
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+        elif not is_live(name):
+            remove_workspace(name)
+            removed += 1
+    return removed
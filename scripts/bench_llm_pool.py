@@ -0,0 +1,120 @@
+"""Benchmark: a new HTTP client per LLM call vs the pooled keep-alive registry.
+
+Usage:
+  python scripts/bench_llm_pool.py [--calls 50] [--handshake-ms 60] [--url URL]
+
+Starts a local OpenAI-compatible stub (POST /chat/completions) unless --url
+points at a real endpoint. The stub sleeps --handshake-ms on every NEW
+connection, standing in for the TCP + TLS setup a remote provider costs;
+requests on a kept-alive connection skip it.
+
+"before" opens an httpx.Client per call, like the old Baseten rephraser
+(the old per-call Groq clients behaved the same). "after" posts through
+get_llm_clients().http(). Prints mean milliseconds per call and how many
+connections the stub accepted.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.llm_clients import LLMClientRegistry  # noqa: E402
+
+
+_RESPONSE = json.dumps({
+    "id": "stub",
+    "object": "chat.completion",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "OK"}, "finish_reason": "stop"}],
+}).encode()
+
+
+def _start_stub(handshake_seconds: float):
+    counters = {"connections": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def setup(self):
+            counters["connections"] += 1
+            time.sleep(handshake_seconds)
+            super().setup()
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(_RESPONSE)))
+            self.end_headers()
+            self.wfile.write(_RESPONSE)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, counters
+
+
+def _payload() -> dict:
+    return {"model": "stub", "messages": [{"role": "user", "content": "Say 'OK'"}], "max_tokens": 10}
+
+
+def _before(url: str, calls: int) -> float:
+    import httpx
+    started = time.perf_counter()
+    for _ in range(calls):
+        with httpx.Client(timeout=12.0) as client:
+            client.post(url, json=_payload()).raise_for_status()
+    return (time.perf_counter() - started) / calls * 1e3
+
+
+def _after(url: str, calls: int) -> float:
+    registry = LLMClientRegistry()
+    try:
+        started = time.perf_counter()
+        for _ in range(calls):
+            registry.http().post(url, json=_payload(), timeout=12.0).raise_for_status()
+        return (time.perf_counter() - started) / calls * 1e3
+    finally:
+        registry.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--handshake-ms", type=float, default=60.0, help="Stub delay per new connection")
+    parser.add_argument("--url", default=None, help="Real /chat/completions URL instead of the stub")
+    args = parser.parse_args()
+
+    server, counters = None, {"connections": 0}
+    url = args.url
+    if url is None:
+        server, counters = _start_stub(args.handshake_ms / 1000)
+        url = f"http://127.0.0.1:{server.server_address[1]}/chat/completions"
+
+    try:
+        before = _before(url, args.calls)
+        before_conns = counters["connections"]
+        after = _after(url, args.calls)
+        after_conns = counters["connections"] - before_conns
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    print(f"{'before':<8} {before:9.2f} ms/call" + (f"  ({before_conns} connections)" if server else ""))
+    print(f"{'after':<8} {after:9.2f} ms/call" + (f"  ({after_conns} connections)" if server else ""))
+    print(f"Speedup: {before / after:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,86 @@
+"""Benchmark: single-process vs chunked parallel Ghostscript compression.
+
+Usage:
+  python scripts/bench_parallel_compress.py path/to/large.pdf [--preset ebook] [--workers 8] [--chunk 25]
+  python scripts/bench_parallel_compress.py --generate 300      # synthetic scanned-style PDF (needs PyMuPDF)
+
+Prints wall-clock time and output size for both paths. Requires Ghostscript.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def _generate_pdf(path: str, pages: int) -> None:
+    import fitz
+
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        # A noisy full-page pixmap approximates a scanned page.
+        pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 1200, 1600), False)
+        pix.set_rect(pix.irect, (240, 240, 235))
+        for y in range(0, 1600, 40):
+            pix.set_rect(fitz.IRect(80, y, 1120, y + 12), ((i * 7 + y) % 120, 60, 60))
+        page.insert_image(page.rect, pixmap=pix)
+        page.insert_text((72, 72), f"Page {i + 1}", fontsize=24)
+    doc.save(path)
+    doc.close()
+
+
+def _run(label: str, input_path: str, output_path: str, preset: str, workers: int, chunk: int) -> float:
+    from app.config import settings
+    from app import pdf_operations
+    from app.pdf_operations import _ghostscript_compress, _resolve_ghostscript_executable
+
+    settings.gs_parallel_workers = workers
+    settings.gs_pages_per_chunk = chunk
+    settings.gs_parallel_min_pages = 1
+    settings.gs_max_processes = max(workers, settings.gs_max_processes)
+    pdf_operations._GS_SLOTS = None  # Rebuilt from the setting above
+
+    gs = _resolve_ghostscript_executable(raise_if_missing=True)
+    started = time.perf_counter()
+    _ghostscript_compress(gs, input_path, output_path, preset)
+    elapsed = time.perf_counter() - started
+    size_mb = os.path.getsize(output_path) / (1024 * 1024)
+    print(f"{label:<10} {elapsed:8.2f}s  {size_mb:8.2f} MB")
+    return elapsed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pdf", nargs="?")
+    parser.add_argument("--generate", type=int, default=0, help="Generate a synthetic PDF with N pages")
+    parser.add_argument("--preset", default="ebook")
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--chunk", type=int, default=25)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_gs_") as tmp:
+        input_path = args.pdf
+        if args.generate:
+            input_path = os.path.join(tmp, "synthetic.pdf")
+            _generate_pdf(input_path, args.generate)
+        if not input_path or not os.path.exists(input_path):
+            parser.error("pass a PDF path or --generate N")
+
+        print(f"Input: {input_path} ({os.path.getsize(input_path) / (1024 * 1024):.2f} MB)")
+        single = _run("single", input_path, os.path.join(tmp, "single.pdf"), args.preset, 1, args.chunk)
+        parallel = _run(
+            f"parallel x{args.workers}", input_path, os.path.join(tmp, "parallel.pdf"),
+            args.preset, args.workers, args.chunk,
+        )
+        print(f"Speedup: {single / parallel:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
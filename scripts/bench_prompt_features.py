@@ -0,0 +1,75 @@
+"""Benchmark: inline per-flag regexes vs the precompiled prompt feature extractor.
+
+Usage:
+  python scripts/bench_prompt_features.py [--rounds 2000] [--cold]
+
+"before" is what clarify_intent used to do: one re.search per wants_* flag
+plus the _is_vague_command pattern loop, with string patterns going through
+re's cache. --cold purges that cache before every prompt, which is what
+happens once more distinct patterns are in use than re keeps cached.
+"after" is extract_prompt_features. Prints mean microseconds per prompt.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.prompt_features import _FLAG_SPECS, _FORMAT_SPECS, _VAGUE_PATTERNS, extract_prompt_features  # noqa: E402
+
+
+PROMPTS = (
+    "compress",
+    "convert to docx",
+    "merge all files and compress",
+    "rotate left then add page numbers",
+    "make it email ready",
+    "split first 3 pages",
+    "ok",
+    "OCR this scan and make searchable pdf",
+    "remove blank pages and duplicate pages",
+    "watermark CONFIDENTIAL on every page",
+)
+
+
+def _before(prompt_for_match: str) -> dict:
+    compact = prompt_for_match.strip().lower()
+    flags = {name: bool(re.search(pattern, compact)) for name, pattern, _ in _FLAG_SPECS}
+    for name, pattern in _FORMAT_SPECS:
+        flags[name] = bool(re.search(pattern, prompt_for_match, re.IGNORECASE))
+    flags["vague"] = any(re.match(f"^{pattern}$", compact) for pattern in _VAGUE_PATTERNS)
+    return flags
+
+
+def _time(fn, rounds: int, cold: bool) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for prompt in PROMPTS:
+            if cold:
+                re.purge()
+            fn(prompt)
+    return (time.perf_counter() - started) / (rounds * len(PROMPTS)) * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=2000)
+    parser.add_argument("--cold", action="store_true", help="Purge re's pattern cache before every prompt")
+    args = parser.parse_args()
+    rounds = args.rounds if not args.cold else max(1, args.rounds // 20)
+
+    before = _time(_before, rounds, args.cold)
+    after = _time(extract_prompt_features, rounds, args.cold)
+    print(f"{'before':<8} {before:9.1f} us/prompt")
+    print(f"{'after':<8} {after:9.1f} us/prompt")
+    print(f"Speedup: {before / after:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
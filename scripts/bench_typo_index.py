@@ -0,0 +1,97 @@
+"""Benchmark: SequenceMatcher scan vs the symmetric-delete typo index.
+
+Usage:
+  python scripts/bench_typo_index.py [--limit 40050] [--typo-rate 0.3]
+
+Builds the 40K command corpus from the pattern families in
+app/pattern_matching.py (prefix x operation chain x target). A share of the
+words get a random edit. Each prompt is then normalized the way
+_normalize_prompt_for_heuristics does it (every word fuzzy-matched against
+ALL_NORMALIZE_KEYWORDS), once with the old linear scan and once with
+fuzzy_match_keyword. Reports time per prompt and checks that the outputs are
+identical.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import os
+import random
+import re
+import string
+import sys
+import time
+from difflib import SequenceMatcher
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.pattern_matching import ALL_OPERATIONS, OP_ALIASES  # noqa: E402
+from app.utils import ALL_NORMALIZE_KEYWORDS, fuzzy_match_keyword  # noqa: E402
+
+
+PREFIXES = ("", "pls ", "please ", "and ", "then ", "can you ", "i want to ", "just ")
+TARGETS = ("", " to pdf", " to docx", " to jpg", " to 2mb", " under 500kb", " for email", " for whatsapp", " for print")
+WORD_RE = re.compile(r"[A-Za-z]{2,}")
+
+
+def _corpus(limit: int, typo_rate: float, seed: int = 1) -> list[str]:
+    rng = random.Random(seed)
+    ops = list(ALL_OPERATIONS) + list(OP_ALIASES)
+    chains = itertools.chain(
+        ((a,) for a in ops),
+        ((a, b) for a in ops for b in ops if a != b),
+        ((a, b, c) for a in ops for b in ops for c in ops if len({a, b, c}) == 3),
+    )
+    prompts = []
+    for chain, prefix, target in zip(chains, itertools.cycle(PREFIXES), itertools.cycle(TARGETS)):
+        text = prefix + " then ".join(chain) + target
+        words = []
+        for word in text.split():
+            if len(word) >= 4 and rng.random() < typo_rate:
+                i = rng.randrange(len(word))
+                word = word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+            words.append(word)
+        prompts.append(" ".join(words))
+        if len(prompts) >= limit:
+            break
+    return prompts
+
+
+def _linear_keyword(word: str, keywords: list[str], threshold: float = 0.86) -> str:
+    w = word.lower()
+    if w in keywords or len(w) < 4:
+        return w
+    best, best_score = None, 0.0
+    for k in keywords:
+        score = SequenceMatcher(None, w, k).ratio()
+        if score > best_score:
+            best, best_score = k, score
+    return best if best and best_score >= threshold else word
+
+
+def _run(label: str, fn, prompts: list[str]) -> tuple[float, list[str]]:
+    started = time.perf_counter()
+    out = [WORD_RE.sub(lambda m: fn(m.group(0), ALL_NORMALIZE_KEYWORDS), p) for p in prompts]
+    per_prompt = (time.perf_counter() - started) / len(prompts) * 1e6
+    print(f"{label:<8} {per_prompt:9.1f} us/prompt")
+    return per_prompt, out
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--limit", type=int, default=40050)
+    parser.add_argument("--typo-rate", type=float, default=0.3)
+    args = parser.parse_args()
+
+    prompts = _corpus(args.limit, args.typo_rate)
+    print(f"Corpus: {len(prompts)} prompts")
+    before, expected = _run("scan", _linear_keyword, prompts)
+    after, actual = _run("index", fuzzy_match_keyword, prompts)
+    mismatches = sum(1 for a, b in zip(expected, actual) if a != b)
+    print(f"Speedup: {before / after:.1f}x, mismatches: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,81 @@
+"""Tests for the non-blocking LLM path (safe_llm_call_async, run_blocking, run_file_operation)."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from app import llm_wrapper  # noqa: E402
+from app.blocking import get_blocking_executor, run_blocking, run_file_operation  # noqa: E402
+
+
+def _completion(text):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+
+class _FlakyAsyncClient:
+    """Rate-limits the first call, then answers."""
+
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            raise RuntimeError("Error code: 429 - rate limit reached")
+        return _completion(" OK ")
+
+
+async def _ticks_while(coro):
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    try:
+        result = await coro
+    finally:
+        task.cancel()
+    return result, ticks
+
+
+def test_rate_limit_backoff_does_not_block_the_loop(monkeypatch):
+    client = _FlakyAsyncClient()
+    monkeypatch.setattr(llm_wrapper, "_is_api_key_valid", lambda: True)
+    monkeypatch.setattr(llm_wrapper, "_get_async_groq_client", lambda: client)
+    monkeypatch.setattr(llm_wrapper, "_retry_delay", lambda error, attempt: 0.2)
+
+    response, ticks = asyncio.run(_ticks_while(
+        llm_wrapper.safe_llm_call_async([{"role": "user", "content": "hi"}], purpose="test")
+    ))
+
+    assert response.success and response.content == "OK"
+    assert client.calls == 2
+    assert ticks >= 5  # other coroutines ran during the 0.2s backoff
+
+
+def test_run_blocking_keeps_the_loop_responsive():
+    result, ticks = asyncio.run(_ticks_while(run_blocking(lambda: time.sleep(0.2) or "done")))
+    assert result == "done"
+    assert ticks >= 5
+
+
+def test_file_operations_do_not_queue_short_work():
+    async def run():
+        workers = get_blocking_executor()._max_workers
+        long_ops = [asyncio.ensure_future(run_file_operation(time.sleep, 0.5)) for _ in range(workers + 2)]
+        started = time.perf_counter()
+        assert await run_blocking(lambda: "short") == "short"
+        waited = time.perf_counter() - started
+        await asyncio.gather(*long_ops)
+        return waited
+
+    assert asyncio.run(run()) < 0.2
@@ -0,0 +1,112 @@
+"""Tests for resumable chunked uploads (app/chunked_upload.py)."""
+
+import asyncio
+import hashlib
+
+import pytest
+
+from app import chunked_upload
+from app.chunked_upload import ChunkedUploadError, ChunkedUploadStore
+from app.upload_store import UploadStore
+
+
+def _store(tmp_path, max_file_mb=1):
+    blobs = UploadStore(blob_dir=str(tmp_path / "blobs"), uploads_dir=str(tmp_path / "uploads"))
+    return ChunkedUploadStore(blobs, partial_dir=str(tmp_path / "partial"), max_file_mb=max_file_mb)
+
+
+def _stream(*pieces, fail_after=None):
+    async def gen():
+        for i, piece in enumerate(pieces):
+            if fail_after is not None and i == fail_after:
+                raise ConnectionError("client went away")
+            yield piece
+    return gen()
+
+
+def _put(store, file_id, offset, *pieces, **kw):
+    return asyncio.run(store.write_chunk(file_id, offset, _stream(*pieces, **kw)))
+
+
+def test_chunks_assemble_and_hash(tmp_path):
+    store = _store(tmp_path)
+    data = b"%PDF-" + bytes(range(256)) * 40
+    session = store.init("doc.pdf", len(data))
+
+    _put(store, session.file_id, 0, data[:4000], data[4000:5000])
+    _put(store, session.file_id, 5000, data[5000:])
+    finished, path, digest = store.finalize(session.file_id, sha256=hashlib.sha256(data).hexdigest())
+
+    assert digest == hashlib.sha256(data).hexdigest()
+    assert open(path, "rb").read() == data
+    assert finished.upload_id == session.upload_id
+    assert store.upload_store.ref_count(digest) == 2  # the preupload and the uploads/ handle
+    with pytest.raises(ChunkedUploadError):
+        store.get(session.file_id)
+
+
+def test_dropped_chunk_resumes_from_acknowledged_offset(tmp_path):
+    store = _store(tmp_path)
+    data = b"a" * 3000 + b"b" * 3000
+    session = store.init("doc.pdf", len(data))
+    _put(store, session.file_id, 0, data[:3000])
+
+    with pytest.raises(ConnectionError):
+        _put(store, session.file_id, 3000, data[3000:4000], data[4000:], fail_after=1)
+    assert store.get(session.file_id).offset == 3000
+
+    with pytest.raises(ChunkedUploadError) as e:
+        _put(store, session.file_id, 4000, data[4000:])
+    assert e.value.status_code == 409 and e.value.offset == 3000
+
+    _put(store, session.file_id, 3000, data[3000:])
+    _, path, digest = store.finalize(session.file_id)
+    assert open(path, "rb").read() == data
+    assert digest == hashlib.sha256(data).hexdigest()
+
+
+def test_limits_and_digest_mismatch(tmp_path):
+    store = _store(tmp_path, max_file_mb=1)
+    with pytest.raises(ChunkedUploadError) as e:
+        store.init("huge.pdf", 2 * 1024 * 1024)
+    assert e.value.status_code == 413
+    with pytest.raises(ChunkedUploadError):
+        store.init("notes.txt", 10)
+
+    session = store.init("doc.pdf", 10)
+    with pytest.raises(ChunkedUploadError) as e:
+        _put(store, session.file_id, 0, b"x" * 11)
+    assert e.value.status_code == 413
+
+    _put(store, session.file_id, 0, b"x" * 10)
+    with pytest.raises(ChunkedUploadError) as e:
+        store.finalize(session.file_id, sha256="0" * 64)
+    assert e.value.status_code == 422
+    assert store.get(session.file_id).offset == 0  # corrupt upload restarts from scratch
+
+
+def test_expire_removes_idle_sessions(tmp_path):
+    store = _store(tmp_path)
+    session = store.init("doc.pdf", 10)
+    session.updated_at -= 3600
+
+    assert store.expire(60) == 1
+    assert not (tmp_path / "partial" / f"{session.file_id}.part").exists()
+
+
+def test_chunks_are_capped_at_the_chunk_size(tmp_path, monkeypatch):
+    monkeypatch.setattr(chunked_upload, "_WRITE_BATCH_BYTES", 100)  # several batches per chunk
+    store = _store(tmp_path)
+    store.chunk_bytes = 1000
+    data = bytes(range(256)) * 10
+    session = store.init("doc.pdf", len(data))
+
+    with pytest.raises(ChunkedUploadError) as e:
+        _put(store, session.file_id, 0, data[:600], data[600:1200])
+    assert e.value.status_code == 413 and store.get(session.file_id).offset == 0
+
+    for start in range(0, len(data), 1000):
+        chunk = data[start:start + 1000]
+        _put(store, session.file_id, start, *(chunk[i:i + 70] for i in range(0, len(chunk), 70)))
+    _, path, digest = store.finalize(session.file_id)
+    assert open(path, "rb").read() == data and digest == hashlib.sha256(data).hexdigest()
@@ -0,0 +1,82 @@
+"""Tests for the document probe cache (app/doc_probe.py)."""
+
+import os
+
+from app import doc_probe
+from app.doc_probe import DocumentProbe, ProbeCache
+
+
+def _fake_probe(calls):
+    def probe(path, digest=None):
+        calls.append(path)
+        return DocumentProbe(
+            sha256=digest, file_type="pdf", size_bytes=os.path.getsize(path),
+            page_count=3, page_has_text=[True, False, False], image_area_ratio=0.8,
+        )
+    return probe
+
+
+def test_probe_runs_once_per_content(monkeypatch, tmp_path):
+    calls = []
+    monkeypatch.setattr(doc_probe, "probe_document", _fake_probe(calls))
+    cache = ProbeCache(cache_dir=str(tmp_path / "probes"))
+    (tmp_path / "a.pdf").write_bytes(b"%PDF-same")
+    (tmp_path / "b.pdf").write_bytes(b"%PDF-same")
+
+    first = cache.get(str(tmp_path / "a.pdf"))
+    second = cache.get(str(tmp_path / "b.pdf"))
+
+    assert first is second
+    assert len(calls) == 1
+    assert first.page_count == 3 and abs(first.text_coverage - 1 / 3) < 1e-9
+    assert first.likely_scanned is False
+
+
+def test_hard_links_share_the_known_digest(monkeypatch, tmp_path):
+    calls = []
+    monkeypatch.setattr(doc_probe, "probe_document", _fake_probe(calls))
+    cache = ProbeCache(cache_dir=str(tmp_path / "probes"))
+    blob = tmp_path / "blob"
+    blob.write_bytes(b"%PDF-blob")
+    os.link(blob, tmp_path / "handle.pdf")
+
+    assert cache.get(str(tmp_path / "handle.pdf"), compute=False) is None  # digest unknown, nothing hashed
+    cache.get(str(blob), digest="d" * 64)
+    hit = cache.get(str(tmp_path / "handle.pdf"), compute=False)
+
+    assert hit is not None and hit.sha256 == "d" * 64
+    assert len(calls) == 1
+
+
+def test_results_persist_for_other_processes(monkeypatch, tmp_path):
+    calls = []
+    monkeypatch.setattr(doc_probe, "probe_document", _fake_probe(calls))
+    (tmp_path / "a.pdf").write_bytes(b"%PDF-x")
+    ProbeCache(cache_dir=str(tmp_path / "probes")).get(str(tmp_path / "a.pdf"))
+
+    fresh = ProbeCache(cache_dir=str(tmp_path / "probes"))
+    probe = fresh.get(str(tmp_path / "a.pdf"))
+
+    assert probe.page_has_text == [True, False, False]
+    assert len(calls) == 1
+
+
+def test_unreadable_pdf_is_recorded_not_raised(tmp_path):
+    path = tmp_path / "broken.pdf"
+    path.write_bytes(b"not a pdf")
+
+    probe = doc_probe.probe_document(str(path))
+
+    assert probe.file_type == "pdf"
+    assert probe.page_count == 0 and probe.error
+
+
+def test_extensionless_blob_is_typed_from_content(tmp_path):
+    path = tmp_path / ("ab" * 32)  # Content-addressed blob: no extension
+    path.write_bytes(b"%PDF-1.4 broken")
+
+    probe = doc_probe.probe_document(str(path))
+
+    assert probe.file_type == "pdf"
+    (tmp_path / "cd").write_bytes(b"plain text")
+    assert doc_probe.probe_document(str(tmp_path / "cd")).file_type == "other"
@@ -0,0 +1,89 @@
+"""Tests for the fused page-level pipeline (pdf_operations.run_fused_pipeline)."""
+
+import io
+
+import pytest
+
+pypdf = pytest.importorskip("pypdf")
+pytest.importorskip("reportlab")
+
+from reportlab.pdfgen import canvas  # noqa: E402
+
+from app.pdf_operations import (  # noqa: E402
+    add_page_numbers, merge_pdfs, rotate_pdf, run_fused_pipeline, watermark_pdf,
+)
+
+
+def _pdf(path, labels):
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=(300, 400))
+    for label in labels:
+        c.drawString(40, 200, label)
+        c.showPage()
+    c.save()
+    path.write_bytes(buf.getvalue())
+
+
+@pytest.fixture
+def dirs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "uploads").mkdir()
+    (tmp_path / "outputs").mkdir()
+    _pdf(tmp_path / "uploads" / "a.pdf", ["alpha one", "alpha two"])
+    _pdf(tmp_path / "uploads" / "b.pdf", ["bravo one"])
+    return tmp_path
+
+
+def _pages(path):
+    reader = pypdf.PdfReader(str(path))
+    return [(page.rotation, " ".join(page.extract_text().split())) for page in reader.pages]
+
+
+def test_fused_chain_matches_step_by_step(dirs):
+    fused = run_fused_pipeline(
+        ["a.pdf", "b.pdf"],
+        [
+            {"op": "merge"},
+            {"op": "rotate", "degrees": 90, "pages": [2]},
+            {"op": "page_numbers", "position": "bottom_center", "start_at": 1},
+            {"op": "watermark", "text": "DRAFT", "opacity": 0.12, "angle": 30},
+        ],
+        output_name="fused.pdf",
+    )
+
+    merged = merge_pdfs(["a.pdf", "b.pdf"], output_name="step1.pdf")
+    rotated = rotate_pdf(merged, 90, pages=[2], output_name="step2.pdf")
+    numbered = add_page_numbers(rotated, output_name="step3.pdf")
+    unfused = watermark_pdf(numbered, "DRAFT", output_name="step4.pdf")
+
+    fused_pages = _pages(dirs / "outputs" / fused)
+    assert fused_pages == _pages(dirs / "outputs" / unfused)
+    assert [rotation for rotation, _ in fused_pages] == [0, 90, 0]
+    for number, (label, (_, text)) in enumerate(zip(["alpha one", "alpha two", "bravo one"], fused_pages), start=1):
+        assert label in text and "DRAFT" in text and str(number) in text.replace(label, "")
+
+
+def test_overlays_stay_per_page_when_a_file_is_merged_twice(dirs):
+    out = run_fused_pipeline(
+        ["b.pdf", "b.pdf"],
+        [{"op": "merge"}, {"op": "page_numbers", "position": "bottom_center", "start_at": 1}],
+        output_name="twice.pdf",
+    )
+
+    texts = [text for _, text in _pages(dirs / "outputs" / out)]
+    assert texts[0].count("bravo one") == 1 and "2" not in texts[0]
+    assert texts[1].count("bravo one") == 1 and "1" not in texts[1].replace("bravo one", "")
+
+
+def test_operation_chain_writes_consecutive_page_steps_once(dirs):
+    from app.models import DeleteIntent, ParsedIntent, RotateIntent
+    from app.multi_operation_executor import execute_operation_chain
+
+    out, summary = execute_operation_chain("a.pdf", [
+        ParsedIntent(operation_type="delete", delete=DeleteIntent(file="a.pdf", pages_to_delete=[1])),
+        ParsedIntent(operation_type="rotate", rotate=RotateIntent(file="a.pdf", degrees=90)),
+    ])
+
+    assert out == "step_2_pages.pdf"
+    assert _pages(dirs / "outputs" / out) == [(90, "alpha two")]
+    assert summary == "Deleted pages [1] → Rotated 90°"
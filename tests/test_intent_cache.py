@@ -0,0 +1,76 @@
+"""Tests for the parsed-intent cache (app/intent_cache.py)."""
+
+from app.intent_cache import IntentCache
+
+
+class _Op:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class _Intent:
+    """Minimal stand-in for ParsedIntent (only get_operation is used)."""
+
+    def __init__(self, operation_type, **fields):
+        self.operation_type = operation_type
+        self.op = _Op(**fields)
+
+    def get_operation(self):
+        return self.op
+
+
+def test_hit_rebinds_files_by_position():
+    cache = IntentCache()
+    cache.put("merge  all files", ["a.pdf", "b.pdf"], "", _Intent("merge", files=["b.pdf", "a.pdf"]), 1.5)
+
+    hit = cache.get("merge all files", ["x.pdf", "y.pdf"])
+
+    assert hit.op.files == ["y.pdf", "x.pdf"]
+    stats = cache.get_stats()
+    assert stats["hits"] == 1 and stats["saved_seconds"] == 1.5
+
+
+def test_file_types_and_last_question_are_part_of_the_key():
+    cache = IntentCache()
+    cache.put("convert", ["a.pdf"], "", _Intent("pdf_to_docx", file="a.pdf"), 0.1)
+
+    assert cache.get("convert", ["a.docx"]) is None
+    assert cache.get("convert", ["a.pdf", "b.pdf"]) is None
+    assert cache.get("convert", ["a.pdf"], last_question="Which format?") is None
+    assert cache.get("convert", ["c.pdf"]).op.file == "c.pdf"
+
+
+def test_hits_are_independent_copies():
+    cache = IntentCache()
+    cache.put("rotate 90", ["a.pdf"], "", _Intent("rotate", file="a.pdf", degrees=90), 0.1)
+
+    first = cache.get("rotate 90", ["a.pdf"])
+    first.op.degrees = 180
+
+    assert cache.get("rotate 90", ["a.pdf"]).op.degrees == 90
+
+
+def test_prompts_naming_files_or_sizes_are_not_cached():
+    cache = IntentCache()
+
+    assert not cache.put("compress report.pdf", ["report.pdf"], "", _Intent("compress", file="report.pdf"), 0.1)
+    assert not cache.put("compress report", ["report.pdf"], "", _Intent("compress", file="report.pdf"), 0.1)
+    assert not cache.put("compress by 50%", ["a.pdf"], "", _Intent("compress_to_target", file="a.pdf"), 0.1)
+    assert not cache.put("compress", ["a.pdf"], "", _Intent("compress", file="typo.pdf"), 0.1)
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_ttl_and_lru_eviction(monkeypatch):
+    from app import intent_cache
+
+    now = [1000.0]
+    monkeypatch.setattr(intent_cache.time, "time", lambda: now[0])
+    cache = IntentCache(max_entries=2, ttl_seconds=60)
+    for prompt in ("compress", "rotate", "flatten"):
+        cache.put(prompt, ["a.pdf"], "", _Intent(prompt, file="a.pdf"), 0.1)
+
+    assert cache.get("compress", ["a.pdf"]) is None  # evicted
+    assert cache.get("rotate", ["a.pdf"]) is not None
+    now[0] += 61
+    assert cache.get("flatten", ["a.pdf"]) is None
+    assert cache.get_stats()["expired"] == 1
@@ -0,0 +1,75 @@
+"""
+Tests for push-based job progress (app/job_events.py).
+"""
+
+import os
+import sys
+import time
+import asyncio
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.job_queue import JobQueue
+from app.job_events import job_event_stream
+
+
+def _snapshot(job):
+    return {"status": job.status.value, "progress": job.progress, "estimated_remaining": 0}
+
+
+def _collect(queue, job_id, last_event_id=None, heartbeat=5.0):
+    async def run():
+        events = []
+        async for event in job_event_stream(queue, job_id, _snapshot, last_event_id, heartbeat):
+            events.append(event)
+        return events
+    return asyncio.run(asyncio.wait_for(run(), timeout=5))
+
+
+class TestJobEvents:
+    """Progress pushes, final result, resume and heartbeats"""
+
+    def test_streams_progress_until_result(self):
+        queue = JobQueue(max_concurrent=1)
+        gate = threading.Event()
+
+        def processor(job_id):
+            gate.wait(5)
+            queue.update_progress(job_id, 50, "half")
+            queue.complete_job(job_id, "success", "ok")
+
+        queue.set_processor(processor)
+        job_id = queue.create_job(["a.pdf"], "compress")
+        threading.Timer(0.1, gate.set).start()
+
+        events = _collect(queue, job_id)
+
+        assert events[-1][1] == "result"
+        assert events[-1][2]["status"] == "completed"
+        ids = [event_id for event_id, name, _ in events if name != "heartbeat"]
+        assert ids == sorted(ids)
+
+    def test_resume_from_current_id_only_heartbeats(self):
+        queue = JobQueue(max_concurrent=1)
+        gate = threading.Event()
+        queue.set_processor(lambda job_id: gate.wait(5))
+        job_id = queue.create_job(["a.pdf"], "compress")
+        deadline = time.time() + 5
+        while queue.get_job(job_id).status.value != "processing" and time.time() < deadline:
+            time.sleep(0.01)
+        seen = queue.get_job(job_id).event_id
+
+        async def first_event():
+            stream = job_event_stream(queue, job_id, _snapshot, seen, heartbeat_seconds=0.05)
+            try:
+                return await stream.__anext__()
+            finally:
+                await stream.aclose()
+
+        try:
+            event_id, name, payload = asyncio.run(asyncio.wait_for(first_event(), timeout=5))
+        finally:
+            gate.set()
+        assert (event_id, name) == (None, "heartbeat")
+        assert payload["status"] == "processing"
@@ -0,0 +1,104 @@
+"""
+Tests for the background JobQueue worker pool and priority ordering.
+"""
+
+import os
+import sys
+import time
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.job_queue import JobQueue, JobStatus, PRIORITY_HIGH, PRIORITY_LOW
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestJobQueue:
+    """Worker pool, FIFO-within-priority and queue position reporting"""
+
+    def test_runs_in_priority_then_fifo_order(self):
+        queue = JobQueue(max_concurrent=1)
+        gate = threading.Event()
+        order = []
+
+        def processor(job_id):
+            if not order:
+                gate.wait(5)
+            order.append(job_id)
+            queue.complete_job(job_id, "success", "ok")
+
+        queue.set_processor(processor)
+        blocker = queue.create_job(["a.pdf"], "compress")
+        assert _wait_for(lambda: queue.get_job(blocker).status == JobStatus.PROCESSING)
+
+        low = queue.create_job(["b.pdf"], "compress", priority=PRIORITY_LOW)
+        normal_1 = queue.create_job(["c.pdf"], "compress")
+        normal_2 = queue.create_job(["d.pdf"], "compress")
+        high = queue.create_job(["e.pdf"], "compress", priority=PRIORITY_HIGH)
+
+        assert queue.get_queue_position(high) == 1
+        assert queue.get_queue_position(low) == 4
+        stats = queue.get_stats()
+        assert stats["queued"] == 4
+        assert not any(jid in repr(stats) for jid in (blocker, low, normal_1, normal_2, high))
+
+        gate.set()
+        assert _wait_for(lambda: len(order) == 5)
+        assert order == [blocker, high, normal_1, normal_2, low]
+        assert queue.get_queue_position(low) is None
+        assert queue.get_wait_seconds(low) >= 0.0
+
+    def test_cancelled_job_is_skipped(self):
+        queue = JobQueue(max_concurrent=1)
+        gate = threading.Event()
+        ran = []
+
+        def processor(job_id):
+            gate.wait(5)
+            ran.append(job_id)
+            queue.complete_job(job_id, "success", "ok")
+
+        queue.set_processor(processor)
+        first = queue.create_job(["a.pdf"], "merge")
+        assert _wait_for(lambda: queue.get_job(first).status == JobStatus.PROCESSING)
+        second = queue.create_job(["b.pdf"], "merge")
+        third = queue.create_job(["c.pdf"], "merge")
+
+        assert queue.cancel_job(second)
+        assert queue.get_queue_position(third) == 1
+
+        gate.set()
+        assert _wait_for(lambda: len(ran) == 2)
+        assert ran == [first, third]
+        assert queue.get_job(second).status == JobStatus.CANCELLED
+
+    def test_pool_size_bounds_concurrency(self):
+        queue = JobQueue(max_concurrent=2)
+        lock = threading.Lock()
+        state = {"running": 0, "peak": 0, "done": 0}
+
+        def processor(job_id):
+            with lock:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+            time.sleep(0.05)
+            with lock:
+                state["running"] -= 1
+                state["done"] += 1
+            queue.complete_job(job_id, "success", "ok")
+
+        queue.set_processor(processor)
+        for i in range(6):
+            queue.create_job([f"{i}.pdf"], "compress")
+
+        assert _wait_for(lambda: state["done"] == 6)
+        assert state["peak"] == 2
+        assert queue.get_stats()["workers"] == 2
@@ -0,0 +1,90 @@
+"""Tests for the SQLite LLM response cache (app/llm_cache.py)."""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.llm_cache import LLMResponseCache
+
+MESSAGES = [{"role": "system", "content": "Parse"}, {"role": "user", "content": "compress it"}]
+
+
+def _cache(tmp_path, **kwargs):
+    return LLMResponseCache(db_path=str(tmp_path / "llm.db"), **kwargs)
+
+
+def test_hit_requires_the_same_request(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put("groq:m", MESSAGES, 0.1, True, 500, '{"operation_type": "compress"}')
+
+    assert cache.get("groq:m", MESSAGES, 0.1, True, 500) == '{"operation_type": "compress"}'
+    assert cache.get("groq:other", MESSAGES, 0.1, True, 500) is None
+    assert cache.get("groq:m", MESSAGES, 0.1, False, 500) is None
+    assert cache.get("groq:m", MESSAGES, 0.0, True, 500) is None
+    assert cache.get("groq:m", MESSAGES, 0.1, True, 1000) is None
+    assert cache.get("groq:m", MESSAGES[:1], 0.1, True, 500) is None
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 5 and stats["entries"] == 1
+
+
+def test_high_temperature_is_never_cached(tmp_path):
+    cache = _cache(tmp_path, max_temperature=0.2)
+    cache.put("groq:m", MESSAGES, 0.7, False, 1500, "a creative answer")
+    assert cache.get("groq:m", MESSAGES, 0.7, False, 1500) is None
+    assert cache.get_stats()["entries"] == 0 and cache.get_stats()["bypassed"] == 1
+
+
+def test_entries_expire(tmp_path):
+    cache = _cache(tmp_path, ttl_seconds=0.05)
+    cache.put("groq:m", MESSAGES, 0.1, False, 10, "OK")
+    time.sleep(0.1)
+    assert cache.get("groq:m", MESSAGES, 0.1, False, 10) is None
+    assert cache.get_stats()["expired"] == 1
+
+
+def test_least_recently_used_rows_are_evicted(tmp_path):
+    cache = _cache(tmp_path, max_entries=3)
+    for i in range(3):
+        cache.put("groq:m", [{"role": "user", "content": str(i)}], 0.1, False, 10, f"answer {i}")
+    cache.get("groq:m", [{"role": "user", "content": "0"}], 0.1, False, 10)  # 0 is now the most recent
+    for i in range(3, 50):
+        cache.put("groq:m", [{"role": "user", "content": str(i)}], 0.1, False, 10, f"answer {i}")
+
+    assert cache.get_stats()["entries"] == 3
+    assert cache.get("groq:m", [{"role": "user", "content": "49"}], 0.1, False, 10) == "answer 49"
+    assert cache.get("groq:m", [{"role": "user", "content": "1"}], 0.1, False, 10) is None
+
+
+def test_survives_a_restart(tmp_path):
+    _cache(tmp_path).put("groq:m", MESSAGES, 0.1, False, 10, "OK")
+    assert _cache(tmp_path).get("groq:m", MESSAGES, 0.1, False, 10) == "OK"
+
+
+def test_parser_caches_only_answers_that_validate(tmp_path, monkeypatch):
+    pytest.importorskip("pydantic_settings")
+    from app import llm_cache
+    from app.ai_parser import AIParser
+
+    cache = _cache(tmp_path)
+    monkeypatch.setattr(llm_cache, "_CACHE", cache)
+    answers = ['{"operation_type": "no_such_operation"}', '{"operation_type": "rotate", "rotate": {"operation": "rotate", "file": "a.pdf", "degrees": 90}}']
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs["model"])
+        text = answers[min(len(calls), len(answers)) - 1]
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+    parser = AIParser()
+    parser.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    parser.fallback_model = parser.primary_model
+
+    with pytest.raises(ValueError):
+        parser.parse_intent("rotate a.pdf", ["a.pdf"])
+    assert cache.get_stats()["entries"] == 0  # A confident but invalid answer is not replayed
+
+    assert parser.parse_intent("rotate a.pdf", ["a.pdf"]).operation_type == "rotate"
+    assert parser.parse_intent("rotate a.pdf", ["a.pdf"]).operation_type == "rotate"
+    assert len(calls) == 2 and cache.get_stats()["entries"] == 1
@@ -0,0 +1,82 @@
+"""Tests for the shared LLM client registry (app/llm_clients.py)."""
+
+import threading
+
+from app.llm_clients import LLMClientRegistry
+
+
+class _FakeHTTP:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class _Registry(LLMClientRegistry):
+    def _new_http_client(self):
+        return _FakeHTTP()
+
+    def _new_groq_client(self, api_key, http_client):
+        return (api_key, http_client)
+
+
+def test_clients_are_shared_per_key_and_pool():
+    registry = _Registry()
+    http = registry.http()
+    assert registry.http() is http
+    assert registry.groq("key-a") is registry.groq("key-a")
+    assert registry.groq("key-a")[1] is http and registry.groq("key-b")[1] is http
+    stats = registry.get_stats()
+    assert stats["http_clients_created"] == 1 and stats["groq_clients_created"] == 2
+
+
+def test_concurrent_first_use_builds_one_client():
+    registry = _Registry()
+    barrier = threading.Barrier(8)
+    seen = []
+
+    def worker():
+        barrier.wait()
+        seen.append(registry.groq("key"))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len({id(c) for c in seen}) == 1
+    assert registry.get_stats()["groq_clients_created"] == 1
+
+
+def test_close_releases_pool_and_later_calls_reopen():
+    registry = _Registry()
+    first = registry.http()
+    registry.groq("key")
+    registry.close()
+    assert first.closed and not registry.get_stats()["open"]
+    assert registry.http() is not first
+    assert registry.groq("key")[1] is registry.http()
+
+
+def test_async_clients_are_per_event_loop():
+    import asyncio
+
+    class _AsyncRegistry(_Registry):
+        def _new_async_http_client(self):
+            return _FakeHTTP()
+
+        def _new_async_groq_client(self, api_key, http_client):
+            return (api_key, http_client)
+
+    registry = _AsyncRegistry()
+
+    async def grab():
+        return registry.async_groq("key"), registry.async_groq("key")
+
+    first_a, first_b = asyncio.run(grab())
+    second, _ = asyncio.run(grab())
+    assert first_a is first_b
+    assert second is not first_a  # a new loop never reuses another loop's connections
+    asyncio.run(registry.aclose())
+    assert not registry.get_stats()["async_open"]
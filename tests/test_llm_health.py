@@ -0,0 +1,97 @@
+"""Tests for LLM circuit breakers and the health monitor (app/llm_health.py)."""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app import llm_health
+from app.llm_health import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, LLMHealthMonitor
+
+
+def test_breaker_opens_then_half_opens_for_one_trial():
+    breaker = CircuitBreaker("groq:m", failure_threshold=2, reset_seconds=0.05)
+    breaker.record_failure(RuntimeError("502 bad gateway"))
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure(RuntimeError("502 bad gateway"))
+    assert breaker.state == OPEN and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow()  # only one trial at a time
+    breaker.record_failure(RuntimeError("timeout"))
+    assert breaker.state == OPEN
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.failures == 0
+
+
+class _StatusError(RuntimeError):
+    def __init__(self, message, status_code=None, response=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response = response
+
+
+def test_rate_limits_do_not_open_the_circuit():
+    breaker = CircuitBreaker("groq:m", failure_threshold=1)
+    breaker.record_failure(_StatusError("Error code: 429 - rate limit reached", status_code=429))
+    breaker.record_failure(_StatusError("Too Many Requests", response=SimpleNamespace(status_code=429)))
+    assert breaker.state == CLOSED
+
+    breaker.record_failure(RuntimeError("failed to generate a moderate response"))
+    assert breaker.state == OPEN  # "rate" inside other words is not a rate limit
+
+
+def test_probe_success_only_half_opens_the_circuit():
+    monitor = LLMHealthMonitor(failure_threshold=1, reset_seconds=60, probes=lambda: {"groq:m": lambda: None})
+    breaker = monitor.breaker("groq:m")
+    breaker.record_failure(RuntimeError("503 service unavailable"))
+
+    monitor.probe_once()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()  # the trial call
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_status_is_served_from_the_last_probe(monkeypatch):
+    calls = []
+
+    def failing():
+        calls.append("b")
+        raise RuntimeError("connection refused")
+
+    monitor = LLMHealthMonitor(
+        failure_threshold=1,
+        probes=lambda: {"groq:fast": lambda: calls.append("a"), "baseten:big": failing},
+    )
+    monkeypatch.setattr(llm_health, "_api_key_configured", lambda: True)
+    assert monitor.status()["error"] == "Health check pending"
+
+    monitor.probe_once()
+    for _ in range(100):
+        status = monitor.status()
+    assert calls == ["a", "b"]  # status() never probes
+    assert status["available"] and status["models"] == ["fast"]
+    assert status["providers"]["baseten:big"]["state"] == OPEN
+    assert status["providers"]["baseten:big"]["error"] == "connection refused"
+
+
+def test_call_with_breaker_fails_fast_when_open(monkeypatch):
+    monitor = LLMHealthMonitor(failure_threshold=1, reset_seconds=60, probes=dict)
+    monkeypatch.setattr(llm_health, "_MONITOR", monitor)
+    calls = []
+
+    def down():
+        calls.append(1)
+        raise RuntimeError("503 service unavailable")
+
+    with pytest.raises(RuntimeError, match="503"):
+        llm_health.call_with_breaker("groq:m", down)
+    with pytest.raises(CircuitOpenError):
+        llm_health.call_with_breaker("groq:m", down)
+    assert calls == [1]
+    assert llm_health.call_with_breaker("groq:other", lambda: "ok") == "ok"
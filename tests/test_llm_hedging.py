@@ -0,0 +1,122 @@
+"""Tests for hedged LLM requests (app/llm_hedging.py)."""
+
+import asyncio
+import time
+
+import pytest
+
+from app.llm_hedging import LatencyHistogram, LLMHedger, hedged_call, hedged_call_async
+
+
+def _hedger(**kwargs):
+    options = dict(min_samples=3, default_delay_seconds=0.05, min_delay_seconds=0.01, max_delay_seconds=1.0)
+    options.update(kwargs)
+    return LLMHedger(**options)
+
+
+def _sleeping(seconds, value, calls=None):
+    def fn():
+        if calls is not None:
+            calls.append(value)
+        time.sleep(seconds)
+        return value
+    return fn
+
+
+def test_percentiles_drive_the_hedge_delay():
+    hist = LatencyHistogram()
+    for ms in range(1, 11):
+        hist.record(ms / 1000)
+    assert hist.percentile(50) == 0.005 and hist.percentile(90) == 0.009
+
+    hedger = _hedger()
+    assert hedger.hedge_delay("p") == 0.05  # no history yet: default delay
+    for seconds in (0.2, 0.3, 0.4):
+        hedger.record("p", seconds)
+    assert hedger.hedge_delay("p") == 0.4
+    assert LLMHedger(enabled=False).hedge_delay("p") is None
+
+
+def test_slow_primary_is_hedged_and_backup_wins():
+    hedger = _hedger()
+    started = time.perf_counter()
+    result = hedged_call([("a", _sleeping(0.5, "primary")), ("b", _sleeping(0.01, "backup"))], hedger=hedger)
+    assert result == "backup"
+    assert time.perf_counter() - started < 0.3
+    assert hedger.get_stats()["hedges"] == 1 and hedger.get_stats()["backup_wins"] == 1
+
+
+def test_fast_primary_never_starts_the_backup():
+    calls = []
+    hedger = _hedger(default_delay_seconds=0.5)
+    result = hedged_call([("a", _sleeping(0.01, "primary", calls)), ("b", _sleeping(0.01, "backup", calls))], hedger=hedger)
+    assert result == "primary" and calls == ["primary"]
+
+
+def test_invalid_answers_fall_through_and_primary_is_kept_last():
+    hedger = _hedger(default_delay_seconds=1.0)
+
+    def boom():
+        raise RuntimeError("down")
+
+    assert hedged_call([("a", lambda: None), ("b", lambda: "ok")], hedger=hedger) == "ok"
+    # Neither valid: the primary's answer, as before hedging
+    assert hedged_call([("a", lambda: "unsure-a"), ("b", lambda: "unsure-b")], is_valid=lambda r: False, hedger=hedger) == "unsure-a"
+    with pytest.raises(RuntimeError, match="down"):
+        hedged_call([("a", boom), ("b", boom)], hedger=hedger)
+
+
+def test_async_hedge_cancels_the_loser():
+    hedger = _hedger()
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(1.0)
+            return "primary"
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def fast():
+        await asyncio.sleep(0.01)
+        return "backup"
+
+    async def run():
+        result = await hedged_call_async([("a", slow), ("b", fast)], hedger=hedger)
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(run()) == "backup"
+    assert cancelled == [True]
+
+
+def test_only_valid_results_feed_the_histogram():
+    hedger = _hedger()
+    hedged_call([("a", lambda: None)], hedger=hedger)  # e.g. an open breaker answering instantly
+    assert len(hedger.histogram("a")) == 0
+    hedged_call([("a", lambda: "ok")], hedger=hedger)
+    assert len(hedger.histogram("a")) == 1
+
+
+def test_rate_limiter_pacing_is_not_provider_latency():
+    from app.llm_rate_limit import _add_paced
+
+    def paced_call():
+        time.sleep(0.2)
+        _add_paced(0.2)  # What pace_request does after its sleep
+        return "ok"
+
+    hedger = _hedger()
+    hedged_call([("a", paced_call)], hedger=hedger)
+    asyncio.run(hedged_call_async([("b", _paced_async)], hedger=hedger))
+    assert hedger.histogram("a").percentile(50) < 0.1
+    assert hedger.histogram("b").percentile(50) < 0.1
+
+
+async def _paced_async():
+    from app.llm_rate_limit import _add_paced
+
+    await asyncio.sleep(0.2)
+    _add_paced(0.2)
+    return "ok"
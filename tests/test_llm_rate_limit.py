@@ -0,0 +1,73 @@
+"""Tests for the client-side LLM rate limiter (app/llm_rate_limit.py)."""
+
+import json
+from types import SimpleNamespace
+
+from app import llm_rate_limit
+from app.llm_rate_limit import LLMRateLimiter, estimate_tokens, parse_duration, parse_model_limits
+
+
+def test_durations_and_model_limits_parse():
+    assert parse_duration("7.66s") == 7.66
+    assert abs(parse_duration("2m59.56s") - 179.56) < 1e-9
+    assert parse_duration("120ms") == 0.12
+    assert parse_duration("3") == 3.0
+    assert parse_duration("soon") is None
+    assert parse_model_limits("a=30/6000, b=60/12000,bad") == {"a": (30.0, 6000.0), "b": (60.0, 12000.0)}
+
+
+def test_burst_is_spread_in_arrival_order():
+    limiter = LLMRateLimiter(default_rpm=60, default_tpm=1_000_000)
+    waits = [limiter.reserve("m", 10) for _ in range(63)]
+    assert waits[:60] == [0.0] * 60  # a full bucket's worth goes straight out
+    # then one per second, each queued behind the previous one
+    assert [round(w) for w in waits[60:]] == [1, 2, 3]
+
+
+def test_token_budget_and_usage_refund():
+    limiter = LLMRateLimiter(default_rpm=1000, default_tpm=600)  # 10 tokens/s
+    assert limiter.reserve("m", 600) == 0.0
+    assert round(limiter.reserve("m", 100), 1) == 10.0
+    limiter.observe("m", 200, {}, reserved_tokens=600, used_tokens=100)  # 500 back
+    assert limiter.get_stats()["m"]["refunded_tokens"] == 500
+    assert limiter.reserve("m", 300) < 1.0
+
+
+def test_429_retry_after_blocks_everyone_and_headers_adapt():
+    limiter = LLMRateLimiter(default_rpm=1000, default_tpm=100_000)
+    limiter.reserve("m", 10)
+    limiter.observe("m", 429, {"retry-after": "5"}, reserved_tokens=10)
+    assert 4.5 < limiter.reserve("m", 10) <= 5.0
+    assert limiter.get_stats()["m"]["rate_limited"] == 1
+
+    limiter.observe("other", 200, {"x-ratelimit-limit-tokens": "12000", "x-ratelimit-remaining-tokens": "0"})
+    assert limiter.get_stats()["other"]["tpm"] == 12000
+    assert limiter.reserve("other", 120) > 0
+
+
+def _request(body, path="/openai/v1/chat/completions"):
+    return SimpleNamespace(
+        method="POST",
+        url=SimpleNamespace(path=path),
+        content=json.dumps(body).encode(),
+        extensions={},
+    )
+
+
+def test_hooks_pace_chat_requests_only(monkeypatch):
+    limiter = LLMRateLimiter(default_rpm=60, default_tpm=100_000)
+    monkeypatch.setattr(llm_rate_limit, "_LIMITER", limiter)
+    slept = []
+    monkeypatch.setattr(llm_rate_limit.time, "sleep", slept.append)
+
+    body = {"model": "m", "messages": [{"role": "user", "content": "x" * 400}], "max_tokens": 50}
+    assert estimate_tokens(body) == 150
+    for _ in range(61):
+        request = _request(body)
+        llm_rate_limit.pace_request(request)
+    assert request.extensions["llm_rate_reservation"] == ("m", 150, False)
+    assert len(slept) == 1 and round(slept[0]) == 1
+
+    probe = SimpleNamespace(method="GET", url=SimpleNamespace(path="/openai/v1/models"), content=b"", extensions={})
+    llm_rate_limit.pace_request(probe)
+    assert probe.extensions == {} and limiter.get_stats()["m"]["requests"] == 61
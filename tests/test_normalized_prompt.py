@@ -0,0 +1,65 @@
+"""Tests for the shared normalization stage (app/normalized_prompt.py)."""
+
+import pytest
+
+from app.command_intelligence import CommandIntelligence
+from app.normalized_prompt import compile_typo_fixes, get_normalized_prompt
+from app.one_flow_resolver import LocalNormalizer
+from app.pattern_matching import PatternMatcher
+
+
+def test_same_text_shares_one_object_and_its_views():
+    calls = []
+    first = get_normalized_prompt("Compres this PDF to 2mb")
+    second = get_normalized_prompt("Compres this PDF to 2mb")
+
+    assert first is second
+    assert first.text == "compres this pdf to 2mb"
+    assert first.tokens == ("compres", "this", "pdf", "to", "2mb")
+    assert first.view("k", lambda: calls.append(1) or "v") == "v"
+    assert second.view("k", lambda: calls.append(1) or "other") == "v"
+    assert calls == [1]
+
+
+def test_resolvers_keep_their_own_typo_maps():
+    assert LocalNormalizer.normalize("pls comprs then splt") == "compress then split"
+    assert PatternMatcher().match("compres then spilt").operations == ["compress", "split"]
+    assert get_normalized_prompt("compres then spilt").operations == ("compress", "split")
+
+
+def test_watermark_text_is_not_read_as_a_second_operation():
+    for prompt in ("watermark orc", "watermark mergee"):
+        assert PatternMatcher().match(prompt).operations == ["watermark"]
+        assert LocalNormalizer.extract_operations(LocalNormalizer.normalize(prompt)) == ["watermark"]
+
+
+def test_single_pass_matches_whole_words_only():
+    fix = compile_typo_fixes({"merg": "merge", "mergee": "merge", "dog": "docx"})
+    assert fix("merg mergee emerge doggo dog") == "merge merge emerge doggo docx"
+
+
+def test_pattern_match_results_are_independent_copies():
+    a = PatternMatcher().match("merge and compress for email")
+    a.operations.append("rotate")
+    a.case_id = "CASE-1"
+
+    b = PatternMatcher().match("merge and compress for email")
+    assert b.operations == ["merge", "compress"] and b.case_id is None
+    assert b.purpose == "email"
+
+
+def test_command_intents_scanned_once_in_pattern_order():
+    prompt = "rotate page 2 and compress"
+    assert CommandIntelligence.find_all_intents(prompt) == ["compress", "rotate"]
+    assert CommandIntelligence.detect_intent(prompt) == "compress"
+    assert get_normalized_prompt(prompt).view("command_intents", lambda: None) == ("compress", "rotate")
+
+
+def test_llm_prompt_keeps_the_users_own_words():
+    # The shared TYPO_FIXES maps "dog"/"imag"/"spill"; the LLM-bound prompt must not
+    pytest.importorskip("pydantic_settings")
+    from app.ai_parser import normalize_human_input
+
+    assert normalize_human_input('add watermark "my dog photo"') == 'add watermark "my dog photo"'
+    assert normalize_human_input("watermak draft imag") == "watermark draft imag"
+    assert normalize_human_input("spill proof, rotet teh pages") == "spill proof, rotate the pages"
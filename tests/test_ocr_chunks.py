@@ -0,0 +1,14 @@
+"""Tests for OCR chunk planning (app/pdf_operations.py)."""
+
+from app.pdf_operations import _scanned_page_runs
+
+
+def test_text_pages_split_runs_and_are_skipped():
+    needs_ocr = [True, True, False, True, False, False, True]
+
+    assert _scanned_page_runs(needs_ocr, 25) == [[0, 1], [3], [6]]
+
+
+def test_long_scanned_runs_are_capped_at_chunk_size():
+    assert _scanned_page_runs([True] * 5, 2) == [[0, 1], [2, 3], [4]]
+    assert _scanned_page_runs([False] * 3, 2) == []
@@ -0,0 +1,64 @@
+"""Tests for the page map compiler (app/page_map.py)."""
+
+import pytest
+
+from app.page_map import PageRef, compile_page_map, is_identity, page_step_from_intent
+
+
+def _sources(page_map):
+    return [ref.source for ref in page_map]
+
+
+def test_chain_composes_against_intermediate_page_numbers():
+    steps = [
+        {"op": "split", "pages": list(range(1, 11))},  # pages 1-10
+        {"op": "delete", "pages": [3]},                 # drop original page 3
+        {"op": "reorder", "new_order": "reverse"},
+        {"op": "rotate", "degrees": 90, "pages": [1]},  # original page 10
+    ]
+    page_map = compile_page_map(steps, 20)
+
+    assert _sources(page_map) == [9, 8, 7, 6, 5, 4, 3, 1, 0]
+    assert page_map[0] == PageRef(9, 90)
+    assert all(ref.rotation == 0 for ref in page_map[1:])
+
+
+def test_rotation_accumulates_modulo_360():
+    steps = [
+        {"op": "rotate", "degrees": 270, "pages": None},
+        {"op": "rotate", "degrees": 180, "pages": [2]},
+        {"op": "rotate", "degrees": 90, "pages": None},
+    ]
+    page_map = compile_page_map(steps, 2)
+
+    assert page_map == [PageRef(0, 0), PageRef(1, 180)]
+
+
+def test_explicit_reorder_and_identity():
+    page_map = compile_page_map([{"op": "reorder", "new_order": [2, 1]}, {"op": "reorder", "new_order": [2, 1]}], 2)
+
+    assert is_identity(page_map, 2)
+    assert not is_identity(compile_page_map([{"op": "reorder", "new_order": "reverse"}], 2), 2)
+
+
+def test_bounds_are_checked_against_current_page_count():
+    steps = [{"op": "split", "pages": [1, 2, 3]}, {"op": "delete", "pages": [4]}]
+
+    with pytest.raises(ValueError, match="PDF has 3 pages"):
+        compile_page_map(steps, 10)
+
+
+def test_invalid_arguments_raise():
+    with pytest.raises(ValueError):
+        compile_page_map([{"op": "reorder", "new_order": [1, 1]}], 2)
+    with pytest.raises(ValueError):
+        compile_page_map([{"op": "rotate", "degrees": 45, "pages": None}], 2)
+    with pytest.raises(ValueError, match="No pages left"):
+        compile_page_map([{"op": "delete", "pages": [1, 2]}], 2)
+
+
+def test_page_step_from_intent_ignores_non_structural_ops():
+    class _Intent:
+        operation_type = "compress"
+
+    assert page_step_from_intent(_Intent()) is None
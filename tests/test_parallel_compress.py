@@ -0,0 +1,205 @@
+"""Tests for chunked Ghostscript compression planning (app/pdf_operations.py)."""
+
+import io
+import threading
+import time
+
+import pytest
+
+from app import pdf_operations
+
+
+def test_page_ranges_cover_every_page_once():
+    assert pdf_operations._page_ranges(7, 3) == [(1, 3), (4, 6), (7, 7)]
+    assert pdf_operations._page_ranges(6, 3) == [(1, 3), (4, 6)]
+
+
+def test_large_input_runs_one_gs_per_chunk_then_stitches(monkeypatch, tmp_path):
+    calls = []
+    stitched = {}
+
+    class _Reader:
+        pages = [object()] * 10
+
+    monkeypatch.setattr(pdf_operations, "_gs_parallel_settings", lambda: (4, 1, 4))
+    monkeypatch.setattr(pdf_operations, "PdfReader", lambda path: _Reader())
+    monkeypatch.setattr(pdf_operations, "_has_cross_page_references", lambda path: False)
+    monkeypatch.setattr(pdf_operations.subprocess, "run", lambda args, check: calls.append(args))
+    monkeypatch.setattr(
+        pdf_operations, "_stitch_pdf_chunks",
+        lambda chunks, out: stitched.update(chunks=len(chunks), out=out),
+    )
+
+    out = str(tmp_path / "out.pdf")
+    pdf_operations._ghostscript_compress("gs", "in.pdf", out, "ebook")
+
+    first_pages = sorted(x for args in calls for x in args if x.startswith("-dFirstPage="))
+    assert first_pages == ["-dFirstPage=1", "-dFirstPage=5", "-dFirstPage=9"]
+    assert stitched == {"chunks": 3, "out": out}
+
+
+def test_small_input_stays_single_process(monkeypatch, tmp_path):
+    calls = []
+
+    class _Reader:
+        pages = [object()] * 5
+
+    monkeypatch.setattr(pdf_operations, "_gs_parallel_settings", lambda: (4, 60, 25))
+    monkeypatch.setattr(pdf_operations, "PdfReader", lambda path: _Reader())
+    monkeypatch.setattr(pdf_operations.subprocess, "run", lambda args, check: calls.append(args))
+
+    pdf_operations._ghostscript_compress("gs", "in.pdf", str(tmp_path / "out.pdf"), "ebook")
+
+    assert len(calls) == 1
+    assert not any(a.startswith("-dFirstPage=") for a in calls[0])
+
+
+def _pdf_bytes(pages, link=False, outline=False):
+    canvas = pytest.importorskip("reportlab.pdfgen.canvas")
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=(300, 400))
+    for i in range(pages):
+        c.bookmarkPage(f"p{i}")
+        if outline:
+            c.addOutlineEntry(f"Page {i + 1}", f"p{i}")
+        if link and i == 0:
+            c.linkAbsolute("last page", f"p{pages - 1}", (10, 10, 100, 30))
+        c.drawString(40, 200, f"page {i + 1}")
+        c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+def test_outlines_and_internal_links_disable_chunking(monkeypatch, tmp_path):
+    for name, data, expected in [
+        ("plain.pdf", _pdf_bytes(3), False),
+        ("link.pdf", _pdf_bytes(3, link=True), True),
+        ("outline.pdf", _pdf_bytes(3, outline=True), True),
+    ]:
+        (tmp_path / name).write_bytes(data)
+        assert pdf_operations._has_cross_page_references(str(tmp_path / name)) is expected, name
+
+    calls = []
+    monkeypatch.setattr(pdf_operations, "_gs_parallel_settings", lambda: (4, 1, 1))
+    monkeypatch.setattr(pdf_operations.subprocess, "run", lambda args, check: calls.append(args))
+    pdf_operations._ghostscript_compress("gs", str(tmp_path / "link.pdf"), str(tmp_path / "out.pdf"), "ebook")
+    assert len(calls) == 1 and not any(a.startswith("-dFirstPage=") for a in calls[0])
+
+
+def test_gs_processes_share_one_process_wide_budget(monkeypatch, tmp_path):
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+
+    def fake_run(args, check):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        time.sleep(0.02)
+        with lock:
+            state["running"] -= 1
+
+    class _Reader:
+        pages = [object()] * 8
+
+    monkeypatch.setattr(pdf_operations, "_GS_SLOTS", threading.BoundedSemaphore(2))
+    monkeypatch.setattr(pdf_operations, "_gs_parallel_settings", lambda: (4, 1, 1))
+    monkeypatch.setattr(pdf_operations, "PdfReader", lambda path: _Reader())
+    monkeypatch.setattr(pdf_operations, "_has_cross_page_references", lambda path: False)
+    monkeypatch.setattr(pdf_operations, "_stitch_pdf_chunks", lambda chunks, out: None)
+    monkeypatch.setattr(pdf_operations.subprocess, "run", fake_run)
+
+    jobs = [
+        threading.Thread(target=pdf_operations._ghostscript_compress, args=("gs", "in.pdf", str(tmp_path / f"{i}.pdf"), "ebook"))
+        for i in range(2)
+    ]
+    for job in jobs:
+        job.start()
+    for job in jobs:
+        job.join(5)
+
+    assert state["peak"] == 2  # Two jobs x four chunk workers, but only two gs at a time
+
+
+def _fake_gs(monkeypatch, tmp_path, sizes_by_rank, workers=2):
+    """Stand-in for Ghostscript: candidate N writes sizes_by_rank[N] bytes."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "uploads").mkdir()
+    (tmp_path / "uploads" / "in.pdf").write_bytes(b"x" * 10_000)
+    monkeypatch.setattr(pdf_operations, "_resolve_ghostscript_executable", lambda raise_if_missing: "gs")
+    monkeypatch.setattr(pdf_operations, "_gs_parallel_settings", lambda: (workers, 60, 25))
+    started = []
+
+    class _Proc:
+        def __init__(self, args):
+            out = next(a for a in args if a.startswith("-sOutputFile=")).split("=", 1)[1]
+            rank = int(out.rsplit("_", 1)[1].split(".")[0])
+            started.append(rank)
+            with open(out, "wb") as f:
+                f.write(b"x" * sizes_by_rank[rank])
+
+        def wait(self):
+            return 0
+
+        def kill(self):
+            pass
+
+    monkeypatch.setattr(pdf_operations.subprocess, "Popen", _Proc)
+    return started
+
+
+def test_target_search_picks_best_quality_that_fits(monkeypatch, tmp_path):
+    sizes = [9000, 8000, 7000, 6000, 1000, 800, 500, 300]
+    started = _fake_gs(monkeypatch, tmp_path, sizes, workers=1)
+    details = {}
+
+    out = pdf_operations.compress_pdf_to_target("in.pdf", 1200 / (1024 * 1024), "target.pdf", details=details)
+
+    assert out == "target.pdf"
+    assert (tmp_path / "outputs" / "target.pdf").stat().st_size == 1000
+    assert details["preset"] == "ebook" and details["dpi"] == 110 and details["met_target"]
+    assert started == [0, 1, 2, 3, 4]  # lower-quality candidates are skipped once one fits
+
+
+def test_target_search_promotes_smallest_when_nothing_fits(monkeypatch, tmp_path):
+    sizes = [9000, 8000, 7000, 6000, 5000, 4000, 3000, 2000]
+    _fake_gs(monkeypatch, tmp_path, sizes)
+    details = {}
+
+    try:
+        pdf_operations.compress_pdf_to_target("in.pdf", 1000 / (1024 * 1024), "target.pdf", details=details)
+    except Exception as e:
+        assert str(e).startswith("PARTIAL_SUCCESS:")
+    else:
+        raise AssertionError("expected PARTIAL_SUCCESS")
+
+    assert (tmp_path / "outputs" / "target.pdf").stat().st_size == 2000
+    assert details["dpi"] == 36 and not details["met_target"]
+
+
+def test_target_search_runs_few_candidates_at_once(monkeypatch, tmp_path):
+    sizes = [9000, 8000, 7000, 6000, 5000, 4000, 3000, 2000]
+    _fake_gs(monkeypatch, tmp_path, sizes, workers=8)
+    fake_popen = pdf_operations.subprocess.Popen
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+
+    class _SlowProc(fake_popen):
+        def __init__(self, args):
+            super().__init__(args)
+            with lock:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+
+        def wait(self):
+            time.sleep(0.02)
+            with lock:
+                state["running"] -= 1
+            return 0
+
+    monkeypatch.setattr(pdf_operations.subprocess, "Popen", _SlowProc)
+    monkeypatch.setattr(pdf_operations, "_GS_SLOTS", threading.BoundedSemaphore(8))
+
+    with pytest.raises(Exception, match="PARTIAL_SUCCESS"):
+        pdf_operations.compress_pdf_to_target("in.pdf", 1000 / (1024 * 1024), "target.pdf")
+
+    assert state["peak"] == pdf_operations._TARGET_MAX_WORKERS
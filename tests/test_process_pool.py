@@ -0,0 +1,61 @@
+"""
+Tests for the worker-process execution backend.
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.process_pool import ProcessPool
+
+
+def _echo_pid(value):
+    return f"{value}:{os.getpid()}"
+
+
+def _raise_value_error(message):
+    raise ValueError(message)
+
+
+def _sleep(seconds):
+    time.sleep(seconds)
+    return "done"
+
+
+@pytest.fixture
+def pool():
+    p = ProcessPool(workers=1, max_tasks_per_worker=2, max_rss_mb=0, task_timeout_seconds=30)
+    yield p
+    p.shutdown()
+
+
+class TestProcessPool:
+    """Result transport, error mapping, timeouts and recycling"""
+
+    def test_returns_result_from_worker(self, pool):
+        out = pool.run(__name__, "_echo_pid", ("out.pdf",))
+        name, pid = out.split(":")
+        assert name == "out.pdf"
+        assert int(pid) != os.getpid()
+
+    def test_exception_type_is_preserved(self, pool):
+        with pytest.raises(ValueError, match="Invalid page number"):
+            pool.run(__name__, "_raise_value_error", ("Invalid page number: 9",))
+        assert pool.get_stats()["failures"] == 1
+
+    def test_worker_recycled_after_max_tasks(self, pool):
+        pids = [pool.run(__name__, "_echo_pid", (i,)).split(":")[1] for i in range(4)]
+        assert pids[0] == pids[1]
+        assert pids[2] == pids[3]
+        assert pids[1] != pids[2]
+        assert pool.get_stats()["recycled"] == 2
+
+    def test_timeout_kills_and_replaces_worker(self, pool):
+        with pytest.raises(TimeoutError):
+            pool.run(__name__, "_sleep", (10,), timeout=0.5)
+        assert pool.run(__name__, "_sleep", (0,)) == "done"
+        assert pool.get_stats()["timeouts"] == 1
@@ -0,0 +1,60 @@
+"""Tests for the precompiled prompt feature extractor (app/prompt_features.py)."""
+
+import random
+import re
+
+from app.prompt_features import (
+    _FLAG_SPECS, _FORMAT_SPECS, _VAGUE_PATTERNS, extract_prompt_features, is_vague_command,
+)
+
+
+_WORDS = (
+    "merge combine join split extract keep delete remove compress smaller shrink reduce size make small "
+    "tiny rotate turn flip straighten watermark page pages number numbers add enhance improve clarify "
+    "sharpen clean up fix scan scanned flatten sanitize optimize optimise text only get to as export "
+    "pdf docx word png jpg jpeg img image images txt ocr reorder reverse swap blank duplicate email "
+    "ready for send by print printing searchable secure protect final version copy finalize submission "
+    "college submit assignment archive archiving whatsapp wa govt government quality neat it tidy "
+    "professional look sendable shareable share convert and & orientation rotation extra unwanted "
+    "mobile optimized phone left counter anti 180 270 90 change doc this the all first last please"
+).split()
+
+
+def _naive(prompt_for_match):
+    """The original per-flag inline searches."""
+    compact = prompt_for_match.strip().lower()
+    flags = {name: bool(re.search(pattern, compact)) for name, pattern, _ in _FLAG_SPECS}
+    flags.update({name: bool(re.search(pattern, prompt_for_match, re.IGNORECASE)) for name, pattern in _FORMAT_SPECS})
+    return flags
+
+
+def test_matches_the_inline_searches_on_random_prompts():
+    rng = random.Random(7)
+    joiners = (" ", "", "  ", "-", " ")
+    for _ in range(3000):
+        words = rng.choices(_WORDS, k=rng.randint(1, 6))
+        prompt = "".join(w + rng.choice(joiners) for w in words)
+        if rng.random() < 0.3:
+            prompt = prompt.upper()
+        features = extract_prompt_features(prompt)
+        for name, expected in _naive(prompt).items():
+            assert getattr(features, name) is expected, (prompt, name)
+
+
+def test_operation_count_and_modifiers():
+    features = extract_prompt_features("Rotate left and compress to 2mb, then add page numbers")
+
+    assert features.rotate and features.rotate_left and features.compress and features.page_numbers
+    assert features.num_operations == 3
+    assert not features.merge and not features.vague
+
+
+def test_vague_matches_the_original_pattern_loop():
+    for prompt in ("", "ok", "do it", "go ahead", "whatever", "hmm hmm", "blah blah blah", "compress", "to pdf"):
+        p = prompt.strip().lower()
+        expected = (
+            len(p) < 3
+            or any(re.match(f"^{pattern}$", p) for pattern in _VAGUE_PATTERNS)
+            or (len(p.split()) <= 3 and not any(w in p for w in ("pdf", "compress", "to")))
+        )
+        assert is_vague_command(prompt) is expected, prompt
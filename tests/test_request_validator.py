@@ -0,0 +1,113 @@
+"""Tests for the streaming upload validator (app/request_validator.py)."""
+
+import asyncio
+import json
+
+from app.request_validator import MultipartScanner, StreamingUploadValidator
+
+
+BOUNDARY = "XyZ"
+
+
+def _multipart(parts):
+    body = b""
+    for name, filename, data in parts:
+        disposition = f'form-data; name="{name}"'
+        if filename is not None:
+            disposition += f'; filename="{filename}"'
+        body += f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n\r\n".encode() + data + b"\r\n"
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+
+def _run(validator_kwargs, body, chunk_size=7, query=b"", content_length=True):
+    received = []
+    sent = []
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)] or [b""]
+
+    async def endpoint(scope, receive, send):
+        while True:
+            message = await receive()
+            received.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    async def receive():
+        chunk = chunks.pop(0)
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+
+    async def send(message):
+        sent.append(message)
+
+    headers = [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())]
+    if content_length:
+        headers.append((b"content-length", str(len(body)).encode()))
+    scope = {"type": "http", "method": "POST", "path": "/submit", "headers": headers, "query_string": query}
+    asyncio.run(StreamingUploadValidator(endpoint, **validator_kwargs)(scope, receive, send))
+    status = sent[0]["status"]
+    payload = b"".join(m.get("body", b"") for m in sent[1:])
+    return status, payload, received
+
+
+def test_scanner_reports_parts_across_chunk_boundaries():
+    events = []
+    scanner = MultipartScanner(
+        BOUNDARY.encode(),
+        lambda name, filename: events.append(("part", name, filename)),
+        lambda n, chunk: events.append(("data", n)),
+    )
+    body = _multipart([("prompt", None, b"merge"), ("files", "a.pdf", b"%PDF" * 10)])
+    for i in range(len(body)):
+        scanner.feed(body[i:i + 1])
+
+    assert [e for e in events if e[0] == "part"] == [("part", "prompt", None), ("part", "files", "a.pdf")]
+    assert sum(e[1] for e in events if e[0] == "data") == len(b"merge") + 40
+
+
+def test_valid_upload_streams_through_unbuffered():
+    body = _multipart([("prompt", None, b"merge"), ("files", "a.pdf", b"x" * 100), ("files", "b.png", b"y" * 50)])
+    status, payload, received = _run({"max_file_mb": 1, "max_files": 5}, body)
+
+    assert status == 200 and payload == b"ok"
+    assert b"".join(received) == body
+    assert max(len(c) for c in received) <= 7  # chunks are forwarded as they arrive
+
+
+def test_content_length_over_limit_rejected_before_reading():
+    body = _multipart([("files", "a.pdf", b"x" * 10)])
+    status, payload, received = _run({"max_file_mb": 1, "max_files": 1}, body + b" " * (3 * 1024 * 1024))
+
+    assert status == 413
+    assert received == []
+
+
+def test_disallowed_type_rejected_from_part_headers():
+    body = _multipart([("files", "notes.txt", b"x" * 500)])
+    status, payload, received = _run({"max_file_mb": 1, "max_files": 5}, body)
+
+    assert status == 400
+    assert "notes.txt" in json.loads(payload)["detail"]
+
+
+def test_operation_field_narrows_allowed_types():
+    body = _multipart([("operation", None, b"docx_to_pdf"), ("files", "a.pdf", b"x" * 10)])
+    status, payload, _ = _run({"max_file_mb": 1, "max_files": 5}, body)
+
+    assert status == 400
+
+
+def test_file_over_size_limit_rejected_mid_stream():
+    body = _multipart([("files", "big.pdf", b"x" * (2 * 1024 * 1024))])
+    status, payload, received = _run({"max_file_mb": 1, "max_files": 5}, body, chunk_size=64 * 1024, content_length=False)
+
+    assert status == 413
+    assert "big.pdf" in json.loads(payload)["detail"]
+    assert sum(len(c) for c in received) < len(body)  # stopped before the whole body was read
+
+
+def test_too_many_files_rejected():
+    body = _multipart([("files", f"{i}.pdf", b"x") for i in range(3)])
+    status, _, _ = _run({"max_file_mb": 1, "max_files": 2}, body)
+
+    assert status == 400
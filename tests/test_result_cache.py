@@ -0,0 +1,102 @@
+"""
+Tests for the content-addressed result cache.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.result_cache import ResultCache
+
+
+class _Intent:
+    """Minimal stand-in for ParsedIntent (only model_dump is used)."""
+
+    def __init__(self, operation_type, **op):
+        self.operation_type = operation_type
+        self._op = op
+
+    def model_dump(self, exclude_none=False):
+        return {"operation_type": self.operation_type, self.operation_type: dict(self._op)}
+
+
+def _write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+class TestResultCache:
+    """Keying, atomic publish and LRU eviction"""
+
+    def test_same_bytes_under_another_name_hits(self, tmp_path):
+        cache = ResultCache(cache_dir=str(tmp_path / "cache"), max_mb=10, max_entries=10)
+        a = _write(tmp_path / "a.pdf", b"%PDF-same")
+        b = _write(tmp_path / "b.pdf", b"%PDF-same")
+
+        key_a = cache.make_key(_Intent("compress", file="a.pdf", preset="ebook"), ["a.pdf"], [str(a)])
+        key_b = cache.make_key(_Intent("compress", file="b.pdf", preset="ebook"), ["b.pdf"], [str(b)])
+        key_screen = cache.make_key(_Intent("compress", file="a.pdf", preset="screen"), ["a.pdf"], [str(a)])
+
+        assert key_a == key_b
+        assert key_a != key_screen
+
+    def test_unset_parameters_share_a_key_with_their_defaults(self, tmp_path):
+        models = pytest.importorskip("app.models")
+        cache = ResultCache(cache_dir=str(tmp_path / "cache"))
+        a = _write(tmp_path / "a.pdf", b"%PDF")
+
+        def key(**op):
+            intent = models.ParsedIntent(operation_type="compress", compress=models.CompressIntent(file="a.pdf", **op))
+            return cache.make_key(intent, ["a.pdf"], [str(a)])
+
+        assert key() == key(preset="ebook")
+        assert key() != key(preset="screen")
+
+    def test_unknown_file_is_not_cacheable(self, tmp_path):
+        cache = ResultCache(cache_dir=str(tmp_path / "cache"))
+        a = _write(tmp_path / "a.pdf", b"%PDF")
+        assert cache.make_key(_Intent("compress", file="other.pdf"), ["a.pdf"], [str(a)]) is None
+
+    def test_put_then_get_publishes_output(self, tmp_path):
+        cache = ResultCache(cache_dir=str(tmp_path / "cache"))
+        outputs = tmp_path / "outputs"
+        outputs.mkdir()
+        out = _write(outputs / "compressed_output.pdf", b"result-bytes")
+
+        assert cache.get("k1", outputs_dir=str(outputs)) is None
+        cache.put("k1", str(out), "Compressed", "compress")
+        os.remove(out)
+
+        hit = cache.get("k1", outputs_dir=str(outputs))
+        assert hit == ("compressed_output.pdf", "Compressed", "compress")
+        assert (outputs / "compressed_output.pdf").read_bytes() == b"result-bytes"
+        stats = cache.get_stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+
+    def test_hit_message_names_the_current_inputs(self, tmp_path):
+        cache = ResultCache(cache_dir=str(tmp_path / "cache"))
+        out = _write(tmp_path / "compressed_output.pdf", b"result-bytes")
+        cache.put("k1", str(out), "Compressed X.pdf to under 2 MB {fast}", "compress_to_target", file_names=["X.pdf"])
+
+        hit = cache.get("k1", outputs_dir=str(tmp_path), file_names=["Y.pdf"])
+        assert hit[1] == "Compressed Y.pdf to under 2 MB {fast}"
+        assert cache.get("k1", outputs_dir=str(tmp_path)) is None  # No name for position 0
+
+    def test_lru_eviction_by_entry_count(self, tmp_path):
+        cache = ResultCache(cache_dir=str(tmp_path / "cache"), max_entries=2)
+        src = _write(tmp_path / "out.pdf", b"x")
+        cache.put("k1", str(src), "m", "op")
+        cache.put("k2", str(src), "m", "op")
+        assert cache.get("k1", outputs_dir=str(tmp_path)) is not None  # k1 becomes most recent
+        cache.put("k3", str(src), "m", "op")
+
+        assert cache.get("k2", outputs_dir=str(tmp_path)) is None
+        assert cache.get("k1", outputs_dir=str(tmp_path)) is not None
+        assert cache.get_stats()["evictions"] == 1
+
+        reloaded = ResultCache(cache_dir=str(tmp_path / "cache"), max_entries=2)
+        assert reloaded.get_stats()["entries"] == 2
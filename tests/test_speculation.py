@@ -0,0 +1,142 @@
+"""Tests for preupload speculation (app/speculation.py)."""
+
+import io
+import threading
+
+import pytest
+
+from app import speculation
+from app.doc_probe import DocumentProbe
+from app.speculation import Speculator
+
+
+def _probe(path, digest=None):
+    return DocumentProbe(sha256=digest or "f" * 64, file_type="pdf", size_bytes=10, page_count=2)
+
+
+def _wait(speculator):
+    speculator._executor.submit(lambda: None).result(timeout=5)
+
+
+def test_steps_warm_text_and_precompute(monkeypatch, tmp_path):
+    monkeypatch.setattr(speculation, "get_probe", _probe)
+    notes = tmp_path / "notes.txt"
+    notes.write_text("hello world")
+    precomputed = []
+    speculator = Speculator(
+        thumbnail_dir=str(tmp_path / "thumbs"),
+        precompute=lambda name, path, probe, budget: precomputed.append((name, probe.page_count)) or "compress",
+    )
+
+    speculator.speculate("u1", {"notes.txt": (str(notes), "a" * 64)})
+    _wait(speculator)
+
+    assert precomputed == [("notes.txt", 2)]
+    assert speculator.status("u1")["steps"] == [
+        "probe:notes.txt", "text:notes.txt", "thumbnail:notes.txt", "precompute:notes.txt",
+    ]
+    notes.write_text("changed on disk")  # served from the speculation cache, not re-read
+    assert speculator.analysis_text(str(notes), "a" * 64) == "\nhello world"
+    assert speculator.get_stats()["precomputed"] == 1
+    speculator.shutdown()
+
+
+def test_busy_queue_skips_heavy_steps(monkeypatch, tmp_path):
+    monkeypatch.setattr(speculation, "get_probe", _probe)
+    precomputed = []
+    speculator = Speculator(
+        thumbnail_dir=str(tmp_path / "thumbs"),
+        precompute=lambda *args: precomputed.append(args),
+        is_busy=lambda: True,
+    )
+
+    speculator.speculate("u1", {"a.pdf": (str(tmp_path / "a.pdf"), "b" * 64)})
+    _wait(speculator)
+
+    status = speculator.status("u1")
+    assert precomputed == []
+    assert "precompute:a.pdf (busy)" in status["skipped"]
+    assert "thumbnail:a.pdf (busy)" in status["skipped"]
+    speculator.shutdown()
+
+
+def test_cancel_skips_remaining_steps(monkeypatch, tmp_path):
+    release = threading.Event()
+
+    def slow_probe(path, digest=None):
+        release.wait(5)
+        return _probe(path, digest)
+
+    monkeypatch.setattr(speculation, "get_probe", slow_probe)
+    precomputed = []
+    speculator = Speculator(thumbnail_dir=None, precompute=lambda *args: precomputed.append(args))
+    spec_state = []
+    speculator.speculate("u1", {"a.pdf": (str(tmp_path / "a.pdf"), "c" * 64)})
+    spec_state.append(speculator._active["u1"])
+
+    speculator.cancel("u1")
+    release.set()
+    _wait(speculator)
+
+    assert precomputed == []
+    assert speculator.status("u1") is None
+    assert any(s.endswith("(cancelled)") for s in spec_state[0].skipped)
+    speculator.shutdown()
+
+
+def test_precompute_is_told_the_remaining_budget(monkeypatch, tmp_path):
+    monkeypatch.setattr(speculation, "get_probe", _probe)
+    budgets = []
+    speculator = Speculator(
+        budget_seconds=50.0, thumbnail_dir=None,
+        precompute=lambda name, path, probe, budget: budgets.append(budget),
+    )
+
+    speculator.speculate("u1", {"a.pdf": (str(tmp_path / "a.pdf"), "d" * 64)})
+    _wait(speculator)
+
+    assert len(budgets) == 1 and 0 < budgets[0] <= 50.0
+    speculator.shutdown()
+
+
+def test_preupload_precompute_is_hit_by_process_compress(monkeypatch, tmp_path):
+    pytest.importorskip("fastapi")
+    pypdf = pytest.importorskip("pypdf")
+    from fastapi.testclient import TestClient
+
+    from app import main, result_cache, speculation as spec_module
+
+    monkeypatch.chdir(tmp_path)
+    for name in ("uploads", "outputs"):
+        (tmp_path / name).mkdir()
+    monkeypatch.setattr(result_cache, "_CACHE", result_cache.ResultCache(cache_dir=str(tmp_path / "results")))
+    monkeypatch.setattr(main.settings, "speculation_precompute_min_mb", 0.0)
+    runs = []
+
+    def fake_compress(file_name, output_name="compressed_output.pdf", preset="ebook"):
+        runs.append(preset)  # Ghostscript stand-in: copy the input
+        with open(main.get_upload_path(file_name), "rb") as src, open(main.get_output_path(output_name), "wb") as dst:
+            dst.write(src.read())
+        return output_name
+
+    monkeypatch.setattr(main, "compress_pdf", fake_compress)
+    speculator = spec_module.configure_speculator(thumbnail_dir=None, precompute=main._speculative_precompute)
+
+    writer = pypdf.PdfWriter()
+    writer.add_blank_page(width=200, height=200)
+    buf = io.BytesIO()
+    writer.write(buf)
+    pdf = buf.getvalue()
+
+    client = TestClient(main.app)
+    upload = client.post("/preupload", files={"files": ("big.pdf", pdf, "application/pdf")})
+    assert upload.status_code == 200
+    _wait(speculator)
+    assert runs == ["ebook"] and speculator.get_stats()["precomputed"] == 1
+
+    response = client.post("/process", files={"files": ("big.pdf", pdf, "application/pdf")}, data={"prompt": "compress"})
+    assert response.json()["status"] == "success"
+    assert runs == ["ebook"]  # Served from the precomputed entry
+    assert result_cache.get_result_cache().get_stats()["hits"] == 1
+    spec_module.configure_speculator(thumbnail_dir=None).shutdown()
+    monkeypatch.setattr(spec_module, "_SPECULATOR", None)
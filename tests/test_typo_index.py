@@ -0,0 +1,59 @@
+"""Tests for the symmetric-delete typo index (app/typo_index.py)."""
+
+import random
+import string
+from difflib import SequenceMatcher
+
+from app.typo_index import TypoIndex
+from app.utils import ALL_NORMALIZE_KEYWORDS, fuzzy_match_keyword, fuzzy_match_string
+
+
+def _linear(query, words, threshold):
+    """The SequenceMatcher scan fuzzy_match_* used to do."""
+    best, best_score = None, 0.0
+    for word in words:
+        score = SequenceMatcher(None, query.lower(), word.lower()).ratio()
+        if score > best_score:
+            best, best_score = word, score
+    return best if best and best_score >= threshold else None
+
+
+def _mutate(rng, word):
+    chars = list(word)
+    for _ in range(rng.randint(0, 3)):
+        i = rng.randrange(len(chars) + 1)
+        op = rng.random()
+        if op < 0.33 and chars:
+            chars.pop(min(i, len(chars) - 1))
+        elif op < 0.66:
+            chars.insert(i, rng.choice(string.ascii_lowercase))
+        elif chars:
+            chars[min(i, len(chars) - 1)] = rng.choice(string.ascii_lowercase)
+    return "".join(chars) or "x"
+
+
+def test_keyword_radius_is_small():
+    index = TypoIndex(ALL_NORMALIZE_KEYWORDS, 0.86)
+    assert index.max_distance == 2
+    assert index.match("compres") == "compress"
+    assert index.match("rotat") == "rotate"
+    assert index.match("banana") is None
+
+
+def test_identical_to_linear_scan():
+    rng = random.Random(11)
+    names = ["Annual Report 2023.pdf", "scan_001.pdf", "invoice-march.pdf", "photo.jpg"]
+    for _ in range(1500):
+        word = _mutate(rng, rng.choice(ALL_NORMALIZE_KEYWORDS))
+        expected = _linear(word, ALL_NORMALIZE_KEYWORDS, 0.86) if len(word) >= 4 and word not in ALL_NORMALIZE_KEYWORDS else None
+        assert fuzzy_match_keyword(word, ALL_NORMALIZE_KEYWORDS) == (expected or word)
+
+        name = _mutate(rng, rng.choice(names))
+        assert fuzzy_match_string(name, names) == (
+            next((n for n in names if n.lower() == name.lower()), None) or _linear(name, names, 0.84)
+        )
+
+
+def test_ties_go_to_the_earlier_word():
+    assert TypoIndex(["abcd", "abce"], 0.7).match("abcx") == "abcd"
+    assert TypoIndex(["abce", "abcd"], 0.7).match("abcx") == "abce"
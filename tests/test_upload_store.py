@@ -0,0 +1,70 @@
+"""Tests for the content-addressed upload store (app/upload_store.py)."""
+
+import io
+import os
+
+from app.upload_store import UploadStore
+
+
+def _store(tmp_path):
+    return UploadStore(blob_dir=str(tmp_path / "blobs"), uploads_dir=str(tmp_path / "uploads"))
+
+
+def test_duplicate_upload_is_stored_once(tmp_path):
+    store = _store(tmp_path)
+    a = store.ingest_stream(io.BytesIO(b"%PDF-same"), "preupload:a")
+    b = store.ingest_stream(io.BytesIO(b"%PDF-same"), "preupload:b")
+
+    assert a == b
+    assert store.ref_count(a) == 2
+    stats = store.get_stats()
+    assert stats["stored"] == 1 and stats["deduplicated"] == 1
+    assert os.listdir(os.path.dirname(store.blob_path(a))) == [a]
+
+
+def test_same_name_different_bytes_keeps_both_blobs(tmp_path):
+    store = _store(tmp_path)
+    first = store.ingest_stream(io.BytesIO(b"first"), "job:1")
+    store.publish(first, "scan.pdf")
+    second = store.ingest_stream(io.BytesIO(b"second"), "job:2")
+    store.publish(second, "scan.pdf")
+
+    assert (tmp_path / "uploads" / "scan.pdf").read_bytes() == b"second"
+    assert open(store.blob_path(first), "rb").read() == b"first"  # job 1's input is untouched
+    assert store.ref_count(first) == 1  # the handle moved on; job:1 still holds it
+
+
+def test_blob_evicted_when_last_reference_released(tmp_path):
+    store = _store(tmp_path)
+    digest = store.ingest_stream(io.BytesIO(b"data"), "preupload:x")
+    store.publish(digest, "doc.pdf")
+    store.acquire(digest, "job:1")
+
+    store.release_holder("preupload:x")
+    assert not store.release_handle("doc.pdf", digest="other")  # stale digest leaves the handle alone
+    assert store.release_handle("doc.pdf", digest=digest)
+    assert store.has(digest)
+
+    store.release_holder("job:1")
+    assert not store.has(digest)
+    assert not (tmp_path / "uploads" / "doc.pdf").exists()
+
+
+def test_ingest_file_consumes_source(tmp_path):
+    store = _store(tmp_path)
+    part = tmp_path / "upload.part"
+    part.write_bytes(b"chunked")
+    digest = store.ingest_file(str(part), "preupload:y")
+
+    assert not part.exists()
+    assert open(store.blob_path(digest), "rb").read() == b"chunked"
+
+
+def test_sweep_removes_only_unreferenced_blobs(tmp_path):
+    store = _store(tmp_path)
+    kept = store.ingest_stream(io.BytesIO(b"kept"), "job:1")
+    orphan = store.ingest_stream(io.BytesIO(b"orphan"), "job:2")
+    store._refs.pop(orphan)  # as after a restart
+
+    assert store.sweep_unreferenced(-1) == 1
+    assert store.has(kept) and not store.has(orphan)
@@ -0,0 +1,70 @@
+"""Tests for per-job workspaces (app/workspace.py)."""
+
+import io
+import os
+
+import pytest
+
+from app import workspace
+from app.pdf_operations import get_output_path, get_upload_path
+
+
+@pytest.fixture
+def root(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(workspace, "_root", str(tmp_path / "jobs"))
+    (tmp_path / "jobs").mkdir()
+    return tmp_path / "jobs"
+
+
+def test_jobs_resolve_paths_inside_their_own_workspace(root, tmp_path):
+    (tmp_path / "uploads").mkdir()
+    (tmp_path / "uploads" / "a.pdf").write_bytes(b"%PDF")
+
+    with workspace.job_workspace("aaaaaaaa-111", [str(tmp_path / "uploads" / "a.pdf")]) as ws:
+        assert get_upload_path("a.pdf") == os.path.join(ws, "in", "a.pdf")
+        first = get_output_path("merged_output.pdf")
+    with workspace.job_workspace("bbbbbbbb-222", []):
+        second = get_output_path("merged_output.pdf")
+
+    assert first != second
+    assert get_output_path("merged_output.pdf") == os.path.join("outputs", "merged_output.pdf")
+
+
+def test_public_name_resolves_through_job_id(root):
+    with workspace.job_workspace("cccccccc-333", []):
+        with open(get_output_path("out.pdf"), "wb") as f:
+            f.write(b"x")
+
+    public = workspace.public_output_name("cccccccc-333", "out.pdf")
+    assert workspace.split_public_name(public) == ("cccccccc-333", "out.pdf")
+    assert os.path.exists(workspace.resolve_public_name(public))
+    assert workspace.resolve_public_name("out.pdf") is None
+
+
+def test_remove_and_sweep(root):
+    workspace.create_workspace("dddddddd-444", [])
+    workspace.create_workspace("eeeeeeee-555", [])
+
+    workspace.remove_workspace("dddddddd-444")
+    assert not (root / "dddddddd-444").exists()
+
+    assert workspace.sweep_stale_workspaces(-1, lambda jid: jid == "eeeeeeee-555") == 0
+    assert workspace.sweep_stale_workspaces(-1, lambda jid: False) == 1
+    assert os.listdir(root) == []
+
+
+def test_concurrent_requests_with_the_same_name_read_their_own_bytes(root, tmp_path):
+    from app.upload_store import UploadStore
+
+    store = UploadStore(blob_dir=str(tmp_path / "blobs"), uploads_dir=str(tmp_path / "uploads"))
+    first = store.ingest_stream(io.BytesIO(b"first scan"), "request:a")
+    store.publish(first, "scan.pdf")
+    second = store.ingest_stream(io.BytesIO(b"second scan"), "request:b")
+    store.publish(second, "scan.pdf")  # uploads/scan.pdf now belongs to request b
+
+    with workspace.job_workspace("aaaaaaaaaaaa", [], named_inputs={"scan.pdf": store.blob_path(first)}):
+        assert open(get_upload_path("scan.pdf"), "rb").read() == b"first scan"
+
+    assert not store.release_handle("scan.pdf", first)  # a's cleanup leaves b's handle alone
+    assert (tmp_path / "uploads" / "scan.pdf").read_bytes() == b"second scan"